@@ -1,13 +1,15 @@
 """Dependencies for API endpoints"""
 
-from typing import Generator
+from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthCredentials
 
 from app.infrastructure.database.database import get_db
 from app.core.security import decode_token
+from app.infrastructure.services.token_revocation import get_token_revocation_store
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 def get_current_user(credentials: HTTPAuthCredentials = Depends(security)):
@@ -21,6 +23,12 @@ def get_current_user(credentials: HTTPAuthCredentials = Depends(security)):
             detail="Invalid token"
         )
     
+    if get_token_revocation_store().is_payload_revoked(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked"
+        )
+    
     user_id = payload.get("sub")
     if user_id is None:
         raise HTTPException(
@@ -31,6 +39,15 @@ def get_current_user(credentials: HTTPAuthCredentials = Depends(security)):
     return {"user_id": int(user_id), "role": payload.get("role")}
 
 
+def get_optional_user(
+    credentials: Optional[HTTPAuthCredentials] = Depends(optional_security)
+) -> Optional[dict]:
+    """Current user when a token is sent, None for anonymous requests"""
+    if credentials is None:
+        return None
+    return get_current_user(credentials)
+
+
 def get_current_admin(current_user: dict = Depends(get_current_user)):
     """Get current admin user"""
     if current_user.get("role") != "admin":
@@ -4,10 +4,11 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from sqlalchemy.orm import Session
 
 from app.infrastructure.database.database import get_db
-from app.application.auth.login import LoginUseCase, RefreshTokenUseCase
+from app.application.auth.login import LoginUseCase, RefreshTokenUseCase, LogoutUseCase
 from app.schemas.auth_schemas import TokenRequest, TokenResponse, RefreshTokenRequest
+from app.api.v1.routing import SessionReleasingRoute
 
-router = APIRouter(prefix="/auth", tags=["Authentication"])
+router = APIRouter(prefix="/auth", tags=["Authentication"], route_class=SessionReleasingRoute)
 
 
 @router.post("/login", response_model=TokenResponse, status_code=status.HTTP_200_OK)
@@ -32,12 +33,13 @@ async def login(
 
 
 @router.post("/refresh", response_model=TokenResponse, status_code=status.HTTP_200_OK)
-async def refresh_token(
-    request: RefreshTokenRequest,
-    db: Session = Depends(get_db)
-):
+def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
     """
-    Refresh access token using refresh token
+    Rotate a refresh token
+    
+    Returns a new access and refresh token with the user's current role; the
+    presented refresh token can't be used again, and presenting it twice
+    revokes the whole session. Inactive accounts can't refresh.
     """
     try:
         use_case = RefreshTokenUseCase(db)
@@ -47,3 +49,18 @@ async def refresh_token(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e)
         )
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(request: RefreshTokenRequest):
+    """
+    Revoke the session of a refresh token, including its access tokens
+    """
+    try:
+        use_case = LogoutUseCase()
+        use_case.execute(request.refresh_token)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e)
+        )
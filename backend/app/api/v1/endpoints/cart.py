@@ -0,0 +1,169 @@
+"""Cart endpoints"""
+
+import re
+from typing import Callable, Optional
+from uuid import uuid4
+
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query, Response
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.infrastructure.database.database import get_db
+from app.application.orders.checkout_cart import CheckoutCartUseCase
+from app.application.orders.manage_cart import (
+    AddCartItemUseCase, ClearCartUseCase, GetCartUseCase, SetCartItemUseCase
+)
+from app.application.orders.quote_cart import PriceBook, QuoteCartUseCase
+from app.infrastructure.services.cart_store import (
+    CartLimitError, get_cart_store, guest_cart_key, user_cart_key
+)
+from app.schemas.auth_schemas import CART_TOKEN_PATTERN
+from app.schemas.cart_schemas import (
+    CartCheckoutResponse, CartItem, CartItemUpdate, CartQuoteRequest, CartQuoteResponse,
+    CartResponse
+)
+from app.api.v1.dependencies import get_optional_user
+from app.api.v1.routing import SessionReleasingRoute
+from app.utils.exceptions import (
+    InsufficientStockError, InvalidCouponError, ResourceNotFoundError
+)
+
+router = APIRouter(prefix="/cart", tags=["Cart"], route_class=SessionReleasingRoute)
+
+CART_TOKEN_HEADER = "X-Cart-Token"
+
+
+def get_cart_key(
+    response: Response,
+    current_user: Optional[dict] = Depends(get_optional_user),
+    x_cart_token: Optional[str] = Header(None)
+) -> str:
+    """Cart of the signed-in user, else the guest cart of X-Cart-Token (issued if missing)"""
+    if current_user is not None:
+        return user_cart_key(current_user["user_id"])
+    if x_cart_token is None or not re.match(CART_TOKEN_PATTERN, x_cart_token):
+        x_cart_token = uuid4().hex
+    response.headers[CART_TOKEN_HEADER] = x_cart_token
+    return guest_cart_key(x_cart_token)
+
+
+async def _run_cart(cart_key: str, method: Callable, *args):
+    """Run a cart use case, in the threadpool when it may wait on I/O"""
+    if get_cart_store().would_block(cart_key):
+        return await run_in_threadpool(method, *args)
+    return method(*args)
+
+
+def get_price_book(db: Session = Depends(get_db)) -> PriceBook:
+    """Dependency giving each request its own price book"""
+    return PriceBook(db)
+
+
+@router.post("/quote", response_model=CartQuoteResponse)
+async def quote_cart(
+    request: CartQuoteRequest,
+    db: Session = Depends(get_db),
+    price_book: PriceBook = Depends(get_price_book)
+):
+    """Price a cart with an optional coupon (exact to the cent)"""
+    try:
+        use_case = QuoteCartUseCase(db, price_book)
+        return use_case.execute(request.items, request.coupon_code)
+    except ResourceNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except InsufficientStockError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except InvalidCouponError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/", response_model=CartResponse)
+async def get_cart(cart_key: str = Depends(get_cart_key)):
+    """Get the current cart"""
+    return await _run_cart(cart_key, GetCartUseCase().execute, cart_key)
+
+
+@router.post("/items", response_model=CartResponse)
+async def add_cart_item(item: CartItem, cart_key: str = Depends(get_cart_key)):
+    """Add units of a product to the cart"""
+    try:
+        return await _run_cart(cart_key, AddCartItemUseCase().execute, cart_key, item)
+    except CartLimitError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.put("/items/{product_id}", response_model=CartResponse)
+async def set_cart_item(
+    product_id: int,
+    update: CartItemUpdate,
+    cart_key: str = Depends(get_cart_key)
+):
+    """Set the quantity of a cart line (0 removes it)"""
+    try:
+        return await _run_cart(
+            cart_key, SetCartItemUseCase().execute, cart_key, product_id, update.quantity
+        )
+    except CartLimitError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.delete("/items/{product_id}", response_model=CartResponse)
+async def remove_cart_item(product_id: int, cart_key: str = Depends(get_cart_key)):
+    """Remove a cart line"""
+    return await _run_cart(cart_key, SetCartItemUseCase().execute, cart_key, product_id, 0)
+
+
+@router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_cart(cart_key: str = Depends(get_cart_key)):
+    """Empty the cart"""
+    await _run_cart(cart_key, ClearCartUseCase().execute, cart_key)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/checkout", response_model=CartCheckoutResponse)
+async def checkout_cart(
+    coupon_code: Optional[str] = Query(None, max_length=50),
+    cart_key: str = Depends(get_cart_key),
+    db: Session = Depends(get_db),
+    price_book: PriceBook = Depends(get_price_book)
+):
+    """Validate and price the stored cart (what an order will be placed from)"""
+    try:
+        use_case = CheckoutCartUseCase(db, price_book=price_book)
+        # Pricing reads the database
+        return await run_in_threadpool(use_case.execute, cart_key, coupon_code)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except ResourceNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except InsufficientStockError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except InvalidCouponError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
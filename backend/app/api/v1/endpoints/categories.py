@@ -0,0 +1,76 @@
+"""Category endpoints"""
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Response
+from sqlalchemy.orm import Session
+
+from app.infrastructure.database.database import get_db
+from app.application.categories.catalog import (
+    ListCategoriesUseCase, GetCategoryTreeUseCase, CreateCategoryUseCase
+)
+from app.schemas.category_schemas import (
+    CategoryCreate, CategoryResponse, CategoryListResponse, CategoryTreeResponse
+)
+from app.api.v1.dependencies import get_current_admin
+from app.api.v1.routing import SessionReleasingRoute
+from app.utils.exceptions import DuplicateResourceError, ResourceNotFoundError
+
+router = APIRouter(prefix="/categories", tags=["Categories"], route_class=SessionReleasingRoute)
+
+
+def _etag(version: int) -> str:
+    """Entity tag of a catalog version"""
+    return f'W/"categories-{version}"'
+
+
+def _not_modified(response, if_none_match: Optional[str], version: int):
+    """304 when the client already has this catalog version, else the response with its ETag"""
+    etag = _etag(version)
+    if if_none_match == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return response
+
+
+@router.get("/", response_model=CategoryListResponse)
+async def list_categories(
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
+):
+    """List categories with active product counts (served from memory)"""
+    result = ListCategoriesUseCase().execute()
+    response.headers["ETag"] = _etag(result.version)
+    return _not_modified(result, if_none_match, result.version)
+
+
+@router.get("/tree", response_model=CategoryTreeResponse)
+async def get_category_tree(
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
+):
+    """Category tree with direct and subtree product counts (served from memory)"""
+    result = GetCategoryTreeUseCase().execute()
+    response.headers["ETag"] = _etag(result.version)
+    return _not_modified(result, if_none_match, result.version)
+
+
+@router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
+async def create_category(
+    category: CategoryCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_admin)
+):
+    """Create a category (admin only)"""
+    try:
+        use_case = CreateCategoryUseCase(db)
+        return use_case.execute(category)
+    except DuplicateResourceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except ResourceNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
@@ -0,0 +1,39 @@
+"""Admin export endpoints"""
+
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.application.exports.stream_export import FORMATS, open_export
+from app.api.v1.dependencies import get_current_admin
+from app.api.v1.routing import SessionReleasingRoute
+
+router = APIRouter(prefix="/admin/exports", tags=["Admin"], route_class=SessionReleasingRoute)
+
+
+@router.get("/{entity}")
+def export_entity(
+    entity: str,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    gzip: bool = False,
+    current_user: dict = Depends(get_current_admin)
+):
+    """
+    Stream a full export of orders, users or products
+    
+    - **format**: `csv` or `ndjson`
+    - **gzip**: compress the stream (served as a `.gz` file)
+    """
+    try:
+        chunks = open_export(entity, export_format, gzip)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    
+    filename = f"{entity}.{export_format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if gzip else FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,96 @@
+"""Product image endpoints"""
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, status, Depends, File, Header, Response, UploadFile
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.infrastructure.database.database import get_db
+from app.application.images.upload_image import (
+    UploadProductImageUseCase, ListProductImagesUseCase
+)
+from app.infrastructure.services.image_processing import CONTENT_TYPES
+from app.infrastructure.services.image_storage import (
+    get_image_storage, image_key, is_valid_key
+)
+from app.schemas.image_schemas import ProductImageResponse
+from app.api.v1.dependencies import get_current_vendor
+from app.api.v1.routing import SessionReleasingRoute
+from app.utils.exceptions import InvalidImageError, ResourceNotFoundError
+
+router = APIRouter(tags=["Images"], route_class=SessionReleasingRoute)
+
+# Keys name immutable content, so variants can be cached for good
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+@router.post(
+    "/products/{product_id}/images",
+    response_model=ProductImageResponse,
+    status_code=status.HTTP_201_CREATED
+)
+async def upload_product_image(
+    product_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_vendor)
+):
+    """Add an image to a product's gallery (vendor/admin only)"""
+    # Read one byte past the limit to detect oversized uploads without buffering them whole
+    data = await file.read(settings.IMAGE_MAX_UPLOAD_BYTES + 1)
+    if len(data) > settings.IMAGE_MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Image larger than {settings.IMAGE_MAX_UPLOAD_BYTES} bytes"
+        )
+    try:
+        use_case = UploadProductImageUseCase(db)
+        return await use_case.execute(product_id, data)
+    except InvalidImageError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except ResourceNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@router.get("/products/{product_id}/images", response_model=list[ProductImageResponse])
+async def list_product_images(
+    product_id: int,
+    db: Session = Depends(get_db)
+):
+    """List a product's images in display order"""
+    use_case = ListProductImagesUseCase(db)
+    return use_case.execute(product_id)
+
+
+@router.get("/images/{content_hash}/{variant}")
+async def get_image(
+    content_hash: str,
+    variant: str,
+    if_none_match: Optional[str] = Header(None)
+):
+    """Serve one stored image variant (immutable, cacheable forever)"""
+    key = image_key(content_hash, variant)
+    if not is_valid_key(key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    headers = {"Cache-Control": IMMUTABLE_CACHE, "ETag": f'"{content_hash}-{variant}"'}
+    if if_none_match == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    storage = get_image_storage()
+    media_type = CONTENT_TYPES[variant.rsplit(".", 1)[1]]
+    path = await run_in_threadpool(storage.local_path, key)
+    if path is not None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+    data = await run_in_threadpool(storage.get, key) if storage.blocking else storage.get(key)
+    if data is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    return Response(content=data, media_type=media_type, headers=headers)
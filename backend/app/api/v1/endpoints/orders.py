@@ -0,0 +1,36 @@
+"""Order endpoints"""
+
+from fastapi import APIRouter, HTTPException, status, Depends
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.infrastructure.database.database import get_db
+from app.application.orders.order_status import TransitionOrdersUseCase
+from app.schemas.order_schemas import (
+    OrderStatusTransitionRequest, OrderStatusTransitionResponse
+)
+from app.api.v1.dependencies import get_current_admin
+from app.api.v1.routing import SessionReleasingRoute
+from app.utils.exceptions import InvalidOrderTransitionError
+
+router = APIRouter(prefix="/orders", tags=["Orders"], route_class=SessionReleasingRoute)
+
+
+@router.post("/status-transitions", response_model=OrderStatusTransitionResponse)
+async def transition_orders(
+    request: OrderStatusTransitionRequest,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_admin)
+):
+    """Move orders to a new status, reporting the ones that cannot move (admin only)"""
+    try:
+        use_case = TransitionOrdersUseCase(db)
+        return await run_in_threadpool(
+            use_case.execute, request.order_ids, request.to_status, request.from_status,
+            current_user["user_id"]
+        )
+    except InvalidOrderTransitionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
@@ -0,0 +1,40 @@
+"""Payment endpoints"""
+
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Request
+from sqlalchemy.orm import Session
+
+from app.infrastructure.database.database import get_db
+from app.application.payments.process_webhook import (
+    ReceivePaymentWebhookUseCase, get_payment_event_worker
+)
+from app.utils.exceptions import InvalidWebhookSignatureError
+from app.api.v1.routing import SessionReleasingRoute
+
+router = APIRouter(prefix="/payments", tags=["Payments"], route_class=SessionReleasingRoute)
+
+
+@router.post("/webhook", status_code=status.HTTP_200_OK)
+async def payment_webhook(
+    request: Request,
+    stripe_signature: str = Header(..., alias="Stripe-Signature"),
+    db: Session = Depends(get_db)
+):
+    """
+    Stripe webhook (no authentication, verified by signature)
+    
+    The raw event is stored and acknowledged immediately; payment and order
+    updates are applied asynchronously by the payment event worker.
+    """
+    payload = await request.body()
+    try:
+        use_case = ReceivePaymentWebhookUseCase(db)
+        is_new = use_case.execute(payload, stripe_signature)
+    except InvalidWebhookSignatureError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    if is_new:
+        get_payment_event_worker().notify()
+    return {"status": "success", "duplicate": not is_new}
@@ -1,17 +1,55 @@
 """Product endpoints"""
 
+from decimal import Decimal
+from typing import Optional
+
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.infrastructure.database.database import get_db
 from app.application.products.create_product import (
-    CreateProductUseCase, GetProductUseCase, UpdateProductUseCase,
+    CreateProductUseCase, GetProductDetailUseCase, UpdateProductUseCase,
     ListProductsUseCase, SearchProductsUseCase
 )
-from app.schemas.product_schemas import ProductCreate, ProductUpdate, ProductResponse
-from app.api.v1.dependencies import get_current_vendor
+from app.application.products.recommendations import GetRelatedProductsUseCase
+from app.application.products.autocomplete import AutocompleteProductsUseCase
+from app.application.products.get_products import (
+    GetProductBatchedUseCase, GetProductsUseCase, get_request_product_loader
+)
+from app.infrastructure.services.batch_loader import RequestLoader
+from app.schemas.product_schemas import (
+    ProductCreate, ProductUpdate, ProductResponse, ProductDetailedResponse,
+    RelatedProductResponse, AutocompleteResponse, ProductFilters, ProductStatus,
+    FacetedProductsResponse, ProductBatchRequest, ProductBatchResponse
+)
+from app.api.v1.dependencies import get_current_vendor, get_optional_user
+from app.api.v1.routing import SessionReleasingRoute
+from app.utils.exceptions import DuplicateResourceError, ResourceNotFoundError
 
-router = APIRouter(prefix="/products", tags=["Products"])
+router = APIRouter(prefix="/products", tags=["Products"], route_class=SessionReleasingRoute)
+
+
+def get_product_filters(
+    category_id: Optional[list[int]] = Query(None),
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    in_stock: Optional[bool] = None,
+    product_status: ProductStatus = Query(ProductStatus.ACTIVE, alias="status"),
+    current_user: Optional[dict] = Depends(get_optional_user)
+) -> ProductFilters:
+    """Faceted browsing filters from the query string (other statuses than active: admins only)"""
+    if product_status != ProductStatus.ACTIVE and (
+        current_user is None or current_user.get("role") != "admin"
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can list products that are not active"
+        )
+    return ProductFilters(
+        category_ids=category_id, min_price=min_price, max_price=max_price,
+        in_stock=in_stock, status=product_status
+    )
 
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
@@ -24,6 +62,49 @@ async def create_product(
     try:
         use_case = CreateProductUseCase(db)
         return use_case.execute(product)
+    except DuplicateResourceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except (ResourceNotFoundError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/autocomplete", response_model=AutocompleteResponse)
+async def autocomplete_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=20)
+):
+    """Autocomplete suggestions for the search box (served from memory)"""
+    use_case = AutocompleteProductsUseCase()
+    return use_case.execute(q, limit)
+
+
+@router.get("/faceted", response_model=FacetedProductsResponse)
+async def list_products_faceted(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    filters: ProductFilters = Depends(get_product_filters),
+    db: Session = Depends(get_db)
+):
+    """List products matching the filters, with facet counts"""
+    use_case = ListProductsUseCase(db)
+    return use_case.execute_faceted(filters, skip, limit)
+
+
+@router.post("/batch", response_model=ProductBatchResponse)
+async def get_products_batch(
+    batch: ProductBatchRequest,
+    loader: RequestLoader = Depends(get_request_product_loader)
+):
+    """Get several products by ID in one request (one query)"""
+    try:
+        use_case = GetProductsUseCase(loader)
+        return await use_case.execute(batch.ids)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -33,12 +114,28 @@ async def create_product(
 
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(
+    product_id: int,
+    loader: RequestLoader = Depends(get_request_product_loader)
+):
+    """Get product by ID (concurrent lookups are batched into one query)"""
+    try:
+        use_case = GetProductBatchedUseCase(loader)
+        return await use_case.execute(product_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@router.get("/{product_id}/detail", response_model=ProductDetailedResponse)
+async def get_product_detail(
     product_id: int,
     db: Session = Depends(get_db)
 ):
-    """Get product by ID"""
+    """Get product by ID with its rating summary"""
     try:
-        use_case = GetProductUseCase(db)
+        use_case = GetProductDetailUseCase(db)
         return use_case.execute(product_id)
     except ValueError as e:
         raise HTTPException(
@@ -47,6 +144,17 @@ async def get_product(
         )
 
 
+@router.get("/{product_id}/related", response_model=list[RelatedProductResponse])
+async def get_related_products(
+    product_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Get products frequently bought together with this one"""
+    use_case = GetRelatedProductsUseCase(db)
+    return use_case.execute(product_id, limit)
+
+
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(
     product_id: int,
@@ -58,7 +166,12 @@ async def update_product(
     try:
         use_case = UpdateProductUseCase(db)
         return use_case.execute(product_id, product_update)
-    except ValueError as e:
+    except DuplicateResourceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except (ResourceNotFoundError, ValueError) as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
@@ -69,11 +182,12 @@ async def update_product(
 async def list_products(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    filters: ProductFilters = Depends(get_product_filters),
     db: Session = Depends(get_db)
 ):
-    """List all active products"""
+    """List products (active by default), optionally filtered"""
     use_case = ListProductsUseCase(db)
-    return use_case.execute(skip, limit)
+    return use_case.execute(skip, limit, filters)
 
 
 @router.get("/search/results", response_model=list[ProductResponse])
@@ -85,4 +199,5 @@ async def search_products(
 ):
     """Search products"""
     use_case = SearchProductsUseCase(db)
-    return use_case.execute(q, skip, limit)
+    # In the threadpool: identical concurrent searches wait for the first one
+    return await run_in_threadpool(use_case.execute, q, skip, limit)
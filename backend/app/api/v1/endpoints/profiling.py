@@ -0,0 +1,55 @@
+"""Admin profiling endpoints"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from app.api.v1.dependencies import get_current_admin
+from app.api.v1.routing import SessionReleasingRoute
+from app.infrastructure.services.profiler import get_profiler
+from app.schemas.profiling_schemas import ProfilingSettings, ProfilingStatus, HotStacksResponse
+
+router = APIRouter(prefix="/admin/profiling", tags=["Admin"], route_class=SessionReleasingRoute)
+
+
+def _status() -> ProfilingStatus:
+    profiler = get_profiler()
+    return ProfilingStatus(
+        enabled=profiler.enabled,
+        sample_rate=profiler.sample_rate,
+        path_prefix=profiler.path_prefix,
+        directory=str(profiler.directory),
+        interval_seconds=profiler.sampler.interval,
+    )
+
+
+@router.get("/", response_model=ProfilingStatus)
+async def get_profiling_status(current_user: dict = Depends(get_current_admin)):
+    """Get the profiler state of this worker"""
+    return _status()
+
+
+@router.put("/", response_model=ProfilingStatus)
+async def update_profiling(
+    profiling: ProfilingSettings,
+    current_user: dict = Depends(get_current_admin)
+):
+    """
+    Profile a fraction of requests on this worker
+    
+    - **sample_rate**: fraction of requests to profile, 0 turns sampling off
+    - **path_prefix**: only profile paths starting with this prefix
+    """
+    get_profiler().configure(profiling.sample_rate, profiling.path_prefix)
+    return _status()
+
+
+@router.get("/hot-stacks", response_model=HotStacksResponse)
+async def get_hot_stacks(
+    minutes: int = Query(10, ge=1, le=1440),
+    limit: int = Query(20, ge=1, le=500),
+    route: Optional[str] = None,
+    current_user: dict = Depends(get_current_admin)
+):
+    """Get the most sampled stacks of profiled requests over the last minutes"""
+    return get_profiler().hot_stacks(minutes, limit, route)
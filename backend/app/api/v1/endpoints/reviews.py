@@ -0,0 +1,75 @@
+"""Review endpoints"""
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from sqlalchemy.orm import Session
+
+from app.infrastructure.database.database import get_db
+from app.application.reviews.manage_reviews import (
+    CreateReviewUseCase, DeleteReviewUseCase, ListReviewsUseCase
+)
+from app.schemas.review_schemas import ReviewCreate, ReviewResponse, ReviewPage
+from app.api.v1.dependencies import get_current_user
+from app.api.v1.routing import SessionReleasingRoute
+from app.utils.exceptions import DuplicateResourceError, ResourceNotFoundError
+
+router = APIRouter(tags=["Reviews"], route_class=SessionReleasingRoute)
+
+
+@router.get("/products/{product_id}/reviews", response_model=ReviewPage)
+async def list_reviews(
+    product_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db)
+):
+    """List a product's reviews, newest first (pass next_cursor to get the next page)"""
+    use_case = ListReviewsUseCase(db)
+    return use_case.execute(product_id, limit, cursor)
+
+
+@router.post(
+    "/products/{product_id}/reviews",
+    response_model=ReviewResponse,
+    status_code=status.HTTP_201_CREATED
+)
+async def create_review(
+    product_id: int,
+    review: ReviewCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Review a product (one review per user and product)"""
+    try:
+        use_case = CreateReviewUseCase(db)
+        return use_case.execute(product_id, current_user["user_id"], review)
+    except DuplicateResourceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except ResourceNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@router.delete("/reviews/{review_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_review(
+    review_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Delete a review (your own; admins can delete any)"""
+    owner_id = None if current_user.get("role") == "admin" else current_user["user_id"]
+    try:
+        use_case = DeleteReviewUseCase(db)
+        use_case.execute(review_id, owner_id)
+    except ResourceNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -10,8 +10,11 @@ from app.application.users.create_user import (
 )
 from app.schemas.user_schemas import UserCreate, UserUpdate, UserResponse
 from app.api.v1.dependencies import get_current_user, get_current_admin
+from app.api.v1.routing import SessionReleasingRoute
+from app.infrastructure.services.email_service import get_email_batcher
+from app.utils.exceptions import DuplicateResourceError
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=SessionReleasingRoute)
 
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -22,12 +25,23 @@ async def create_user(
     """Create a new user"""
     try:
         use_case = CreateUserUseCase(db)
-        return use_case.execute(user)
+        created_user = use_case.execute(user)
+    except DuplicateResourceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    
+    # Welcome emails are delivered in batches by a background thread
+    email_batcher = get_email_batcher()
+    if email_batcher:
+        email_batcher.enqueue_welcome(created_user)
+    return created_user
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -58,6 +72,11 @@ async def update_user(
     try:
         use_case = UpdateUserUseCase(db)
         return use_case.execute(user_id, user_update)
+    except DuplicateResourceError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
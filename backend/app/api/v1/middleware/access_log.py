@@ -0,0 +1,99 @@
+"""Structured access logging middleware"""
+
+import logging
+import time
+import uuid
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.logging import (
+    ACCESS_LOGGER, LogPipeline, RequestContext, bind_request_context, reset_request_context
+)
+
+REQUEST_ID_HEADER = b"x-request-id"
+MAX_REQUEST_ID_LENGTH = 64
+
+logger = logging.getLogger(ACCESS_LOGGER)
+
+
+def _request_id(scope: Scope) -> str:
+    """Caller's X-Request-ID when sane, otherwise a new id"""
+    for name, value in scope["headers"]:
+        if name == REQUEST_ID_HEADER:
+            if 0 < len(value) <= MAX_REQUEST_ID_LENGTH and value.isascii():
+                return value.decode()
+            break
+    return uuid.uuid4().hex
+
+
+class AccessLogMiddleware:
+    """
+    Logs one structured record per request
+    
+    - Binds a request context (request id, route, database time) for the request
+    - Echoes the request id in an X-Request-ID response header
+    - Records method, route template, status, latency, database time and statements
+    - Successful requests are sampled by the pipeline, errors and slow requests always logged
+    """
+    
+    def __init__(self, app: ASGIApp, pipeline: LogPipeline):
+        self.app = app
+        self.pipeline = pipeline
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        context = RequestContext(request_id=_request_id(scope), route=scope["path"])
+        token = bind_request_context(context)
+        status = 500
+        
+        async def send_with_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER, context.request_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        error = None
+        try:
+            await self.app(scope, receive, send_with_id)
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            reset_request_context(token)
+            self._log(scope, context, status, time.perf_counter() - start, error)
+    
+    def _log(self, scope: Scope, context: RequestContext, status: int, elapsed: float, error):
+        """Emit the access record unless sampled out"""
+        latency_ms = elapsed * 1000
+        if status < 400 and error is None and not self.pipeline.should_log_success(latency_ms):
+            return
+        level = logging.ERROR if status >= 500 or error else (
+            logging.WARNING if status >= 400 else logging.INFO
+        )
+        route = getattr(scope.get("route"), "path", None) or context.route
+        logger.log(
+            level,
+            "%s %s %s",
+            scope["method"], route, status,
+            exc_info=error,
+            extra={
+                "request_id": context.request_id,
+                "route": route,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "latency_ms": round(latency_ms, 2),
+                "db_ms": round(context.db_seconds * 1000, 2),
+                "db_statements": context.db_statements,
+                "db_cache_misses": context.db_cache_misses,
+                "db_wait_ms": round(context.db_wait_seconds * 1000, 2),
+                "db_hold_ms": round(context.db_hold_seconds * 1000, 2),
+            },
+        )
@@ -0,0 +1,214 @@
+"""Idempotency-Key middleware for mutating endpoints"""
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.infrastructure.services.idempotency_store import (
+    IdempotencyStore, IdempotencyRecord, COMPLETED
+)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyMiddleware:
+    """
+    Replays the stored response for repeated requests with the same
+    Idempotency-Key instead of executing the endpoint again
+    
+    - Keys are scoped per Authorization header, so clients cannot collide
+    - A request fingerprint (method, path, query, body) must match the original
+    - Concurrent duplicates wait for the first in-flight execution
+    - An in-flight claim only lasts `lease` seconds, so a key whose worker
+      died mid-request is free again soon; completed responses are kept `ttl`
+    - 5xx responses are not stored, so the request can be retried
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: IdempotencyStore,
+        ttl: int = 86400,
+        lease: int = 60,
+        wait_timeout: float = 30.0,
+        poll_interval: float = 0.05,
+        methods: tuple[str, ...] = ("POST", "PUT", "PATCH", "DELETE"),
+    ):
+        self.app = app
+        self.store = store
+        self.ttl = ttl
+        self.lease = lease
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.methods = methods
+        self._inflight: dict[str, asyncio.Event] = {}
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in self.methods:
+            await self.app(scope, receive, send)
+            return
+        
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            await self._send_error(send, 400, "Idempotency-Key is too long")
+            return
+        
+        body = await self._read_body(receive)
+        key = self._hash(headers.get("authorization", ""), idempotency_key)
+        fingerprint = self._hash(
+            scope["method"], scope["path"], scope.get("query_string", b"").decode(), body.hex()
+        )
+        
+        record = await self._acquire(key, fingerprint)
+        if record is not None:
+            if record.fingerprint != fingerprint:
+                await self._send_error(
+                    send, 422, "Idempotency-Key was already used with a different request"
+                )
+            elif record.status != COMPLETED:
+                await self._send_error(
+                    send, 409, "A request with this Idempotency-Key is still in progress"
+                )
+            else:
+                await self._replay(send, record)
+            return
+        
+        await self._execute(scope, body, receive, send, key, fingerprint)
+    
+    @staticmethod
+    def _hash(*parts: str) -> str:
+        """Hash request parts into a fixed-size key"""
+        return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+    
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        """Read the whole request body"""
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        return b"".join(chunks)
+    
+    async def _call_store(self, method, *args):
+        """Call the store, off the event loop if it blocks"""
+        if self.store.blocking:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+    
+    async def _acquire(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        """Claim the key, or wait for the in-flight execution to finish"""
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            record = await self._call_store(self.store.claim, key, fingerprint, self.lease)
+            if record is None:
+                self._inflight[key] = asyncio.Event()
+                return None
+            if record.status == COMPLETED or record.fingerprint != fingerprint:
+                return record
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return record
+            event = self._inflight.get(key)
+            if event is not None:
+                # Same process: wake up as soon as the first execution finishes
+                try:
+                    await asyncio.wait_for(event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                # Another worker holds the key: poll the shared store
+                await asyncio.sleep(min(self.poll_interval, remaining))
+    
+    async def _execute(
+        self,
+        scope: Scope,
+        body: bytes,
+        receive: Receive,
+        send: Send,
+        key: str,
+        fingerprint: str,
+    ) -> None:
+        """Run the endpoint once and store its response"""
+        record = IdempotencyRecord(fingerprint=fingerprint)
+        chunks = []
+        body_sent = False
+        finished = False
+        
+        async def receive_body() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                # Later calls wait for the client, as they would without buffering
+                # (streaming responses listen for http.disconnect)
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        
+        async def capture_send(message: Message) -> None:
+            nonlocal finished
+            if message["type"] == "http.response.start":
+                record.status_code = message["status"]
+                record.headers = [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                finished = not message.get("more_body", False)
+            await send(message)
+        
+        stored = False
+        try:
+            await self.app(scope, receive_body, capture_send)
+            # A response cut off by a disconnect is not stored for replay
+            if finished and record.status_code is not None and record.status_code < 500:
+                record.body = b"".join(chunks)
+                await self._call_store(self.store.complete, key, record, self.ttl)
+                stored = True
+        finally:
+            if not stored:
+                await self._call_store(self.store.release, key)
+            event = self._inflight.pop(key, None)
+            if event is not None:
+                event.set()
+    
+    @staticmethod
+    async def _replay(send: Send, record: IdempotencyRecord) -> None:
+        """Send a stored response"""
+        headers = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in record.headers
+        ]
+        headers.append((REPLAYED_HEADER, b"true"))
+        await send({
+            "type": "http.response.start", "status": record.status_code, "headers": headers
+        })
+        await send({"type": "http.response.body", "body": record.body})
+    
+    @staticmethod
+    async def _send_error(send: Send, status_code: int, detail: str) -> None:
+        """Send a JSON error response"""
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,61 @@
+"""Per-request profiling middleware"""
+
+import asyncio
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.infrastructure.services.profiler import Profiler
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+
+class ProfilingMiddleware:
+    """
+    Samples the stacks of selected requests with the process profiler
+    
+    - A valid signed X-Profile header always profiles the request
+    - Otherwise the admin toggle profiles a random fraction of requests
+    - Profiled responses carry an X-Profile-Id header naming the profile
+    - With the toggle off and no header, a request costs one header scan
+    """
+    
+    def __init__(self, app: ASGIApp, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        header = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                header = value.decode("latin-1")
+                break
+        if header is None and not self.profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+        if not self.profiler.should_profile(scope["path"], header):
+            await self.app(scope, receive, send)
+            return
+        
+        profile = self.profiler.start(scope["path"])
+        
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER, profile.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            self.profiler.stop(profile)
+            route = getattr(scope.get("route"), "path", None)
+            # Writing the collapsed-stack file is blocking file I/O
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.profiler.finish, profile, route
+            )
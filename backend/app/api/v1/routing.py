@@ -0,0 +1,60 @@
+"""Route class ending read-only database transactions before responses are serialized
+
+It also binds the threadpool thread of sync endpoints to the request's
+profile, so the profiler samples that thread for the request.
+"""
+
+import asyncio
+import functools
+from typing import Callable
+
+from fastapi.routing import APIRoute
+
+from app.infrastructure.database.pool import (
+    bind_request_sessions, release_request_sessions, reset_request_sessions
+)
+from app.infrastructure.services.profiler import profiled_endpoint
+
+
+def _releasing_sessions(endpoint: Callable) -> Callable:
+    """Endpoint that releases the request's sessions once it has returned"""
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def call(*args, **kwargs):
+            result = await endpoint(*args, **kwargs)
+            release_request_sessions()
+            return result
+    else:
+        @functools.wraps(endpoint)
+        def call(*args, **kwargs):
+            result = endpoint(*args, **kwargs)
+            release_request_sessions()
+            return result
+    return call
+
+
+class SessionReleasingRoute(APIRoute):
+    """Route returning its database connections before the response is serialized
+    
+    With FastAPI 0.104 the teardown of get_db runs after the response has
+    been sent, so a request that only reads would hold its connection while
+    the response is validated, serialized and written. Sessions from get_db
+    are collected while the request is handled, and once the endpoint
+    returns their read-only transaction is committed (PooledSession.release),
+    one round trip per request. Writes are left to the endpoint's own commit.
+    """
+    
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _releasing_sessions(profiled_endpoint(endpoint)), **kwargs)
+    
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        
+        async def route_handler(request):
+            token = bind_request_sessions()
+            try:
+                return await handler(request)
+            finally:
+                reset_request_sessions(token)
+        
+        return route_handler
@@ -1,22 +1,67 @@
 """Authentication use cases"""
 
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import uuid4
+
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.application.orders.manage_cart import MergeGuestCartUseCase
+from app.infrastructure.database.pool import release_session
+from app.infrastructure.repositories.token_repository import TokenFamilyRepository
 from app.infrastructure.repositories.user_repository import UserRepository
+from app.infrastructure.services.cart_store import CartLimitError, CartStore
+from app.infrastructure.services.token_revocation import (
+    TokenRevocationStore, get_token_revocation_store
+)
 from app.schemas.auth_schemas import TokenRequest, TokenResponse
-from app.core.security import verify_password, create_access_token, create_refresh_token
+from app.core.security import (
+    verify_password, create_access_token, create_refresh_token, decode_token
+)
+
+
+def issue_tokens(user_id: str, role: str, family_id: str) -> TokenResponse:
+    """Access and refresh token pair belonging to a token family (one login session)"""
+    claims = {"sub": str(user_id), "role": role, "fam": family_id}
+    return TokenResponse(
+        access_token=create_access_token(claims),
+        refresh_token=create_refresh_token(claims)
+    )
+
+
+def _family_expiry() -> datetime:
+    """Latest expiry of any refresh token issued in a family from now on"""
+    return datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+
+def _decode_refresh_token(refresh_token: str) -> dict:
+    """Decode a refresh token, rejecting other token types"""
+    payload = decode_token(refresh_token)
+    if (
+        not payload or payload.get("type") != "refresh"
+        or not payload.get("jti") or not payload.get("fam")
+    ):
+        raise ValueError("Invalid refresh token")
+    return payload
 
 
 class LoginUseCase:
     """Use case for user login"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, carts: Optional[CartStore] = None):
+        self.db = db
         self.repository = UserRepository(db)
+        self.families = TokenFamilyRepository(db)
+        self.carts = carts
     
     def execute(self, credentials: TokenRequest) -> TokenResponse:
         """Authenticate user and generate tokens"""
         # Find user by email
         user = self.repository.get_by_email(credentials.email)
+        # Return the connection before bcrypt runs; the family is recorded in a
+        # short transaction of its own
+        release_session(self.db)
         if not user:
             raise ValueError("Invalid credentials")
         
@@ -28,39 +73,75 @@ class LoginUseCase:
         if not user.is_active:
             raise ValueError("User account is inactive")
         
-        # Generate tokens
-        access_token = create_access_token({"sub": str(user.id), "role": user.role})
-        refresh_token = create_refresh_token({"sub": str(user.id)})
+        # Carry over what the user put in the cart before signing in
+        if credentials.cart_token:
+            try:
+                MergeGuestCartUseCase(self.carts).execute(credentials.cart_token, user.id)
+            except CartLimitError:
+                # Too many lines together: the guest cart is left as it was
+                pass
         
-        return TokenResponse(
-            access_token=access_token,
-            refresh_token=refresh_token
-        )
+        # Generate tokens for a new token family, recorded so it can be revoked with the user
+        family_id = uuid4().hex
+        self.families.record(family_id, user.id, _family_expiry())
+        return issue_tokens(user.id, user.role, family_id)
 
 
 class RefreshTokenUseCase:
-    """Use case for refreshing access token"""
+    """Use case for rotating a refresh token"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, revocation_store: Optional[TokenRevocationStore] = None):
         self.repository = UserRepository(db)
+        self.families = TokenFamilyRepository(db)
+        self.revocation_store = revocation_store or get_token_revocation_store()
     
     def execute(self, refresh_token: str) -> TokenResponse:
-        """Refresh access token using refresh token"""
-        from app.core.security import decode_token
+        """Exchange a refresh token for a new token pair in the same family"""
+        payload = _decode_refresh_token(refresh_token)
+        family_id = payload["fam"]
+        if self.revocation_store.is_revoked(family_id):
+            raise ValueError("Refresh token revoked")
         
-        payload = decode_token(refresh_token)
-        if not payload or payload.get("type") == "refresh":
-            raise ValueError("Invalid refresh token")
-        
-        user_id = payload.get("sub")
-        user = self.repository.get_by_id(int(user_id))
-        if not user:
-            raise ValueError("User not found")
+        # The account may have been deactivated or changed role since the last refresh
+        user = self.repository.get_by_id(int(payload["sub"]))
+        if not user or not user.is_active:
+            self.revocation_store.revoke(family_id, "family", _family_expiry(), "inactive")
+            raise ValueError("User account is inactive")
         
-        # Generate new access token
-        access_token = create_access_token({"sub": str(user.id), "role": user.role})
+        # Refresh tokens are single-use: claiming the jti is one INSERT
+        expires_at = datetime.utcfromtimestamp(payload["exp"])
+        if not self.revocation_store.revoke(payload["jti"], "jti", expires_at, "rotated"):
+            # A rotated token was presented again, so it leaked: end the whole session
+            self.revocation_store.revoke(family_id, "family", _family_expiry(), "reuse")
+            raise ValueError("Refresh token reuse detected")
         
-        return TokenResponse(
-            access_token=access_token,
-            refresh_token=refresh_token
-        )
+        self.families.extend(family_id, _family_expiry())
+        return issue_tokens(user.id, user.role, family_id)
+
+
+class RevokeUserTokensUseCase:
+    """Use case for ending every login session of a user"""
+    
+    def __init__(self, db: Session, revocation_store: Optional[TokenRevocationStore] = None):
+        self.families = TokenFamilyRepository(db)
+        self.revocation_store = revocation_store or get_token_revocation_store()
+    
+    def execute(self, user_id: int, reason: str) -> int:
+        """Revoke the user's live token families (and their access tokens), return how many"""
+        family_ids = self.families.get_live_family_ids(user_id, datetime.utcnow())
+        for family_id in family_ids:
+            self.revocation_store.revoke(family_id, "family", _family_expiry(), reason)
+        self.families.delete_for_user(user_id)
+        return len(family_ids)
+
+
+class LogoutUseCase:
+    """Use case for ending a login session"""
+    
+    def __init__(self, revocation_store: Optional[TokenRevocationStore] = None):
+        self.revocation_store = revocation_store or get_token_revocation_store()
+    
+    def execute(self, refresh_token: str) -> None:
+        """Revoke the token family of a refresh token (and its access tokens)"""
+        payload = _decode_refresh_token(refresh_token)
+        self.revocation_store.revoke(payload["fam"], "family", _family_expiry(), "logout")
@@ -0,0 +1,146 @@
+"""Category catalog use cases"""
+
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.infrastructure.repositories.product_repository import (
+    ProductRepository, CategoryRepository
+)
+from app.infrastructure.services.category_catalog import (
+    CatalogSnapshot, CategoryCatalog, get_category_catalog
+)
+from app.schemas.category_schemas import (
+    CategoryCreate, CategoryResponse, CategoryListResponse, CategoryTreeNode,
+    CategoryTreeResponse
+)
+from app.utils.exceptions import ResourceNotFoundError
+
+
+class BuildCategoryCatalogUseCase:
+    """Use case for (re)loading the in-memory category catalog"""
+    
+    def __init__(self, db: Session):
+        self.repository = CategoryRepository(db)
+        self.product_repository = ProductRepository(db)
+        self.catalog = get_category_catalog()
+    
+    def execute(self) -> int:
+        """Load all categories and active product counts, then swap the snapshot"""
+        snapshot = self.catalog.build(
+            self.repository.get_catalog_rows(), self.product_repository.get_category_rows()
+        )
+        return snapshot.version
+
+
+def _category_response(snapshot: CatalogSnapshot, category_id: int) -> dict:
+    """Response fields of one category"""
+    entry = snapshot.get(category_id)
+    return {
+        "id": entry.id,
+        "name": entry.name,
+        "description": entry.description,
+        "icon": entry.icon,
+        "parent_id": entry.parent_id,
+        "product_count": snapshot.product_count(category_id),
+    }
+
+
+class ListCategoriesUseCase:
+    """Use case for listing categories (served from memory, no DB access)"""
+    
+    def __init__(self, catalog: Optional[CategoryCatalog] = None):
+        self.catalog = catalog or get_category_catalog()
+    
+    def execute(self) -> CategoryListResponse:
+        """All categories ordered by name, with their active product counts"""
+        snapshot = self.catalog.snapshot
+        return CategoryListResponse(
+            version=snapshot.version,
+            items=[
+                CategoryResponse(**_category_response(snapshot, entry.id))
+                for entry in snapshot.ordered()
+            ],
+        )
+
+
+class GetCategoryTreeUseCase:
+    """Use case for the category tree (served from memory, no DB access)"""
+    
+    def __init__(self, catalog: Optional[CategoryCatalog] = None):
+        self.catalog = catalog or get_category_catalog()
+    
+    def execute(self) -> CategoryTreeResponse:
+        """Top-level categories with nested subcategories and subtree product counts"""
+        snapshot = self.catalog.snapshot
+        totals = snapshot.subtree_product_counts
+        
+        def node(category_id: int) -> CategoryTreeNode:
+            return CategoryTreeNode(
+                **_category_response(snapshot, category_id),
+                total_product_count=totals.get(category_id, 0),
+                children=[node(child) for child in snapshot.children.get(category_id, ())],
+            )
+        
+        return CategoryTreeResponse(
+            version=snapshot.version,
+            roots=[node(category_id) for category_id in snapshot.children.get(None, ())],
+        )
+
+
+class CreateCategoryUseCase:
+    """Use case for creating a category"""
+    
+    def __init__(self, db: Session):
+        self.repository = CategoryRepository(db)
+        self.catalog = get_category_catalog()
+    
+    def execute(self, category_data: CategoryCreate) -> CategoryResponse:
+        """
+        Create a category and publish a new catalog snapshot
+        
+        A taken name raises DuplicateResourceError, an unknown parent
+        ResourceNotFoundError.
+        """
+        ensure_category_exists(self.repository.db, category_data.parent_id, field="parent_id")
+        category = self.repository.create(category_data)
+        snapshot = self.catalog.upsert_category(
+            category.id, category.name, category.description, category.icon, category.parent_id
+        )
+        return CategoryResponse(**_category_response(snapshot, category.id))
+
+
+def ensure_category_exists(
+    db: Session, category_id: Optional[int], field: str = "category_id"
+) -> None:
+    """
+    Raise ResourceNotFoundError unless the category exists (None passes)
+    
+    Known categories are validated from the snapshot without a query. An id
+    missing from it is looked up once, in case another worker created the
+    category, and added to the catalog when found.
+    """
+    catalog = get_category_catalog()
+    if category_id is None or category_id in catalog.snapshot:
+        return
+    category = CategoryRepository(db).get_by_id(category_id)
+    if category is None:
+        raise ResourceNotFoundError(f"Category with ID {category_id} not found", field=field)
+    catalog.upsert_category(
+        category.id, category.name, category.description, category.icon, category.parent_id
+    )
+
+
+def refresh_catalog_product(product) -> None:
+    """Reflect a created/updated product in the catalog's product counts"""
+    get_category_catalog().upsert_product(product.id, product.category_id, product.status)
+
+
+def warm_category_catalog() -> None:
+    """Load the category catalog at startup"""
+    from app.infrastructure.database.database import SessionLocal
+    db = SessionLocal()
+    try:
+        BuildCategoryCatalogUseCase(db).execute()
+    finally:
+        db.close()
@@ -0,0 +1 @@
+"""Export use cases"""
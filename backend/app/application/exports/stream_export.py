@@ -0,0 +1,157 @@
+"""Streaming table exports for admins
+
+Rows are read as plain column tuples in batches (a server-side cursor on
+PostgreSQL) and each batch is encoded and, optionally, gzip-compressed into
+one chunk before the next one is fetched, so memory stays constant however
+large the table is.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import DateTime, Enum, Numeric
+from sqlalchemy.orm import Session
+
+from app.infrastructure.database.models_order import Order
+from app.infrastructure.database.models_product import Product
+from app.infrastructure.database.models_user import User
+from app.infrastructure.repositories.base_repository import BaseRepository
+
+# entity -> (model, exported columns); never include secrets such as password hashes
+EXPORTS = {
+    "orders": (Order, (
+        "id", "order_number", "user_id", "status", "total_amount", "shipping_address",
+        "created_at", "updated_at",
+    )),
+    "users": (User, (
+        "id", "email", "username", "first_name", "last_name", "role", "is_active",
+        "email_verified", "created_at",
+    )),
+    "products": (Product, (
+        "id", "sku", "name", "price", "stock", "category_id", "status", "created_at",
+        "updated_at",
+    )),
+}
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+GZIP_LEVEL = 6
+
+
+def _nullable(converter: Callable) -> Callable:
+    """Converter that passes None through"""
+    return lambda value: None if value is None else converter(value)
+
+
+def _converters(model, columns: Sequence[str]) -> list[tuple[int, Callable]]:
+    """(position, converter) for columns whose values need converting for output"""
+    converters = []
+    for position, name in enumerate(columns):
+        column = model.__table__.columns[name]
+        if isinstance(column.type, Enum):
+            converter = {member: member.value for member in column.type.enum_class}.__getitem__
+        elif isinstance(column.type, DateTime):
+            converter = datetime.isoformat
+        elif isinstance(column.type, Numeric):
+            converter = str
+        else:
+            continue
+        converters.append((position, _nullable(converter) if column.nullable else converter))
+    return converters
+
+
+def _convert(batch: Sequence[tuple], converters: list[tuple[int, Callable]]) -> Iterable:
+    """Rows with converted values (converted column by column with map)"""
+    if not converters or not batch:
+        return batch
+    columns = list(zip(*batch))
+    for position, converter in converters:
+        columns[position] = map(converter, columns[position])
+    return zip(*columns)
+
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a stream of chunks into one gzip stream"""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def validate_export(entity: str, export_format: str) -> None:
+    """Reject unknown entities and formats"""
+    if entity not in EXPORTS:
+        raise ValueError(f"Unknown export: {entity}")
+    if export_format not in FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+
+class StreamExportUseCase:
+    """Use case for streaming a full table export"""
+    
+    def __init__(self, db: Session, batch_size: int = 10000):
+        self.db = db
+        self.batch_size = batch_size
+    
+    def execute(self, entity: str, export_format: str = "csv", compress: bool = False):
+        """Byte chunks of the export, one per batch of rows"""
+        validate_export(entity, export_format)
+        model, columns = EXPORTS[entity]
+        batches = BaseRepository(self.db, model).stream_columns(columns, self.batch_size)
+        converters = _converters(model, columns)
+        if export_format == "csv":
+            chunks = self._csv(batches, columns, converters)
+        else:
+            chunks = self._ndjson(batches, columns, converters)
+        return _gzip(chunks) if compress else chunks
+    
+    @staticmethod
+    def _csv(batches, columns: Sequence[str], converters) -> Iterator[bytes]:
+        """CSV with a header row"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for batch in batches:
+            writer.writerows(_convert(batch, converters))
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    
+    @staticmethod
+    def _ndjson(batches, columns: Sequence[str], converters) -> Iterator[bytes]:
+        """One JSON object per line"""
+        encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+        for batch in batches:
+            lines = [encode(dict(zip(columns, row))) for row in _convert(batch, converters)]
+            lines.append("")
+            yield "\n".join(lines).encode()
+
+
+def open_export(
+    entity: str,
+    export_format: str = "csv",
+    compress: bool = False,
+    session_factory: Optional[Callable[[], Session]] = None,
+) -> Iterator[bytes]:
+    """Validate an export and return its byte stream, which holds its own session while read"""
+    validate_export(entity, export_format)
+    if session_factory is None:
+        from app.infrastructure.database.database import SessionLocal
+        session_factory = SessionLocal
+    
+    def stream() -> Iterator[bytes]:
+        db = session_factory()
+        try:
+            yield from StreamExportUseCase(db).execute(entity, export_format, compress)
+        finally:
+            db.close()
+    
+    return stream()
@@ -0,0 +1 @@
+"""Images use cases"""
@@ -0,0 +1,135 @@
+"""Product image use cases"""
+
+import hashlib
+from typing import Optional
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.infrastructure.database.models_image import ImageAsset, ProductImage
+from app.infrastructure.repositories.image_repository import (
+    ImageAssetRepository, ProductImageRepository
+)
+from app.infrastructure.services.image_processing import (
+    FORMATS, ImageProcessor, get_image_processor
+)
+from app.infrastructure.services.image_storage import (
+    ImageStorage, get_image_storage, image_key
+)
+from app.schemas.image_schemas import ProductImageResponse
+from app.utils.exceptions import (
+    DuplicateResourceError, InvalidImageError, ResourceNotFoundError
+)
+
+
+def image_url(content_hash: str, variant: str) -> str:
+    """Public URL of an image variant"""
+    return f"{settings.API_V1_STR}/images/{image_key(content_hash, variant)}"
+
+
+def image_response(image: ProductImage, asset: ImageAsset) -> ProductImageResponse:
+    """Response for a product image"""
+    return ProductImageResponse(
+        id=image.id,
+        product_id=image.product_id,
+        content_hash=asset.content_hash,
+        position=image.position,
+        width=asset.width,
+        height=asset.height,
+        urls={
+            variant: image_url(asset.content_hash, variant)
+            for variant in asset.variants.split(",")
+        },
+    )
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class UploadProductImageUseCase:
+    """Use case for adding an uploaded image to a product's gallery"""
+    
+    def __init__(
+        self,
+        db: Session,
+        storage: Optional[ImageStorage] = None,
+        processor: Optional[ImageProcessor] = None,
+    ):
+        self.asset_repository = ImageAssetRepository(db)
+        self.image_repository = ProductImageRepository(db)
+        self.storage = storage or get_image_storage()
+        self.processor = processor or get_image_processor()
+    
+    async def execute(self, product_id: int, data: bytes) -> ProductImageResponse:
+        """
+        Store an upload once per content hash and link it to the product
+        
+        Hashing and file writes run in the threadpool and decoding/resizing in
+        the process pool, so the event loop stays free during uploads. An image
+        already stored (by any product) is linked without being processed again.
+        """
+        if not data:
+            raise InvalidImageError("Empty upload")
+        if len(data) > settings.IMAGE_MAX_UPLOAD_BYTES:
+            raise InvalidImageError(
+                f"Image larger than {settings.IMAGE_MAX_UPLOAD_BYTES} bytes"
+            )
+        if not self.image_repository.product_exists(product_id):
+            raise ResourceNotFoundError(
+                f"Product with ID {product_id} not found", field="product_id"
+            )
+        
+        content_hash = await run_in_threadpool(_sha256, data)
+        asset = self.asset_repository.get_by_hash(content_hash)
+        if asset is None:
+            asset = await self._store(content_hash, data)
+        
+        image = self.image_repository.get_link(product_id, content_hash)
+        if image is None:
+            try:
+                image = self.image_repository.add_to_product(product_id, content_hash)
+            except DuplicateResourceError:
+                # The same image was added concurrently
+                image = self.image_repository.get_link(product_id, content_hash)
+        return image_response(image, asset)
+    
+    async def _store(self, content_hash: str, data: bytes) -> ImageAsset:
+        """Process an upload, write its files, then record the asset"""
+        processed = await self.processor.process(content_hash, data)
+        original = f"original.{FORMATS[processed.format][0]}"
+        files = {original: data, **processed.variants}
+        
+        def write_files() -> None:
+            for variant, content in files.items():
+                self.storage.put(image_key(content_hash, variant), content)
+        
+        if self.storage.blocking:
+            await run_in_threadpool(write_files)
+        else:
+            write_files()
+        # Files first: a recorded asset always has its files
+        self.asset_repository.insert_if_absent({
+            "content_hash": content_hash,
+            "format": original.rsplit(".", 1)[1],
+            "width": processed.width,
+            "height": processed.height,
+            "size_bytes": len(data),
+            "variants": ",".join(files),
+        })
+        return self.asset_repository.get_by_hash(content_hash)
+
+
+class ListProductImagesUseCase:
+    """Use case for a product's image gallery"""
+    
+    def __init__(self, db: Session):
+        self.repository = ProductImageRepository(db)
+    
+    def execute(self, product_id: int) -> list[ProductImageResponse]:
+        """A product's images in display order"""
+        return [
+            image_response(image, asset)
+            for image, asset in self.repository.get_for_product(product_id)
+        ]
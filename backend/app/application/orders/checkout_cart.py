@@ -0,0 +1,56 @@
+"""Validated cart snapshots for checkout
+
+A ValidatedCart is the stored cart's lines at one version, with every
+product checked (exists, active, enough stock) and priced exactly. The
+checkout endpoint returns it for the client to confirm. There is no
+order-placing use case yet: one should take a ValidatedCart rather than
+cart lines from the client, and call is_current() before writing the
+order to confirm the cart has not changed since.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.application.orders.quote_cart import PriceBook, QuoteCartUseCase, quote_response
+from app.infrastructure.services.cart_store import CartStore, get_cart_store
+from app.infrastructure.services.pricing_engine import Quote
+from app.schemas.cart_schemas import CartCheckoutResponse
+
+
+@dataclass(frozen=True)
+class ValidatedCart:
+    """A cart's lines at one version, checked and priced"""
+    cart_key: str
+    version: int
+    quote: Quote
+
+
+class CheckoutCartUseCase:
+    """Use case for validating and pricing a stored cart"""
+    
+    def __init__(
+        self,
+        db: Session,
+        carts: Optional[CartStore] = None,
+        price_book: Optional[PriceBook] = None,
+    ):
+        self.carts = carts or get_cart_store()
+        self.quotes = QuoteCartUseCase(db, price_book)
+    
+    def snapshot(self, cart_key: str, coupon_code: Optional[str] = None) -> ValidatedCart:
+        """Validated snapshot of a cart"""
+        state = self.carts.get(cart_key)
+        if not state.items:
+            raise ValueError("Cart is empty")
+        return ValidatedCart(cart_key, state.version, self.quotes.price(state.items, coupon_code))
+    
+    def is_current(self, cart: ValidatedCart) -> bool:
+        """Whether a cart is unchanged since it was validated"""
+        return self.carts.get(cart.cart_key).version == cart.version
+    
+    def execute(self, cart_key: str, coupon_code: Optional[str] = None) -> CartCheckoutResponse:
+        """Validated and priced cart"""
+        cart = self.snapshot(cart_key, coupon_code)
+        return CartCheckoutResponse(version=cart.version, quote=quote_response(cart.quote))
@@ -0,0 +1,78 @@
+"""Cart use cases"""
+
+from typing import Optional
+
+from app.infrastructure.services.cart_store import (
+    CartState, CartStore, get_cart_store, guest_cart_key, user_cart_key
+)
+from app.schemas.cart_schemas import CartItem, CartResponse
+
+
+def cart_response(state: CartState) -> CartResponse:
+    """Response for a cart"""
+    return CartResponse(
+        items=[
+            CartItem(product_id=product_id, quantity=quantity)
+            for product_id, quantity in state.items.items()
+        ],
+        version=state.version,
+    )
+
+
+class GetCartUseCase:
+    """Use case for reading a cart"""
+    
+    def __init__(self, carts: Optional[CartStore] = None):
+        self.carts = carts or get_cart_store()
+    
+    def execute(self, cart_key: str) -> CartResponse:
+        """Lines of a cart"""
+        return cart_response(self.carts.get(cart_key))
+
+
+class AddCartItemUseCase:
+    """Use case for putting a product in a cart"""
+    
+    def __init__(self, carts: Optional[CartStore] = None):
+        self.carts = carts or get_cart_store()
+    
+    def execute(self, cart_key: str, item: CartItem) -> CartResponse:
+        """Add units of a product (to its line if it already has one)"""
+        self.carts.add(cart_key, item.product_id, item.quantity)
+        return cart_response(self.carts.get(cart_key))
+
+
+class SetCartItemUseCase:
+    """Use case for changing or removing a cart line"""
+    
+    def __init__(self, carts: Optional[CartStore] = None):
+        self.carts = carts or get_cart_store()
+    
+    def execute(self, cart_key: str, product_id: int, quantity: int) -> CartResponse:
+        """Set a line's quantity (0 removes the line)"""
+        self.carts.set(cart_key, product_id, quantity)
+        return cart_response(self.carts.get(cart_key))
+
+
+class ClearCartUseCase:
+    """Use case for emptying a cart"""
+    
+    def __init__(self, carts: Optional[CartStore] = None):
+        self.carts = carts or get_cart_store()
+    
+    def execute(self, cart_key: str) -> None:
+        """Remove every line of a cart"""
+        self.carts.clear(cart_key)
+
+
+class MergeGuestCartUseCase:
+    """Use case for moving a guest cart into a user's cart on login"""
+    
+    def __init__(self, carts: Optional[CartStore] = None):
+        self.carts = carts or get_cart_store()
+    
+    def execute(self, guest_token: str, user_id: int) -> CartResponse:
+        """Add the guest cart's lines to the user's cart and empty the guest cart"""
+        return cart_response(
+            self.carts.merge(guest_cart_key(guest_token), user_cart_key(user_id))
+        )
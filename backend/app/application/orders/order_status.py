@@ -0,0 +1,98 @@
+"""Order status transitions
+
+Orders move through the fulfilment state machine in bulk: for each batch
+of ids, one UPDATE per allowed source status moves the orders that are in
+it (WHERE id = ANY(:ids) AND status = :from RETURNING id), the history rows
+of the moved orders are inserted in one statement, and the batch commits.
+Orders that did not move are looked up once per batch to report why. No
+order is loaded into the session, and an order changed concurrently is
+either moved from the status the UPDATE saw or reported, never moved from
+a status that does not allow it.
+"""
+
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.domain.orders.state_machine import check_transition, source_statuses, transition_error
+from app.infrastructure.database.models_order import OrderStatusEnum
+from app.infrastructure.repositories.order_repository import (
+    OrderRepository, OrderStatusHistoryRepository
+)
+from app.schemas.order_schemas import OrderStatusTransitionResponse, OrderTransitionFailure
+from app.utils.exceptions import InvalidOrderTransitionError
+
+
+class TransitionOrdersUseCase:
+    """Use case for moving many orders to a new status"""
+    
+    def __init__(self, db: Session, batch_size: Optional[int] = None):
+        self.db = db
+        self.repository = OrderRepository(db)
+        self.history_repository = OrderStatusHistoryRepository(db)
+        self.batch_size = batch_size or settings.ORDER_TRANSITION_BATCH_SIZE
+    
+    def execute(
+        self,
+        order_ids: list[int],
+        to_status: OrderStatusEnum,
+        from_status: Optional[OrderStatusEnum] = None,
+        changed_by: Optional[int] = None,
+    ) -> OrderStatusTransitionResponse:
+        """
+        Move orders to to_status, reporting each order that could not move
+        
+        Without from_status every status allowed to move to to_status is a
+        source. A transition the state machine never allows (such as to
+        pending) raises InvalidOrderTransitionError.
+        """
+        if from_status is not None:
+            check_transition(from_status, to_status)
+            sources = [from_status.value]
+        else:
+            sources = source_statuses(to_status)
+            if not sources:
+                raise InvalidOrderTransitionError(
+                    f"No order can change to {to_status.value}"
+                )
+        target = OrderStatusEnum(to_status)
+        
+        order_ids = list(dict.fromkeys(order_ids))
+        transitioned, failed = [], []
+        for start in range(0, len(order_ids), self.batch_size):
+            batch = order_ids[start:start + self.batch_size]
+            remaining, history = batch, []
+            for source in sources:
+                moved = self.repository.transition_status(
+                    remaining, OrderStatusEnum(source), target
+                )
+                if not moved:
+                    continue
+                history.extend(
+                    {"order_id": order_id, "from_status": OrderStatusEnum(source),
+                     "to_status": target, "changed_by": changed_by}
+                    for order_id in moved
+                )
+                transitioned.extend(moved)
+                moved = set(moved)
+                remaining = [order_id for order_id in remaining if order_id not in moved]
+                if not remaining:
+                    break
+            self.history_repository.add_many(history)
+            if remaining:
+                statuses = self.repository.get_statuses(remaining)
+                for order_id in remaining:
+                    current = statuses.get(order_id)
+                    failed.append(OrderTransitionFailure(
+                        order_id=order_id,
+                        status=current.value if current is not None else None,
+                        error=(
+                            transition_error(current, to_status) if current is not None
+                            else "Order not found"
+                        ),
+                    ))
+            self.db.commit()
+        return OrderStatusTransitionResponse(
+            to_status=to_status, transitioned=transitioned, failed=failed
+        )
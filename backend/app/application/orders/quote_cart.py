@@ -0,0 +1,144 @@
+"""Cart pricing
+
+A quote costs two queries whatever the cart size: one for the prices of
+all its products and one for the coupon. Prices are kept in a PriceBook
+for the rest of the request, so pricing the same products again (a quote
+followed by checkout, a cart re-priced after a change) does not query
+them again. The arithmetic runs in the integer-cent pricing engine.
+"""
+
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.repositories.coupon_repository import CouponRepository, is_usable
+from app.infrastructure.repositories.product_repository import ProductRepository
+from app.infrastructure.services.pricing_engine import (
+    CouponTerms, PriceEntry, Quote, price_cart
+)
+from app.schemas.cart_schemas import CartItem, CartQuoteLine, CartQuoteResponse
+from app.utils.exceptions import (
+    InsufficientStockError, InvalidCouponError, ResourceNotFoundError
+)
+from app.utils.helpers import from_cents, to_cents
+
+
+class PriceBook:
+    """Per-request cache of product prices, loading unseen products in one query"""
+    
+    def __init__(self, db: Session):
+        self.repository = ProductRepository(db)
+        self._entries: dict[int, Optional[PriceEntry]] = {}
+        self.queries = 0
+    
+    def get_many(self, product_ids: Iterable[int]) -> dict[int, Optional[PriceEntry]]:
+        """Price entries of several products (None for unknown ones)"""
+        product_ids = list(product_ids)
+        missing = [product_id for product_id in product_ids if product_id not in self._entries]
+        if missing:
+            self.queries += 1
+            self._entries.update(dict.fromkeys(missing))
+            for product_id, price, stock, status in self.repository.get_price_rows(missing):
+                self._entries[product_id] = PriceEntry(
+                    product_id=product_id,
+                    unit_cents=to_cents(price),
+                    stock=stock,
+                    active=getattr(status, "value", status) == "active",
+                )
+        return {product_id: self._entries[product_id] for product_id in product_ids}
+
+
+def coupon_terms(coupon, now: datetime) -> CouponTerms:
+    """Terms of a usable coupon, InvalidCouponError otherwise"""
+    if coupon is None or not is_usable(coupon, now):
+        raise InvalidCouponError("Coupon is invalid or expired")
+    percentage = coupon.discount_percentage or 0
+    return CouponTerms(
+        code=coupon.code,
+        # Numeric(5, 2) percent -> exact basis points
+        percent_bp=to_cents(percentage),
+        amount_cents=to_cents(coupon.discount_amount or 0),
+        min_purchase_cents=to_cents(coupon.min_purchase_amount or 0),
+    )
+
+
+def merge_items(items: Iterable[CartItem]) -> dict[int, int]:
+    """Quantities per product, in first-seen order (repeated products are added up)"""
+    quantities: dict[int, int] = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+
+def quote_response(quote: Quote) -> CartQuoteResponse:
+    """Response for a quote, converting cents back to Decimal"""
+    return CartQuoteResponse(
+        items=[
+            CartQuoteLine(
+                product_id=product_id,
+                quantity=quantity,
+                unit_price=from_cents(unit),
+                subtotal=from_cents(subtotal),
+                discount=from_cents(discount),
+                tax=from_cents(tax),
+                total=from_cents(total),
+            )
+            for product_id, quantity, unit, subtotal, discount, tax, total in zip(
+                quote.product_ids, quote.quantities, quote.unit_cents,
+                quote.line_subtotal_cents, quote.line_discount_cents,
+                quote.line_tax_cents, quote.line_total_cents,
+            )
+        ],
+        subtotal=from_cents(quote.subtotal_cents),
+        discount=from_cents(quote.discount_cents),
+        tax=from_cents(quote.tax_cents),
+        total=from_cents(quote.total_cents),
+        coupon_code=quote.coupon_code,
+    )
+
+
+class QuoteCartUseCase:
+    """Use case for pricing a cart with an optional coupon"""
+    
+    def __init__(self, db: Session, price_book: Optional[PriceBook] = None):
+        self.coupon_repository = CouponRepository(db)
+        self.price_book = price_book or PriceBook(db)
+    
+    def price(self, quantities: dict[int, int], coupon_code: Optional[str] = None) -> Quote:
+        """Price merged cart lines, checking products, stock and the coupon"""
+        entries = self.price_book.get_many(quantities)
+        unavailable = [
+            product_id for product_id, entry in entries.items()
+            if entry is None or not entry.active
+        ]
+        if unavailable:
+            raise ResourceNotFoundError(
+                f"Products not available: {unavailable}", field="product_id"
+            )
+        short = [
+            product_id for product_id, quantity in quantities.items()
+            if entries[product_id].stock < quantity
+        ]
+        if short:
+            raise InsufficientStockError(f"Insufficient stock for products: {short}")
+        
+        coupon = None
+        if coupon_code:
+            coupon = coupon_terms(
+                self.coupon_repository.get_by_code(coupon_code), datetime.utcnow()
+            )
+        return price_cart(
+            list(quantities),
+            list(quantities.values()),
+            [entries[product_id].unit_cents for product_id in quantities],
+            coupon,
+            settings.SALES_TAX_BASIS_POINTS,
+        )
+    
+    def execute(
+        self, items: list[CartItem], coupon_code: Optional[str] = None
+    ) -> CartQuoteResponse:
+        """Quote a cart"""
+        return quote_response(self.price(merge_items(items), coupon_code))
@@ -0,0 +1,245 @@
+"""Payment webhook use cases"""
+
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.domain.orders.state_machine import can_transition
+from app.infrastructure.database.models_order import (
+    OrderStatusEnum, PaymentStatusEnum, WebhookEventStatusEnum
+)
+from app.infrastructure.external.stripe_webhooks import verify_signature, parse_event
+from app.infrastructure.repositories.order_repository import (
+    OrderRepository, OrderStatusHistoryRepository, PaymentRepository,
+    PaymentWebhookEventRepository
+)
+from app.infrastructure.repositories.user_repository import UserRepository
+from app.infrastructure.services.email_service import EmailBatcher, get_email_batcher
+from app.utils.exceptions import InvalidWebhookSignatureError
+
+
+# Event type -> (payment status, order status or None to leave the order as is)
+EVENT_TRANSITIONS = {
+    "payment_intent.succeeded": (PaymentStatusEnum.COMPLETED, OrderStatusEnum.CONFIRMED),
+    "payment_intent.payment_failed": (PaymentStatusEnum.FAILED, None),
+    "charge.refunded": (PaymentStatusEnum.REFUNDED, OrderStatusEnum.CANCELLED),
+}
+
+
+class ReceivePaymentWebhookUseCase:
+    """Use case for verifying and storing an incoming webhook event"""
+    
+    def __init__(self, db: Session):
+        self.repository = PaymentWebhookEventRepository(db)
+    
+    def execute(self, payload: bytes, signature_header: str) -> bool:
+        """Verify and persist the raw event, return False for duplicates"""
+        if not settings.STRIPE_WEBHOOK_SECRET:
+            raise InvalidWebhookSignatureError("Webhook secret is not configured")
+        verify_signature(
+            payload, signature_header, settings.STRIPE_WEBHOOK_SECRET,
+            tolerance=settings.STRIPE_WEBHOOK_TOLERANCE_SECONDS,
+        )
+        event = parse_event(payload)
+        return self.repository.insert_if_new({
+            "event_id": event.event_id,
+            "event_type": event.event_type,
+            "order_id": event.order_id,
+            "transaction_id": event.transaction_id,
+            "payload": event.payload,
+        })
+
+
+class ProcessPaymentEventsUseCase:
+    """Use case for applying stored webhook events to payments and orders"""
+    
+    def __init__(
+        self,
+        db: Session,
+        max_attempts: Optional[int] = None,
+        retry_backoff: Optional[float] = None,
+        email_batcher: Optional[EmailBatcher] = None,
+    ):
+        self.db = db
+        self.max_attempts = max_attempts or settings.PAYMENT_EVENTS_MAX_ATTEMPTS
+        self.retry_backoff = (
+            settings.PAYMENT_EVENTS_RETRY_BACKOFF_SECONDS if retry_backoff is None
+            else retry_backoff
+        )
+        self.event_repository = PaymentWebhookEventRepository(db)
+        self.payment_repository = PaymentRepository(db)
+        self.order_repository = OrderRepository(db)
+        self.history_repository = OrderStatusHistoryRepository(db)
+        self.user_repository = UserRepository(db)
+        # None when SMTP is not configured: no confirmation emails
+        self.email_batcher = email_batcher or get_email_batcher()
+    
+    def _defer(self, event) -> bool:
+        """Schedule a retry for an event whose payment is not stored yet, False if out of tries"""
+        event.attempts += 1
+        if event.attempts >= self.max_attempts:
+            return False
+        delay = self.retry_backoff * 2 ** (event.attempts - 1)
+        event.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        return True
+    
+    def execute(self, batch_size: int = 500) -> int:
+        """Process one batch of pending events, return the number handled"""
+        events = self.event_repository.get_pending(batch_size)
+        if not events:
+            return 0
+        
+        payments = {
+            payment.transaction_id: payment
+            for payment in self.payment_repository.get_by_transaction_ids(
+                list({event.transaction_id for event in events if event.transaction_id})
+            )
+        }
+        orders = {
+            order.id: order
+            for order in self.order_repository.get_by_ids(
+                list({payment.order_id for payment in payments.values()})
+            )
+        }
+        
+        # Group by order keeping arrival order, so each order sees its events in sequence
+        events_by_order = defaultdict(list)
+        for event in events:
+            payment = payments.get(event.transaction_id)
+            events_by_order[payment.order_id if payment else event.order_id].append(event)
+        
+        processed, ignored, history = [], [], []
+        for order_events in events_by_order.values():
+            for event in order_events:
+                transition = EVENT_TRANSITIONS.get(event.event_type)
+                payment = payments.get(event.transaction_id)
+                if transition and payment is None and self._defer(event):
+                    # The payment may be stored after its first events arrive; the
+                    # event stays received and is picked up again after the delay
+                    continue
+                if not transition or payment is None:
+                    ignored.append(event.id)
+                    continue
+                
+                payment_status, order_status = transition
+                payment.status = payment_status
+                order = orders.get(payment.order_id)
+                # A late event does not move an order back (e.g. refunded after shipping)
+                if order_status and order and can_transition(order.status, order_status):
+                    history.append({"order_id": order.id, "from_status": order.status,
+                                    "to_status": order_status, "changed_by": None})
+                    order.status = order_status
+                processed.append(event.id)
+        
+        # Payments/orders are flushed once per batch with their final state
+        self.event_repository.mark_done(processed, WebhookEventStatusEnum.PROCESSED)
+        self.event_repository.mark_done(ignored, WebhookEventStatusEnum.IGNORED)
+        self.history_repository.add_many(history)
+        self.db.commit()
+        self._send_confirmations([
+            orders[entry["order_id"]] for entry in history
+            if entry["to_status"] == OrderStatusEnum.CONFIRMED
+        ])
+        return len(events)
+    
+    def _send_confirmations(self, confirmed: list) -> None:
+        """Queue confirmation emails for orders the batch confirmed (once committed)"""
+        if self.email_batcher is None:
+            return
+        # Not for orders a later event of the batch already moved on (e.g. refunded)
+        orders = {
+            order.id: order for order in confirmed if order.status == OrderStatusEnum.CONFIRMED
+        }
+        if not orders:
+            return
+        users = {
+            user.id: user for user in self.user_repository.get_by_ids(
+                list({order.user_id for order in orders.values()})
+            )
+        }
+        for order in orders.values():
+            user = users.get(order.user_id)
+            if user is not None:
+                self.email_batcher.enqueue_order_confirmation(order, user)
+
+
+class PaymentEventWorker:
+    """Background worker that drains stored webhook events in batches"""
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        batch_size: int = 500,
+        interval: float = 1.0,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Start the worker thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="payment-events", daemon=True
+            )
+            self._thread.start()
+    
+    def notify(self) -> None:
+        """Wake the worker after new events were stored"""
+        self._wakeup.set()
+    
+    def drain(self) -> int:
+        """Process batches until no pending events are left"""
+        total = 0
+        db = self.session_factory()
+        try:
+            use_case = ProcessPaymentEventsUseCase(db)
+            while True:
+                handled = use_case.execute(self.batch_size)
+                total += handled
+                if handled < self.batch_size:
+                    return total
+        finally:
+            db.close()
+    
+    def _run(self) -> None:
+        """Worker loop"""
+        while not self._stop.is_set():
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.drain()
+            except Exception:
+                # Events stay pending and are retried on the next wakeup
+                self._stop.wait(self.interval)
+    
+    def stop(self) -> None:
+        """Stop the worker thread"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_payment_event_worker: Optional[PaymentEventWorker] = None
+
+
+def get_payment_event_worker() -> PaymentEventWorker:
+    """Get the process-wide payment event worker"""
+    global _payment_event_worker
+    if _payment_event_worker is None:
+        from app.infrastructure.database.database import SessionLocal
+        _payment_event_worker = PaymentEventWorker(
+            SessionLocal,
+            batch_size=settings.PAYMENT_EVENTS_BATCH_SIZE,
+            interval=settings.PAYMENT_EVENTS_POLL_INTERVAL_SECONDS,
+        )
+    return _payment_event_worker
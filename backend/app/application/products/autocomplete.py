@@ -0,0 +1,149 @@
+"""Product autocomplete use cases"""
+
+import logging
+import threading
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.repositories.order_repository import OrderItemRepository
+from app.infrastructure.repositories.product_repository import ProductRepository, CategoryRepository
+from app.infrastructure.services.autocomplete_index import get_autocomplete_index
+from app.schemas.product_schemas import (
+    AutocompleteResponse, AutocompleteProduct, AutocompleteCategory
+)
+
+logger = logging.getLogger("app.autocomplete")
+
+
+class BuildAutocompleteIndexUseCase:
+    """Use case for (re)building the in-memory autocomplete index"""
+    
+    def __init__(self, db: Session):
+        self.repository = ProductRepository(db)
+        self.category_repository = CategoryRepository(db)
+        self.order_item_repository = OrderItemRepository(db)
+        self.index = get_autocomplete_index()
+    
+    def execute(self) -> int:
+        """Load a narrow projection of the catalog and build the index"""
+        self.index.build(
+            self.repository.get_autocomplete_rows(),
+            self.category_repository.get_names(),
+            popularity=self.order_item_repository.get_units_sold(),
+        )
+        return len(self.index)
+
+
+class RefreshAutocompletePopularityUseCase:
+    """Use case for re-ranking indexed products by their current units sold"""
+    
+    def __init__(self, db: Session):
+        self.order_item_repository = OrderItemRepository(db)
+        self.index = get_autocomplete_index()
+    
+    def execute(self) -> int:
+        """Re-rank products whose units sold changed, return how many"""
+        return self.index.refresh_popularity(self.order_item_repository.get_units_sold())
+
+
+class AutocompleteProductsUseCase:
+    """Use case for autocomplete suggestions (served from memory, no DB access)"""
+    
+    def __init__(self):
+        self.index = get_autocomplete_index()
+    
+    def execute(self, query: str, limit: int = 10) -> AutocompleteResponse:
+        """Get products and categories matching a partial query"""
+        products = self.index.search(query, limit)
+        categories = self.index.search_categories(query)
+        return AutocompleteResponse(
+            query=query,
+            products=[
+                AutocompleteProduct(
+                    id=entry.id, name=entry.name, sku=entry.sku, category_id=entry.category_id
+                )
+                for entry in products
+            ],
+            categories=[
+                AutocompleteCategory(id=category_id, name=name)
+                for category_id, name in categories
+            ],
+        )
+
+
+def refresh_autocomplete_product(product) -> None:
+    """Reflect a created/updated product in the autocomplete index"""
+    get_autocomplete_index().upsert_product(
+        product.id, product.name, product.sku, product.category_id,
+        is_active=product.status == "active",
+    )
+
+
+def warm_autocomplete_index() -> None:
+    """Build the autocomplete index at startup"""
+    from app.infrastructure.database.database import SessionLocal
+    db = SessionLocal()
+    try:
+        BuildAutocompleteIndexUseCase(db).execute()
+    finally:
+        db.close()
+
+
+class AutocompletePopularityRefresher:
+    """Background worker that keeps the autocomplete ranking in line with sales"""
+    
+    def __init__(self, session_factory: Callable[[], Session], interval: float = 300.0):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.last_changed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Start the worker thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="autocomplete-popularity", daemon=True
+            )
+            self._thread.start()
+    
+    def refresh(self) -> int:
+        """Run one refresh"""
+        db = self.session_factory()
+        try:
+            self.last_changed = RefreshAutocompletePopularityUseCase(db).execute()
+            return self.last_changed
+        finally:
+            db.close()
+    
+    def _run(self) -> None:
+        """Worker loop"""
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception:
+                # The previous ranking stays until the next refresh
+                logger.exception("Autocomplete popularity refresh failed")
+    
+    def stop(self) -> None:
+        """Stop the worker thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_popularity_refresher: Optional[AutocompletePopularityRefresher] = None
+
+
+def get_autocomplete_popularity_refresher() -> AutocompletePopularityRefresher:
+    """Get the process-wide autocomplete popularity refresher"""
+    global _popularity_refresher
+    if _popularity_refresher is None:
+        from app.infrastructure.database.database import SessionLocal
+        _popularity_refresher = AutocompletePopularityRefresher(
+            SessionLocal, interval=settings.AUTOCOMPLETE_POPULARITY_REFRESH_SECONDS
+        )
+    return _popularity_refresher
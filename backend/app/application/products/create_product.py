@@ -1,9 +1,25 @@
 """Product use cases"""
 
+from typing import Optional
+
 from sqlalchemy.orm import Session
 
-from app.infrastructure.repositories.product_repository import ProductRepository, CategoryRepository
-from app.schemas.product_schemas import ProductCreate, ProductUpdate, ProductResponse
+from app.infrastructure.repositories.product_repository import ProductRepository
+from app.infrastructure.services.facet_index import get_facet_index
+from app.infrastructure.services.product_snapshot import (
+    ProductSnapshotReader, get_product_snapshot_reader
+)
+from app.infrastructure.services.search_cache import (
+    SearchCache, get_search_cache, normalize_query
+)
+from app.schemas.product_schemas import (
+    ProductCreate, ProductUpdate, ProductResponse, ProductDetailedResponse, ProductFilters,
+    FacetedProductsResponse, ProductFacets, FacetValueCount, PriceRangeCount, ProductStatus
+)
+from app.application.images.upload_image import ListProductImagesUseCase
+from app.application.categories.catalog import ensure_category_exists, refresh_catalog_product
+from app.application.products.autocomplete import refresh_autocomplete_product
+from app.application.products.facets import refresh_facet_product
 
 
 class CreateProductUseCase:
@@ -11,22 +27,21 @@ class CreateProductUseCase:
     
     def __init__(self, db: Session):
         self.repository = ProductRepository(db)
-        self.category_repository = CategoryRepository(db)
     
     def execute(self, product_data: ProductCreate) -> ProductResponse:
-        """Create a new product"""
-        # Verify category exists
-        category = self.category_repository.get_by_id(product_data.category_id)
-        if not category:
-            raise ValueError(f"Category with ID {product_data.category_id} not found")
-        
-        # Check if SKU already exists
-        existing_product = self.repository.get_by_sku(product_data.sku)
-        if existing_product:
-            raise ValueError(f"Product with SKU {product_data.sku} already exists")
+        """
+        Create a new product
         
-        # Create product
+        The category is validated against the in-memory catalog and the SKU
+        unique constraint by the insert itself: an unknown category raises
+        ResourceNotFoundError, a taken SKU DuplicateResourceError.
+        """
+        ensure_category_exists(self.repository.db, product_data.category_id)
         product = self.repository.create(product_data)
+        refresh_autocomplete_product(product)
+        refresh_facet_product(product)
+        refresh_catalog_product(product)
+        get_search_cache().bump_version()
         return ProductResponse.from_orm(product)
 
 
@@ -44,55 +59,129 @@ class GetProductUseCase:
         return ProductResponse.from_orm(product)
 
 
-class UpdateProductUseCase:
-    """Use case for updating a product"""
+class GetProductDetailUseCase:
+    """Use case for the product detail page"""
     
     def __init__(self, db: Session):
         self.repository = ProductRepository(db)
-        self.category_repository = CategoryRepository(db)
+        self.images = ListProductImagesUseCase(db)
     
-    def execute(self, product_id: int, product_data: ProductUpdate) -> ProductResponse:
-        """Update product"""
+    def execute(self, product_id: int) -> ProductDetailedResponse:
+        """Get product by ID with its images and rating summary (no AVG query)"""
         product = self.repository.get_by_id(product_id)
         if not product:
             raise ValueError(f"Product with ID {product_id} not found")
+        detail = ProductDetailedResponse.from_orm(product)
+        detail.images = self.images.execute(product_id)
+        detail.ratings_count = product.rating_count
+        if product.rating_count:
+            detail.ratings_average = round(product.rating_sum / product.rating_count, 2)
+        return detail
+
+
+class UpdateProductUseCase:
+    """Use case for updating a product"""
+    
+    def __init__(self, db: Session):
+        self.repository = ProductRepository(db)
+    
+    def execute(self, product_id: int, product_data: ProductUpdate) -> ProductResponse:
+        """
+        Update product
         
-        # If category is being updated, verify it exists
-        if product_data.category_id:
-            category = self.category_repository.get_by_id(product_data.category_id)
-            if not category:
-                raise ValueError(f"Category with ID {product_data.category_id} not found")
-        
-        # If SKU is being updated, check for duplicates
-        if product_data.sku and product_data.sku != product.sku:
-            existing_product = self.repository.get_by_sku(product_data.sku)
-            if existing_product:
-                raise ValueError(f"Product with SKU {product_data.sku} already exists")
-        
-        # Update product
+        An unknown category (checked against the in-memory catalog) raises
+        ResourceNotFoundError and a SKU taken by another product
+        DuplicateResourceError, the latter from the update itself.
+        """
+        ensure_category_exists(self.repository.db, product_data.category_id)
         updated_product = self.repository.update(product_id, product_data)
+        if not updated_product:
+            raise ValueError(f"Product with ID {product_id} not found")
+        refresh_autocomplete_product(updated_product)
+        refresh_facet_product(updated_product)
+        refresh_catalog_product(updated_product)
+        get_search_cache().bump_version()
         return ProductResponse.from_orm(updated_product)
 
 
 class ListProductsUseCase:
     """Use case for listing products"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, snapshots: Optional[ProductSnapshotReader] = None):
         self.repository = ProductRepository(db)
+        self.facet_index = get_facet_index()
+        self.snapshots = snapshots or get_product_snapshot_reader()
     
-    def execute(self, skip: int = 0, limit: int = 100) -> list[ProductResponse]:
-        """Get all active products"""
-        products = self.repository.get_active_products(skip, limit)
+    def execute(
+        self, skip: int = 0, limit: int = 100, filters: Optional[ProductFilters] = None
+    ) -> list[ProductResponse]:
+        """Get active products, optionally filtered (from the shared snapshot while it is fresh)"""
+        snapshot = None
+        if filters is None or filters.status == ProductStatus.ACTIVE:
+            snapshot = self.snapshots.current()
+        if snapshot is not None:
+            args = {} if filters is None else self._filter_args(filters)
+            args.pop("status", None)
+            products = snapshot.page(skip, limit, **args)
+        elif filters is None:
+            products = self.repository.get_active_products(skip, limit)
+        else:
+            products = self.repository.filter_products(
+                **self._filter_args(filters), skip=skip, limit=limit
+            )
         return [ProductResponse.from_orm(product) for product in products]
+    
+    def execute_faceted(
+        self, filters: ProductFilters, skip: int = 0, limit: int = 100
+    ) -> FacetedProductsResponse:
+        """Get a page of filtered products plus facet counts (from memory, no COUNT queries)"""
+        items = self.execute(skip, limit, filters)
+        counts = self.facet_index.counts(**self._filter_args(filters))
+        facets = ProductFacets(
+            categories=[
+                FacetValueCount(value=category_id, count=count)
+                for category_id, count in counts["categories"].items()
+            ],
+            price_ranges=[
+                PriceRangeCount(min=low, max=high, count=count)
+                for low, high, count in counts["price_ranges"]
+            ],
+            in_stock=[
+                FacetValueCount(value=value, count=count)
+                for value, count in counts["in_stock"].items()
+            ],
+            status=[
+                FacetValueCount(value=value, count=count)
+                for value, count in counts["status"].items()
+            ],
+        )
+        return FacetedProductsResponse(items=items, total=counts["total"], facets=facets)
+    
+    @staticmethod
+    def _filter_args(filters: ProductFilters) -> dict:
+        """Filters as repository/facet index keyword arguments"""
+        return {
+            "category_ids": filters.category_ids,
+            "min_price": filters.min_price,
+            "max_price": filters.max_price,
+            "in_stock": filters.in_stock,
+            "status": filters.status.value,
+        }
 
 
 class SearchProductsUseCase:
     """Use case for searching products"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, cache: Optional[SearchCache] = None):
         self.repository = ProductRepository(db)
+        self.cache = cache or get_search_cache()
     
     def execute(self, query: str, skip: int = 0, limit: int = 100) -> list[ProductResponse]:
-        """Search products"""
-        products = self.repository.search(query, skip, limit)
-        return [ProductResponse.from_orm(product) for product in products]
+        """Search products (cached per normalized query and page, identical searches coalesced)"""
+        query = normalize_query(query)
+        
+        def load() -> tuple[ProductResponse, ...]:
+            products = self.repository.search(query, skip, limit)
+            return tuple(ProductResponse.from_orm(product) for product in products)
+        
+        return list(self.cache.get_or_load((query, skip, limit), load))
@@ -0,0 +1,36 @@
+"""Product facet index use cases"""
+
+from sqlalchemy.orm import Session
+
+from app.infrastructure.repositories.product_repository import ProductRepository
+from app.infrastructure.services.facet_index import get_facet_index
+
+
+class BuildFacetIndexUseCase:
+    """Use case for (re)building the in-memory facet index"""
+    
+    def __init__(self, db: Session):
+        self.repository = ProductRepository(db)
+        self.index = get_facet_index()
+    
+    def execute(self) -> int:
+        """Load a narrow projection of all products and build the index"""
+        self.index.build(self.repository.get_facet_rows())
+        return len(self.index)
+
+
+def refresh_facet_product(product) -> None:
+    """Reflect a created/updated product in the facet index"""
+    get_facet_index().upsert_product(
+        product.id, product.category_id, product.price, product.stock, product.status
+    )
+
+
+def warm_facet_index() -> None:
+    """Build the facet index at startup"""
+    from app.infrastructure.database.database import SessionLocal
+    db = SessionLocal()
+    try:
+        BuildFacetIndexUseCase(db).execute()
+    finally:
+        db.close()
@@ -0,0 +1,102 @@
+"""Batched product lookups
+
+Product lookups go through a process-wide BatchLoader: concurrent
+single-product requests and the ids of a multi-get issued in the same
+event-loop tick are fetched with one query on one pooled connection.
+Active products are read from the shared catalog snapshot while it is
+fresh, so only the ids it does not have reach the database.
+"""
+
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.infrastructure.repositories.product_repository import ProductRepository
+from app.infrastructure.services.batch_loader import BatchLoader, RequestLoader
+from app.infrastructure.services.product_snapshot import (
+    ProductSnapshotReader, get_product_snapshot_reader
+)
+from app.schemas.product_schemas import ProductResponse, ProductBatchResponse
+
+# Largest number of ids in one query (and in one multi-get request)
+MAX_BATCH_SIZE = 100
+
+
+def make_product_batch_fn(
+    session_factory: Callable[[], Session],
+    snapshots: Optional[ProductSnapshotReader] = None,
+) -> Callable[[list[int]], dict[int, ProductResponse]]:
+    """Batch function loading products by id from the snapshot, then on a session of its own"""
+    def load_products(product_ids: list[int]) -> dict[int, ProductResponse]:
+        found = {}
+        snapshot = snapshots.current() if snapshots is not None else None
+        if snapshot is not None:
+            for product_id in product_ids:
+                record = snapshot.get(product_id)
+                if record is not None:
+                    found[product_id] = ProductResponse.from_orm(record)
+        # Products that are not active (or newer than the snapshot) come from the database
+        missing = [product_id for product_id in product_ids if product_id not in found]
+        if not missing:
+            return found
+        db = session_factory()
+        try:
+            for product in ProductRepository(db).get_by_ids(missing):
+                found[product.id] = ProductResponse.from_orm(product)
+            return found
+        finally:
+            db.close()
+    return load_products
+
+
+_product_loader: Optional[BatchLoader[int, ProductResponse]] = None
+
+
+def get_product_loader() -> BatchLoader[int, ProductResponse]:
+    """Get the process-wide product batch loader"""
+    global _product_loader
+    if _product_loader is None:
+        from app.infrastructure.database.database import SessionLocal
+        _product_loader = BatchLoader(
+            make_product_batch_fn(SessionLocal, get_product_snapshot_reader()), MAX_BATCH_SIZE
+        )
+    return _product_loader
+
+
+def get_request_product_loader() -> RequestLoader[int, ProductResponse]:
+    """Dependency giving each request a memoizing view of the product loader"""
+    return RequestLoader(get_product_loader())
+
+
+class GetProductBatchedUseCase:
+    """Use case for retrieving one product through the batch loader"""
+    
+    def __init__(self, loader: RequestLoader[int, ProductResponse]):
+        self.loader = loader
+    
+    async def execute(self, product_id: int) -> ProductResponse:
+        """Get product by ID"""
+        product = await self.loader.load(product_id)
+        if product is None:
+            raise ValueError(f"Product with ID {product_id} not found")
+        return product
+
+
+class GetProductsUseCase:
+    """Use case for retrieving several products at once"""
+    
+    def __init__(self, loader: RequestLoader[int, ProductResponse]):
+        self.loader = loader
+    
+    async def execute(self, product_ids: list[int]) -> ProductBatchResponse:
+        """Get products by ID, in request order, plus the ids that do not exist"""
+        if len(product_ids) > MAX_BATCH_SIZE:
+            raise ValueError(f"At most {MAX_BATCH_SIZE} products can be requested at once")
+        unique_ids = list(dict.fromkeys(product_ids))
+        products = await self.loader.load_many(unique_ids)
+        return ProductBatchResponse(
+            items=[product for product in products if product is not None],
+            missing=[
+                product_id for product_id, product in zip(unique_ids, products) if product is None
+            ],
+        )
@@ -0,0 +1,87 @@
+"""Catalog cache invalidation use cases
+
+Products and categories written by other workers reach this worker's caches
+through the invalidation bus: changed rows are reloaded into the facet,
+autocomplete and category indexes (deleted ones removed), and cached search
+results are dropped. A None id set (missed messages, very large writes)
+rebuilds the indexes from the database.
+"""
+
+from typing import Optional
+
+from app.application.categories.catalog import (
+    BuildCategoryCatalogUseCase, refresh_catalog_product
+)
+from app.application.products.autocomplete import (
+    BuildAutocompleteIndexUseCase, refresh_autocomplete_product
+)
+from app.application.products.facets import BuildFacetIndexUseCase, refresh_facet_product
+from app.infrastructure.repositories.product_repository import (
+    ProductRepository, CategoryRepository
+)
+from app.infrastructure.services.autocomplete_index import get_autocomplete_index
+from app.infrastructure.services.cache_invalidation import (
+    CacheInvalidationBus, get_invalidation_bus
+)
+from app.infrastructure.services.category_catalog import get_category_catalog
+from app.infrastructure.services.facet_index import get_facet_index
+from app.infrastructure.services.search_cache import get_search_cache
+
+
+def refresh_cached_products(product_ids: Optional[frozenset[int]]) -> None:
+    """Reload products written elsewhere into the in-memory indexes"""
+    from app.infrastructure.database.database import SessionLocal
+    db = SessionLocal()
+    try:
+        if product_ids is None:
+            BuildFacetIndexUseCase(db).execute()
+            BuildAutocompleteIndexUseCase(db).execute()
+            BuildCategoryCatalogUseCase(db).execute()
+        else:
+            products = ProductRepository(db).get_by_ids(list(product_ids))
+            for product in products:
+                refresh_autocomplete_product(product)
+                refresh_facet_product(product)
+                refresh_catalog_product(product)
+            for product_id in product_ids - {product.id for product in products}:
+                get_autocomplete_index().remove_product(product_id)
+                get_facet_index().remove_product(product_id)
+                get_category_catalog().remove_product(product_id)
+    finally:
+        db.close()
+    get_search_cache().bump_version()
+
+
+def refresh_cached_categories(category_ids: Optional[frozenset[int]]) -> None:
+    """Reload categories written elsewhere into the category catalog"""
+    from app.infrastructure.database.database import SessionLocal
+    db = SessionLocal()
+    try:
+        categories = [] if category_ids is None else CategoryRepository(db).get_by_ids(
+            list(category_ids)
+        )
+        if category_ids is None or len(categories) < len(category_ids):
+            # The catalog has no single-category removal
+            BuildCategoryCatalogUseCase(db).execute()
+            return
+        catalog = get_category_catalog()
+        for category in categories:
+            catalog.upsert_category(
+                category.id, category.name, category.description, category.icon,
+                category.parent_id,
+            )
+    finally:
+        db.close()
+
+
+def subscribe_catalog_caches(bus: CacheInvalidationBus) -> None:
+    """Keep this worker's catalog caches in step with writes made by others"""
+    bus.subscribe("product", refresh_cached_products)
+    bus.subscribe("category", refresh_cached_categories)
+
+
+def start_cache_invalidation() -> None:
+    """Subscribe the catalog caches and start listening (before they are warmed)"""
+    bus = get_invalidation_bus()
+    subscribe_catalog_caches(bus)
+    bus.start()
@@ -0,0 +1,78 @@
+"""Frequently-bought-together recommendation use cases"""
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.repositories.order_repository import OrderItemRepository
+from app.infrastructure.repositories.product_repository import ProductRepository
+from app.infrastructure.services.recommendation_engine import (
+    CooccurrenceModel, RecommendationStore, get_recommendation_index
+)
+from app.schemas.product_schemas import RelatedProductResponse
+
+
+def _pair_batches(repository: OrderItemRepository, after_order_id: int):
+    """Convert streamed (order_id, product_id) rows into NumPy batches"""
+    for rows in repository.iter_order_product_pairs(
+        after_order_id, settings.RECOMMENDATIONS_BATCH_SIZE
+    ):
+        pairs = np.asarray(rows, dtype=np.int64)
+        yield pairs[:, 0], pairs[:, 1]
+
+
+class BuildRecommendationsUseCase:
+    """Use case for rebuilding the co-occurrence model from all order items"""
+    
+    def __init__(self, db: Session):
+        self.order_item_repository = OrderItemRepository(db)
+        self.store = RecommendationStore(settings.RECOMMENDATIONS_DIR)
+    
+    def execute(self) -> dict:
+        """Rebuild from scratch and publish top-K neighbours"""
+        model = CooccurrenceModel()
+        model.add(_pair_batches(self.order_item_repository, 0))
+        return self.store.publish(model, settings.RECOMMENDATIONS_TOP_K)
+
+
+class UpdateRecommendationsUseCase:
+    """Use case for folding orders placed since the last build into the model"""
+    
+    def __init__(self, db: Session):
+        self.order_item_repository = OrderItemRepository(db)
+        self.store = RecommendationStore(settings.RECOMMENDATIONS_DIR)
+    
+    def execute(self) -> dict:
+        """Add new orders and republish only the neighbours that changed"""
+        model = self.store.load_model()
+        changed = model.add(_pair_batches(self.order_item_repository, model.last_order_id))
+        if not len(changed) and self.store.read_meta():
+            return self.store.read_meta()
+        return self.store.publish(model, settings.RECOMMENDATIONS_TOP_K, changed_rows=changed)
+
+
+class GetRelatedProductsUseCase:
+    """Use case for retrieving products frequently bought together"""
+    
+    def __init__(self, db: Session):
+        self.repository = ProductRepository(db)
+        self.index = get_recommendation_index()
+    
+    def execute(self, product_id: int, limit: int = 10) -> list[RelatedProductResponse]:
+        """Get related active products, best match first"""
+        related = self.index.related(product_id, limit)
+        if not related:
+            return []
+        products = {
+            product.id: product
+            for product in self.repository.get_by_ids([related_id for related_id, _ in related])
+        }
+        results = []
+        for related_id, times_bought_together in related:
+            product = products.get(related_id)
+            if product is None or product.status != "active":
+                continue
+            response = RelatedProductResponse.from_orm(product)
+            response.times_bought_together = times_bought_together
+            results.append(response)
+        return results
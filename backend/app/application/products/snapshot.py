@@ -0,0 +1,36 @@
+"""Shared product snapshot use cases"""
+
+import time
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.repositories.cache_version_repository import CacheVersionRepository
+from app.infrastructure.repositories.product_repository import ProductRepository
+from app.infrastructure.services.product_snapshot import write_product_snapshot
+
+
+class BuildProductSnapshotUseCase:
+    """Use case for publishing the memory-mapped snapshot of active products"""
+    
+    def __init__(self, db: Session, path: str = None):
+        self.repository = ProductRepository(db)
+        self.versions = CacheVersionRepository(db)
+        self.path = path or settings.CATALOG_SNAPSHOT_PATH
+    
+    def source_version(self) -> int:
+        """Current product version (its newest row in cache_writes)"""
+        return self.versions.get_versions().get("product", 0)
+    
+    def execute(self) -> dict:
+        """
+        Serialize every active product and swap the file in
+        
+        The version is read before the rows, so a write committing in
+        between makes the snapshot look older than it is, never newer.
+        """
+        start = time.perf_counter()
+        version = self.source_version()
+        result = write_product_snapshot(self.path, self.repository.iter_snapshot_rows(), version)
+        result["seconds"] = round(time.perf_counter() - start, 3)
+        return result
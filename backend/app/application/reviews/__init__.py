@@ -0,0 +1 @@
+"""Reviews use cases"""
@@ -0,0 +1,64 @@
+"""Review use cases"""
+
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.infrastructure.repositories.review_repository import ReviewRepository
+from app.schemas.review_schemas import ReviewCreate, ReviewResponse, ReviewPage
+from app.utils.exceptions import DuplicateResourceError, ResourceNotFoundError
+
+
+class CreateReviewUseCase:
+    """Use case for reviewing a product"""
+    
+    def __init__(self, db: Session):
+        self.repository = ReviewRepository(db)
+    
+    def execute(self, product_id: int, user_id: int, review_data: ReviewCreate) -> ReviewResponse:
+        """Add a review, updating the product's rating aggregate in the same transaction"""
+        values = {"product_id": product_id, "user_id": user_id, **review_data.dict()}
+        try:
+            review = self.repository.add_review(values)
+        except DuplicateResourceError as exc:
+            raise DuplicateResourceError(
+                "You have already reviewed this product", field="product_id"
+            ) from exc
+        if review is None:
+            raise ResourceNotFoundError(
+                f"Product with ID {product_id} not found", field="product_id"
+            )
+        return ReviewResponse.from_orm(review)
+
+
+class DeleteReviewUseCase:
+    """Use case for deleting a review"""
+    
+    def __init__(self, db: Session):
+        self.repository = ReviewRepository(db)
+    
+    def execute(self, review_id: int, user_id: Optional[int] = None) -> int:
+        """Delete a review (the user's own unless user_id is None), return its product id"""
+        product_id = self.repository.remove_review(review_id, user_id)
+        if product_id is None:
+            raise ResourceNotFoundError(f"Review with ID {review_id} not found")
+        return product_id
+
+
+class ListReviewsUseCase:
+    """Use case for paging through a product's reviews"""
+    
+    def __init__(self, db: Session):
+        self.repository = ReviewRepository(db)
+    
+    def execute(self, product_id: int, limit: int = 20, cursor: Optional[int] = None) -> ReviewPage:
+        """
+        Reviews newest first, continuing below the cursor
+        
+        The cursor is the last review id of the previous page, so every page
+        is one index range scan however deep the client pages.
+        """
+        reviews = self.repository.get_page(product_id, limit + 1, before_id=cursor)
+        items = [ReviewResponse.from_orm(review) for review in reviews[:limit]]
+        next_cursor = items[-1].id if len(reviews) > limit else None
+        return ReviewPage(items=items, next_cursor=next_cursor)
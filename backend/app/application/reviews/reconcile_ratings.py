@@ -0,0 +1,94 @@
+"""Rating aggregate reconciliation"""
+
+import logging
+import threading
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.repositories.review_repository import ReviewRepository
+
+logger = logging.getLogger("app.reviews")
+
+
+class ReconcileRatingsUseCase:
+    """Use case for correcting product rating aggregates that drifted from the reviews"""
+    
+    def __init__(self, db: Session):
+        self.repository = ReviewRepository(db)
+    
+    def execute(self, batch_size: int = 1000) -> int:
+        """Recompute the aggregates of drifted products, return how many were fixed"""
+        # Collect first: recomputing commits, which would end the streaming scan
+        drifted = list(self.repository.find_drifted_products())
+        fixed = 0
+        for start in range(0, len(drifted), batch_size):
+            fixed += self.repository.recompute_aggregates(drifted[start:start + batch_size])
+        return fixed
+
+
+class RatingReconciler:
+    """Background worker that reconciles rating aggregates periodically"""
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        interval: float = 3600.0,
+        batch_size: int = 1000,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_fixed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Start the worker thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="rating-reconciler", daemon=True
+            )
+            self._thread.start()
+    
+    def reconcile(self) -> int:
+        """Run one reconciliation pass"""
+        db = self.session_factory()
+        try:
+            self.last_fixed = ReconcileRatingsUseCase(db).execute(self.batch_size)
+            return self.last_fixed
+        finally:
+            db.close()
+    
+    def _run(self) -> None:
+        """Worker loop"""
+        while not self._stop.wait(self.interval):
+            try:
+                self.reconcile()
+            except Exception:
+                # Drift is left for the next pass
+                logger.exception("Rating reconciliation failed")
+    
+    def stop(self) -> None:
+        """Stop the worker thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_rating_reconciler: Optional[RatingReconciler] = None
+
+
+def get_rating_reconciler() -> RatingReconciler:
+    """Get the process-wide rating reconciler"""
+    global _rating_reconciler
+    if _rating_reconciler is None:
+        from app.infrastructure.database.database import SessionLocal
+        _rating_reconciler = RatingReconciler(
+            SessionLocal,
+            interval=settings.REVIEW_RECONCILE_INTERVAL_SECONDS,
+            batch_size=settings.REVIEW_RECONCILE_BATCH_SIZE,
+        )
+    return _rating_reconciler
@@ -2,6 +2,7 @@
 
 from sqlalchemy.orm import Session
 
+from app.application.auth.login import RevokeUserTokensUseCase
 from app.infrastructure.repositories.user_repository import UserRepository
 from app.schemas.user_schemas import UserCreate, UserUpdate, UserResponse
 from app.core.security import hash_password, verify_password
@@ -14,20 +15,13 @@ class CreateUserUseCase:
         self.repository = UserRepository(db)
     
     def execute(self, user_data: UserCreate) -> UserResponse:
-        """Create a new user"""
-        # Check if user already exists
-        existing_user = self.repository.get_by_email_or_username(
-            user_data.email, user_data.username
-        )
-        if existing_user:
-            raise ValueError("User with this email or username already exists")
-        
+        """Create a new user (a taken email or username raises DuplicateResourceError)"""
         # Hash password
         user_dict = user_data.dict()
         user_dict["hashed_password"] = hash_password(user_dict.pop("password"))
         
-        # Create user
-        user = self.repository.create(UserCreate(**user_dict))
+        # Create user; the unique constraints reject duplicates
+        user = self.repository.create(user_dict)
         return UserResponse.from_orm(user)
 
 
@@ -50,12 +44,15 @@ class UpdateUserUseCase:
     
     def __init__(self, db: Session):
         self.repository = UserRepository(db)
+        self.revoke_tokens = RevokeUserTokensUseCase(db)
     
     def execute(self, user_id: int, user_data: UserUpdate) -> UserResponse:
-        """Update user"""
+        """Update user (deactivating one ends all of its login sessions)"""
         user = self.repository.update(user_id, user_data)
         if not user:
             raise ValueError(f"User with ID {user_id} not found")
+        if user_data.is_active is False:
+            self.revoke_tokens.execute(user_id, "deactivated")
         return UserResponse.from_orm(user)
 
 
@@ -64,9 +61,11 @@ class DeleteUserUseCase:
     
     def __init__(self, db: Session):
         self.repository = UserRepository(db)
+        self.revoke_tokens = RevokeUserTokensUseCase(db)
     
     def execute(self, user_id: int) -> bool:
-        """Delete user"""
+        """Delete user (ending all of its login sessions)"""
+        self.revoke_tokens.execute(user_id, "deleted")
         result = self.repository.delete(user_id)
         if not result:
             raise ValueError(f"User with ID {user_id} not found")
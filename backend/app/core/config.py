@@ -23,6 +23,9 @@ class Settings(BaseSettings):
     DATABASE_ECHO: bool = False
     DATABASE_POOL_SIZE: int = 20
     DATABASE_MAX_OVERFLOW: int = 40
+    DATABASE_STATEMENT_CACHE_SIZE: int = 1000
+    # Executions before psycopg (3) prepares a statement on the server, negative disables
+    DATABASE_PREPARE_THRESHOLD: int = 5
     
     # JWT
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
@@ -30,18 +33,105 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Token revocation (Bloom filter over revoked refresh token ids and families)
+    TOKEN_REVOCATION_CAPACITY: int = 1000000
+    TOKEN_REVOCATION_ERROR_RATE: float = 0.001
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 2.0
+    TOKEN_REVOCATION_REBUILD_SECONDS: float = 3600.0
+    
     # CORS
     CORS_ORIGINS: list = ["http://localhost:3000", "http://localhost:8080"]
     CORS_ALLOW_CREDENTIALS: bool = True
     CORS_ALLOW_METHODS: list = ["*"]
     CORS_ALLOW_HEADERS: list = ["*"]
     
+    # Idempotency-Key support
+    IDEMPOTENCY_STORE: str = "memory"  # "memory" or "database"
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    # How long an in-flight request holds its key (longer than any request runs)
+    IDEMPOTENCY_LEASE_SECONDS: int = 60
+    IDEMPOTENCY_WAIT_TIMEOUT_SECONDS: float = 30.0
+    IDEMPOTENCY_MAX_ENTRIES: int = 100000
+    
+    # Order history partitioning (PostgreSQL)
+    PARTITION_MONTHS_AHEAD: int = 3
+    ARCHIVE_AFTER_MONTHS: int = 24
+    ARCHIVE_DIR: str = "var/archive"
+    
+    # Logging (JSON lines written by a background thread)
+    LOG_LEVEL: str = "INFO"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SUCCESS_SAMPLE_RATE: float = 1.0
+    LOG_SLOW_REQUEST_MS: float = 1000.0
+    LOG_SLOW_QUERY_MS: float = 200.0
+    LOG_FLUSH_INTERVAL_SECONDS: float = 0.05
+    
+    # Product search result cache
+    SEARCH_CACHE_TTL_SECONDS: float = 30.0
+    SEARCH_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Product autocomplete (in-memory index, re-ranked by units sold periodically)
+    AUTOCOMPLETE_POPULARITY_REFRESH_SECONDS: float = 300.0
+    
+    # Product reviews (rating aggregate reconciliation)
+    REVIEW_RECONCILE_INTERVAL_SECONDS: float = 3600.0
+    REVIEW_RECONCILE_BATCH_SIZE: int = 1000
+    
+    # Product images (content-addressed storage, thumbnails in a process pool)
+    IMAGE_STORAGE: str = "local"  # "local" or "memory"
+    IMAGE_STORAGE_DIR: str = "var/images"
+    IMAGE_MAX_UPLOAD_BYTES: int = 15 * 1024 * 1024
+    IMAGE_MAX_PIXELS: int = 40000000
+    IMAGE_THUMBNAIL_SIZES: list = [160, 480, 1024]
+    IMAGE_WEBP_QUALITY: int = 80
+    IMAGE_WORKERS: int = 2
+    
+    # Cart pricing (tax in basis points of the discounted line amount: 2100 = 21%)
+    SALES_TAX_BASIS_POINTS: int = 0
+    
+    # Carts (in memory, written behind to the carts table)
+    CART_BACKEND: str = "local"
+    CART_FLUSH_INTERVAL_SECONDS: float = 2.0
+    CART_IDLE_SECONDS: float = 1800.0
+    CART_EXPIRY_DAYS: int = 30
+    CART_SWEEP_INTERVAL_SECONDS: float = 300.0
+    
+    # Cross-worker cache invalidation (pg_notify on commit, versions checked as a fallback)
+    CACHE_INVALIDATION_TRANSPORT: str = "postgres"  # "postgres" or "local"
+    CACHE_INVALIDATION_CHANNEL: str = "cache_invalidation"
+    CACHE_INVALIDATION_CHECK_SECONDS: float = 5.0
+    
+    # Shared product snapshot (built by "manage.py build-catalog-snapshot", mapped by workers)
+    CATALOG_SNAPSHOT_PATH: str = "var/catalog/products.snapshot"
+    CATALOG_SNAPSHOT_CHECK_SECONDS: float = 1.0
+    
+    # Bulk order status transitions (orders per UPDATE and per transaction)
+    ORDER_TRANSITION_BATCH_SIZE: int = 1000
+    
+    # Request profiling
+    PROFILING_DIR: str = "var/profiles"
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_SECONDS: float = 0.005
+    PROFILING_RETENTION_MINUTES: int = 60
+    
+    # Recommendations ("frequently bought together")
+    RECOMMENDATIONS_DIR: str = "var/recommendations"
+    RECOMMENDATIONS_TOP_K: int = 20
+    RECOMMENDATIONS_BATCH_SIZE: int = 100000
+    
     # External Services
     SMTP_SERVER: Optional[str] = None
     SMTP_PORT: Optional[int] = None
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
     SMTP_FROM: Optional[str] = None
+    SMTP_USE_TLS: bool = True
+    SMTP_TIMEOUT_SECONDS: int = 10
+    SMTP_POOL_SIZE: int = 4
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_BATCH_INTERVAL_SECONDS: float = 2.0
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_SHUTDOWN_TIMEOUT_SECONDS: float = 10.0
     
     # AWS/Payment Gateways
     AWS_ACCESS_KEY: Optional[str] = None
@@ -51,6 +141,12 @@ class Settings(BaseSettings):
     # Stripe
     STRIPE_API_KEY: Optional[str] = None
     STRIPE_WEBHOOK_SECRET: Optional[str] = None
+    STRIPE_WEBHOOK_TOLERANCE_SECONDS: int = 300
+    PAYMENT_EVENTS_BATCH_SIZE: int = 500
+    PAYMENT_EVENTS_POLL_INTERVAL_SECONDS: float = 1.0
+    # Events whose payment is not stored yet are retried with doubling delays
+    PAYMENT_EVENTS_MAX_ATTEMPTS: int = 8
+    PAYMENT_EVENTS_RETRY_BACKOFF_SECONDS: float = 2.0
     
     class Config:
         env_file = ".env"
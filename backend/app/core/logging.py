@@ -0,0 +1,342 @@
+"""Structured, non-blocking application and access logging
+
+Every log record is put on a bounded in-memory queue by a QueueHandler on
+the root logger, with its message and any traceback already rendered to
+text; a QueueListener thread encodes the records as one JSON object per
+line and writes them out, so request handling never encodes JSON or does
+I/O for logging. When the queue is full (the output cannot keep up)
+records are dropped and counted rather than blocking requests.
+
+A RequestContext in a context variable carries the request id, route and
+time spent in the database (accumulated by SQLAlchemy engine events), and
+is attached to every record logged while a request is handled, including
+records logged from threadpool workers running sync endpoints. The same
+engine events count how often statements were found in SQLAlchemy's
+compiled statement cache.
+"""
+
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+ACCESS_LOGGER = "app.access"
+DB_LOGGER = "app.db"
+
+# Longest statement text included in slow query records
+MAX_STATEMENT_LENGTH = 500
+
+# Standard LogRecord attributes, everything else passed as `extra` is a field
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+# Renders tracebacks when records are queued
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+
+@dataclass(slots=True)
+class RequestContext:
+    """Request currently being handled"""
+    request_id: str
+    route: str
+    db_seconds: float = 0.0
+    db_statements: int = 0
+    db_cache_misses: int = 0
+    db_wait_seconds: float = 0.0
+    db_hold_seconds: float = 0.0
+
+
+_request_context: ContextVar[Optional[RequestContext]] = ContextVar(
+    "request_context", default=None
+)
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """Context of the request being handled, if any"""
+    return _request_context.get()
+
+
+def bind_request_context(context: Optional[RequestContext]):
+    """Make a request context current, returns a token for reset_request_context"""
+    return _request_context.set(context)
+
+
+def reset_request_context(token) -> None:
+    """Restore the context current before bind_request_context"""
+    _request_context.reset(token)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with request context and extra fields"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, separators=(",", ":"), ensure_ascii=False)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops (and counts) records instead of blocking when full"""
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Copy of the record with the request context and everything it refers to resolved
+        
+        The message is merged with its args and a traceback rendered to text
+        here, while the objects they refer to are as they were when logged,
+        and the queued record no longer keeps them (or the exception's
+        frames) alive. Only the JSON encoding is left to the listener thread.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        context = _request_context.get()
+        if context is not None and not hasattr(record, "request_id"):
+            record.request_id = context.request_id
+            record.route = context.route
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+    """
+    Queue listener writing records out in batches
+    
+    Waking the writer thread for every record makes it compete with request
+    handling for the GIL once per record; instead, after the first record
+    of a batch it sleeps for the flush interval and then drains whatever
+    has accumulated.
+    """
+    
+    def __init__(self, log_queue: queue.Queue, *handlers, flush_interval: float = 0.05):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+    
+    def enqueue_sentinel(self) -> None:
+        # Stopping must not fail on a full queue
+        self.queue.put(self._sentinel)
+    
+    def _monitor(self) -> None:
+        log_queue = self.queue
+        while True:
+            record = log_queue.get()
+            if record is self._sentinel:
+                return
+            self.handle(record)
+            time.sleep(self.flush_interval)
+            while True:
+                try:
+                    record = log_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is self._sentinel:
+                    return
+                self.handle(record)
+
+
+class LogPipeline:
+    """Root queue handler, the listener writing its records, and sampling of success logs"""
+    
+    def __init__(
+        self,
+        level: str = "INFO",
+        queue_size: int = 10000,
+        success_sample_rate: float = 1.0,
+        slow_request_ms: float = 1000.0,
+        slow_query_ms: float = 200.0,
+        flush_interval: float = 0.05,
+        stream=None,
+    ):
+        self.level = level
+        self.success_sample_rate = success_sample_rate
+        self.slow_request_ms = slow_request_ms
+        self.slow_query_ms = slow_query_ms
+        self.sampled_out = 0
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.handler = BoundedQueueHandler(self.queue)
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(JsonFormatter())
+        self.listener = _Listener(self.queue, output, flush_interval=flush_interval)
+        self._installed: list[logging.Handler] = []
+        self._running = False
+    
+    def start(self) -> None:
+        """Route every log record through the queue and start writing them out"""
+        if self._running:
+            return
+        root = logging.getLogger()
+        self._installed = list(root.handlers)
+        for handler in self._installed:
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+        self.listener.start()
+        self._running = True
+    
+    def stop(self) -> None:
+        """Write out the queued records and restore the previous handlers"""
+        if not self._running:
+            return
+        root = logging.getLogger()
+        root.removeHandler(self.handler)
+        for handler in self._installed:
+            root.addHandler(handler)
+        self.listener.stop()
+        self._running = False
+    
+    def should_log_success(self, latency_ms: float) -> bool:
+        """Whether to keep the access record of a successful request (slow ones always)"""
+        if latency_ms >= self.slow_request_ms or random.random() < self.success_sample_rate:
+            return True
+        self.sampled_out += 1
+        return False
+    
+    def stats(self) -> dict:
+        """Queue depth and records lost to a full queue or to sampling"""
+        return {
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "dropped": self.handler.dropped,
+            "sampled_out": self.sampled_out,
+        }
+
+
+class StatementCacheStats:
+    """Compiled statement cache outcome of the statements an engine executed
+    
+    A miss means the statement was compiled; "uncached" statements (textual
+    SQL, or caching disabled) are compiled again on every execution.
+    """
+    
+    def __init__(self):
+        self.counts = {"hits": 0, "misses": 0, "uncached": 0}
+    
+    def record(self, outcome: str) -> None:
+        """Count one execution"""
+        self.counts[outcome] += 1
+    
+    def info(self, engine=None) -> dict:
+        """Counts, hit ratio and, given the engine, how full its cache is"""
+        counts = dict(self.counts)
+        lookups = counts["hits"] + counts["misses"]
+        info = {**counts, "hit_ratio": round(counts["hits"] / lookups, 4) if lookups else None}
+        cache = getattr(engine, "_compiled_cache", None)
+        if cache is not None:
+            info["entries"] = len(cache)
+            info["capacity"] = cache.capacity
+        return info
+
+
+_statement_cache_stats = StatementCacheStats()
+
+
+def get_statement_cache_stats() -> StatementCacheStats:
+    """Get the process-wide compiled statement cache counters"""
+    return _statement_cache_stats
+
+
+def instrument_engine(
+    engine,
+    pipeline: Optional[LogPipeline] = None,
+    cache_stats: Optional[StatementCacheStats] = None,
+) -> None:
+    """Add statement time to the request, log slow statements, count statement cache hits"""
+    from sqlalchemy import event
+    from sqlalchemy.engine.interfaces import CacheStats
+    
+    db_logger = logging.getLogger(DB_LOGGER)
+    cache_stats = cache_stats or _statement_cache_stats
+    outcomes = {CacheStats.CACHE_HIT: "hits", CacheStats.CACHE_MISS: "misses"}
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("statement_start", []).append(time.perf_counter())
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["statement_start"].pop()
+        outcome = outcomes.get(getattr(context, "cache_hit", None), "uncached")
+        cache_stats.record(outcome)
+        request = _request_context.get()
+        if request is not None:
+            request.db_seconds += elapsed
+            request.db_statements += 1
+            if outcome == "misses":
+                request.db_cache_misses += 1
+        elapsed_ms = elapsed * 1000
+        if elapsed_ms >= (pipeline or get_log_pipeline()).slow_query_ms:
+            db_logger.warning(
+                "slow query",
+                extra={
+                    "duration_ms": round(elapsed_ms, 2),
+                    "statement": statement[:MAX_STATEMENT_LENGTH],
+                    "executemany": executemany,
+                },
+            )
+
+
+_log_pipeline: Optional[LogPipeline] = None
+
+
+def get_log_pipeline() -> LogPipeline:
+    """Get the process-wide log pipeline"""
+    global _log_pipeline
+    if _log_pipeline is None:
+        from app.core.config import settings
+        _log_pipeline = LogPipeline(
+            level=settings.LOG_LEVEL,
+            queue_size=settings.LOG_QUEUE_SIZE,
+            success_sample_rate=settings.LOG_SUCCESS_SAMPLE_RATE,
+            slow_request_ms=settings.LOG_SLOW_REQUEST_MS,
+            slow_query_ms=settings.LOG_SLOW_QUERY_MS,
+            flush_interval=settings.LOG_FLUSH_INTERVAL_SECONDS,
+        )
+    return _log_pipeline
+
+
+def configure_logging() -> LogPipeline:
+    """Start the process-wide log pipeline"""
+    pipeline = get_log_pipeline()
+    pipeline.start()
+    return pipeline
+
+
+def shutdown_logging() -> None:
+    """Flush and stop the process-wide log pipeline"""
+    if _log_pipeline is not None:
+        _log_pipeline.stop()
@@ -0,0 +1,51 @@
+"""Order fulfilment state machine
+
+    pending -> confirmed -> processing -> shipped -> delivered
+       |           |             |
+       +-----------+-------------+--> cancelled
+
+Orders can be cancelled until they ship; delivered and cancelled orders
+are final. Statuses are the values of OrderStatus (OrderStatusEnum, the
+str enum of the models and schemas, compares equal to them).
+"""
+
+from app.core.constants import OrderStatus
+from app.utils.exceptions import InvalidOrderTransitionError
+
+TRANSITIONS: dict[str, frozenset[str]] = {
+    OrderStatus.PENDING: frozenset({OrderStatus.CONFIRMED, OrderStatus.CANCELLED}),
+    OrderStatus.CONFIRMED: frozenset({OrderStatus.PROCESSING, OrderStatus.CANCELLED}),
+    OrderStatus.PROCESSING: frozenset({OrderStatus.SHIPPED, OrderStatus.CANCELLED}),
+    OrderStatus.SHIPPED: frozenset({OrderStatus.DELIVERED}),
+    OrderStatus.DELIVERED: frozenset(),
+    OrderStatus.CANCELLED: frozenset(),
+}
+
+
+def _value(status) -> str:
+    return getattr(status, "value", status)
+
+
+def can_transition(current, target) -> bool:
+    """Whether an order in the current status may move to the target status"""
+    return _value(target) in TRANSITIONS.get(_value(current), ())
+
+
+def source_statuses(target) -> list[str]:
+    """Statuses an order may move to the target status from, in fulfilment order"""
+    target = _value(target)
+    return [status for status in OrderStatus.ALL_STATUSES if target in TRANSITIONS[status]]
+
+
+def transition_error(current, target) -> str:
+    """Why an order in the current status cannot move to the target status"""
+    current, target = _value(current), _value(target)
+    if current == target:
+        return f"Order is already {target}"
+    return f"Cannot change an order from {current} to {target}"
+
+
+def check_transition(current, target) -> None:
+    """Raise InvalidOrderTransitionError unless current -> target is allowed"""
+    if not can_transition(current, target):
+        raise InvalidOrderTransitionError(transition_error(current, target))
@@ -1,23 +1,60 @@
 """Database configuration and session management"""
 
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
-from sqlalchemy.pool import QueuePool
 
 from app.core.config import settings
+from app.core.logging import instrument_engine
+from app.infrastructure.database.pool import (
+    MeteredQueuePool, PooledSession, add_request_session
+)
+
+
+
+def driver_connect_args(database_url: str, prepare_threshold: int) -> dict:
+    """Driver arguments for server-side prepared statements, where the driver has them
+    
+    psycopg (3) prepares a statement on the server once it has run
+    prepare_threshold times on a connection and executes the prepared plan
+    after that; repository statements render the same SQL on every call, so
+    they qualify. A negative threshold turns this off (required behind
+    PgBouncer in transaction mode). psycopg2 and SQLite have no server-side
+    prepared statements.
+    """
+    if make_url(database_url).get_driver_name() == "psycopg":
+        return {"prepare_threshold": prepare_threshold if prepare_threshold >= 0 else None}
+    return {}
 
 
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
-    poolclass=QueuePool,
+    # Records checkout waits and connection hold times (engine.pool.metrics)
+    poolclass=MeteredQueuePool,
     pool_size=settings.DATABASE_POOL_SIZE,
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
     echo=settings.DATABASE_ECHO,
+    # Compiled statements kept per engine (each filter combination of a
+    # lambda statement is one entry)
+    query_cache_size=settings.DATABASE_STATEMENT_CACHE_SIZE,
+    connect_args=driver_connect_args(
+        settings.DATABASE_URL, settings.DATABASE_PREPARE_THRESHOLD
+    ),
 )
 
+# Per-request database time, slow query logging and statement cache counters
+instrument_engine(engine)
+
+if engine.dialect.name == "sqlite":
+    # Writes rely on foreign keys being enforced, which SQLite does not by default
+    @event.listens_for(engine, "connect")
+    def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
 # Session factory
 SessionLocal = sessionmaker(
+    class_=PooledSession,
     autocommit=False,
     autoflush=False,
     bind=engine,
@@ -29,8 +66,17 @@ Base = declarative_base()
 
 
 def get_db() -> Session:
-    """Dependency to get database session"""
+    """
+    Dependency to get database session
+    
+    No connection is checked out until the first statement, so requests
+    rejected before touching the database never take one. A write returns
+    its connection to the pool when it commits, and a read-only transaction
+    once the endpoint has returned (see SessionReleasingRoute), not when the
+    session is closed here after the response has been sent.
+    """
     db = SessionLocal()
+    add_request_session(db)
     try:
         yield db
     finally:
@@ -38,5 +84,7 @@ def get_db() -> Session:
 
 
 def init_db() -> None:
-    """Initialize the database"""
+    """Initialize the database: create missing tables, then upgrade existing ones"""
+    from app.infrastructure.database.schema import upgrade_schema
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
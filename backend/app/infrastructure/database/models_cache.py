@@ -0,0 +1,31 @@
+"""Database models for cross-worker cache invalidation"""
+
+from sqlalchemy import Column, BigInteger, DateTime, Index, Integer, Sequence, String, Text
+from sqlalchemy.sql import func
+
+from app.infrastructure.database.database import Base
+
+
+class CacheWrite(Base):
+    """Committed write to one cached entity type, appended in the writing transaction"""
+    __tablename__ = "cache_writes"
+    
+    # Taken from one sequence for every entity: writes never wait on each
+    # other for it, and the newest row of an entity is that entity's version
+    version = Column(
+        BigInteger().with_variant(Integer, "sqlite"), Sequence("cache_version_seq"),
+        primary_key=True,
+    )
+    # "product", "category", ...
+    entity = Column(String(32), nullable=False)
+    # Comma-separated ids of the rows written; NULL when all of them may have changed
+    ids = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_cache_writes_entity_version", "entity", "version"),
+        Index("ix_cache_writes_created_at", "created_at"),
+    )
+    
+    def __repr__(self):
+        return f"<CacheWrite(version={self.version}, entity={self.entity})>"
@@ -0,0 +1,21 @@
+"""Database models for shopping carts"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime
+
+from app.infrastructure.database.database import Base
+
+
+class Cart(Base):
+    """Persisted copy of a cart, written behind the in-memory cart store"""
+    __tablename__ = "carts"
+    
+    # "user:<id>" or "guest:<token>"
+    key = Column(String(64), primary_key=True)
+    # JSON object of product id -> quantity, in the order lines were added
+    items = Column(Text, nullable=False)
+    version = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<Cart(key={self.key})>"
@@ -0,0 +1,24 @@
+"""Database models for idempotency keys"""
+
+from sqlalchemy import Column, Integer, String, Text, LargeBinary, DateTime
+from sqlalchemy.sql import func
+
+from app.infrastructure.database.database import Base
+
+
+class IdempotencyKey(Base):
+    """Stored outcome of a request sent with an Idempotency-Key header"""
+    __tablename__ = "idempotency_keys"
+    
+    key = Column(String(64), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response_headers = Column(Text, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<IdempotencyKey(key={self.key}, status={self.status})>"
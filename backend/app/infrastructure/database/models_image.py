@@ -0,0 +1,44 @@
+"""Database models for product images"""
+
+from sqlalchemy import (
+    Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
+)
+from sqlalchemy.sql import func
+
+from app.infrastructure.database.database import Base
+
+
+class ImageAsset(Base):
+    """Stored image, identified by the SHA-256 of the uploaded bytes"""
+    __tablename__ = "image_assets"
+    
+    content_hash = Column(String(64), primary_key=True)
+    format = Column(String(10), nullable=False)  # Extension of the original
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    variants = Column(Text, nullable=False)  # Comma-separated variant names
+    
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<ImageAsset(content_hash={self.content_hash}, {self.width}x{self.height})>"
+
+
+class ProductImage(Base):
+    """Image shown on a product, in display order"""
+    __tablename__ = "product_images"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
+    content_hash = Column(String(64), ForeignKey("image_assets.content_hash"), nullable=False)
+    position = Column(Integer, nullable=False, default=0)
+    
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint("product_id", "content_hash", name="uq_product_images_product_hash"),
+    )
+    
+    def __repr__(self):
+        return f"<ProductImage(product_id={self.product_id}, content_hash={self.content_hash})>"
@@ -1,6 +1,8 @@
 """Database models for orders and related"""
 
-from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, Enum, ForeignKey, Boolean
+from sqlalchemy import (
+    Column, Integer, String, Text, Numeric, DateTime, Enum, ForeignKey, Boolean, Index
+)
 from sqlalchemy.sql import func
 from datetime import datetime
 import enum
@@ -26,12 +28,20 @@ class PaymentStatusEnum(str, enum.Enum):
     REFUNDED = "refunded"
 
 
+class WebhookEventStatusEnum(str, enum.Enum):
+    """Webhook event processing status enum"""
+    RECEIVED = "received"
+    PROCESSED = "processed"
+    IGNORED = "ignored"
+
+
 class Order(Base):
     """Order model"""
     __tablename__ = "orders"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # Indexed by ix_orders_user_created, which also serves lookups by user_id alone
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     order_number = Column(String(50), unique=True, nullable=False, index=True)
     status = Column(Enum(OrderStatusEnum), default=OrderStatusEnum.PENDING, nullable=False)
     total_amount = Column(Numeric(10, 2), nullable=False)
@@ -41,6 +51,13 @@ class Order(Base):
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
     
+    # Lead with the filter column and end with the partition key, so history
+    # queries read one index range per monthly partition
+    __table_args__ = (
+        Index("ix_orders_user_created", "user_id", "created_at"),
+        Index("ix_orders_status_created", "status", "created_at"),
+    )
+    
     def __repr__(self):
         return f"<Order(id={self.id}, order_number={self.order_number})>"
 
@@ -55,6 +72,34 @@ class OrderItem(Base):
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Numeric(10, 2), nullable=False)
     subtotal = Column(Numeric(10, 2), nullable=False)
+    
+    # Copy of the order's created_at: the partition key of order_items, and
+    # matched exactly by OrderItemRepository.get_by_order. Set by
+    # OrderItemRepository.add_to_order; the server default is only a backstop
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_order_items_order_created", "order_id", "created_at"),
+    )
+
+
+class OrderStatusHistory(Base):
+    """One status change of an order"""
+    __tablename__ = "order_status_history"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    # No foreign key: orders is partitioned, so its primary key is (id, created_at)
+    order_id = Column(Integer, nullable=False)
+    from_status = Column(Enum(OrderStatusEnum), nullable=False)
+    to_status = Column(Enum(OrderStatusEnum), nullable=False)
+    # User who made the change, None for changes made by payment events
+    changed_by = Column(Integer, nullable=True)
+    
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_order_status_history_order_created", "order_id", "created_at"),
+    )
 
 
 class Payment(Base):
@@ -70,3 +115,28 @@ class Payment(Base):
     
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class PaymentWebhookEvent(Base):
+    """Raw payment provider webhook event, deduplicated by provider event id"""
+    __tablename__ = "payment_webhook_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String(255), unique=True, nullable=False, index=True)
+    event_type = Column(String(100), nullable=False)
+    order_id = Column(Integer, nullable=True, index=True)
+    transaction_id = Column(String(255), nullable=True)
+    payload = Column(Text, nullable=False)
+    status = Column(
+        Enum(WebhookEventStatusEnum), default=WebhookEventStatusEnum.RECEIVED,
+        nullable=False, index=True
+    )
+    # Times processing was deferred because the event's payment was not stored yet
+    attempts = Column(Integer, default=0, server_default="0", nullable=False)
+    next_attempt_at = Column(DateTime, nullable=True)
+    
+    received_at = Column(DateTime, server_default=func.now(), nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<PaymentWebhookEvent(id={self.id}, event_id={self.event_id})>"
@@ -1,6 +1,8 @@
 """Database models for products"""
 
-from sqlalchemy import Column, Integer, String, Text, Numeric, Boolean, DateTime, Enum, ForeignKey
+from sqlalchemy import (
+    Column, Integer, String, Text, Numeric, Boolean, DateTime, Enum, ForeignKey, Index
+)
 from sqlalchemy.sql import func
 from datetime import datetime
 import enum
@@ -28,9 +30,23 @@ class Product(Base):
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
     status = Column(Enum(ProductStatusEnum), default=ProductStatusEnum.ACTIVE, nullable=False)
     
+    # Review aggregate, maintained in the same transaction as each review write
+    rating_sum = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_count = Column(Integer, default=0, server_default="0", nullable=False)
+    
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
     
+    __table_args__ = (
+        # Faceted browsing: status is always filtered, category/price usually
+        Index("ix_products_status_category_price", "status", "category_id", "price"),
+        Index("ix_products_status_price", "status", "price"),
+        Index(
+            "ix_products_in_stock", "status", "category_id",
+            postgresql_where=stock > 0, sqlite_where=stock > 0,
+        ),
+    )
+    
     def __repr__(self):
         return f"<Product(id={self.id}, name={self.name}, sku={self.sku})>"
 
@@ -43,6 +59,7 @@ class Category(Base):
     name = Column(String(100), nullable=False, unique=True, index=True)
     description = Column(Text, nullable=True)
     icon = Column(String(255), nullable=True)
+    parent_id = Column(Integer, ForeignKey("categories.id"), nullable=True, index=True)
     
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,33 @@
+"""Database models for product reviews"""
+
+from sqlalchemy import (
+    Column, Integer, SmallInteger, String, Text, DateTime, ForeignKey, Index,
+    CheckConstraint, UniqueConstraint
+)
+from sqlalchemy.sql import func
+
+from app.infrastructure.database.database import Base
+
+
+class Review(Base):
+    """Product review (one per user and product)"""
+    __tablename__ = "reviews"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    rating = Column(SmallInteger, nullable=False)
+    title = Column(String(150), nullable=True)
+    comment = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        CheckConstraint("rating BETWEEN 1 AND 5", name="ck_reviews_rating"),
+        UniqueConstraint("product_id", "user_id", name="uq_reviews_product_user"),
+        # Keyset pagination: newest first within a product is one index range
+        Index("ix_reviews_product_id_desc", "product_id", "id"),
+    )
+    
+    def __repr__(self):
+        return f"<Review(id={self.id}, product_id={self.product_id}, rating={self.rating})>"
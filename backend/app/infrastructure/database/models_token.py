@@ -0,0 +1,41 @@
+"""Database models for refresh token families and their revocation"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.infrastructure.database.database import Base
+
+
+class RevokedToken(Base):
+    """Revoked token id: a used refresh token jti or a whole token family"""
+    __tablename__ = "revoked_tokens"
+    
+    # Autoincrement id doubles as the sync cursor for other workers
+    id = Column(Integer, primary_key=True, index=True)
+    token_id = Column(String(64), unique=True, nullable=False, index=True)
+    kind = Column(String(20), nullable=False)  # "jti" or "family"
+    reason = Column(String(50), nullable=True)
+    
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<RevokedToken(token_id={self.token_id}, kind={self.kind})>"
+
+
+class TokenFamily(Base):
+    """Token family (one login session) of a user, so all of them can be revoked"""
+    __tablename__ = "token_families"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    family_id = Column(String(64), unique=True, nullable=False, index=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    
+    # Pushed forward on every refresh: the family is dead once this has passed
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<TokenFamily(family_id={self.family_id}, user_id={self.user_id})>"
@@ -0,0 +1,306 @@
+"""Monthly range partitioning of order history tables (PostgreSQL)
+
+orders, order_items and payments are partitioned by RANGE (created_at): one
+partition per calendar month plus a DEFAULT partition for rows outside the
+pre-created months. Queries with a created_at predicate only touch matching
+partitions, and old months are archived by detaching a partition instead of
+deleting rows.
+
+PostgreSQL requires the primary key and unique constraints of a partitioned
+table to include the partition key, so converted tables get a primary key
+on (id, created_at), formerly unique columns get plain indexes, and foreign
+keys referencing orders are dropped. Foreign keys to unpartitioned tables
+(users, products) are kept.
+"""
+
+import gzip
+import os
+import re
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+from sqlalchemy import Table, UniqueConstraint, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.infrastructure.database.database import Base
+
+PARTITIONED_TABLES = ("orders", "order_items", "payments")
+PARTITION_KEY = "created_at"
+DEFAULT_SUFFIX = "_default"
+
+_PARTITION_RE = re.compile(r"^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+def month_start(value: date) -> date:
+    """First day of the month of a date or datetime"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month `months` after the given one"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_between(first: date, last: date) -> list[date]:
+    """Month starts from first to last, inclusive"""
+    months = []
+    month = month_start(first)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partition_name(table: str, month: date) -> str:
+    """Name of a table's partition for a month"""
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def parse_partition_name(name: str) -> Optional[tuple[str, date]]:
+    """(table, month) of a monthly partition name, None for other tables"""
+    match = _PARTITION_RE.match(name)
+    if match is None:
+        return None
+    return match["table"], date(int(match["year"]), int(match["month"]), 1)
+
+
+def archivable(partitions: Iterable[str], cutoff: date) -> list[str]:
+    """Monthly partitions holding only rows created before the cutoff month"""
+    cutoff = month_start(cutoff)
+    names = []
+    for name in partitions:
+        parsed = parse_partition_name(name)
+        if parsed is not None and parsed[1] < cutoff:
+            names.append(name)
+    return sorted(names, key=lambda name: parse_partition_name(name)[1])
+
+
+def partition_ddl(table: str, month: date) -> str:
+    """CREATE TABLE statement for one monthly partition"""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def index_ddl(table: Table) -> list[str]:
+    """CREATE INDEX statements for a partitioned table (unique ones made plain)"""
+    indexes = [
+        (index.name, [column.name for column in index.columns]) for index in table.indexes
+    ]
+    indexes += [
+        (f"ix_{table.name}_{'_'.join(column.name for column in constraint.columns)}",
+         [column.name for column in constraint.columns])
+        for constraint in table.constraints if isinstance(constraint, UniqueConstraint)
+    ]
+    return [
+        f"CREATE INDEX {name} ON {table.name} ({', '.join(columns)})"
+        for name, columns in sorted(indexes)
+    ]
+
+
+def foreign_key_ddl(table: Table) -> list[str]:
+    """Foreign keys of a table that can be kept after partitioning"""
+    statements = []
+    for foreign_key in sorted(table.foreign_keys, key=lambda key: key.parent.name):
+        target = foreign_key.column
+        if target.table.name in PARTITIONED_TABLES:
+            continue
+        statements.append(
+            f"ALTER TABLE {table.name} ADD FOREIGN KEY ({foreign_key.parent.name}) "
+            f"REFERENCES {target.table.name} ({target.name})"
+        )
+    return statements
+
+
+@dataclass
+class ArchivedPartition:
+    """Partition exported to a compressed file and dropped"""
+    name: str
+    rows: int
+    path: str
+    bytes: int
+
+
+class PartitionManager:
+    """Creates, converts and archives monthly partitions"""
+    
+    def __init__(self, engine: Engine, dry_run: bool = False):
+        if engine.dialect.name != "postgresql":
+            raise ValueError("Table partitioning requires PostgreSQL")
+        self.engine = engine
+        self.dry_run = dry_run
+        # DDL executed (or, in dry-run mode, that would be executed)
+        self.statements: list[str] = []
+    
+    def _ddl(self, connection: Connection, statement: str) -> None:
+        """Run or record a DDL statement"""
+        self.statements.append(statement)
+        if not self.dry_run:
+            connection.execute(text(statement))
+    
+    @staticmethod
+    def is_partitioned(connection: Connection, table: str) -> bool:
+        """Whether a table is already partitioned"""
+        return connection.execute(text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+        ), {"table": table}).first() is not None
+    
+    @staticmethod
+    def list_partitions(connection: Connection, table: str) -> list[str]:
+        """Names of a table's attached partitions"""
+        rows = connection.execute(text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = :table ORDER BY child.relname"
+        ), {"table": table})
+        return [row[0] for row in rows]
+    
+    def _backfill_item_dates(self, connection: Connection) -> None:
+        """Give order items of older schemas their order's created_at"""
+        exists = connection.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'order_items' AND column_name = :column"
+        ), {"column": PARTITION_KEY}).first()
+        if exists:
+            return
+        self._ddl(connection, f"ALTER TABLE order_items ADD COLUMN {PARTITION_KEY} TIMESTAMP")
+        self._ddl(
+            connection,
+            f"UPDATE order_items i SET {PARTITION_KEY} = o.created_at "
+            "FROM orders o WHERE o.id = i.order_id",
+        )
+        self._ddl(
+            connection,
+            f"ALTER TABLE order_items ALTER COLUMN {PARTITION_KEY} SET DEFAULT now(), "
+            f"ALTER COLUMN {PARTITION_KEY} SET NOT NULL",
+        )
+    
+    def _convert_table(self, connection: Connection, table: Table, months_ahead: int) -> dict:
+        """Replace a plain table with a partitioned one holding the same rows"""
+        name = table.name
+        old = f"{name}_unpartitioned"
+        # Items and payments are never older than their order
+        first_row = connection.execute(text(f"SELECT MIN({PARTITION_KEY}) FROM orders")).scalar()
+        sequence = connection.execute(
+            text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": name}
+        ).scalar()
+        
+        self._ddl(connection, f"ALTER TABLE {name} RENAME TO {old}")
+        self._ddl(
+            connection,
+            f"CREATE TABLE {name} (LIKE {old} INCLUDING DEFAULTS) "
+            f"PARTITION BY RANGE ({PARTITION_KEY})",
+        )
+        current = month_start(datetime.utcnow())
+        months = months_between(first_row or current, add_months(current, months_ahead))
+        for month in months:
+            self._ddl(connection, partition_ddl(name, month))
+        self._ddl(connection, f"CREATE TABLE {name}{DEFAULT_SUFFIX} PARTITION OF {name} DEFAULT")
+        self._ddl(connection, f"INSERT INTO {name} SELECT * FROM {old}")
+        if sequence:
+            # Keep the id sequence alive when the old table is dropped
+            self._ddl(connection, f"ALTER SEQUENCE {sequence} OWNED BY {name}.id")
+        self._ddl(connection, f"DROP TABLE {old} CASCADE")
+        # Constraint and index names are free again only once the old table is gone
+        self._ddl(connection, f"ALTER TABLE {name} ADD PRIMARY KEY (id, {PARTITION_KEY})")
+        for statement in index_ddl(table) + foreign_key_ddl(table):
+            self._ddl(connection, statement)
+        return {"table": name, "partitions": len(months), "first_month": months[0]}
+    
+    def convert(self, months_ahead: int = 3) -> list[dict]:
+        """Partition the order history tables that are not partitioned yet (one transaction)"""
+        converted = []
+        with self.engine.begin() as connection:
+            if not self.is_partitioned(connection, "order_items"):
+                self._backfill_item_dates(connection)
+            for name in PARTITIONED_TABLES:
+                if not self.is_partitioned(connection, name):
+                    table = Base.metadata.tables[name]
+                    converted.append(self._convert_table(connection, table, months_ahead))
+            if self.dry_run:
+                connection.rollback()
+        return converted
+    
+    def _create_partition(self, connection: Connection, table: str, month: date) -> None:
+        """Create one monthly partition, moving its rows out of the DEFAULT partition"""
+        default = f"{table}{DEFAULT_SUFFIX}"
+        bounds = {"start": month, "end": add_months(month, 1)}
+        in_default = connection.execute(text(
+            f"SELECT 1 FROM {default} WHERE {PARTITION_KEY} >= :start "
+            f"AND {PARTITION_KEY} < :end LIMIT 1"
+        ), bounds).first()
+        if in_default is None:
+            self._ddl(connection, partition_ddl(table, month))
+            return
+        name = partition_name(table, month)
+        where = (
+            f"{PARTITION_KEY} >= '{bounds['start'].isoformat()}' "
+            f"AND {PARTITION_KEY} < '{bounds['end'].isoformat()}'"
+        )
+        self._ddl(connection, f"ALTER TABLE {table} DETACH PARTITION {default}")
+        self._ddl(connection, partition_ddl(table, month))
+        self._ddl(connection, f"INSERT INTO {name} SELECT * FROM {default} WHERE {where}")
+        self._ddl(connection, f"DELETE FROM {default} WHERE {where}")
+        self._ddl(connection, f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+    
+    def ensure_partitions(self, months_ahead: int = 3, today: Optional[date] = None) -> list[str]:
+        """Pre-create partitions for the current month and `months_ahead` more"""
+        current = month_start(today or datetime.utcnow())
+        created = []
+        with self.engine.begin() as connection:
+            for table in PARTITIONED_TABLES:
+                if not self.is_partitioned(connection, table):
+                    raise ValueError(f"Table {table} is not partitioned; run the conversion first")
+                existing = set(self.list_partitions(connection, table))
+                for month in months_between(current, add_months(current, months_ahead)):
+                    name = partition_name(table, month)
+                    if name not in existing:
+                        self._create_partition(connection, table, month)
+                        created.append(name)
+            if self.dry_run:
+                connection.rollback()
+        return created
+    
+    def _export(self, connection: Connection, name: str, directory: Path) -> ArchivedPartition:
+        """Copy a partition's rows to a gzip-compressed CSV file"""
+        path = directory / f"{name}.csv.gz"
+        temporary = directory / f".{name}.csv.gz.tmp"
+        cursor = connection.connection.cursor()
+        try:
+            with gzip.open(temporary, "wt", encoding="utf-8", newline="") as handle:
+                cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", handle)
+                rows = cursor.rowcount
+                handle.flush()
+            os.replace(temporary, path)
+        finally:
+            cursor.close()
+        return ArchivedPartition(name=name, rows=rows, path=str(path), bytes=path.stat().st_size)
+    
+    def archive(self, cutoff: date, directory: str) -> list[dict]:
+        """Detach, export and drop monthly partitions older than the cutoff month"""
+        target = Path(directory)
+        archived = []
+        with self.engine.connect() as connection:
+            names = []
+            for table in PARTITIONED_TABLES:
+                names.extend(archivable(self.list_partitions(connection, table), cutoff))
+            connection.rollback()
+            if not self.dry_run:
+                target.mkdir(parents=True, exist_ok=True)
+            for name in names:
+                table = parse_partition_name(name)[0]
+                # One transaction per partition: a failed export leaves it detached, not lost
+                with connection.begin():
+                    self._ddl(connection, f"ALTER TABLE {table} DETACH PARTITION {name}")
+                if self.dry_run:
+                    continue
+                with connection.begin():
+                    archived.append(asdict(self._export(connection, name, target)))
+                    self._ddl(connection, f"DROP TABLE {name}")
+        return archived
@@ -0,0 +1,228 @@
+"""Connection pool metering and sessions that hold connections briefly
+
+A session checks out a pooled connection on its first statement and keeps
+it until its transaction ends. Requests that only read never end theirs
+before the session is closed, and get_db closes it once the response has
+been sent, so the connection would also be held while the response is
+validated, serialized and written to the client. Once a request's endpoint
+has returned, its PooledSessions end their read-only transaction, which
+returns the connection to the pool before any of that work; every
+statement of the endpoint still runs in one transaction. Writes keep their
+connection until commit or rollback, as before.
+
+MeteredQueuePool records how long each checkout waited for a free
+connection and how long the connection was held until it was checked
+back in.
+"""
+
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+from app.core.logging import get_request_context
+
+# Recent checkouts kept for the wait and hold percentiles
+SAMPLE_SIZE = 2048
+
+
+def _percentile(samples: list[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return round(samples[min(len(samples) - 1, int(len(samples) * pct / 100))] * 1000, 3)
+
+
+class PoolMetrics:
+    """Checkout wait and connection hold times of one pool"""
+    
+    def __init__(self):
+        self.waits: deque[float] = deque(maxlen=SAMPLE_SIZE)
+        self.holds: deque[float] = deque(maxlen=SAMPLE_SIZE)
+        self.stats = {"checkouts": 0, "waited": 0, "timeouts": 0, "wait_seconds": 0.0,
+                      "hold_seconds": 0.0}
+        self._lock = threading.Lock()
+    
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        """Time a checkout spent waiting for a free connection"""
+        with self._lock:
+            if timed_out:
+                self.stats["timeouts"] += 1
+                return
+            self.stats["checkouts"] += 1
+            self.stats["wait_seconds"] += seconds
+            # Under a millisecond is the pool's own overhead, not waiting
+            if seconds >= 0.001:
+                self.stats["waited"] += 1
+            self.waits.append(seconds)
+        request = get_request_context()
+        if request is not None:
+            request.db_wait_seconds += seconds
+    
+    def record_hold(self, seconds: float) -> None:
+        """Time a connection was checked out"""
+        with self._lock:
+            self.stats["hold_seconds"] += seconds
+            self.holds.append(seconds)
+        request = get_request_context()
+        if request is not None:
+            request.db_hold_seconds += seconds
+    
+    def info(self, pool: Optional[QueuePool] = None) -> dict:
+        """Counters, recent wait/hold percentiles in ms and, given the pool, its occupancy"""
+        with self._lock:
+            stats = dict(self.stats)
+            waits, holds = list(self.waits), list(self.holds)
+        info = {
+            **{key: round(value, 3) if isinstance(value, float) else value
+               for key, value in stats.items()},
+            "wait_p50_ms": _percentile(waits, 50),
+            "wait_p99_ms": _percentile(waits, 99),
+            "hold_p50_ms": _percentile(holds, 50),
+            "hold_p99_ms": _percentile(holds, 99),
+        }
+        if pool is not None:
+            info.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+        return info
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool recording checkout waits and hold times in PoolMetrics"""
+    
+    def __init__(self, *args, metrics: Optional[PoolMetrics] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics or PoolMetrics()
+        event.listen(self, "checkout", self._checked_out)
+        event.listen(self, "checkin", self._checked_in)
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return record
+    
+    def recreate(self) -> "MeteredQueuePool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+    
+    def _checked_out(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info["checked_out_at"] = time.perf_counter()
+    
+    def _checked_in(self, dbapi_connection, connection_record) -> None:
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            self.metrics.record_hold(time.perf_counter() - checked_out_at)
+
+
+class PooledSession(Session):
+    """Session that can end a read-only transaction early to return its connection
+    
+    release() commits the transaction (which ends it without expiring
+    anything, as sessions are made with expire_on_commit=False) as long as
+    it has done nothing that must stay in one transaction: there are no
+    pending changes, nothing has been flushed or written, no savepoint is
+    open, the caller has not taken the connection itself, and no results
+    are being streamed. Statements run in the same transaction until then,
+    and a later statement checks a connection out again.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._keeps_connection = False
+    
+    def _track(self, statement, kwargs: dict) -> None:
+        if not getattr(statement, "is_select", False):
+            self._keeps_connection = True
+            return
+        options = {**statement.get_execution_options(), **(kwargs.get("execution_options") or {})}
+        if options.get("stream_results") or options.get("yield_per"):
+            self._keeps_connection = True
+    
+    def execute(self, statement, params=None, **kwargs):
+        self._track(statement, kwargs)
+        return super().execute(statement, params, **kwargs)
+    
+    def scalars(self, statement, params=None, **kwargs):
+        self._track(statement, kwargs)
+        return super().scalars(statement, params, **kwargs)
+    
+    def scalar(self, statement, params=None, **kwargs):
+        self._track(statement, kwargs)
+        return super().scalar(statement, params, **kwargs)
+    
+    def release(self) -> bool:
+        """End a read-only transaction to return its connection, return whether it did"""
+        if (not self.in_transaction() or self._keeps_connection or self.in_nested_transaction()
+                or self.new or self.dirty or self.deleted):
+            return False
+        self.commit()
+        return True
+    
+    def connection(self, *args, **kwargs):
+        # A caller using the connection directly may rely on its transaction
+        self._keeps_connection = True
+        return super().connection(*args, **kwargs)
+    
+    def flush(self, objects=None) -> None:
+        if self.new or self.dirty or self.deleted:
+            self._keeps_connection = True
+        super().flush(objects)
+    
+    def commit(self) -> None:
+        super().commit()
+        self._keeps_connection = False
+    
+    def rollback(self) -> None:
+        try:
+            super().rollback()
+        finally:
+            self._keeps_connection = False
+    
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._keeps_connection = False
+
+
+# Sessions opened for the request being handled (see SessionReleasingRoute)
+_request_sessions: ContextVar[Optional[list]] = ContextVar("request_sessions", default=None)
+
+
+def bind_request_sessions():
+    """Start collecting the sessions of a request, returns a token for reset_request_sessions"""
+    return _request_sessions.set([])
+
+
+def reset_request_sessions(token) -> None:
+    """Stop collecting the sessions of a request"""
+    _request_sessions.reset(token)
+
+
+def add_request_session(db: Session) -> None:
+    """Register a session to be released once the request's endpoint has returned"""
+    sessions = _request_sessions.get()
+    if sessions is not None:
+        sessions.append(db)
+
+
+def release_session(db: Session) -> bool:
+    """End a session's read-only transaction if it is a PooledSession, return whether it did"""
+    return isinstance(db, PooledSession) and db.release()
+
+
+def release_request_sessions() -> None:
+    """Release the read-only transactions of the current request's sessions"""
+    for db in _request_sessions.get() or ():
+        release_session(db)
@@ -0,0 +1,98 @@
+"""Schema upgrades for databases created by an older version of the models
+
+init_db builds the schema with Base.metadata.create_all, which creates
+missing tables but never changes an existing one: a column or index added
+to a model later is missing from every database created before it. The
+columns below are added with ALTER TABLE (and backfilled where the server
+default would be wrong for existing rows), any index of the models missing
+from its table is created and indexes the models no longer have are
+dropped. Everything is checked against the live
+schema first, so upgrading an up-to-date database does nothing.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from app.infrastructure.database.database import Base
+
+
+@dataclass(frozen=True)
+class AddedColumn:
+    """Column added to a model after its table was first created"""
+    table: str
+    column: str
+    # Statement giving existing rows their value, run once after the column is added
+    backfill: Optional[str] = None
+
+
+# In the order they were added to the models
+ADDED_COLUMNS = (
+    AddedColumn(
+        "order_items", "created_at",
+        backfill="UPDATE order_items SET created_at = "
+                 "(SELECT orders.created_at FROM orders WHERE orders.id = order_items.order_id)",
+    ),
+    AddedColumn("categories", "parent_id"),
+    AddedColumn("products", "rating_sum"),
+    AddedColumn("products", "rating_count"),
+    AddedColumn("payment_webhook_events", "attempts"),
+    AddedColumn("payment_webhook_events", "next_attempt_at"),
+)
+
+
+# (table, index) pairs removed from the models, superseded by a composite index
+DROPPED_INDEXES = (
+    ("orders", "ix_orders_user_id"),
+)
+
+
+def add_column_ddl(connection: Connection, table: str, column: str) -> str:
+    """ALTER TABLE statement adding a model column, with its default and foreign key"""
+    model_column = Base.metadata.tables[table].c[column]
+    default = model_column.server_default
+    if (connection.dialect.name == "sqlite" and default is not None
+            and not isinstance(default.arg, str)):
+        # SQLite cannot add a column with an expression default such as now();
+        # the column is added nullable and without it, then backfilled
+        ddl = f"{model_column.name} {model_column.type.compile(dialect=connection.dialect)}"
+    else:
+        ddl = str(CreateColumn(model_column).compile(dialect=connection.dialect))
+    for foreign_key in model_column.foreign_keys:
+        target = foreign_key.column
+        ddl += f" REFERENCES {target.table.name} ({target.name})"
+    return f"ALTER TABLE {table} ADD COLUMN {ddl}"
+
+
+def upgrade_schema(engine: Engine, dry_run: bool = False) -> list[str]:
+    """Bring existing tables' columns and indexes up to the models, return the DDL run"""
+    statements = []
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        tables = set(inspector.get_table_names())
+        for added in ADDED_COLUMNS:
+            if added.table not in tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(added.table)}
+            if added.column in existing:
+                continue
+            statements.append(add_column_ddl(connection, added.table, added.column))
+            if added.backfill:
+                statements.append(added.backfill)
+        for table, index in DROPPED_INDEXES:
+            if table in tables and index in {
+                existing["name"] for existing in inspector.get_indexes(table)
+            }:
+                statements.append(f"DROP INDEX {index}")
+        for name in sorted(tables & set(Base.metadata.tables)):
+            existing = {index["name"] for index in inspector.get_indexes(name)}
+            for index in sorted(Base.metadata.tables[name].indexes, key=lambda index: index.name):
+                if index.name not in existing:
+                    statements.append(str(CreateIndex(index).compile(dialect=connection.dialect)))
+        if not dry_run:
+            for statement in statements:
+                connection.execute(text(statement))
+    return statements
@@ -0,0 +1,69 @@
+"""Local fake payment provider that emits signed Stripe-style webhook events"""
+
+import itertools
+import json
+import random
+import time
+from typing import Optional
+
+from app.infrastructure.external.stripe_webhooks import compute_signature
+
+
+class FakePaymentProvider:
+    """Generates signed webhook deliveries, including retry storms"""
+    
+    def __init__(self, secret: str, seed: Optional[int] = None):
+        self.secret = secret
+        self._random = random.Random(seed)
+        self._counter = itertools.count(1)
+    
+    def make_event(
+        self, event_type: str, order_id: int, transaction_id: str
+    ) -> bytes:
+        """Build a raw event payload"""
+        obj = {"id": transaction_id, "metadata": {"order_id": str(order_id)}}
+        if event_type.startswith("charge."):
+            obj = {
+                "id": f"ch_{next(self._counter)}",
+                "payment_intent": transaction_id,
+                "metadata": {"order_id": str(order_id)},
+            }
+        event = {
+            "id": f"evt_{next(self._counter):012d}",
+            "type": event_type,
+            "created": int(time.time()),
+            "data": {"object": obj},
+        }
+        return json.dumps(event).encode()
+    
+    def sign(self, payload: bytes, timestamp: Optional[int] = None) -> str:
+        """Build the signature header for a payload"""
+        timestamp = timestamp or int(time.time())
+        return f"t={timestamp},v1={compute_signature(payload, timestamp, self.secret)}"
+    
+    def storm(
+        self,
+        order_transactions: dict[int, str],
+        lifecycle: tuple[str, ...] = ("payment_intent.succeeded",),
+        retries: int = 2,
+    ) -> list[tuple[bytes, str]]:
+        """
+        Simulate a post-outage burst: every order's lifecycle events, each
+        delivered up to `retries` extra times, interleaved across orders while
+        keeping per-order order intact
+        """
+        streams = []
+        for order_id, transaction_id in order_transactions.items():
+            stream = []
+            for event_type in lifecycle:
+                payload = self.make_event(event_type, order_id, transaction_id)
+                stream.extend([payload] * (1 + self._random.randint(0, retries)))
+            streams.append(stream)
+        
+        deliveries = []
+        while streams:
+            stream = self._random.choice(streams)
+            deliveries.append(stream.pop(0))
+            if not stream:
+                streams.remove(stream)
+        return [(payload, self.sign(payload)) for payload in deliveries]
@@ -0,0 +1,70 @@
+"""Stripe webhook signature verification and event parsing"""
+
+import hashlib
+import hmac
+import json
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.utils.exceptions import InvalidWebhookSignatureError
+
+
+@dataclass
+class WebhookEvent:
+    """Normalized payment provider event"""
+    event_id: str
+    event_type: str
+    order_id: Optional[int]
+    transaction_id: Optional[str]
+    payload: str
+
+
+def compute_signature(payload: bytes, timestamp: int, secret: str) -> str:
+    """Compute the v1 signature for a payload"""
+    signed_payload = f"{timestamp}.".encode() + payload
+    return hmac.new(secret.encode(), signed_payload, hashlib.sha256).hexdigest()
+
+
+def verify_signature(payload: bytes, header: str, secret: str, tolerance: int = 300) -> None:
+    """Verify a `Stripe-Signature` header (t=<timestamp>,v1=<signature>,...)"""
+    timestamp = None
+    signatures = []
+    for item in header.split(","):
+        key, _, value = item.strip().partition("=")
+        if key == "t":
+            timestamp = value
+        elif key == "v1":
+            signatures.append(value)
+    
+    if not timestamp or not timestamp.isdigit() or not signatures:
+        raise InvalidWebhookSignatureError("Malformed signature header")
+    if tolerance and abs(time.time() - int(timestamp)) > tolerance:
+        raise InvalidWebhookSignatureError("Signature timestamp outside tolerance")
+    
+    expected = compute_signature(payload, int(timestamp), secret)
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise InvalidWebhookSignatureError("Signature mismatch")
+
+
+def parse_event(payload: bytes) -> WebhookEvent:
+    """Extract the fields needed for deduplication and ordering"""
+    try:
+        event = json.loads(payload)
+        event_id = event["id"]
+        event_type = event["type"]
+        obj = event.get("data", {}).get("object", {})
+        # Refund events reference the payment intent, intent events are the intent itself
+        transaction_id = obj.get("payment_intent") or obj.get("id")
+        order_id = (obj.get("metadata") or {}).get("order_id")
+        order_id = int(order_id) if order_id is not None else None
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise InvalidWebhookSignatureError("Malformed event payload")
+    
+    return WebhookEvent(
+        event_id=event_id,
+        event_type=event_type,
+        order_id=order_id,
+        transaction_id=transaction_id,
+        payload=payload.decode(),
+    )
@@ -1,13 +1,38 @@
-"""Base repository with common CRUD operations"""
+"""Base repository with common CRUD operations
 
-from typing import TypeVar, Generic, Type, List, Optional
+Repository queries are 2.0-style select() statements. Fixed-shape lookups
+are built once with named bind parameters and reused for every call, so no
+query object is constructed per call and SQLAlchemy finds their compiled
+form in the engine's statement cache; queries whose filters vary are
+lambda statements, cached per combination of filters.
+"""
+
+import logging
+from typing import Callable, Hashable, TypeVar, Generic, Type, List, Optional, Iterator, Sequence
+from sqlalchemy import Executable, Integer, any_, bindparam, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
+from app.infrastructure.repositories.integrity import translate_integrity_error
+
 T = TypeVar("T")
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+logger = logging.getLogger("app.repository")
+
+_statements: dict[Hashable, Executable] = {}
+
+
+def cached_statement(key: Hashable, build: Callable[[], Executable]) -> Executable:
+    """Statement built on first use and shared by every later call with the same key"""
+    statement = _statements.get(key)
+    if statement is None:
+        statement = _statements.setdefault(key, build())
+    return statement
+
 
 class BaseRepository(Generic[T, CreateSchemaType, UpdateSchemaType]):
     """Base repository with CRUD operations"""
@@ -16,24 +41,90 @@ class BaseRepository(Generic[T, CreateSchemaType, UpdateSchemaType]):
         self.db = db
         self.model = model
     
-    def create(self, obj_in: CreateSchemaType) -> T:
-        """Create a new object"""
-        db_obj = self.model(**obj_in.dict())
+    def create(self, obj_in: CreateSchemaType | dict) -> T:
+        """Create a new object (unique/foreign-key violations raise domain errors)"""
+        data = obj_in if isinstance(obj_in, dict) else obj_in.dict()
+        db_obj = self.model(**data)
         self.db.add(db_obj)
-        self.db.commit()
+        self._commit(data)
         self.db.refresh(db_obj)
+        self._log_write("created", db_obj.id)
         return db_obj
     
+    def _commit(self, values: dict) -> None:
+        """Commit, translating constraint violations into domain errors"""
+        try:
+            self.db.commit()
+        except IntegrityError as exc:
+            self.db.rollback()
+            error = translate_integrity_error(exc, self.model, values)
+            if error is exc:
+                raise
+            raise error from exc
+    
+    def _log_write(self, action: str, obj_id) -> None:
+        """Debug record of a committed write"""
+        if logger.isEnabledFor(logging.DEBUG):
+            model = self.model.__name__
+            logger.debug("%s %s %s", action, model, obj_id, extra={"model": model, "id": obj_id})
+    
+    def insert_statement(self):
+        """Dialect-specific INSERT supporting ON CONFLICT clauses"""
+        dialect = postgresql if self.db.get_bind().dialect.name == "postgresql" else sqlite
+        return dialect.insert(self.model)
+    
+    def stream_columns(
+        self, columns: Sequence[str], batch_size: int = 10000
+    ) -> Iterator[Sequence[tuple]]:
+        """Stream the given columns of every row, ordered by id, in batches of plain tuples"""
+        statement = (
+            select(*[getattr(self.model, column) for column in columns])
+            .order_by(self.model.id)
+            .execution_options(stream_results=True, yield_per=batch_size)
+        )
+        # Core execution (no ORM row processing); a server-side cursor on
+        # PostgreSQL, so only one batch is held in memory
+        for partition in self.db.connection().execute(statement).partitions():
+            yield partition
+    
+    def statement(self, name: str, build: Callable[[], Executable]) -> Executable:
+        """This model's cached statement of the given name (per database dialect)"""
+        return cached_statement((self.model, name, self.db.get_bind().dialect.name), build)
+    
     def get_by_id(self, obj_id: int) -> Optional[T]:
         """Get object by ID"""
-        return self.db.query(self.model).filter(self.model.id == obj_id).first()
+        statement = self.statement(
+            "get_by_id", lambda: select(self.model).where(self.model.id == bindparam("id")).limit(1)
+        )
+        return self.db.scalars(statement, {"id": obj_id}).first()
+    
+    def ids_filter(self):
+        """Criterion matching the IDs passed as the "ids" parameter"""
+        if self.db.get_bind().dialect.name == "postgresql":
+            # One array parameter (id = ANY(:ids)): the same statement text,
+            # and so one cached plan, for any number of ids
+            return self.model.id == any_(bindparam("ids", type_=postgresql.ARRAY(Integer)))
+        return self.model.id.in_(bindparam("ids", expanding=True))
+    
+    def get_by_ids(self, obj_ids: list[int]) -> List[T]:
+        """Get several objects by ID in one query"""
+        if not obj_ids:
+            return []
+        statement = self.statement(
+            "get_by_ids", lambda: select(self.model).where(self.ids_filter())
+        )
+        return list(self.db.scalars(statement, {"ids": list(obj_ids)}))
     
     def get_all(self, skip: int = 0, limit: int = 100) -> List[T]:
         """Get all objects with pagination"""
-        return self.db.query(self.model).offset(skip).limit(limit).all()
+        statement = self.statement(
+            "get_all",
+            lambda: select(self.model).offset(bindparam("skip")).limit(bindparam("limit")),
+        )
+        return list(self.db.scalars(statement, {"skip": skip, "limit": limit}))
     
     def update(self, obj_id: int, obj_in: UpdateSchemaType) -> Optional[T]:
-        """Update an object"""
+        """Update an object (unique/foreign-key violations raise domain errors)"""
         db_obj = self.get_by_id(obj_id)
         if not db_obj:
             return None
@@ -43,8 +134,9 @@ class BaseRepository(Generic[T, CreateSchemaType, UpdateSchemaType]):
             setattr(db_obj, field, value)
         
         self.db.add(db_obj)
-        self.db.commit()
+        self._commit(update_data)
         self.db.refresh(db_obj)
+        self._log_write("updated", obj_id)
         return db_obj
     
     def delete(self, obj_id: int) -> bool:
@@ -55,8 +147,12 @@ class BaseRepository(Generic[T, CreateSchemaType, UpdateSchemaType]):
         
         self.db.delete(db_obj)
         self.db.commit()
+        self._log_write("deleted", obj_id)
         return True
     
     def exists(self, obj_id: int) -> bool:
         """Check if object exists"""
-        return self.db.query(self.model).filter(self.model.id == obj_id).first() is not None
+        statement = self.statement(
+            "exists", lambda: select(self.model.id).where(self.model.id == bindparam("id")).limit(1)
+        )
+        return self.db.scalar(statement, {"id": obj_id}) is not None
@@ -0,0 +1,66 @@
+"""Cache version repository"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session, aliased
+
+from app.infrastructure.repositories.base_repository import BaseRepository
+from app.infrastructure.database.models_cache import CacheWrite
+
+
+class CacheVersionRepository(BaseRepository[CacheWrite, dict, dict]):
+    """Cache version repository with custom queries"""
+    
+    def __init__(self, db: Session):
+        super().__init__(db, CacheWrite)
+    
+    def append(self, entity: str, ids: Optional[list[int]]) -> int:
+        """
+        Record a write of an entity in the current transaction, return its version
+        
+        Not committed here: the row commits (or rolls back) with the write it
+        records. Only an INSERT, so concurrent writes of one entity never
+        lock each other; their versions commit nearly, not strictly, in order.
+        """
+        statement = insert(CacheWrite).values(
+            entity=entity, ids=None if ids is None else ",".join(map(str, ids))
+        ).returning(CacheWrite.version)
+        # Core execution on the session's connection: no ORM bookkeeping, no autoflush
+        return self.db.connection().execute(statement).scalar_one()
+    
+    def get_versions(self) -> dict[str, int]:
+        """Current version (newest write) of every entity"""
+        statement = select(CacheWrite.entity, func.max(CacheWrite.version)).group_by(
+            CacheWrite.entity
+        )
+        return dict(self.db.execute(statement).all())
+    
+    def get_since(
+        self, version: int, limit: int = 10000
+    ) -> list[tuple[int, str, Optional[tuple[int, ...]]]]:
+        """(version, entity, ids) of writes after a version, oldest first (None: all ids)"""
+        statement = (
+            select(CacheWrite.version, CacheWrite.entity, CacheWrite.ids)
+            .where(CacheWrite.version > version)
+            .order_by(CacheWrite.version)
+            .limit(limit)
+        )
+        return [
+            (row_version, entity, None if ids is None else tuple(int(i) for i in ids.split(",")))
+            for row_version, entity, ids in self.db.execute(statement)
+        ]
+    
+    def delete_before(self, before: datetime) -> int:
+        """Delete writes older than a time but each entity's newest, return the number removed"""
+        newest = aliased(CacheWrite)
+        statement = delete(CacheWrite).where(
+            CacheWrite.created_at < before,
+            CacheWrite.version < select(func.max(newest.version))
+            .where(newest.entity == CacheWrite.entity)
+            .scalar_subquery(),
+        )
+        result = self.db.execute(statement)
+        self.db.commit()
+        return result.rowcount
@@ -0,0 +1,52 @@
+"""Cart repository"""
+
+import json
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.infrastructure.repositories.base_repository import BaseRepository
+from app.infrastructure.database.models_cart import Cart
+
+
+class CartRepository(BaseRepository[Cart, dict, dict]):
+    """Cart repository with custom queries"""
+    
+    def __init__(self, db: Session):
+        super().__init__(db, Cart)
+    
+    def get_items(self, key: str) -> Optional[tuple[dict[int, int], int, datetime]]:
+        """Items, version and last update of a persisted cart"""
+        row = self.db.execute(
+            select(Cart.items, Cart.version, Cart.updated_at).where(Cart.key == key)
+        ).first()
+        if row is None:
+            return None
+        items = {int(product_id): quantity for product_id, quantity in json.loads(row[0]).items()}
+        return items, row[1], row[2]
+    
+    def upsert_many(self, rows: list[dict]) -> None:
+        """Insert or overwrite several carts with one statement"""
+        if not rows:
+            return
+        statement = self.insert_statement()
+        statement = statement.on_conflict_do_update(
+            index_elements=[Cart.key],
+            set_={
+                # Subscripted: "items" is also a method of the column collection
+                "items": statement.excluded["items"],
+                "version": statement.excluded.version,
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+        # executemany: one prepared statement for every cart
+        self.db.execute(statement, rows)
+        self.db.commit()
+    
+    def delete_expired(self, before: datetime) -> int:
+        """Delete carts last updated before a time, return the number removed"""
+        result = self.db.execute(delete(Cart).where(Cart.updated_at < before))
+        self.db.commit()
+        return result.rowcount
@@ -1,11 +1,23 @@
 """Coupon repository"""
 
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from app.infrastructure.repositories.base_repository import BaseRepository
 from app.infrastructure.database.models_coupon import Coupon
 
+_BY_CODE = select(Coupon).where(Coupon.code == bindparam("code")).limit(1)
+_ACTIVE = (
+    select(Coupon)
+    .where(
+        Coupon.is_active == True,
+        Coupon.valid_from <= bindparam("now"),
+        Coupon.valid_until >= bindparam("now"),
+    )
+    .offset(bindparam("skip")).limit(bindparam("limit"))
+)
+
 
 class CouponRepository(BaseRepository[Coupon, dict, dict]):
     """Coupon repository with custom queries"""
@@ -15,29 +27,25 @@ class CouponRepository(BaseRepository[Coupon, dict, dict]):
     
     def get_by_code(self, code: str) -> Coupon | None:
         """Get coupon by code"""
-        return self.db.query(self.model).filter(Coupon.code == code).first()
+        return self.db.scalars(_BY_CODE, {"code": code}).first()
     
     def get_active_coupons(self, skip: int = 0, limit: int = 100) -> list[Coupon]:
         """Get active and valid coupons"""
-        now = datetime.utcnow()
-        return self.db.query(self.model).filter(
-            Coupon.is_active == True,
-            Coupon.valid_from <= now,
-            Coupon.valid_until >= now
-        ).offset(skip).limit(limit).all()
+        parameters = {"now": datetime.utcnow(), "skip": skip, "limit": limit}
+        return list(self.db.scalars(_ACTIVE, parameters))
     
     def validate_coupon(self, code: str) -> bool:
         """Validate if coupon can be used"""
         coupon = self.get_by_code(code)
-        if not coupon:
-            return False
-        
-        now = datetime.utcnow()
-        if not coupon.is_active:
-            return False
-        if coupon.valid_from > now or coupon.valid_until < now:
-            return False
-        if coupon.max_uses and coupon.current_uses >= coupon.max_uses:
-            return False
-        
-        return True
+        return coupon is not None and is_usable(coupon, datetime.utcnow())
+
+
+def is_usable(coupon: Coupon, now: datetime) -> bool:
+    """Whether a loaded coupon is active, in its validity window and has uses left"""
+    if not coupon.is_active:
+        return False
+    if coupon.valid_from > now or coupon.valid_until < now:
+        return False
+    if coupon.max_uses and coupon.current_uses >= coupon.max_uses:
+        return False
+    return True
@@ -0,0 +1,64 @@
+"""Idempotency key repository"""
+
+from datetime import datetime
+
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.orm import Session
+
+from app.infrastructure.repositories.base_repository import BaseRepository
+from app.infrastructure.database.models_idempotency import IdempotencyKey
+
+_BY_KEY = select(IdempotencyKey).where(IdempotencyKey.key == bindparam("key")).limit(1)
+
+
+class IdempotencyKeyRepository(BaseRepository[IdempotencyKey, dict, dict]):
+    """Idempotency key repository with custom queries"""
+    
+    def __init__(self, db: Session):
+        super().__init__(db, IdempotencyKey)
+    
+    def get_by_key(self, key: str) -> IdempotencyKey | None:
+        """Get record by key"""
+        return self.db.scalars(_BY_KEY, {"key": key}).first()
+    
+    def insert_if_absent(self, values: dict) -> bool:
+        """Claim a key with a single INSERT, return False if it already exists"""
+        statement = self.insert_statement().values(**values).on_conflict_do_nothing(
+            index_elements=[IdempotencyKey.key]
+        )
+        result = self.db.execute(statement)
+        self.db.commit()
+        return result.rowcount == 1
+    
+    def take_over_expired(self, values: dict, now: datetime) -> bool:
+        """Claim a key whose record has expired with one UPDATE, return whether it did
+        
+        The expiry is checked by the UPDATE itself, so of several workers
+        taking over the same record exactly one changes it.
+        """
+        statement = (
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == values["key"], IdempotencyKey.expires_at < now)
+            .values(
+                fingerprint=values["fingerprint"],
+                status=values["status"],
+                status_code=None,
+                response_headers=None,
+                response_body=None,
+                expires_at=values["expires_at"],
+            )
+        )
+        result = self.db.execute(statement)
+        self.db.commit()
+        return result.rowcount == 1
+    
+    def delete_key(self, key: str) -> None:
+        """Delete a key"""
+        self.db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+        self.db.commit()
+    
+    def delete_expired(self, now: datetime) -> int:
+        """Delete expired keys, return the number removed"""
+        result = self.db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < now))
+        self.db.commit()
+        return result.rowcount
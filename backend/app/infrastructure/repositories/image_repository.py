@@ -0,0 +1,69 @@
+"""Image repository"""
+
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.infrastructure.repositories.base_repository import BaseRepository
+from app.infrastructure.database.models_image import ImageAsset, ProductImage
+from app.infrastructure.database.models_product import Product
+
+
+class ImageAssetRepository(BaseRepository[ImageAsset, dict, dict]):
+    """Image asset repository with custom queries"""
+    
+    def __init__(self, db: Session):
+        super().__init__(db, ImageAsset)
+    
+    def get_by_hash(self, content_hash: str) -> Optional[ImageAsset]:
+        """Get an asset by content hash"""
+        return self.db.get(ImageAsset, content_hash)
+    
+    def insert_if_absent(self, values: dict) -> bool:
+        """Record an asset with a single INSERT, return False if it was already recorded"""
+        statement = self.insert_statement().values(**values).on_conflict_do_nothing(
+            index_elements=[ImageAsset.content_hash]
+        )
+        result = self.db.execute(statement)
+        self.db.commit()
+        return result.rowcount == 1
+
+
+class ProductImageRepository(BaseRepository[ProductImage, dict, dict]):
+    """Product image repository with custom queries"""
+    
+    def __init__(self, db: Session):
+        super().__init__(db, ProductImage)
+    
+    def product_exists(self, product_id: int) -> bool:
+        """Check whether a product exists"""
+        statement = select(Product.id).where(Product.id == product_id)
+        return self.db.execute(statement).first() is not None
+    
+    def get_for_product(self, product_id: int) -> list[tuple[ProductImage, ImageAsset]]:
+        """A product's images with their assets, in display order"""
+        statement = (
+            select(ProductImage, ImageAsset)
+            .join(ImageAsset, ImageAsset.content_hash == ProductImage.content_hash)
+            .where(ProductImage.product_id == product_id)
+            .order_by(ProductImage.position, ProductImage.id)
+        )
+        return [tuple(row) for row in self.db.execute(statement)]
+    
+    def get_link(self, product_id: int, content_hash: str) -> Optional[ProductImage]:
+        """The product's image with a given content hash"""
+        statement = select(ProductImage).where(
+            ProductImage.product_id == product_id, ProductImage.content_hash == content_hash
+        )
+        return self.db.scalars(statement).first()
+    
+    def add_to_product(self, product_id: int, content_hash: str) -> ProductImage:
+        """Append an image to a product's gallery"""
+        position = self.db.execute(
+            select(func.coalesce(func.max(ProductImage.position) + 1, 0))
+            .where(ProductImage.product_id == product_id)
+        ).scalar_one()
+        return self.create(
+            {"product_id": product_id, "content_hash": content_hash, "position": position}
+        )
@@ -0,0 +1,101 @@
+"""Translation of constraint violations into domain errors
+
+Writes rely on the database's unique and foreign-key constraints instead of
+checking first with extra queries (which also races with concurrent writes).
+A violation is mapped back to the column it concerns: by constraint name on
+PostgreSQL, by the error message on SQLite.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Optional
+
+from sqlalchemy import Table, UniqueConstraint
+from sqlalchemy.exc import IntegrityError
+
+from app.utils.exceptions import (
+    DuplicateResourceError, ResourceNotFoundError, SupleGearException
+)
+
+UNIQUE = "unique"
+FOREIGN_KEY = "foreign_key"
+
+# PostgreSQL error codes
+_UNIQUE_VIOLATION = "23505"
+_FOREIGN_KEY_VIOLATION = "23503"
+
+_SQLITE_UNIQUE = re.compile(r"UNIQUE constraint failed: (\w+)\.(\w+)")
+_SQLITE_FOREIGN_KEY = "FOREIGN KEY constraint failed"
+
+
+@lru_cache(maxsize=None)
+def constraint_columns(table: Table) -> dict[str, tuple[str, str]]:
+    """Constraint name -> (kind, column) for a table's single-column constraints"""
+    names = {}
+    for index in table.indexes:
+        if index.unique and len(index.columns) == 1:
+            names[index.name] = (UNIQUE, next(iter(index.columns)).name)
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint) and len(constraint.columns) == 1:
+            column = next(iter(constraint.columns)).name
+            # Unnamed constraints get PostgreSQL's default name
+            names[constraint.name or f"{table.name}_{column}_key"] = (UNIQUE, column)
+    for foreign_key in table.foreign_keys:
+        column = foreign_key.parent.name
+        names[foreign_key.constraint.name or f"{table.name}_{column}_fkey"] = (
+            FOREIGN_KEY, column
+        )
+    return names
+
+
+def _violation(error: IntegrityError, table: Table) -> tuple[Optional[str], Optional[str]]:
+    """(kind, column) of a constraint violation, None where unknown"""
+    original = error.orig
+    constraint = getattr(getattr(original, "diag", None), "constraint_name", None)
+    if constraint in constraint_columns(table):
+        return constraint_columns(table)[constraint]
+    code = getattr(original, "pgcode", None)
+    message = str(original)
+    match = _SQLITE_UNIQUE.search(message)
+    if match and match.group(1) == table.name:
+        return UNIQUE, match.group(2)
+    if code == _UNIQUE_VIOLATION:
+        return UNIQUE, None
+    if code == _FOREIGN_KEY_VIOLATION or _SQLITE_FOREIGN_KEY in message:
+        # SQLite does not name the failing key; a single foreign key is unambiguous
+        columns = {foreign_key.parent.name for foreign_key in table.foreign_keys}
+        return FOREIGN_KEY, columns.pop() if len(columns) == 1 else None
+    return None, None
+
+
+def _referenced_name(table: Table, column: str) -> str:
+    """Singular name of the table a foreign-key column points to"""
+    referenced = next(iter(table.columns[column].foreign_keys)).column.table.name
+    return referenced[:-3] + "y" if referenced.endswith("ies") else referenced.rstrip("s")
+
+
+def translate_integrity_error(
+    error: IntegrityError, model, values: dict[str, Any]
+) -> SupleGearException | IntegrityError:
+    """Domain error naming the field of a violated unique or foreign-key constraint
+    
+    Other violations (NOT NULL, CHECK) have no domain error: the original
+    IntegrityError is returned, for the caller to re-raise as it is.
+    """
+    table = model.__table__
+    kind, column = _violation(error, table)
+    name = model.__name__
+    if kind == UNIQUE:
+        if column is None:
+            return DuplicateResourceError(f"{name} already exists")
+        return DuplicateResourceError(
+            f"{name} with {column} {values.get(column)!r} already exists", field=column
+        )
+    if kind == FOREIGN_KEY:
+        if column is None:
+            return ResourceNotFoundError(f"A resource referenced by the {name} was not found")
+        referenced = _referenced_name(table, column).capitalize()
+        return ResourceNotFoundError(
+            f"{referenced} with ID {values.get(column)} not found", field=column
+        )
+    return error
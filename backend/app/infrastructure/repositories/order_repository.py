@@ -1,9 +1,60 @@
 """Order repository"""
 
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import bindparam, func, insert, lambda_stmt, or_, select, update
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.lambdas import StatementLambdaElement
 
 from app.infrastructure.repositories.base_repository import BaseRepository
-from app.infrastructure.database.models_order import Order, OrderItem, Payment
+from app.infrastructure.database.models_order import (
+    Order, OrderItem, OrderStatusEnum, OrderStatusHistory, Payment, PaymentWebhookEvent,
+    WebhookEventStatusEnum
+)
+
+
+_ORDER_BY_NUMBER = select(Order).where(Order.order_number == bindparam("order_number")).limit(1)
+_ITEMS_OF_ORDER = select(OrderItem).where(
+    OrderItem.order_id == bindparam("order_id"), OrderItem.created_at == bindparam("created_at")
+)
+_UNITS_SOLD = select(OrderItem.product_id, func.sum(OrderItem.quantity)).group_by(
+    OrderItem.product_id
+)
+_PAYMENT_BY_TRANSACTION = select(Payment).where(
+    Payment.transaction_id == bindparam("transaction_id")
+).limit(1)
+_PAYMENTS_BY_TRANSACTIONS = select(Payment).where(
+    Payment.transaction_id.in_(bindparam("transaction_ids", expanding=True))
+)
+_PENDING_EVENTS = (
+    select(PaymentWebhookEvent)
+    .where(
+        PaymentWebhookEvent.status == WebhookEventStatusEnum.RECEIVED,
+        or_(
+            PaymentWebhookEvent.next_attempt_at.is_(None),
+            PaymentWebhookEvent.next_attempt_at <= bindparam("now"),
+        ),
+    )
+    .order_by(PaymentWebhookEvent.id)
+    .limit(bindparam("limit"))
+    # Concurrent workers each lock (and get) a different set of events
+    .with_for_update(skip_locked=True)
+)
+
+
+def created_between(
+    statement: StatementLambdaElement,
+    column,
+    since: Optional[datetime],
+    until: Optional[datetime],
+) -> StatementLambdaElement:
+    """Restrict a statement to a created_at range, letting PostgreSQL skip other partitions"""
+    if since is not None:
+        statement += lambda s: s.where(column >= since)
+    if until is not None:
+        statement += lambda s: s.where(column < until)
+    return statement
 
 
 class OrderRepository(BaseRepository[Order, dict, dict]):
@@ -12,21 +63,129 @@ class OrderRepository(BaseRepository[Order, dict, dict]):
     def __init__(self, db: Session):
         super().__init__(db, Order)
     
-    def get_by_user(self, user_id: int, skip: int = 0, limit: int = 100) -> list[Order]:
-        """Get orders by user"""
-        return self.db.query(self.model).filter(
-            Order.user_id == user_id
-        ).order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+    def get_by_user(
+        self,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> list[Order]:
+        """Get orders by user, newest first"""
+        statement = lambda_stmt(lambda: select(Order).where(Order.user_id == user_id))
+        statement = created_between(statement, Order.created_at, since, until)
+        statement += lambda s: s.order_by(Order.created_at.desc()).offset(skip).limit(limit)
+        return list(self.db.scalars(statement))
     
     def get_by_order_number(self, order_number: str) -> Order | None:
         """Get order by order number"""
-        return self.db.query(self.model).filter(Order.order_number == order_number).first()
+        return self.db.scalars(_ORDER_BY_NUMBER, {"order_number": order_number}).first()
+    
+    def get_by_status(
+        self,
+        status: str,
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> list[Order]:
+        """Get orders by status, newest first"""
+        statement = lambda_stmt(lambda: select(Order).where(Order.status == status))
+        statement = created_between(statement, Order.created_at, since, until)
+        statement += lambda s: s.order_by(Order.created_at.desc()).offset(skip).limit(limit)
+        return list(self.db.scalars(statement))
     
-    def get_by_status(self, status: str, skip: int = 0, limit: int = 100) -> list[Order]:
-        """Get orders by status"""
-        return self.db.query(self.model).filter(
-            Order.status == status
-        ).offset(skip).limit(limit).all()
+    def transition_status(
+        self, order_ids: list[int], from_status: OrderStatusEnum, to_status: OrderStatusEnum
+    ) -> list[int]:
+        """Move the given orders still in from_status to to_status, return the ids moved"""
+        # One UPDATE ... WHERE id = ANY(:ids) AND status = :from RETURNING id (caller commits)
+        if not order_ids:
+            return []
+        statement = self.statement(
+            "transition_status",
+            lambda: update(Order)
+            .where(self.ids_filter(), Order.status == bindparam("from_status"))
+            .values(status=bindparam("to_status"))
+            .returning(Order.id)
+            .execution_options(synchronize_session=False),
+        )
+        parameters = {"ids": list(order_ids), "from_status": from_status, "to_status": to_status}
+        return list(self.db.scalars(statement, parameters))
+    
+    def get_statuses(self, order_ids: list[int]) -> dict[int, OrderStatusEnum]:
+        """Current status of each of the given orders that exists"""
+        if not order_ids:
+            return {}
+        statement = self.statement(
+            "get_statuses", lambda: select(Order.id, Order.status).where(self.ids_filter())
+        )
+        return dict(self.db.execute(statement, {"ids": list(order_ids)}).all())
+
+
+class OrderStatusHistoryRepository(BaseRepository[OrderStatusHistory, dict, dict]):
+    """Order status history repository"""
+    
+    def __init__(self, db: Session):
+        super().__init__(db, OrderStatusHistory)
+    
+    def add_many(self, rows: list[dict]) -> None:
+        """Insert history rows in one executemany (caller commits)"""
+        if rows:
+            self.db.execute(insert(OrderStatusHistory), rows)
+    
+    def get_by_order(self, order_id: int) -> list[OrderStatusHistory]:
+        """Status changes of an order, oldest first"""
+        statement = self.statement(
+            "get_by_order",
+            lambda: select(OrderStatusHistory)
+            .where(OrderStatusHistory.order_id == bindparam("order_id"))
+            .order_by(OrderStatusHistory.id),
+        )
+        return list(self.db.scalars(statement, {"order_id": order_id}))
+
+
+class OrderItemRepository(BaseRepository[OrderItem, dict, dict]):
+    """Order item repository with custom queries"""
+    
+    def __init__(self, db: Session):
+        super().__init__(db, OrderItem)
+    
+    def iter_order_product_pairs(
+        self, after_order_id: int = 0, chunk_size: int = 100_000
+    ) -> Iterator[list[tuple[int, int]]]:
+        """Stream (order_id, product_id) pairs sorted by order, in chunks"""
+        statement = (
+            select(OrderItem.order_id, OrderItem.product_id)
+            .where(OrderItem.order_id > after_order_id)
+            .order_by(OrderItem.order_id)
+            .execution_options(yield_per=chunk_size)
+        )
+        for partition in self.db.execute(statement).partitions():
+            yield partition
+    
+    def add_to_order(self, order: Order, rows: list[dict]) -> None:
+        """Insert an order's items in one executemany, in the order's partition (caller commits)
+        
+        Every item gets the order's created_at, which get_by_order matches
+        exactly: the server default now() of the column would differ from it.
+        """
+        if rows:
+            created_at = order.created_at
+            self.db.execute(
+                insert(OrderItem),
+                [{**row, "order_id": order.id, "created_at": created_at} for row in rows],
+            )
+    
+    def get_by_order(self, order: Order) -> list[OrderItem]:
+        """Get the items of an order (reads only the order's partition)"""
+        parameters = {"order_id": order.id, "created_at": order.created_at}
+        return list(self.db.scalars(_ITEMS_OF_ORDER, parameters))
+    
+    def get_units_sold(self) -> dict[int, int]:
+        """Get total units sold per product"""
+        rows = self.db.execute(_UNITS_SOLD)
+        return {product_id: int(quantity) for product_id, quantity in rows}
 
 
 class PaymentRepository(BaseRepository[Payment, dict, dict]):
@@ -35,12 +194,52 @@ class PaymentRepository(BaseRepository[Payment, dict, dict]):
     def __init__(self, db: Session):
         super().__init__(db, Payment)
     
-    def get_by_order(self, order_id: int) -> Payment | None:
-        """Get payment by order"""
-        return self.db.query(self.model).filter(Payment.order_id == order_id).first()
+    def get_by_order(self, order_id: int, since: Optional[datetime] = None) -> Payment | None:
+        """Get payment by order (pass the order's created_at as `since` to prune partitions)"""
+        statement = lambda_stmt(lambda: select(Payment).where(Payment.order_id == order_id))
+        statement = created_between(statement, Payment.created_at, since, None)
+        statement += lambda s: s.limit(1)
+        return self.db.scalars(statement).first()
     
     def get_by_transaction_id(self, transaction_id: str) -> Payment | None:
         """Get payment by transaction ID"""
-        return self.db.query(self.model).filter(
-            Payment.transaction_id == transaction_id
-        ).first()
+        parameters = {"transaction_id": transaction_id}
+        return self.db.scalars(_PAYMENT_BY_TRANSACTION, parameters).first()
+    
+    def get_by_transaction_ids(self, transaction_ids: list[str]) -> list[Payment]:
+        """Get payments for several transaction IDs in one query"""
+        if not transaction_ids:
+            return []
+        parameters = {"transaction_ids": list(transaction_ids)}
+        return list(self.db.scalars(_PAYMENTS_BY_TRANSACTIONS, parameters))
+
+
+class PaymentWebhookEventRepository(BaseRepository[PaymentWebhookEvent, dict, dict]):
+    """Repository for raw payment webhook events"""
+    
+    def __init__(self, db: Session):
+        super().__init__(db, PaymentWebhookEvent)
+    
+    def insert_if_new(self, values: dict) -> bool:
+        """Insert an event in a single statement, return False if it was a duplicate"""
+        statement = self.insert_statement().values(**values).on_conflict_do_nothing(
+            index_elements=[PaymentWebhookEvent.event_id]
+        )
+        result = self.db.execute(statement)
+        self.db.commit()
+        return result.rowcount == 1
+    
+    def get_pending(self, limit: int = 500) -> list[PaymentWebhookEvent]:
+        """Lock and get received events due for processing, in arrival order"""
+        parameters = {"limit": limit, "now": datetime.utcnow()}
+        return list(self.db.scalars(_PENDING_EVENTS, parameters))
+    
+    def mark_done(self, event_ids: list[int], status: WebhookEventStatusEnum) -> None:
+        """Mark events as handled (caller commits)"""
+        if not event_ids:
+            return
+        self.db.execute(
+            update(PaymentWebhookEvent)
+            .where(PaymentWebhookEvent.id.in_(event_ids))
+            .values(status=status, processed_at=datetime.utcnow())
+        )
@@ -1,11 +1,49 @@
 """Product repository"""
 
+from decimal import Decimal
+from typing import Iterator, Optional, Sequence
+
+from sqlalchemy import bindparam, lambda_stmt, or_, select
 from sqlalchemy.orm import Session
 
 from app.infrastructure.repositories.base_repository import BaseRepository
 from app.infrastructure.database.models_product import Product, Category
 from app.schemas.product_schemas import ProductCreate, ProductUpdate
 
+# Fixed-shape statements, built once (their compiled form is cached by the engine)
+_BY_SKU = select(Product).where(Product.sku == bindparam("sku")).limit(1)
+_BY_CATEGORY = (
+    select(Product).where(Product.category_id == bindparam("category_id"))
+    .offset(bindparam("skip")).limit(bindparam("limit"))
+)
+_SEARCH = (
+    select(Product)
+    .where(or_(Product.name.ilike(bindparam("pattern")),
+               Product.description.ilike(bindparam("pattern"))))
+    .offset(bindparam("skip")).limit(bindparam("limit"))
+)
+_ACTIVE = (
+    select(Product).where(Product.status == "active")
+    .offset(bindparam("skip")).limit(bindparam("limit"))
+)
+_FACET_ROWS = select(
+    Product.id, Product.category_id, Product.price, Product.stock, Product.status
+)
+_AUTOCOMPLETE_ROWS = select(
+    Product.id, Product.name, Product.sku, Product.category_id
+).where(Product.status == "active")
+_CATEGORY_ROWS = select(
+    Product.id, Product.category_id, Product.status
+).where(Product.status == "active")
+_LOW_STOCK = select(Product).where(
+    Product.stock <= bindparam("threshold"), Product.status == "active"
+)
+_CATEGORY_BY_NAME = select(Category).where(Category.name == bindparam("name")).limit(1)
+_CATEGORY_NAMES = select(Category.id, Category.name)
+_CATEGORY_CATALOG_ROWS = select(
+    Category.id, Category.name, Category.description, Category.icon, Category.parent_id
+)
+
 
 class ProductRepository(BaseRepository[Product, ProductCreate, ProductUpdate]):
     """Product repository with custom queries"""
@@ -15,32 +53,91 @@ class ProductRepository(BaseRepository[Product, ProductCreate, ProductUpdate]):
     
     def get_by_sku(self, sku: str) -> Product | None:
         """Get product by SKU"""
-        return self.db.query(self.model).filter(Product.sku == sku).first()
+        return self.db.scalars(_BY_SKU, {"sku": sku}).first()
     
     def get_by_category(self, category_id: int, skip: int = 0, limit: int = 100) -> list[Product]:
         """Get products by category"""
-        return self.db.query(self.model).filter(
-            Product.category_id == category_id
-        ).offset(skip).limit(limit).all()
+        parameters = {"category_id": category_id, "skip": skip, "limit": limit}
+        return list(self.db.scalars(_BY_CATEGORY, parameters))
     
     def search(self, query: str, skip: int = 0, limit: int = 100) -> list[Product]:
         """Search products by name or description"""
-        return self.db.query(self.model).filter(
-            Product.name.ilike(f"%{query}%") | Product.description.ilike(f"%{query}%")
-        ).offset(skip).limit(limit).all()
+        parameters = {"pattern": f"%{query}%", "skip": skip, "limit": limit}
+        return list(self.db.scalars(_SEARCH, parameters))
     
     def get_active_products(self, skip: int = 0, limit: int = 100) -> list[Product]:
         """Get only active products"""
-        return self.db.query(self.model).filter(
-            Product.status == "active"
-        ).offset(skip).limit(limit).all()
+        return list(self.db.scalars(_ACTIVE, {"skip": skip, "limit": limit}))
+    
+    def filter_products(
+        self,
+        category_ids: Optional[list[int]] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        in_stock: Optional[bool] = None,
+        status: str = "active",
+        skip: int = 0,
+        limit: int = 100,
+    ) -> list[Product]:
+        """Get products matching facet filters (served by the status-leading indexes)"""
+        # A lambda statement: each combination of filters is compiled once, the
+        # values are extracted from the closures as parameters on every call
+        statement = lambda_stmt(lambda: select(Product).where(Product.status == status))
+        if category_ids:
+            statement += lambda s: s.where(Product.category_id.in_(category_ids))
+        if min_price is not None:
+            statement += lambda s: s.where(Product.price >= min_price)
+        if max_price is not None:
+            statement += lambda s: s.where(Product.price <= max_price)
+        if in_stock is not None:
+            if in_stock:
+                statement += lambda s: s.where(Product.stock > 0)
+            else:
+                statement += lambda s: s.where(Product.stock == 0)
+        statement += lambda s: s.order_by(Product.id).offset(skip).limit(limit)
+        return list(self.db.scalars(statement))
+    
+    def get_facet_rows(self) -> list[tuple[int, int, Decimal, int, str]]:
+        """Narrow projection of all products for the facet index"""
+        return list(self.db.execute(_FACET_ROWS))
+    
+    def get_autocomplete_rows(self) -> list[tuple[int, str, str, int]]:
+        """Narrow projection of active products for the autocomplete index"""
+        return list(self.db.execute(_AUTOCOMPLETE_ROWS))
+    
+    def get_category_rows(self) -> list[tuple[int, int, str]]:
+        """Narrow projection of active products for the category catalog's counts"""
+        return list(self.db.execute(_CATEGORY_ROWS))
+    
+    def get_price_rows(self, product_ids: list[int]) -> list[tuple[int, Decimal, int, str]]:
+        """Narrow projection (id, price, stock, status) of several products for cart pricing"""
+        if not product_ids:
+            return []
+        statement = self.statement(
+            "get_price_rows",
+            lambda: select(Product.id, Product.price, Product.stock, Product.status).where(
+                self.ids_filter()
+            ),
+        )
+        return list(self.db.execute(statement, {"ids": list(product_ids)}))
+    
+    def iter_snapshot_rows(self, batch_size: int = 10000) -> Iterator[Sequence[tuple]]:
+        """Active products ordered by id, as snapshot rows, in batches of plain tuples"""
+        statement = (
+            select(
+                Product.id, Product.name, Product.sku, Product.description, Product.price,
+                Product.stock, Product.category_id, Product.created_at, Product.updated_at,
+            )
+            .where(Product.status == "active")
+            .order_by(Product.id)
+            .execution_options(stream_results=True, yield_per=batch_size)
+        )
+        for partition in self.db.connection().execute(statement).partitions():
+            yield partition
     
     def get_low_stock(self, threshold: int = 10) -> list[Product]:
         """Get products with low stock"""
-        return self.db.query(self.model).filter(
-            Product.stock <= threshold,
-            Product.status == "active"
-        ).all()
+        return list(self.db.scalars(_LOW_STOCK, {"threshold": threshold}))
 
 
 class CategoryRepository(BaseRepository[Category, dict, dict]):
@@ -51,4 +148,14 @@ class CategoryRepository(BaseRepository[Category, dict, dict]):
     
     def get_by_name(self, name: str) -> Category | None:
         """Get category by name"""
-        return self.db.query(self.model).filter(Category.name == name).first()
+        return self.db.scalars(_CATEGORY_BY_NAME, {"name": name}).first()
+    
+    def get_names(self) -> list[tuple[int, str]]:
+        """Get (id, name) for all categories"""
+        return list(self.db.execute(_CATEGORY_NAMES))
+    
+    def get_catalog_rows(
+        self
+    ) -> list[tuple[int, str, Optional[str], Optional[str], Optional[int]]]:
+        """Get (id, name, description, icon, parent_id) for all categories"""
+        return list(self.db.execute(_CATEGORY_CATALOG_ROWS))
@@ -0,0 +1,143 @@
+"""Review repository"""
+
+from typing import Iterator, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.infrastructure.repositories.base_repository import BaseRepository
+from app.infrastructure.database.models_product import Product
+from app.infrastructure.database.models_review import Review
+
+
+def _adjust_rating(product_id: int, rating: int, count: int):
+    """UPDATE adding rating/count to a product's aggregate (relative, so no read first)"""
+    return (
+        update(Product)
+        .where(Product.id == product_id)
+        .values(
+            rating_sum=Product.rating_sum + rating,
+            rating_count=Product.rating_count + count,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+class ReviewRepository(BaseRepository[Review, dict, dict]):
+    """Review repository with custom queries"""
+    
+    def __init__(self, db: Session):
+        super().__init__(db, Review)
+    
+    def add_review(self, values: dict) -> Optional[Review]:
+        """
+        Insert a review and add its rating to the product aggregate in one transaction
+        
+        The aggregate is updated first: it fails fast for an unknown product
+        (returns None) and locks the product row, so concurrent reviews of
+        one product serialize on it instead of losing updates.
+        """
+        result = self.db.execute(_adjust_rating(values["product_id"], values["rating"], 1))
+        if result.rowcount == 0:
+            self.db.rollback()
+            return None
+        review = Review(**values)
+        self.db.add(review)
+        self._commit(values)
+        self.db.refresh(review)
+        self._log_write("created", review.id)
+        return review
+    
+    def remove_review(self, review_id: int, user_id: Optional[int] = None) -> Optional[int]:
+        """
+        Delete a review (only the user's own when user_id is given) and subtract
+        its rating from the product aggregate in one transaction
+        
+        Returns the review's product id, None when there was no such review.
+        """
+        statement = delete(Review).where(Review.id == review_id)
+        if user_id is not None:
+            statement = statement.where(Review.user_id == user_id)
+        deleted = self.db.execute(
+            statement.returning(Review.product_id, Review.rating)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if deleted is None:
+            self.db.rollback()
+            return None
+        product_id, rating = deleted
+        self.db.execute(_adjust_rating(product_id, -rating, -1))
+        self.db.commit()
+        self._log_write("deleted", review_id)
+        return product_id
+    
+    def get_page(
+        self, product_id: int, limit: int = 20, before_id: Optional[int] = None
+    ) -> list[Review]:
+        """Reviews of a product newest first, starting below a review id (keyset pagination)"""
+        statement = select(Review).where(Review.product_id == product_id)
+        if before_id is not None:
+            statement = statement.where(Review.id < before_id)
+        return list(self.db.scalars(statement.order_by(Review.id.desc()).limit(limit)))
+    
+    def get_rating_aggregate(self, product_id: int) -> Optional[tuple[int, int]]:
+        """Stored (rating_sum, rating_count) of a product"""
+        row = self.db.execute(
+            select(Product.rating_sum, Product.rating_count).where(Product.id == product_id)
+        ).first()
+        return tuple(row) if row is not None else None
+    
+    def find_drifted_products(self, batch_size: int = 10000) -> Iterator[int]:
+        """
+        Yield ids of products whose stored aggregate differs from their reviews
+        
+        Both sides are streamed in product id order and merged, so memory stays
+        bounded for any catalog size.
+        """
+        stored = self.db.execute(
+            select(Product.id, Product.rating_sum, Product.rating_count)
+            .order_by(Product.id)
+            .execution_options(yield_per=batch_size)
+        )
+        actual = iter(self.db.execute(
+            select(Review.product_id, func.sum(Review.rating), func.count(Review.id))
+            .group_by(Review.product_id)
+            .order_by(Review.product_id)
+            .execution_options(yield_per=batch_size)
+        ))
+        reviewed = next(actual, None)
+        for product_id, rating_sum, rating_count in stored:
+            while reviewed is not None and reviewed[0] < product_id:
+                reviewed = next(actual, None)
+            expected = (0, 0)
+            if reviewed is not None and reviewed[0] == product_id:
+                expected = (int(reviewed[1]), int(reviewed[2]))
+            if (rating_sum, rating_count) != expected:
+                yield product_id
+    
+    def recompute_aggregates(self, product_ids: list[int]) -> int:
+        """
+        Recompute the aggregates of the given products from their reviews
+        
+        The product rows are locked first: review writes update the product
+        row in their own transaction, so once the locks are held every review
+        write for these products has committed or not started, and the sums
+        read next are exact.
+        """
+        self.db.execute(
+            select(Product.id).where(Product.id.in_(product_ids)).with_for_update()
+        ).all()
+        rating_sum = select(func.coalesce(func.sum(Review.rating), 0)).where(
+            Review.product_id == Product.id
+        ).scalar_subquery()
+        rating_count = select(func.count(Review.id)).where(
+            Review.product_id == Product.id
+        ).scalar_subquery()
+        result = self.db.execute(
+            update(Product)
+            .where(Product.id.in_(product_ids))
+            .values(rating_sum=rating_sum, rating_count=rating_count)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount
@@ -0,0 +1,98 @@
+"""Revoked token and token family repositories"""
+
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.infrastructure.repositories.base_repository import BaseRepository
+from app.infrastructure.database.models_token import RevokedToken, TokenFamily
+
+
+class RevokedTokenRepository(BaseRepository[RevokedToken, dict, dict]):
+    """Revoked token repository with custom queries"""
+    
+    def __init__(self, db: Session):
+        super().__init__(db, RevokedToken)
+    
+    def insert_if_absent(self, values: dict) -> bool:
+        """Revoke a token id with a single INSERT, return False if it was already revoked"""
+        statement = self.insert_statement().values(**values).on_conflict_do_nothing(
+            index_elements=[RevokedToken.token_id]
+        )
+        result = self.db.execute(statement)
+        self.db.commit()
+        return result.rowcount == 1
+    
+    def is_revoked(self, token_id: str) -> bool:
+        """Check whether a token id is revoked"""
+        statement = select(RevokedToken.id).where(RevokedToken.token_id == token_id).limit(1)
+        return self.db.execute(statement).first() is not None
+    
+    def get_since(self, last_id: int, limit: int = 10000) -> list[tuple[int, str]]:
+        """(id, token_id) rows revoked after the given id, oldest first"""
+        statement = (
+            select(RevokedToken.id, RevokedToken.token_id)
+            .where(RevokedToken.id > last_id)
+            .order_by(RevokedToken.id)
+            .limit(limit)
+        )
+        return [tuple(row) for row in self.db.execute(statement)]
+    
+    def get_active(self, now: datetime, batch_size: int = 10000):
+        """Yield (id, token_id) of revocations that have not expired yet"""
+        statement = (
+            select(RevokedToken.id, RevokedToken.token_id)
+            .where(RevokedToken.expires_at >= now)
+            .execution_options(yield_per=batch_size)
+        )
+        for row in self.db.execute(statement):
+            yield tuple(row)
+    
+    def delete_expired(self, now: datetime) -> int:
+        """Delete revocations of tokens that expired anyway, return the number removed"""
+        result = self.db.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+        self.db.commit()
+        return result.rowcount
+
+
+class TokenFamilyRepository(BaseRepository[TokenFamily, dict, dict]):
+    """Token families of each user"""
+    
+    def __init__(self, db: Session):
+        super().__init__(db, TokenFamily)
+    
+    def record(self, family_id: str, user_id: int, expires_at: datetime) -> None:
+        """Record a new token family of a user"""
+        self.db.execute(insert(TokenFamily).values(
+            family_id=family_id, user_id=user_id, expires_at=expires_at
+        ))
+        self.db.commit()
+    
+    def extend(self, family_id: str, expires_at: datetime) -> None:
+        """Keep a family alive until its newest refresh token expires"""
+        self.db.execute(
+            update(TokenFamily)
+            .where(TokenFamily.family_id == family_id)
+            .values(expires_at=expires_at)
+        )
+        self.db.commit()
+    
+    def get_live_family_ids(self, user_id: int, now: datetime) -> list[str]:
+        """Ids of a user's families that still have an unexpired refresh token"""
+        statement = select(TokenFamily.family_id).where(
+            TokenFamily.user_id == user_id, TokenFamily.expires_at >= now
+        )
+        return list(self.db.scalars(statement))
+    
+    def delete_for_user(self, user_id: int) -> int:
+        """Forget every family of a user, return the number removed"""
+        result = self.db.execute(delete(TokenFamily).where(TokenFamily.user_id == user_id))
+        self.db.commit()
+        return result.rowcount
+    
+    def delete_expired(self, now: datetime) -> int:
+        """Delete families whose refresh tokens have all expired, return the number removed"""
+        result = self.db.execute(delete(TokenFamily).where(TokenFamily.expires_at < now))
+        self.db.commit()
+        return result.rowcount
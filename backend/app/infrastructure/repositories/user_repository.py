@@ -1,12 +1,34 @@
 """User repository"""
 
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import bindparam, or_, select
 
 from app.infrastructure.repositories.base_repository import BaseRepository
 from app.infrastructure.database.models_user import User
 from app.schemas.user_schemas import UserCreate, UserUpdate
 
+_BY_EMAIL = select(User).where(User.email == bindparam("email")).limit(1)
+_BY_USERNAME = select(User).where(User.username == bindparam("username")).limit(1)
+_BY_EMAIL_OR_USERNAME = select(User).where(
+    or_(User.email == bindparam("email"), User.username == bindparam("username"))
+).limit(1)
+_SEARCH = (
+    select(User)
+    .where(
+        or_(
+            User.email.ilike(bindparam("pattern")),
+            User.username.ilike(bindparam("pattern")),
+            User.first_name.ilike(bindparam("pattern")),
+            User.last_name.ilike(bindparam("pattern")),
+        )
+    )
+    .offset(bindparam("skip")).limit(bindparam("limit"))
+)
+_ACTIVE = (
+    select(User).where(User.is_active == True)
+    .offset(bindparam("skip")).limit(bindparam("limit"))
+)
+
 
 class UserRepository(BaseRepository[User, UserCreate, UserUpdate]):
     """User repository with custom queries"""
@@ -16,29 +38,22 @@ class UserRepository(BaseRepository[User, UserCreate, UserUpdate]):
     
     def get_by_email(self, email: str) -> User | None:
         """Get user by email"""
-        return self.db.query(self.model).filter(User.email == email).first()
+        return self.db.scalars(_BY_EMAIL, {"email": email}).first()
     
     def get_by_username(self, username: str) -> User | None:
         """Get user by username"""
-        return self.db.query(self.model).filter(User.username == username).first()
+        return self.db.scalars(_BY_USERNAME, {"username": username}).first()
     
     def get_by_email_or_username(self, email: str, username: str) -> User | None:
         """Get user by email or username"""
-        return self.db.query(self.model).filter(
-            or_(User.email == email, User.username == username)
-        ).first()
+        parameters = {"email": email, "username": username}
+        return self.db.scalars(_BY_EMAIL_OR_USERNAME, parameters).first()
     
     def search(self, query: str, skip: int = 0, limit: int = 100) -> list[User]:
         """Search users by email or username"""
-        return self.db.query(self.model).filter(
-            or_(
-                User.email.ilike(f"%{query}%"),
-                User.username.ilike(f"%{query}%"),
-                User.first_name.ilike(f"%{query}%"),
-                User.last_name.ilike(f"%{query}%"),
-            )
-        ).offset(skip).limit(limit).all()
+        parameters = {"pattern": f"%{query}%", "skip": skip, "limit": limit}
+        return list(self.db.scalars(_SEARCH, parameters))
     
     def get_active_users(self, skip: int = 0, limit: int = 100) -> list[User]:
         """Get only active users"""
-        return self.db.query(self.model).filter(User.is_active == True).offset(skip).limit(limit).all()
+        return list(self.db.scalars(_ACTIVE, {"skip": skip, "limit": limit}))
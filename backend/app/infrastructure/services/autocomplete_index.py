@@ -0,0 +1,361 @@
+"""In-process prefix index for product autocomplete
+
+Terms (normalized words of product names, SKUs and category names) are kept
+in a sorted list, so every term starting with a prefix is one contiguous
+range found with bisect. Each term has a posting list of packed rank keys
+(popularity and product id in one int64, so ascending order is best first).
+A prefix matching many terms (a single letter, a SKU stem) also gets one
+deduplicated key array of all its products, so every word of a query is a
+few sorted arrays. A query is answered by leapfrogging through them: seek
+each word to the best key any other word reached, with bisect, until all
+agree; the first `limit` agreements are the best matches, and no query
+merges or sorts postings.
+"""
+
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_PREFIX_END = "\uffff"
+
+# Prefixes matching more terms than this get a key array of their own
+BROAD_PREFIX_TERMS = 64
+# Changes to one key array past which it is rebuilt rather than edited in place
+REBUILD_CHANGES = 256
+
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+_MAX_POPULARITY = (1 << 30) - 1
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents"""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text: str) -> list[str]:
+    """Split normalized text into words"""
+    return _WORD_RE.findall(normalize(text or ""))
+
+
+def rank_key(popularity: int, product_id: int) -> int:
+    """Sort key packing popularity (descending) and product id (ascending)"""
+    return (_MAX_POPULARITY - min(popularity, _MAX_POPULARITY)) << _ID_BITS | product_id
+
+
+@dataclass(slots=True)
+class _Entry:
+    """Indexed product"""
+    id: int
+    name: str
+    sku: str
+    category_id: int
+    popularity: int
+    terms: tuple[str, ...]
+    
+    @property
+    def key(self) -> int:
+        """Rank key of this product"""
+        return rank_key(self.popularity, self.id)
+
+
+def _prefixes(terms: Iterable[str]) -> set[str]:
+    """Every prefix of the given terms"""
+    return {term[:length] for term in terms for length in range(1, len(term) + 1)}
+
+
+def _edit(keys: Optional[array], drop: set[int], put: set[int]) -> array:
+    """Sorted keys without `drop` and with `put`, edited in place when the change is small"""
+    if keys is None:
+        keys = array("q")
+    if len(drop) + len(put) > REBUILD_CHANGES:
+        merged = set(keys)
+        merged.difference_update(drop)
+        merged.update(put)
+        return array("q", sorted(merged))
+    for key in drop:
+        position = bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
+    for key in put:
+        position = bisect_left(keys, key)
+        if position == len(keys) or keys[position] != key:
+            keys.insert(position, key)
+    return keys
+
+
+class _Cursor:
+    """Forward-only seeks through the union of sorted key arrays"""
+    
+    __slots__ = ("lists", "positions")
+    
+    def __init__(self, lists: list[array]):
+        self.lists = lists
+        self.positions = [0] * len(lists)
+    
+    def __len__(self) -> int:
+        return sum(len(keys) for keys in self.lists)
+    
+    def seek(self, target: int) -> Optional[int]:
+        """Smallest key >= target (targets never decrease), None when exhausted"""
+        best = None
+        positions = self.positions
+        for number, keys in enumerate(self.lists):
+            position = bisect_left(keys, target, positions[number])
+            positions[number] = position
+            if position < len(keys) and (best is None or keys[position] < best):
+                best = keys[position]
+        return best
+
+
+def _intersect(cursors: list[_Cursor], limit: int) -> list[int]:
+    """First `limit` keys present in every cursor, in order"""
+    lead, others = cursors[0], cursors[1:]
+    results = []
+    target = 0
+    while len(results) < limit:
+        key = lead.seek(target)
+        if key is None:
+            break
+        for cursor in others:
+            found = cursor.seek(key)
+            if found is None:
+                return results
+            if found != key:
+                # Nothing before `found` is in this word, so restart from it
+                key = found
+                break
+        else:
+            results.append(key)
+            key += 1
+        target = key
+    return results
+
+
+class AutocompleteIndex:
+    """Prefix index over product names, SKUs and category names"""
+    
+    def __init__(self):
+        self._terms: list[str] = []
+        self._postings: dict[str, array] = {}
+        self._products: dict[int, _Entry] = {}
+        # Deduplicated keys of the products under each broad prefix
+        self._prefix_keys: dict[str, array] = {}
+        self._categories: dict[int, str] = {}
+        self._category_terms: list[tuple[str, int]] = []
+        self._lock = threading.RLock()
+    
+    def __len__(self) -> int:
+        return len(self._products)
+    
+    def _product_terms(self, name: str, sku: str, category_id: int) -> tuple[str, ...]:
+        """Terms a product can be found by"""
+        sku_words = tokenize(sku)
+        terms = set(tokenize(name))
+        terms.update(sku_words)
+        terms.add("".join(sku_words))
+        terms.update(tokenize(self._categories.get(category_id, "")))
+        return tuple(sorted(term for term in terms if term))
+    
+    def build(
+        self,
+        products: Iterable[tuple[int, str, str, int]],
+        categories: Iterable[tuple[int, str]],
+        popularity: Optional[dict[int, int]] = None,
+    ) -> None:
+        """Build from (id, name, sku, category_id) rows of active products"""
+        popularity = popularity or {}
+        category_names = {category_id: name for category_id, name in categories}
+        self._categories = category_names
+        entries = {}
+        postings: dict[str, list[int]] = {}
+        for product_id, name, sku, category_id in products:
+            entry = _Entry(
+                id=product_id, name=name, sku=sku, category_id=category_id,
+                popularity=popularity.get(product_id, 0),
+                terms=self._product_terms(name, sku, category_id),
+            )
+            entries[product_id] = entry
+            key = entry.key
+            for term in entry.terms:
+                postings.setdefault(term, []).append(key)
+        packed = {term: array("q", sorted(keys)) for term, keys in postings.items()}
+        del postings
+        terms = sorted(packed)
+        prefix_keys: dict[str, array] = {}
+        self._collect_broad(terms, packed, "", 0, len(terms), prefix_keys)
+        
+        category_terms = sorted(
+            (term, category_id)
+            for category_id, name in category_names.items()
+            for term in tokenize(name)
+        )
+        with self._lock:
+            self._products = entries
+            self._postings = packed
+            self._terms = terms
+            self._prefix_keys = prefix_keys
+            self._category_terms = category_terms
+    
+    @staticmethod
+    def _collect_broad(
+        terms: list[str], postings: dict[str, array], prefix: str, low: int, high: int,
+        prefix_keys: dict[str, array],
+    ) -> array:
+        """Keys under a prefix, storing those of it and every broad prefix below it"""
+        if high - low <= BROAD_PREFIX_TERMS:
+            keys = set()
+            for term in terms[low:high]:
+                keys.update(postings[term])
+            return array("q", sorted(keys))
+        keys = set()
+        position = low
+        if terms[low] == prefix:
+            keys.update(postings[prefix])
+            position += 1
+        while position < high:
+            child = terms[position][:len(prefix) + 1]
+            end = bisect_left(terms, child + _PREFIX_END, position, high)
+            keys.update(AutocompleteIndex._collect_broad(
+                terms, postings, child, position, end, prefix_keys
+            ))
+            position = end
+        merged = array("q", sorted(keys))
+        if prefix:
+            prefix_keys[prefix] = merged
+        return merged
+    
+    def _apply(
+        self,
+        removed: Iterable[tuple[int, tuple[str, ...]]],
+        added: Iterable[tuple[int, tuple[str, ...]]],
+    ) -> None:
+        """Remove, then add, (key, terms) pairs in the postings and broad prefix arrays"""
+        drop: dict[str, set[int]] = defaultdict(set)
+        put: dict[str, set[int]] = defaultdict(set)
+        prefix_drop: dict[str, set[int]] = defaultdict(set)
+        prefix_put: dict[str, set[int]] = defaultdict(set)
+        for changes, by_term, by_prefix in ((removed, drop, prefix_drop),
+                                            (added, put, prefix_put)):
+            for key, terms in changes:
+                for term in terms:
+                    by_term[term].add(key)
+                for prefix in _prefixes(terms):
+                    if prefix in self._prefix_keys:
+                        by_prefix[prefix].add(key)
+        
+        for term in drop.keys() | put.keys():
+            existed = term in self._postings
+            keys = _edit(self._postings.get(term), drop.get(term, set()), put.get(term, set()))
+            if keys:
+                self._postings[term] = keys
+                if not existed:
+                    insort(self._terms, term)
+            elif existed:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+        for prefix in prefix_drop.keys() | prefix_put.keys():
+            keys = _edit(
+                self._prefix_keys[prefix], prefix_drop.get(prefix, set()),
+                prefix_put.get(prefix, set()),
+            )
+            if keys:
+                self._prefix_keys[prefix] = keys
+            else:
+                del self._prefix_keys[prefix]
+    
+    def upsert_product(
+        self, product_id: int, name: str, sku: str, category_id: int, is_active: bool = True
+    ) -> None:
+        """Add, update or (if inactive) remove one product"""
+        with self._lock:
+            previous = self._products.pop(product_id, None)
+            removed = [(previous.key, previous.terms)] if previous is not None else []
+            added = []
+            if is_active:
+                entry = _Entry(
+                    id=product_id, name=name, sku=sku, category_id=category_id,
+                    popularity=previous.popularity if previous else 0,
+                    terms=self._product_terms(name, sku, category_id),
+                )
+                self._products[product_id] = entry
+                added.append((entry.key, entry.terms))
+            self._apply(removed, added)
+    
+    def remove_product(self, product_id: int) -> None:
+        """Remove a product"""
+        with self._lock:
+            entry = self._products.pop(product_id, None)
+            if entry is not None:
+                self._apply([(entry.key, entry.terms)], [])
+    
+    def refresh_popularity(self, popularity: dict[int, int]) -> int:
+        """Re-rank products whose popularity (0 when missing) changed, return how many"""
+        with self._lock:
+            changed = [
+                entry for entry in self._products.values()
+                if entry.popularity != popularity.get(entry.id, 0)
+            ]
+            removed = [(entry.key, entry.terms) for entry in changed]
+            for entry in changed:
+                entry.popularity = popularity.get(entry.id, 0)
+            self._apply(removed, [(entry.key, entry.terms) for entry in changed])
+            return len(changed)
+    
+    def _word_cursor(self, word: str) -> _Cursor:
+        """Cursor over the products having a term starting with word"""
+        keys = self._prefix_keys.get(word)
+        if keys is not None:
+            return _Cursor([keys])
+        low, high = bisect_left(self._terms, word), bisect_left(self._terms, word + _PREFIX_END)
+        if high - low > BROAD_PREFIX_TERMS:
+            # Broadened by writes since the build: give it its own array from now on
+            keys = self._collect_broad(
+                self._terms, self._postings, word, low, high, self._prefix_keys
+            )
+            self._prefix_keys[word] = keys
+            return _Cursor([keys])
+        return _Cursor([self._postings[term] for term in self._terms[low:high]])
+    
+    def search(self, query: str, limit: int = 10) -> list[_Entry]:
+        """Products with a term starting with every word of the query, most popular first"""
+        words = set(tokenize(query))
+        if not words:
+            return []
+        with self._lock:
+            # The word with the fewest products leads the intersection
+            cursors = sorted((self._word_cursor(word) for word in words), key=len)
+            keys = _intersect(cursors, limit)
+            return [self._products[key & _ID_MASK] for key in keys]
+    
+    def search_categories(self, query: str, limit: int = 5) -> list[tuple[int, str]]:
+        """Categories with a word starting with the last word of the query"""
+        words = tokenize(query)
+        if not words:
+            return []
+        with self._lock:
+            prefix = words[-1]
+            low = bisect_left(self._category_terms, (prefix,))
+            high = bisect_left(self._category_terms, (prefix + _PREFIX_END,))
+            matches = []
+            for _, category_id in self._category_terms[low:high]:
+                if category_id not in matches:
+                    matches.append(category_id)
+            return [(category_id, self._categories[category_id]) for category_id in matches[:limit]]
+
+
+_autocomplete_index = AutocompleteIndex()
+
+
+def get_autocomplete_index() -> AutocompleteIndex:
+    """Get the process-wide autocomplete index"""
+    return _autocomplete_index
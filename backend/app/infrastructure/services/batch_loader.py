@@ -0,0 +1,102 @@
+"""DataLoader-style batching of lookups by key
+
+Every `load` issued while the event loop runs one tick (for example by
+many concurrent requests, or by one request gathering several lookups) is
+collected and dispatched as a single batch call once that tick completes.
+The batch function is blocking (a database query) and runs in the
+threadpool, so one batch costs one pooled connection instead of one per key.
+RequestLoader adds memoization for the lifetime of a single request on top
+of the shared batcher.
+"""
+
+import asyncio
+from typing import Callable, Generic, Hashable, Iterable, Optional, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """Coalesces loads made within one event-loop tick into batch calls"""
+    
+    def __init__(
+        self, batch_fn: Callable[[list[K]], dict[K, V]], max_batch_size: int = 100
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._pending: dict[K, asyncio.Future] = {}
+        self._scheduled = False
+        self.loads = 0
+        self.batches = 0
+    
+    def future(self, key: K) -> asyncio.Future:
+        """Future for a key, shared by every load of it in this tick"""
+        self.loads += 1
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if not self._scheduled:
+                self._scheduled = True
+                loop.call_soon(self._dispatch)
+        return future
+    
+    async def load(self, key: K) -> Optional[V]:
+        """Value for a key (None when the batch function has none)"""
+        return await self.future(key)
+    
+    async def load_many(self, keys: Iterable[K]) -> list[Optional[V]]:
+        """Values for several keys, in order"""
+        return list(await asyncio.gather(*[self.future(key) for key in keys]))
+    
+    def _dispatch(self) -> None:
+        """Start one batch call per max_batch_size pending keys"""
+        pending, self._pending = self._pending, {}
+        self._scheduled = False
+        keys = list(pending)
+        for start in range(0, len(keys), self.max_batch_size):
+            chunk = {key: pending[key] for key in keys[start:start + self.max_batch_size]}
+            asyncio.ensure_future(self._run(chunk))
+    
+    async def _run(self, futures: dict[K, asyncio.Future]) -> None:
+        """Call the batch function and resolve every waiting future"""
+        self.batches += 1
+        try:
+            values = await run_in_threadpool(self.batch_fn, list(futures))
+        except Exception as exc:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for key, future in futures.items():
+            if not future.done():
+                future.set_result(values.get(key))
+    
+    def stats(self) -> dict:
+        """Loads requested and batch calls made"""
+        return {"loads": self.loads, "batches": self.batches}
+
+
+class RequestLoader(Generic[K, V]):
+    """Per-request view of a BatchLoader that memoizes what it has loaded"""
+    
+    def __init__(self, loader: BatchLoader[K, V]):
+        self.loader = loader
+        self._cache: dict[K, asyncio.Future] = {}
+    
+    def _cached(self, key: K) -> asyncio.Future:
+        """Memoized future for a key"""
+        future = self._cache.get(key)
+        if future is None:
+            future = self._cache[key] = self.loader.future(key)
+        return future
+    
+    async def load(self, key: K) -> Optional[V]:
+        """Value for a key, loaded at most once per request"""
+        return await self._cached(key)
+    
+    async def load_many(self, keys: Iterable[K]) -> list[Optional[V]]:
+        """Values for several keys, in order, each loaded at most once per request"""
+        return list(await asyncio.gather(*[self._cached(key) for key in keys]))
@@ -0,0 +1,533 @@
+"""Cross-worker invalidation of per-process caches
+
+Each worker keeps caches in front of the catalog (search results, the facet,
+autocomplete and category indexes), and a write only updates those of the
+worker that handled it. The invalidation bus tells the others.
+
+Writes are picked up from the ORM session: a flush records the ids of new,
+changed and deleted rows of every entity type some cache subscribed to.
+When the writing transaction commits, the bus appends one row per entity
+to cache_writes and publishes a compact message (origin, entity, version,
+ids) through the transport, both inside that transaction: with PostgreSQL
+the message is pg_notify, delivered when the write commits, and a write
+that rolls back (or fails to record its invalidation) leaves neither. The
+version is the row's value from one sequence, so writes never update, or
+wait on, a shared row. (No Core statement writes a cached column of a
+tracked entity; the rating aggregates are not cached.)
+
+Every worker runs a listener thread that hands the ids to the entity's
+subscribers, which reload or evict just those rows. Every check interval
+it also reads the cache_writes rows appended since the last check, which
+catches messages lost while it was disconnected: a write whose message has
+still not arrived one interval later is applied from its row, which bounds
+staleness at two intervals when notifications are lost. Versions
+are taken just before the commit, so rows can commit slightly out of
+version order; each check re-reads VERSION_OVERLAP versions behind the
+newest one it saw. Rows older than KEEP_WRITES_SECONDS are deleted, except
+each entity's newest, which holds its current version.
+"""
+
+import queue
+import select
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.database.models_coupon import Coupon
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.repositories.cache_version_repository import CacheVersionRepository
+
+# Entity names of the models whose writes are tracked (when something subscribed)
+TRACKED_MODELS = {Product: "product", Category: "category", Coupon: "coupon"}
+# Ids per message, keeping payloads well under pg_notify's 8000 byte limit
+MAX_MESSAGE_IDS = 1000
+# Above this many ids one write invalidates the whole entity instead
+MAX_WRITE_IDS = 10000
+# Versions re-read behind the newest one checked, covering writes that commit out of order
+VERSION_OVERLAP = 100
+# Age of the cache_writes rows deleted (but each entity's newest), and how often
+KEEP_WRITES_SECONDS = 86400
+PRUNE_INTERVAL = 3600
+
+# Session.info keys
+_PENDING = "cache_invalidations"
+_OUTBOX = "cache_invalidation_payloads"
+_VERSIONS = "cache_invalidation_versions"
+
+# Subscriber callback: the changed ids, or None when every row may have changed
+InvalidationHandler = Callable[[Optional[frozenset[int]]], None]
+
+
+@dataclass(frozen=True, slots=True)
+class Invalidation:
+    """One invalidation message"""
+    origin: str
+    entity: str
+    version: int
+    # None: the whole entity
+    ids: Optional[tuple[int, ...]]
+    sent_at: float
+    
+    def encode(self) -> str:
+        """Payload text: origin|entity|version|sent_ms|ids ("*" for the whole entity)"""
+        ids = "*" if self.ids is None else ",".join(map(str, self.ids))
+        return f"{self.origin}|{self.entity}|{self.version}|{int(self.sent_at * 1000)}|{ids}"
+    
+    @classmethod
+    def decode(cls, payload: str) -> "Invalidation":
+        """Message from its payload text"""
+        origin, entity, version, sent_ms, ids = payload.split("|")
+        return cls(
+            origin, entity, int(version),
+            None if ids == "*" else tuple(int(i) for i in ids.split(",") if i),
+            int(sent_ms) / 1000,
+        )
+
+
+def split_message(
+    origin: str, entity: str, version: int, ids: Optional[Iterable[int]], sent_at: float
+) -> list[Invalidation]:
+    """Messages for one write, at most MAX_MESSAGE_IDS ids each"""
+    if ids is None:
+        return [Invalidation(origin, entity, version, None, sent_at)]
+    ids = sorted(ids)
+    if len(ids) > MAX_WRITE_IDS:
+        return [Invalidation(origin, entity, version, None, sent_at)]
+    return [
+        Invalidation(origin, entity, version, tuple(ids[i:i + MAX_MESSAGE_IDS]), sent_at)
+        for i in range(0, len(ids), MAX_MESSAGE_IDS)
+    ]
+
+
+class InvalidationTransport(ABC):
+    """Interface for delivering invalidation payloads to every worker"""
+    
+    @abstractmethod
+    def publish(self, session: Session, payloads: list[str]) -> None:
+        """Send payloads as part of the session's transaction (delivered on commit)"""
+    
+    def committed(self, session: Session) -> None:
+        """Called after the session committed"""
+    
+    def rolled_back(self, session: Session) -> None:
+        """Called after the session rolled back"""
+    
+    @abstractmethod
+    def listen(self) -> None:
+        """Start (or restart) receiving payloads"""
+    
+    @abstractmethod
+    def receive(self, timeout: float) -> list[str]:
+        """Payloads received, waiting up to timeout seconds for the first one"""
+    
+    def close(self) -> None:
+        """Stop receiving"""
+
+
+class LocalInvalidationHub:
+    """In-process fan-out shared by local transports (one per simulated worker)"""
+    
+    def __init__(self):
+        self._queues: list[queue.SimpleQueue] = []
+        self._lock = threading.Lock()
+    
+    def subscribe(self) -> queue.SimpleQueue:
+        """New subscriber queue"""
+        subscriber = queue.SimpleQueue()
+        with self._lock:
+            self._queues.append(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber: queue.SimpleQueue) -> None:
+        """Stop delivering to a queue"""
+        with self._lock:
+            if subscriber in self._queues:
+                self._queues.remove(subscriber)
+    
+    def broadcast(self, payloads: list[str]) -> None:
+        """Deliver payloads to every subscriber"""
+        with self._lock:
+            subscribers = list(self._queues)
+        for subscriber in subscribers:
+            for payload in payloads:
+                subscriber.put(payload)
+
+
+class LocalInvalidationTransport(InvalidationTransport):
+    """In-process transport with the same commit semantics, for one worker and for tests"""
+    
+    def __init__(self, hub: Optional[LocalInvalidationHub] = None):
+        self.hub = hub or LocalInvalidationHub()
+        self._queue: Optional[queue.SimpleQueue] = None
+    
+    def publish(self, session: Session, payloads: list[str]) -> None:
+        # Held until the commit, like NOTIFY
+        session.info.setdefault(_OUTBOX, []).extend(payloads)
+    
+    def committed(self, session: Session) -> None:
+        payloads = session.info.pop(_OUTBOX, None)
+        if payloads:
+            self.hub.broadcast(payloads)
+    
+    def rolled_back(self, session: Session) -> None:
+        session.info.pop(_OUTBOX, None)
+    
+    def listen(self) -> None:
+        self.close()
+        self._queue = self.hub.subscribe()
+    
+    def receive(self, timeout: float) -> list[str]:
+        try:
+            first = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+        except queue.Empty:
+            return []
+        payloads = [first]
+        while True:
+            try:
+                payloads.append(self._queue.get_nowait())
+            except queue.Empty:
+                return payloads
+    
+    def close(self) -> None:
+        if self._queue is not None:
+            self.hub.unsubscribe(self._queue)
+            self._queue = None
+
+
+class PostgresNotifyTransport(InvalidationTransport):
+    """pg_notify in the writing transaction, LISTEN on a dedicated connection"""
+    
+    def __init__(self, engine, channel: str = "cache_invalidation"):
+        self.engine = engine
+        self.channel = channel
+        self._connection = None
+    
+    def publish(self, session: Session, payloads: list[str]) -> None:
+        # Every chunk in one round trip
+        session.execute(
+            text(
+                "SELECT pg_notify(:channel, payload) "
+                "FROM unnest(CAST(:payloads AS text[])) AS payload"
+            ),
+            {"channel": self.channel, "payloads": payloads},
+        )
+    
+    def listen(self) -> None:
+        self.close()
+        # A connection of its own, outside the pool and in autocommit, so
+        # notifications are read as soon as they arrive
+        connection = self.engine.raw_connection()
+        # Taken before detaching, which drops the proxy's reference to it
+        dbapi_connection = connection.driver_connection
+        connection.detach()
+        dbapi_connection.autocommit = True
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        self._connection = dbapi_connection
+    
+    def receive(self, timeout: float) -> list[str]:
+        connection = self._connection
+        if not connection.notifies:
+            select.select([connection], [], [], timeout)
+        connection.poll()
+        payloads = [notify.payload for notify in connection.notifies]
+        connection.notifies.clear()
+        return payloads
+    
+    def close(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            finally:
+                self._connection = None
+
+
+class CacheInvalidationBus:
+    """Publishes committed writes of cached entities and applies other workers' writes"""
+    
+    def __init__(
+        self,
+        transport: InvalidationTransport,
+        session_factory: Callable[[], Session],
+        check_interval: float = 5.0,
+    ):
+        self.transport = transport
+        self.session_factory = session_factory
+        self.check_interval = check_interval
+        # Identifies this worker's own messages, which need no applying
+        self.origin = uuid.uuid4().hex[:12]
+        self._handlers: dict[str, list[InvalidationHandler]] = {}
+        self._models: dict[type, str] = {}
+        # Newest version applied per entity
+        self._seen: dict[str, int] = {}
+        # Versions received (or applied) past the check cursor, the newest
+        # version checked, and writes found unreceived at the last check
+        self._received: set[int] = set()
+        self._checked = 0
+        self._overdue: dict[int, tuple[str, Optional[tuple[int, ...]]]] = {}
+        # Versions this worker's own commits produced
+        self._written: dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {
+            "published": 0, "received": 0, "own": 0, "applied": 0,
+            "fallback_refreshes": 0, "errors": 0, "lag_ms_last": 0.0, "lag_ms_max": 0.0,
+        }
+    
+    def subscribe(self, entity: str, handler: InvalidationHandler) -> None:
+        """Call handler with the changed ids of an entity (None: all of them)"""
+        self._handlers.setdefault(entity, []).append(handler)
+        for model, name in TRACKED_MODELS.items():
+            if name == entity:
+                self._models[model] = entity
+    
+    def install(self, session_factory) -> None:
+        """Track writes made through sessions of a sessionmaker"""
+        event.listen(session_factory, "after_flush", self._collect)
+        event.listen(session_factory, "before_commit", self._record)
+        event.listen(session_factory, "after_commit", self._committed)
+        event.listen(session_factory, "after_rollback", self._discard)
+    
+    def _collect(self, session: Session, flush_context) -> None:
+        """Record the ids of tracked rows the flush wrote"""
+        models = self._models
+        if not models:
+            return
+        pending = session.info.setdefault(_PENDING, {})
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            entity = models.get(type(obj))
+            if entity is not None:
+                pending.setdefault(entity, set()).add(obj.id)
+    
+    def _record(self, session: Session) -> None:
+        """Append the transaction's writes and send their messages before it commits"""
+        if not self._models:
+            return
+        # The commit flushes only after this hook: flush now so every write is seen
+        session.flush()
+        pending = session.info.pop(_PENDING, None)
+        if pending:
+            # Errors propagate: the write commits only together with its invalidation
+            session.info.setdefault(_VERSIONS, {}).update(self.publish(session, pending))
+    
+    def publish(self, session: Session, pending: dict[str, set[int]]) -> dict[str, int]:
+        """Append writes and send messages in the session's transaction, return the versions"""
+        repository = CacheVersionRepository(session)
+        now = time.time()
+        payloads = []
+        versions = {}
+        for entity, ids in sorted(pending.items()):
+            ids = None if ids is None or len(ids) > MAX_WRITE_IDS else sorted(ids)
+            version = versions[entity] = repository.append(entity, ids)
+            payloads.extend(
+                message.encode()
+                for message in split_message(self.origin, entity, version, ids, now)
+            )
+        self.transport.publish(session, payloads)
+        self.stats["published"] += len(payloads)
+        return versions
+    
+    def _committed(self, session: Session) -> None:
+        """Deliver the messages of a committed transaction (with transports that hold them)"""
+        self.transport.committed(session)
+        for entity, version in session.info.pop(_VERSIONS, {}).items():
+            self._written[entity] = max(self._written.get(entity, 0), version)
+            self._received.add(version)
+    
+    def _discard(self, session: Session) -> None:
+        """Forget invalidations of a rolled back transaction"""
+        session.info.pop(_PENDING, None)
+        session.info.pop(_VERSIONS, None)
+        self.transport.rolled_back(session)
+    
+    def _refresh(self, entity: str, ids: Optional[frozenset[int]]) -> None:
+        for handler in self._handlers.get(entity, ()):
+            handler(ids)
+    
+    def apply(self, message: Invalidation) -> None:
+        """Apply one message"""
+        stats = self.stats
+        stats["received"] += 1
+        if message.origin == self.origin:
+            stats["own"] += 1
+        else:
+            self._refresh(message.entity, None if message.ids is None else frozenset(message.ids))
+            stats["applied"] += 1
+            lag = round(max(time.time() - message.sent_at, 0.0) * 1000, 3)
+            stats["lag_ms_last"] = lag
+            stats["lag_ms_max"] = max(stats["lag_ms_max"], lag)
+        # Only recorded once handled, so a failed refresh is retried by the version check
+        self._received.add(message.version)
+        self._seen[message.entity] = max(self._seen.get(message.entity, 0), message.version)
+    
+    def receive(self, timeout: float = 0.0) -> int:
+        """Apply the messages that arrived (waiting up to timeout), return how many"""
+        payloads = self.transport.receive(timeout)
+        for payload in payloads:
+            message = Invalidation.decode(payload)
+            if message.entity in self._handlers:
+                self.apply(message)
+        return len(payloads)
+    
+    def _writes_since(self, version: int) -> list[tuple[int, str, Optional[tuple[int, ...]]]]:
+        db = self.session_factory()
+        try:
+            return CacheVersionRepository(db).get_since(version)
+        finally:
+            db.close()
+    
+    def check_versions(self, grace: bool = True) -> list[str]:
+        """
+        Apply committed writes whose messages never arrived, return the entities refreshed
+        
+        With grace, a write is only applied if its message was already
+        missing at the previous check, since a message for a write that
+        just committed may still be on its way.
+        """
+        writes = self._writes_since(max(self._checked - VERSION_OVERLAP, 0))
+        due, self._overdue = self._overdue, {}
+        for version, entity, ids in writes:
+            if version in self._received or entity not in self._handlers:
+                continue
+            if grace and version not in due:
+                self._overdue[version] = (entity, ids)
+            else:
+                due[version] = (entity, ids)
+        missed: dict[str, list[int]] = {}
+        changed: dict[str, Optional[set[int]]] = {}
+        for version, (entity, ids) in due.items():
+            if version in self._received:
+                continue
+            missed.setdefault(entity, []).append(version)
+            if ids is None or changed.get(entity, ()) is None:
+                changed[entity] = None
+            else:
+                changed.setdefault(entity, set()).update(ids)
+        if writes:
+            self._checked = max(self._checked, writes[-1][0])
+        refreshed = []
+        for entity, versions in sorted(missed.items()):
+            ids = changed[entity]
+            self._refresh(
+                entity, None if ids is None or len(ids) > MAX_WRITE_IDS else frozenset(ids)
+            )
+            self._received.update(versions)
+            self._seen[entity] = max(self._seen.get(entity, 0), *versions)
+            self.stats["fallback_refreshes"] += 1
+            refreshed.append(entity)
+        # Versions this far behind are never read again
+        floor = self._checked - VERSION_OVERLAP
+        self._received = {version for version in self._received if version > floor}
+        return refreshed
+    
+    def prune(self) -> int:
+        """Delete cache_writes rows nobody needs any more, return the number removed"""
+        db = self.session_factory()
+        try:
+            return CacheVersionRepository(db).delete_before(
+                datetime.utcnow() - timedelta(seconds=KEEP_WRITES_SECONDS)
+            )
+        finally:
+            db.close()
+    
+    def start(self) -> None:
+        """Start listening, note the current versions and start the listener thread"""
+        if self._thread is None:
+            self.transport.listen()
+            # After LISTEN, so no write falls between the two
+            db = self.session_factory()
+            try:
+                repository = CacheVersionRepository(db)
+                self._seen = repository.get_versions()
+                self._checked = max(self._seen.values(), default=0)
+                # Already applied by whoever loads the caches after this
+                self._received = {
+                    version for version, _, _ in
+                    repository.get_since(max(self._checked - VERSION_OVERLAP, 0))
+                }
+            finally:
+                db.close()
+            self._overdue = {}
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="cache-invalidation", daemon=True
+            )
+            self._thread.start()
+    
+    def _run(self) -> None:
+        """Listener loop"""
+        checked_at = pruned_at = time.monotonic()
+        resync = False
+        while not self._stop.is_set():
+            try:
+                if resync:
+                    self.transport.listen()
+                    # Anything sent while disconnected is lost: compare versions now
+                    self.check_versions(grace=False)
+                    resync = False
+                self.receive(min(self.check_interval, 1.0))
+                if time.monotonic() - checked_at >= self.check_interval:
+                    self.check_versions()
+                    checked_at = time.monotonic()
+                if time.monotonic() - pruned_at >= PRUNE_INTERVAL:
+                    self.prune()
+                    pruned_at = time.monotonic()
+            except Exception:
+                self.stats["errors"] += 1
+                resync = True
+                self._stop.wait(1.0)
+    
+    def stop(self) -> None:
+        """Stop the listener thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.transport.close()
+    
+    def latest_version(self, entity: str) -> int:
+        """Newest version of an entity this worker knows was committed"""
+        return max(self._seen.get(entity, 0), self._written.get(entity, 0))
+    
+    def info(self) -> dict:
+        """Counters, staleness of applied messages and last applied versions"""
+        return {**self.stats, "versions": dict(self._seen)}
+
+
+def create_invalidation_transport(engine) -> InvalidationTransport:
+    """Create the transport selected by CACHE_INVALIDATION_TRANSPORT"""
+    if settings.CACHE_INVALIDATION_TRANSPORT == "postgres":
+        if engine.dialect.name == "postgresql":
+            return PostgresNotifyTransport(engine, settings.CACHE_INVALIDATION_CHANNEL)
+        # Other databases (SQLite in development) serve a single process
+        return LocalInvalidationTransport()
+    if settings.CACHE_INVALIDATION_TRANSPORT == "local":
+        return LocalInvalidationTransport()
+    raise ValueError(
+        f"Unknown cache invalidation transport: {settings.CACHE_INVALIDATION_TRANSPORT}"
+    )
+
+
+_invalidation_bus: Optional[CacheInvalidationBus] = None
+
+
+def get_invalidation_bus() -> CacheInvalidationBus:
+    """Get the process-wide invalidation bus (tracking writes of the app's sessions)"""
+    global _invalidation_bus
+    if _invalidation_bus is None:
+        from app.infrastructure.database.database import SessionLocal, engine
+        _invalidation_bus = CacheInvalidationBus(
+            create_invalidation_transport(engine),
+            SessionLocal,
+            check_interval=settings.CACHE_INVALIDATION_CHECK_SECONDS,
+        )
+        _invalidation_bus.install(SessionLocal)
+    return _invalidation_bus
@@ -0,0 +1,404 @@
+"""Shopping carts in memory, written behind to the carts table
+
+Every cart operation touches one entry of a CartBackend: a hash of product
+id -> quantity per cart key, so adding, updating and removing a line are
+O(1) and never wait on the database. The first access to a cart in a
+process reads it through from the carts table. Changed carts are marked
+dirty, and a background thread flushes them with one upsert per interval.
+The same thread sweeps carts: idle ones are evicted from memory (they stay
+in the table), and rows not updated for CART_EXPIRY_DAYS are deleted.
+
+LocalCartBackend keeps carts in this process. It is the stand-in for a
+shared store (a networked key-value store with per-key hashes) that
+several workers would use behind the same interface. With the local
+backend, a user's requests must reach the same worker (sticky sessions)
+for the cart to stay consistent.
+"""
+
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.repositories.cart_repository import CartRepository
+
+logger = logging.getLogger("app.carts")
+
+
+def user_cart_key(user_id: int) -> str:
+    """Cart key of a signed-in user"""
+    return f"user:{user_id}"
+
+
+def guest_cart_key(token: str) -> str:
+    """Cart key of a guest cart token"""
+    return f"guest:{token}"
+
+
+@dataclass(slots=True)
+class CartState:
+    """Lines of a cart (product id -> quantity, in the order added) and its version"""
+    items: dict[int, int] = field(default_factory=dict)
+    updated_at: float = 0.0
+    version: int = 0
+    # Last time this process changed or loaded the cart (what idle eviction goes by)
+    touched_at: float = 0.0
+
+
+class CartLimitError(ValueError):
+    """Raised when a line would exceed the cart's line limit"""
+    pass
+
+
+class CartBackend(ABC):
+    """Interface for cart backends (one hash of product id -> quantity per key)"""
+    
+    # Whether calls do blocking I/O and must run off the event loop
+    blocking = False
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[CartState]:
+        """Copy of a cart, None if the backend does not hold it"""
+    
+    @abstractmethod
+    def insert_if_absent(self, key: str, state: CartState, now: float) -> None:
+        """Hold a cart loaded from persistence unless the key is already held"""
+    
+    @abstractmethod
+    def add(self, key: str, product_id: int, quantity: int, now: float) -> int:
+        """Add to a line's quantity, return the new quantity"""
+    
+    @abstractmethod
+    def set(self, key: str, product_id: int, quantity: int, now: float) -> None:
+        """Set a line's quantity (0 removes the line)"""
+    
+    @abstractmethod
+    def replace(self, key: str, items: dict[int, int], now: float) -> None:
+        """Replace all lines of a cart"""
+    
+    @abstractmethod
+    def evict(self, key: str, idle_since: float) -> bool:
+        """Stop holding a cart unless it was used after a time, return whether evicted"""
+    
+    @abstractmethod
+    def idle_keys(self, idle_since: float) -> list[str]:
+        """Keys of held carts not used after a time"""
+    
+    @abstractmethod
+    def __contains__(self, key: str) -> bool:
+        """Whether the backend holds a cart"""
+    
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of carts held"""
+
+
+class LocalCartBackend(CartBackend):
+    """Per-process carts, kept in least-recently-used order for cheap sweeps"""
+    
+    def __init__(self, max_lines: int = 500, max_quantity: int = 1000):
+        self.max_lines = max_lines
+        self.max_quantity = max_quantity
+        self._carts: OrderedDict[str, CartState] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _touch(self, key: str, now: float) -> CartState:
+        """The cart to change, created if needed and moved to the recent end"""
+        state = self._carts.get(key)
+        if state is None:
+            state = self._carts[key] = CartState()
+        else:
+            self._carts.move_to_end(key)
+        state.updated_at = state.touched_at = now
+        state.version += 1
+        return state
+    
+    def get(self, key: str) -> Optional[CartState]:
+        with self._lock:
+            state = self._carts.get(key)
+            if state is None:
+                return None
+            return CartState(
+                dict(state.items), state.updated_at, state.version, state.touched_at
+            )
+    
+    def insert_if_absent(self, key: str, state: CartState, now: float) -> None:
+        with self._lock:
+            if key not in self._carts:
+                state.touched_at = now
+                self._carts[key] = state
+    
+    def add(self, key: str, product_id: int, quantity: int, now: float) -> int:
+        with self._lock:
+            items = self._carts.get(key, CartState()).items
+            if product_id not in items and len(items) >= self.max_lines:
+                raise CartLimitError(f"A cart holds at most {self.max_lines} products")
+            state = self._touch(key, now)
+            total = min(state.items.get(product_id, 0) + quantity, self.max_quantity)
+            state.items[product_id] = total
+            return total
+    
+    def set(self, key: str, product_id: int, quantity: int, now: float) -> None:
+        with self._lock:
+            items = self._carts.get(key, CartState()).items
+            if quantity and product_id not in items and len(items) >= self.max_lines:
+                raise CartLimitError(f"A cart holds at most {self.max_lines} products")
+            state = self._touch(key, now)
+            if quantity:
+                state.items[product_id] = min(quantity, self.max_quantity)
+            else:
+                state.items.pop(product_id, None)
+    
+    def replace(self, key: str, items: dict[int, int], now: float) -> None:
+        if len(items) > self.max_lines:
+            raise CartLimitError(f"A cart holds at most {self.max_lines} products")
+        with self._lock:
+            self._touch(key, now).items = {
+                product_id: min(quantity, self.max_quantity)
+                for product_id, quantity in items.items() if quantity
+            }
+    
+    def evict(self, key: str, idle_since: float) -> bool:
+        with self._lock:
+            state = self._carts.get(key)
+            if state is None or state.touched_at >= idle_since:
+                return False
+            del self._carts[key]
+            return True
+    
+    def idle_keys(self, idle_since: float) -> list[str]:
+        keys = []
+        with self._lock:
+            for key, state in self._carts.items():
+                if state.touched_at >= idle_since:
+                    break
+                keys.append(key)
+        return keys
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._carts
+    
+    def __len__(self) -> int:
+        return len(self._carts)
+
+
+class CartStore:
+    """Carts read through from and written behind to the carts table"""
+    
+    def __init__(
+        self,
+        backend: CartBackend,
+        session_factory: Callable[[], Session],
+        flush_interval: float = 2.0,
+        idle_seconds: float = 1800.0,
+        expiry_days: int = 30,
+        sweep_interval: float = 300.0,
+    ):
+        self.backend = backend
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.idle_seconds = idle_seconds
+        self.expiry_days = expiry_days
+        self.sweep_interval = sweep_interval
+        self._dirty: set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"loads": 0, "flushes": 0, "flushed_carts": 0, "evicted": 0, "expired": 0}
+    
+    def _load(self, key: str) -> None:
+        """Read a cart through from the table unless the backend already holds it"""
+        if key in self.backend:
+            return
+        self.stats["loads"] += 1
+        db = self.session_factory()
+        try:
+            persisted = CartRepository(db).get_items(key)
+        finally:
+            db.close()
+        if persisted is None:
+            state = CartState(updated_at=time.time())
+        else:
+            items, version, updated_at = persisted
+            state = CartState(items, updated_at.timestamp(), version)
+        self.backend.insert_if_absent(key, state, time.time())
+    
+    def would_block(self, key: str) -> bool:
+        """Whether an operation on a cart may wait on I/O (a blocking backend or a read-through)"""
+        return self.backend.blocking or key not in self.backend
+    
+    def get(self, key: str) -> CartState:
+        """Copy of a cart (empty if it has no lines)"""
+        state = self.backend.get(key)
+        if state is None:
+            self._load(key)
+            state = self.backend.get(key) or CartState()
+        return state
+    
+    def add(self, key: str, product_id: int, quantity: int) -> int:
+        """Add to a line, return its new quantity"""
+        self._load(key)
+        with self._lock:
+            total = self.backend.add(key, product_id, quantity, time.time())
+            self._dirty.add(key)
+        return total
+    
+    def set(self, key: str, product_id: int, quantity: int) -> None:
+        """Set a line's quantity (0 removes it)"""
+        self._load(key)
+        with self._lock:
+            self.backend.set(key, product_id, quantity, time.time())
+            self._dirty.add(key)
+    
+    def remove(self, key: str, product_id: int) -> None:
+        """Remove a line"""
+        self.set(key, product_id, 0)
+    
+    def clear(self, key: str) -> None:
+        """Remove every line"""
+        self._load(key)
+        with self._lock:
+            self.backend.replace(key, {}, time.time())
+            self._dirty.add(key)
+    
+    def merge(self, source_key: str, target_key: str) -> CartState:
+        """Add a cart's lines into another one and empty it (a guest cart on login)"""
+        self._load(source_key)
+        self._load(target_key)
+        # Cart writes of this process hold the lock, so neither cart changes in between
+        with self._lock:
+            source = self.backend.get(source_key) or CartState()
+            if source.items:
+                target = self.backend.get(target_key) or CartState()
+                merged = target.items
+                for product_id, quantity in source.items.items():
+                    merged[product_id] = merged.get(product_id, 0) + quantity
+                now = time.time()
+                self.backend.replace(target_key, merged, now)
+                self.backend.replace(source_key, {}, now)
+                self._dirty |= {source_key, target_key}
+        return self.get(target_key)
+    
+    def flush(self) -> int:
+        """Write dirty carts to the table with one upsert, return carts written"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return 0
+        rows = []
+        for key in dirty:
+            state = self.backend.get(key)
+            if state is not None:
+                # Emptied carts are written too, so their version survives a reload
+                rows.append({
+                    "key": key,
+                    "items": json.dumps(state.items),
+                    "version": state.version,
+                    "updated_at": datetime.fromtimestamp(state.updated_at),
+                })
+        try:
+            db = self.session_factory()
+            try:
+                CartRepository(db).upsert_many(rows)
+            finally:
+                db.close()
+        except Exception:
+            # Retried on the next flush
+            with self._lock:
+                self._dirty |= dirty
+            raise
+        self.stats["flushes"] += 1
+        self.stats["flushed_carts"] += len(dirty)
+        return len(dirty)
+    
+    def sweep(self) -> int:
+        """Evict idle carts from memory and delete expired rows, return carts evicted"""
+        self.flush()
+        now = time.time()
+        idle_since = now - self.idle_seconds
+        evicted = 0
+        for key in self.backend.idle_keys(idle_since):
+            with self._lock:
+                # Not written out yet: keep it until a flush succeeds
+                if key in self._dirty:
+                    continue
+            # Skipped if the cart was used since it was listed
+            evicted += self.backend.evict(key, idle_since)
+        db = self.session_factory()
+        try:
+            expired = CartRepository(db).delete_expired(
+                datetime.fromtimestamp(now) - timedelta(days=self.expiry_days)
+            )
+        finally:
+            db.close()
+        self.stats["evicted"] += evicted
+        self.stats["expired"] += expired
+        return evicted
+    
+    def start(self) -> None:
+        """Start the write-behind thread"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cart-store", daemon=True)
+            self._thread.start()
+    
+    def _run(self) -> None:
+        """Flush loop, sweeping every sweep_interval"""
+        swept_at = time.monotonic()
+        while not self._stop.wait(self.flush_interval):
+            try:
+                if time.monotonic() - swept_at >= self.sweep_interval:
+                    self.sweep()
+                    swept_at = time.monotonic()
+                else:
+                    self.flush()
+            except Exception:
+                # Dirty carts stay marked and are written on the next round
+                logger.exception("Writing carts to the table failed")
+    
+    def stop(self) -> None:
+        """Stop the thread and write out remaining changes"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+    
+    def info(self) -> dict:
+        """Counters plus carts held and pending writes"""
+        return {**self.stats, "carts": len(self.backend), "dirty": len(self._dirty)}
+
+
+def create_cart_backend() -> CartBackend:
+    """Create the backend selected by CART_BACKEND"""
+    if settings.CART_BACKEND != "local":
+        raise ValueError(f"Unknown cart backend: {settings.CART_BACKEND}")
+    from app.schemas.cart_schemas import MAX_CART_LINES, MAX_LINE_QUANTITY
+    return LocalCartBackend(max_lines=MAX_CART_LINES, max_quantity=MAX_LINE_QUANTITY)
+
+
+_cart_store: Optional[CartStore] = None
+
+
+def get_cart_store() -> CartStore:
+    """Get the process-wide cart store"""
+    global _cart_store
+    if _cart_store is None:
+        from app.infrastructure.database.database import SessionLocal
+        _cart_store = CartStore(
+            create_cart_backend(),
+            SessionLocal,
+            flush_interval=settings.CART_FLUSH_INTERVAL_SECONDS,
+            idle_seconds=settings.CART_IDLE_SECONDS,
+            expiry_days=settings.CART_EXPIRY_DAYS,
+            sweep_interval=settings.CART_SWEEP_INTERVAL_SECONDS,
+        )
+    return _cart_store
@@ -0,0 +1,202 @@
+"""In-memory category catalog
+
+Categories are few and rarely change, so the whole table is held in process
+as an immutable snapshot: the categories by id, the children of each and the
+number of active products in each. Readers take the current snapshot with a
+single attribute read and never lock, so a request sees one consistent
+version even while writes happen. Writers build a new snapshot under a lock
+and swap it in with the next version number. A product write only copies
+the count map, moving one product between at most two categories; the
+category maps are shared with the previous snapshot.
+"""
+
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import cached_property
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
+from app.infrastructure.database.models_product import ProductStatusEnum
+
+# (id, name, description, icon, parent_id)
+CategoryRow = tuple[int, str, Optional[str], Optional[str], Optional[int]]
+# (id, category_id, status)
+ProductCategoryRow = tuple[int, int, str]
+
+def _empty() -> Mapping:
+    """Empty read-only map"""
+    return MappingProxyType({})
+
+
+def _is_active(status) -> bool:
+    """Whether an enum member or string is the active product status"""
+    return getattr(status, "value", status) == ProductStatusEnum.ACTIVE.value
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryEntry:
+    """Category as held in the catalog"""
+    id: int
+    name: str
+    description: Optional[str] = None
+    icon: Optional[str] = None
+    parent_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """One immutable version of the category catalog"""
+    version: int
+    categories: Mapping[int, CategoryEntry] = field(default_factory=_empty)
+    # Parent id (None for top-level) -> child ids ordered by name
+    children: Mapping[Optional[int], tuple[int, ...]] = field(default_factory=_empty)
+    product_counts: Mapping[int, int] = field(default_factory=_empty)
+    
+    def __contains__(self, category_id: int) -> bool:
+        return category_id in self.categories
+    
+    def __len__(self) -> int:
+        return len(self.categories)
+    
+    def get(self, category_id: int) -> Optional[CategoryEntry]:
+        """Category by id, None when unknown"""
+        return self.categories.get(category_id)
+    
+    def product_count(self, category_id: int) -> int:
+        """Active products directly in a category"""
+        return self.product_counts.get(category_id, 0)
+    
+    def ordered(self) -> list[CategoryEntry]:
+        """All categories ordered by name"""
+        return sorted(self.categories.values(), key=lambda entry: (entry.name, entry.id))
+    
+    @cached_property
+    def subtree_product_counts(self) -> Mapping[int, int]:
+        """Active products in each category and all of its descendants"""
+        totals: dict[int, int] = {}
+        # Iterative post-order from the roots (categories in a cycle are unreachable)
+        stack = [(category_id, False) for category_id in self.children.get(None, ())]
+        while stack:
+            category_id, expanded = stack.pop()
+            children = self.children.get(category_id, ())
+            if expanded:
+                totals[category_id] = self.product_count(category_id) + sum(
+                    totals.get(child, 0) for child in children
+                )
+            elif category_id not in totals:
+                stack.append((category_id, True))
+                stack.extend((child, False) for child in children)
+        return MappingProxyType(totals)
+
+
+def _children(categories: Mapping[int, CategoryEntry]) -> Mapping:
+    """Parent id -> child ids ordered by name"""
+    children: dict[Optional[int], list[CategoryEntry]] = {}
+    for entry in categories.values():
+        parent_id = entry.parent_id if entry.parent_id in categories else None
+        children.setdefault(parent_id, []).append(entry)
+    return MappingProxyType({
+        parent_id: tuple(entry.id for entry in sorted(entries, key=lambda e: (e.name, e.id)))
+        for parent_id, entries in children.items()
+    })
+
+
+class CategoryCatalog:
+    """Category snapshot holder with copy-on-write updates"""
+    
+    def __init__(self):
+        self._snapshot = CatalogSnapshot(version=0)
+        # Product id -> category id, for active products only
+        self._active_products: dict[int, int] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """Current snapshot (safe to use without locking)"""
+        return self._snapshot
+    
+    def _swap(self, categories=None, children=None, product_counts=None) -> CatalogSnapshot:
+        """Publish a new snapshot, reusing the current maps that did not change"""
+        current = self._snapshot
+        self._snapshot = CatalogSnapshot(
+            version=current.version + 1,
+            categories=current.categories if categories is None else categories,
+            children=current.children if children is None else children,
+            product_counts=current.product_counts if product_counts is None else product_counts,
+        )
+        return self._snapshot
+    
+    def build(
+        self, categories: Iterable[CategoryRow], products: Iterable[ProductCategoryRow]
+    ) -> CatalogSnapshot:
+        """Build from (id, name, description, icon, parent_id) and (id, category_id, status) rows"""
+        entries = MappingProxyType({row[0]: CategoryEntry(*row) for row in categories})
+        active = {
+            product_id: category_id
+            for product_id, category_id, status in products
+            if _is_active(status)
+        }
+        counts = MappingProxyType(dict(Counter(active.values())))
+        with self._lock:
+            self._active_products = active
+            return self._swap(entries, _children(entries), counts)
+    
+    def upsert_category(
+        self,
+        category_id: int,
+        name: str,
+        description: Optional[str] = None,
+        icon: Optional[str] = None,
+        parent_id: Optional[int] = None,
+    ) -> CatalogSnapshot:
+        """Insert or update one category"""
+        entry = CategoryEntry(category_id, name, description, icon, parent_id)
+        with self._lock:
+            categories = dict(self._snapshot.categories)
+            categories[category_id] = entry
+            categories = MappingProxyType(categories)
+            return self._swap(categories, _children(categories))
+    
+    def _move_product(self, product_id: int, category_id: Optional[int]) -> None:
+        """Count a product in category_id (None: in no category); caller holds the lock"""
+        previous = self._active_products.get(product_id)
+        if previous == category_id:
+            return
+        counts = dict(self._snapshot.product_counts)
+        if previous is not None:
+            del self._active_products[product_id]
+            counts[previous] -= 1
+            if not counts[previous]:
+                del counts[previous]
+        if category_id is not None:
+            self._active_products[product_id] = category_id
+            counts[category_id] = counts.get(category_id, 0) + 1
+        self._swap(product_counts=MappingProxyType(counts))
+    
+    def upsert_product(self, product_id: int, category_id: int, status) -> None:
+        """Reflect a created/updated product in the active product counts"""
+        with self._lock:
+            self._move_product(product_id, category_id if _is_active(status) else None)
+    
+    def remove_product(self, product_id: int) -> None:
+        """Forget a deleted product"""
+        with self._lock:
+            self._move_product(product_id, None)
+    
+    def stats(self) -> dict:
+        """Snapshot version, category count and active product count"""
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "categories": len(snapshot),
+            "active_products": sum(snapshot.product_counts.values()),
+        }
+
+
+_category_catalog = CategoryCatalog()
+
+
+def get_category_catalog() -> CategoryCatalog:
+    """Get the process-wide category catalog"""
+    return _category_catalog
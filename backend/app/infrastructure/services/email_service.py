@@ -0,0 +1,366 @@
+"""Email delivery service with pooled SMTP connections and batched sends"""
+
+import logging
+import queue
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from functools import lru_cache
+from string import Template
+from typing import Iterator, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.email")
+
+# Email templates (subject, body). Placeholders use string.Template syntax.
+EMAIL_TEMPLATES = {
+    "welcome": (
+        "Welcome to SupleGear, $username!",
+        "Hi $first_name,\n\n"
+        "Thanks for creating your SupleGear account ($email).\n"
+        "Start browsing our supplements at any time.\n\n"
+        "The SupleGear team",
+    ),
+    "order_confirmation": (
+        "Order $order_number confirmed",
+        "Hi $first_name,\n\n"
+        "We received your order $order_number.\n"
+        "Total: $total_amount\n"
+        "Shipping to: $shipping_address\n\n"
+        "The SupleGear team",
+    ),
+}
+
+
+@dataclass
+class OutgoingEmail:
+    """Email ready to be delivered"""
+    to: str
+    subject: str
+    body: str
+    # Deliveries already tried and failed with a transient error
+    attempts: int = 0
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a batch: sent count, emails to retry and emails the server rejected"""
+    sent: int = 0
+    retry: list[OutgoingEmail] = field(default_factory=list)
+    rejected: list[OutgoingEmail] = field(default_factory=list)
+    
+    def add(self, other: "BatchResult") -> None:
+        self.sent += other.sent
+        self.retry.extend(other.retry)
+        self.rejected.extend(other.rejected)
+
+
+@lru_cache(maxsize=128)
+def get_compiled_template(name: str) -> tuple[Template, Template]:
+    """Get compiled subject and body templates (cached per template name)"""
+    if name not in EMAIL_TEMPLATES:
+        raise ValueError(f"Email template {name} not found")
+    subject, body = EMAIL_TEMPLATES[name]
+    return Template(subject), Template(body)
+
+
+def is_permanent_failure(error: smtplib.SMTPException) -> bool:
+    """Whether retrying the message cannot succeed (refused recipients or a 5xx reply)"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def render_template(name: str, to: str, context: dict) -> OutgoingEmail:
+    """Render an email template into an outgoing email"""
+    subject, body = get_compiled_template(name)
+    return OutgoingEmail(
+        to=to,
+        subject=subject.safe_substitute(context),
+        body=body.safe_substitute(context),
+    )
+
+
+class SMTPConnectionPool:
+    """Pool of persistent, authenticated SMTP connections"""
+    
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        timeout: int = 10,
+        pool_size: int = 4,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=pool_size)
+        self._slots = threading.BoundedSemaphore(pool_size)
+    
+    def _connect(self) -> smtplib.SMTP:
+        """Open a new connection and run the TLS/login handshake once"""
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            connection.starttls()
+        if self.user and self.password:
+            connection.login(self.user, self.password)
+        return connection
+    
+    @staticmethod
+    def _is_alive(connection: smtplib.SMTP) -> bool:
+        """Check that a pooled connection is still usable"""
+        try:
+            return connection.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+    
+    @staticmethod
+    def _discard(connection: smtplib.SMTP) -> None:
+        """Close a connection, ignoring errors"""
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+    
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """Check out a connection, reconnecting if the pooled one went stale"""
+        self._slots.acquire()
+        try:
+            connection = None
+            try:
+                connection = self._idle.get_nowait()
+                if not self._is_alive(connection):
+                    self._discard(connection)
+                    connection = None
+            except queue.Empty:
+                pass
+            if connection is None:
+                connection = self._connect()
+            
+            try:
+                yield connection
+            except (smtplib.SMTPServerDisconnected, OSError):
+                connection.close()
+                raise
+            except Exception:
+                # Message-level failure, the connection itself is still good
+                self._idle.put_nowait(connection)
+                raise
+            self._idle.put_nowait(connection)
+        finally:
+            self._slots.release()
+    
+    def close(self) -> None:
+        """Close all idle connections"""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+class EmailService:
+    """Service for sending emails over a pooled SMTP connection"""
+    
+    def __init__(self, pool: SMTPConnectionPool, sender: str):
+        self.pool = pool
+        self.sender = sender
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool.pool_size, thread_name_prefix="email"
+        )
+    
+    def _build_message(self, email: OutgoingEmail) -> EmailMessage:
+        """Build a MIME message"""
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = email.to
+        message["Subject"] = email.subject
+        message.set_content(email.body)
+        return message
+    
+    def _send_chunk(self, emails: list[OutgoingEmail]) -> BatchResult:
+        """Send a chunk of emails back to back over a single connection"""
+        result = BatchResult()
+        try:
+            with self.pool.connection() as connection:
+                for email in emails:
+                    try:
+                        connection.send_message(self._build_message(email))
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                        if not is_permanent_failure(e):
+                            raise
+                        result.rejected.append(email)
+                        continue
+                    result.sent += 1
+        except (smtplib.SMTPException, OSError):
+            # Emails before the failing one were delivered, only the rest are retried
+            result.retry.extend(emails[result.sent + len(result.rejected):])
+        return result
+    
+    def send(self, email: OutgoingEmail) -> None:
+        """Send a single email"""
+        with self.pool.connection() as connection:
+            connection.send_message(self._build_message(email))
+    
+    def send_batch(self, emails: list[OutgoingEmail]) -> BatchResult:
+        """Send emails spread across all pooled connections, report what was not sent"""
+        result = BatchResult()
+        if not emails:
+            return result
+        workers = min(self.pool.pool_size, len(emails))
+        chunks = [emails[i::workers] for i in range(workers)]
+        for chunk_result in self._executor.map(self._send_chunk, chunks):
+            result.add(chunk_result)
+        return result
+    
+    def send_template(self, name: str, to: str, context: dict) -> None:
+        """Render and send a templated email"""
+        self.send(render_template(name, to, context))
+    
+    def close(self) -> None:
+        """Stop workers and close connections"""
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+
+
+class EmailBatcher:
+    """Collects emails and flushes them in batches from a background thread"""
+    
+    def __init__(
+        self,
+        service: EmailService,
+        batch_size: int = 50,
+        interval: float = 2.0,
+        max_attempts: int = 5,
+    ):
+        self.service = service
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self._queue: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="email-batcher", daemon=True)
+        self._thread.start()
+    
+    def enqueue(self, email: OutgoingEmail) -> None:
+        """Queue an email for the next batch"""
+        self._queue.put(email)
+    
+    def enqueue_welcome(self, user) -> None:
+        """Queue a welcome email for a new user"""
+        self.enqueue(render_template("welcome", user.email, {
+            "username": user.username,
+            "first_name": user.first_name or user.username,
+            "email": user.email,
+        }))
+    
+    def enqueue_order_confirmation(self, order, user) -> None:
+        """Queue an order confirmation email"""
+        self.enqueue(render_template("order_confirmation", user.email, {
+            "first_name": user.first_name or user.username,
+            "order_number": order.order_number,
+            "total_amount": order.total_amount,
+            "shipping_address": order.shipping_address,
+        }))
+    
+    def _drain(self, first: OutgoingEmail) -> list[OutgoingEmail]:
+        """Collect up to batch_size queued emails"""
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _retry(self, emails: list[OutgoingEmail]) -> None:
+        """Requeue emails that failed transiently, dropping those out of attempts"""
+        for email in emails:
+            email.attempts += 1
+            if self._stop.is_set() or email.attempts >= self.max_attempts:
+                logger.error("Dropping email to %s after %d attempts", email.to, email.attempts)
+            else:
+                self._queue.put(email)
+    
+    def _run(self) -> None:
+        """Flush loop"""
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=self.interval)
+            except queue.Empty:
+                continue
+            batch = self._drain(first)
+            try:
+                result = self.service.send_batch(batch)
+            except Exception:
+                logger.exception("Email batch of %d failed", len(batch))
+                continue
+            for email in result.rejected:
+                logger.warning("Email to %s rejected by the server", email.to)
+            if result.retry:
+                self._retry(result.retry)
+                # Back off until the server is reachable again (no wait once stopping)
+                self._stop.wait(self.interval)
+    
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Flush pending emails and stop the background thread"""
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+def create_email_service(pool_size: Optional[int] = None) -> EmailService:
+    """Create an email service from settings"""
+    pool = SMTPConnectionPool(
+        host=settings.SMTP_SERVER,
+        port=settings.SMTP_PORT or 587,
+        user=settings.SMTP_USER,
+        password=settings.SMTP_PASSWORD,
+        use_tls=settings.SMTP_USE_TLS,
+        timeout=settings.SMTP_TIMEOUT_SECONDS,
+        pool_size=pool_size or settings.SMTP_POOL_SIZE,
+    )
+    return EmailService(pool, settings.SMTP_FROM or settings.SMTP_USER or "")
+
+
+_email_batcher: Optional[EmailBatcher] = None
+_email_batcher_lock = threading.Lock()
+
+
+def get_email_batcher() -> Optional[EmailBatcher]:
+    """Get the process-wide email batcher (None if SMTP is not configured)"""
+    global _email_batcher
+    if not settings.SMTP_SERVER:
+        return None
+    with _email_batcher_lock:
+        if _email_batcher is None:
+            _email_batcher = EmailBatcher(
+                create_email_service(),
+                batch_size=settings.EMAIL_BATCH_SIZE,
+                interval=settings.EMAIL_BATCH_INTERVAL_SECONDS,
+                max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+            )
+    return _email_batcher
+
+
+def shutdown_email_batcher() -> None:
+    """Flush and stop the process-wide email batcher"""
+    global _email_batcher
+    with _email_batcher_lock:
+        if _email_batcher is not None:
+            _email_batcher.close(settings.EMAIL_SHUTDOWN_TIMEOUT_SECONDS)
+            _email_batcher.service.close()
+            _email_batcher = None
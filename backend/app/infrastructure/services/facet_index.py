@@ -0,0 +1,220 @@
+"""In-memory facet counts for product browsing
+
+A count cube indexed by (category, price range, in stock, status) is kept up
+to date on every product write, so facet counts for category, in-stock and
+status filters are sums over a few thousand cells instead of one COUNT(*)
+query per facet. Category, price (in cents), stock and status of every
+product are also kept as parallel numpy columns: an arbitrary min/max price
+filter is one vectorized pass that bincounts the matching rows' cells.
+Each facet is counted with every filter applied except its own, so clients
+can show how many results picking another value would give.
+"""
+
+import threading
+from decimal import Decimal
+from typing import Iterable, Optional
+
+import numpy as np
+
+from app.infrastructure.database.models_product import ProductStatusEnum
+
+# Price range facet edges (upper bound exclusive, last range is open)
+PRICE_RANGE_EDGES = (0, 25, 50, 100, 200)
+
+STATUSES = [status.value for status in ProductStatusEnum]
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+_FREE = -1
+
+FacetRow = tuple[int, int, Decimal, int, str]
+
+
+def _to_cents(price) -> int:
+    """Convert a price to integer cents"""
+    return int((Decimal(str(price)) * 100).to_integral_value())
+
+
+def _status_value(status) -> str:
+    """Plain status string for an enum member or string"""
+    return getattr(status, "value", status)
+
+
+class FacetIndex:
+    """Facet count cube plus per-product columns, updated in place on writes"""
+    
+    def __init__(self, price_range_edges: Iterable[int] = PRICE_RANGE_EDGES):
+        self.price_range_edges = tuple(price_range_edges)
+        self._edges_cents = np.array([edge * 100 for edge in self.price_range_edges[1:]])
+        self._rows: dict[int, int] = {}
+        self._free_rows: list[int] = []
+        self._size = 0
+        self._allocate(1024, categories=1)
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def _allocate(self, capacity: int, categories: int) -> None:
+        """Create empty columns and an empty cube"""
+        self._category = np.zeros(capacity, dtype=np.int32)
+        self._price = np.zeros(capacity, dtype=np.int64)
+        self._price_range = np.zeros(capacity, dtype=np.int8)
+        self._stocked = np.zeros(capacity, dtype=np.int8)
+        self._status = np.full(capacity, _FREE, dtype=np.int8)
+        self._cube = np.zeros(
+            (categories, len(self.price_range_edges), 2, len(STATUSES)), dtype=np.int64
+        )
+    
+    def _grow_rows(self) -> None:
+        """Double the column capacity"""
+        capacity = len(self._category) * 2
+        for name in ("_category", "_price", "_price_range", "_stocked", "_status"):
+            column = getattr(self, name)
+            grown = np.full(capacity, _FREE if name == "_status" else 0, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+    
+    def _grow_categories(self, category_id: int) -> None:
+        """Make room in the cube for a new category id"""
+        if category_id >= len(self._cube):
+            padding = category_id + 1 - len(self._cube)
+            self._cube = np.pad(self._cube, ((0, padding), (0, 0), (0, 0), (0, 0)))
+    
+    def build(self, rows: Iterable[FacetRow]) -> None:
+        """Build from (id, category_id, price, stock, status) rows"""
+        rows = list(rows)
+        count = len(rows)
+        capacity = max(1024, 1 << (count + 255).bit_length())
+        with self._lock:
+            ids, categories, prices, stocks, statuses = zip(*rows) if rows else ([],) * 5
+            self._allocate(capacity, categories=max(categories, default=0) + 1)
+            self._rows = dict(zip(ids, range(count)))
+            self._category[:count] = categories
+            self._price[:count] = [_to_cents(price) for price in prices]
+            self._price_range[:count] = self._price_ranges(self._price[:count])
+            self._stocked[:count] = np.asarray(stocks, dtype=np.int64) > 0
+            self._status[:count] = [_STATUS_CODES[_status_value(s)] for s in statuses]
+            np.add.at(self._cube, self._cells(slice(0, count)), 1)
+            self._free_rows = []
+            self._size = count
+    
+    def _price_ranges(self, cents):
+        """Index of the price range each price falls in"""
+        return np.searchsorted(self._edges_cents, cents, side="right")
+    
+    def _cells(self, rows) -> tuple:
+        """Cube coordinates of the given rows"""
+        return (
+            self._category[rows], self._price_range[rows], self._stocked[rows],
+            self._status[rows],
+        )
+    
+    def upsert_product(
+        self, product_id: int, category_id: int, price, stock: int, status
+    ) -> None:
+        """Insert or update one product's facet values"""
+        with self._lock:
+            row = self._rows.get(product_id)
+            if row is not None:
+                self._cube[self._cells(row)] -= 1
+            else:
+                if self._free_rows:
+                    row = self._free_rows.pop()
+                else:
+                    if self._size == len(self._category):
+                        self._grow_rows()
+                    row = self._size
+                    self._size += 1
+                self._rows[product_id] = row
+            self._grow_categories(category_id)
+            self._category[row] = category_id
+            self._price[row] = _to_cents(price)
+            self._price_range[row] = self._price_ranges(self._price[row])
+            self._stocked[row] = stock > 0
+            self._status[row] = _STATUS_CODES[_status_value(status)]
+            self._cube[self._cells(row)] += 1
+    
+    def remove_product(self, product_id: int) -> None:
+        """Forget a deleted product"""
+        with self._lock:
+            row = self._rows.pop(product_id, None)
+            if row is not None:
+                self._cube[self._cells(row)] -= 1
+                self._status[row] = _FREE
+                self._free_rows.append(row)
+    
+    def _price_filtered_cube(self, min_price, max_price) -> np.ndarray:
+        """Cube restricted to rows within the price bounds (one pass over the columns)"""
+        size = self._size
+        mask = self._status[:size] != _FREE
+        if min_price is not None:
+            mask &= self._price[:size] >= _to_cents(min_price)
+        if max_price is not None:
+            mask &= self._price[:size] <= _to_cents(max_price)
+        shape = self._cube.shape
+        cells = np.ravel_multi_index(self._cells(np.flatnonzero(mask)), shape)
+        return np.bincount(cells, minlength=int(np.prod(shape))).reshape(shape)
+    
+    def counts(
+        self,
+        category_ids: Optional[list[int]] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        in_stock: Optional[bool] = None,
+        status: Optional[str] = ProductStatusEnum.ACTIVE.value,
+    ) -> dict:
+        """Total matches plus per-value counts for each facet"""
+        with self._lock:
+            cube = self._cube
+            priced = cube
+            if min_price is not None or max_price is not None:
+                priced = self._price_filtered_cube(min_price, max_price)
+            
+            # Selected values per dimension (all values when unfiltered)
+            categories = np.ones(len(cube), dtype=bool)
+            if category_ids:
+                categories[:] = False
+                # Unknown ids match nothing; negative ones would index from the end
+                known = [
+                    category_id for category_id in category_ids
+                    if 0 <= category_id < len(cube)
+                ]
+                categories[known] = True
+            stocked = np.ones(2, dtype=bool)
+            if in_stock is not None:
+                stocked[:] = False
+                stocked[int(in_stock)] = True
+            statuses = np.ones(len(STATUSES), dtype=bool)
+            if status is not None:
+                statuses[:] = False
+                statuses[_STATUS_CODES[_status_value(status)]] = True
+            
+            # (category, in stock, status) counts within the price filter
+            flat = priced.sum(axis=1)
+            by_category = flat[:, stocked][:, :, statuses].sum(axis=(1, 2))
+            by_stock = flat[categories][:, :, statuses].sum(axis=(0, 2))
+            by_status = flat[categories][:, stocked].sum(axis=(0, 1))
+            price_ranges = cube[categories][:, :, stocked][..., statuses].sum(axis=(0, 2, 3))
+            total = int(by_category[categories].sum())
+        
+        edges = self.price_range_edges
+        return {
+            "total": total,
+            "categories": {
+                int(category_id): int(by_category[category_id])
+                for category_id in np.flatnonzero(by_category)
+            },
+            "price_ranges": [
+                (edges[i], edges[i + 1] if i + 1 < len(edges) else None, int(price_ranges[i]))
+                for i in range(len(edges))
+            ],
+            "in_stock": {True: int(by_stock[1]), False: int(by_stock[0])},
+            "status": {name: int(by_status[code]) for code, name in enumerate(STATUSES)},
+        }
+
+
+_facet_index = FacetIndex()
+
+
+def get_facet_index() -> FacetIndex:
+    """Get the process-wide facet index"""
+    return _facet_index
@@ -0,0 +1,168 @@
+"""Pluggable stores for Idempotency-Key request records"""
+
+import json
+import threading
+from abc import ABC, abstractmethod
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.repositories.idempotency_repository import IdempotencyKeyRepository
+
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+@dataclass
+class IdempotencyRecord:
+    """Request fingerprint and, once finished, its serialized response"""
+    fingerprint: str
+    status: str = IN_PROGRESS
+    status_code: Optional[int] = None
+    headers: list = field(default_factory=list)
+    body: bytes = b""
+    expires_at: float = 0.0
+
+
+class IdempotencyStore(ABC):
+    """Interface for idempotency stores"""
+    
+    # Whether calls do blocking I/O and must run off the event loop
+    blocking = False
+    
+    @abstractmethod
+    def claim(self, key: str, fingerprint: str, lease: int) -> Optional[IdempotencyRecord]:
+        """
+        Atomically claim a key; return None if claimed, else the existing record
+        
+        The claim expires after `lease` seconds, so a key whose request died
+        with its worker can be claimed again; complete() keeps the response
+        for the full TTL.
+        """
+    
+    @abstractmethod
+    def complete(self, key: str, record: IdempotencyRecord, ttl: int) -> None:
+        """Store the finished response for a claimed key"""
+    
+    @abstractmethod
+    def release(self, key: str) -> None:
+        """Drop a claim so the request can be retried"""
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """Per-process store, suitable for a single worker and for tests"""
+    
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._records: dict[str, IdempotencyRecord] = {}
+        self._lock = threading.Lock()
+    
+    def _purge_expired(self, now: float) -> None:
+        """Drop expired records (and the oldest ones when over capacity)"""
+        expired = [key for key, record in self._records.items() if record.expires_at < now]
+        for key in expired:
+            del self._records[key]
+        overflow = len(self._records) - self.max_entries
+        for key in list(self._records)[:max(overflow, 0)]:
+            del self._records[key]
+    
+    def claim(self, key: str, fingerprint: str, lease: int) -> Optional[IdempotencyRecord]:
+        now = time.time()
+        with self._lock:
+            record = self._records.get(key)
+            if record is not None and record.expires_at >= now:
+                return record
+            if len(self._records) >= self.max_entries:
+                self._purge_expired(now)
+            self._records[key] = IdempotencyRecord(fingerprint=fingerprint, expires_at=now + lease)
+            return None
+    
+    def complete(self, key: str, record: IdempotencyRecord, ttl: int) -> None:
+        record.status = COMPLETED
+        record.expires_at = time.time() + ttl
+        with self._lock:
+            self._records[key] = record
+    
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._records.pop(key, None)
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """Store shared by all workers, backed by the idempotency_keys table"""
+    
+    blocking = True
+    
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+    
+    @staticmethod
+    def _to_record(row) -> IdempotencyRecord:
+        """Convert a database row to a record"""
+        return IdempotencyRecord(
+            fingerprint=row.fingerprint,
+            status=row.status,
+            status_code=row.status_code,
+            headers=json.loads(row.response_headers) if row.response_headers else [],
+            body=row.response_body or b"",
+            expires_at=row.expires_at.timestamp(),
+        )
+    
+    def claim(self, key: str, fingerprint: str, lease: int) -> Optional[IdempotencyRecord]:
+        db = self.session_factory()
+        try:
+            repository = IdempotencyKeyRepository(db)
+            now = datetime.utcnow()
+            values = {
+                "key": key,
+                "fingerprint": fingerprint,
+                "status": IN_PROGRESS,
+                "expires_at": now + timedelta(seconds=lease),
+            }
+            while True:
+                if repository.insert_if_absent(values):
+                    return None
+                # Only the worker whose UPDATE matched the expired row owns the claim
+                if repository.take_over_expired(values, now):
+                    return None
+                row = repository.get_by_key(key)
+                if row is not None:
+                    return self._to_record(row)
+                # Released between the statements: try to claim it again
+        finally:
+            db.close()
+    
+    def complete(self, key: str, record: IdempotencyRecord, ttl: int) -> None:
+        db = self.session_factory()
+        try:
+            row = IdempotencyKeyRepository(db).get_by_key(key)
+            if row is None:
+                return
+            row.status = COMPLETED
+            row.status_code = record.status_code
+            row.response_headers = json.dumps(record.headers)
+            row.response_body = record.body
+            row.expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+            db.commit()
+        finally:
+            db.close()
+    
+    def release(self, key: str) -> None:
+        db = self.session_factory()
+        try:
+            IdempotencyKeyRepository(db).delete_key(key)
+        finally:
+            db.close()
+
+
+def create_idempotency_store() -> IdempotencyStore:
+    """Create the store selected by IDEMPOTENCY_STORE"""
+    if settings.IDEMPOTENCY_STORE == "database":
+        from app.infrastructure.database.database import SessionLocal
+        return DatabaseIdempotencyStore(SessionLocal)
+    return InMemoryIdempotencyStore(max_entries=settings.IDEMPOTENCY_MAX_ENTRIES)
@@ -0,0 +1,171 @@
+"""Product image processing in a process pool
+
+Decoding and resizing a high-resolution photo takes tens to hundreds of
+milliseconds of CPU that holds the GIL, so it never runs in the request's
+process: uploads are handed to a pool of worker processes, which decode
+the image once and encode a thumbnail per configured size, each as JPEG
+(PNG when the image has transparency) and WebP, plus a full-size WebP.
+The event loop only awaits the result. Identical uploads arriving while
+one is being processed share that one job.
+"""
+
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.utils.exceptions import InvalidImageError
+
+# Pillow format -> (original variant extension, content type)
+FORMATS = {
+    "JPEG": ("jpg", "image/jpeg"),
+    "PNG": ("png", "image/png"),
+    "WEBP": ("webp", "image/webp"),
+}
+CONTENT_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+
+
+@dataclass
+class ProcessedImage:
+    """Decoded image facts and encoded variants (variant name -> bytes)"""
+    format: str
+    width: int
+    height: int
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+
+def _encode(image, image_format: str, **options) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def process_image(
+    data: bytes, sizes: tuple[int, ...], webp_quality: int, max_pixels: int
+) -> ProcessedImage:
+    """Decode an upload and encode its variants (runs in a worker process)"""
+    from PIL import Image, ImageOps
+    
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with Image.open(io.BytesIO(data)) as opened:
+            if opened.format not in FORMATS:
+                raise InvalidImageError(f"Unsupported image format: {opened.format}")
+            source_format = opened.format
+            image = ImageOps.exif_transpose(opened)
+            image.load()
+    except InvalidImageError:
+        raise
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as exc:
+        raise InvalidImageError(f"Unreadable image: {exc}") from None
+    
+    transparent = image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+    image = image.convert("RGBA" if transparent else "RGB")
+    fallback, fallback_ext = ("PNG", "png") if transparent else ("JPEG", "jpg")
+    fallback_options = {"optimize": True} if transparent else {"quality": 85, "optimize": True}
+    
+    processed = ProcessedImage(format=source_format, width=image.width, height=image.height)
+    processed.variants["full.webp"] = _encode(image, "WEBP", quality=webp_quality, method=4)
+    for size in sorted(sizes, reverse=True):
+        # Shrink each size from the previous, larger one instead of the full image
+        image = image.copy()
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        processed.variants[f"w{size}.{fallback_ext}"] = _encode(
+            image, fallback, **fallback_options
+        )
+        processed.variants[f"w{size}.webp"] = _encode(
+            image, "WEBP", quality=webp_quality, method=4
+        )
+    return processed
+
+
+class ImageProcessor:
+    """Process pool running image jobs, with identical concurrent jobs coalesced"""
+    
+    def __init__(
+        self,
+        workers: int = 2,
+        sizes: tuple[int, ...] = (160, 480, 1024),
+        webp_quality: int = 80,
+        max_pixels: int = 40_000_000,
+    ):
+        self.workers = workers
+        self.sizes = tuple(sizes)
+        self.webp_quality = webp_quality
+        self.max_pixels = max_pixels
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.processed = 0
+        self.coalesced = 0
+        self.rejected = 0
+    
+    def start(self) -> None:
+        """Start the worker processes"""
+        if self._executor is None:
+            # Spawned, not forked: the parent runs threads (logging, workers)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+    
+    async def process(self, content_hash: str, data: bytes) -> ProcessedImage:
+        """Variants of an upload; concurrent calls for the same hash share one job"""
+        inflight = self._inflight.get(content_hash)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+        self.start()
+        loop = asyncio.get_running_loop()
+        job = asyncio.ensure_future(self._run(loop, data))
+        self._inflight[content_hash] = job
+        try:
+            return await asyncio.shield(job)
+        finally:
+            self._inflight.pop(content_hash, None)
+    
+    async def _run(self, loop, data: bytes) -> ProcessedImage:
+        """One job in a worker process"""
+        try:
+            processed = await loop.run_in_executor(
+                self._executor, process_image, data, self.sizes, self.webp_quality,
+                self.max_pixels,
+            )
+        except InvalidImageError:
+            self.rejected += 1
+            raise
+        self.processed += 1
+        return processed
+    
+    def stats(self) -> dict:
+        """Jobs processed, coalesced into a running job and rejected as invalid images"""
+        return {
+            "processed": self.processed,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+        }
+    
+    def stop(self) -> None:
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+_image_processor: Optional[ImageProcessor] = None
+
+
+def get_image_processor() -> ImageProcessor:
+    """Get the process-wide image processor"""
+    global _image_processor
+    if _image_processor is None:
+        from app.core.config import settings
+        _image_processor = ImageProcessor(
+            workers=settings.IMAGE_WORKERS,
+            sizes=tuple(settings.IMAGE_THUMBNAIL_SIZES),
+            webp_quality=settings.IMAGE_WEBP_QUALITY,
+            max_pixels=settings.IMAGE_MAX_PIXELS,
+        )
+    return _image_processor
@@ -0,0 +1,136 @@
+"""Content-addressed storage for product images
+
+Every stored file is keyed by the SHA-256 of the uploaded original plus a
+variant name ("<sha256>/w480.webp"), so a key always names the same bytes:
+uploading a photo twice stores it once, and files can be cached forever.
+"""
+
+import os
+import re
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from app.core.config import settings
+
+_KEY = re.compile(r"^([0-9a-f]{64})/([a-z0-9]+\.(?:jpg|png|webp))$")
+
+
+def image_key(content_hash: str, variant: str) -> str:
+    """Storage key of one variant of an image"""
+    return f"{content_hash}/{variant}"
+
+
+def is_valid_key(key: str) -> bool:
+    """Whether a key has the <sha256>/<variant>.<ext> shape (no path tricks)"""
+    return _KEY.match(key) is not None
+
+
+class ImageStorage(ABC):
+    """Interface for image stores"""
+    
+    # Whether calls do blocking I/O and must run off the event loop
+    blocking = True
+    
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> bool:
+        """Store bytes under a key, return False if the key was already stored"""
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Bytes stored under a key, None if absent"""
+    
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether a key is stored"""
+    
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of a stored key, for backends that have one (served with sendfile)"""
+        return None
+
+
+class LocalImageStorage(ImageStorage):
+    """Files under a root directory, fanned out by the first two hash characters"""
+    
+    def __init__(self, root: str):
+        self.root = root
+    
+    def _path(self, key: str) -> str:
+        if not is_valid_key(key):
+            raise ValueError(f"Invalid image key: {key!r}")
+        return os.path.join(self.root, key[:2], key)
+    
+    def put(self, key: str, data: bytes) -> bool:
+        path = self._path(key)
+        if os.path.exists(path):
+            return False
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Write aside and rename, so readers never see a partial file
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        try:
+            with os.fdopen(descriptor, "wb") as handle:
+                handle.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        return True
+    
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as handle:
+                return handle.read()
+        except FileNotFoundError:
+            return None
+    
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+    
+    def local_path(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        return path if os.path.exists(path) else None
+
+
+class InMemoryImageStorage(ImageStorage):
+    """Per-process store, a stand-in for object storage in tests and benchmarks"""
+    
+    blocking = False
+    
+    def __init__(self):
+        self._objects: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+    
+    def put(self, key: str, data: bytes) -> bool:
+        if not is_valid_key(key):
+            raise ValueError(f"Invalid image key: {key!r}")
+        with self._lock:
+            if key in self._objects:
+                return False
+            self._objects[key] = bytes(data)
+            return True
+    
+    def get(self, key: str) -> Optional[bytes]:
+        return self._objects.get(key)
+    
+    def exists(self, key: str) -> bool:
+        return key in self._objects
+
+
+_image_storage: Optional[ImageStorage] = None
+
+
+def create_image_storage() -> ImageStorage:
+    """Create the store selected by IMAGE_STORAGE"""
+    if settings.IMAGE_STORAGE == "memory":
+        return InMemoryImageStorage()
+    return LocalImageStorage(settings.IMAGE_STORAGE_DIR)
+
+
+def get_image_storage() -> ImageStorage:
+    """Get the process-wide image store"""
+    global _image_storage
+    if _image_storage is None:
+        _image_storage = create_image_storage()
+    return _image_storage
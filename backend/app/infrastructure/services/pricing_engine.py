@@ -0,0 +1,129 @@
+"""Exact cart pricing in integer cents
+
+Prices are converted once from Numeric(10, 2) to integer cents. Every
+amount of a quote is then computed for the whole cart at once on int64
+numpy columns: line subtotals, the coupon discount spread over the lines,
+and per-line tax. There is no float anywhere and every rounding is an
+explicit half-up integer division, so a quote's lines always add up to
+its totals. Amounts go back to Decimal only at the edges.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.utils.exceptions import InvalidCouponError
+from app.utils.helpers import from_cents
+
+BASIS_POINTS = 10_000
+
+# Above this subtotal (in cents) the discount spread could overflow int64
+# (line * discount), so it switches to exact Python integers
+_INT64_SAFE_SUBTOTAL = 3_000_000_000
+
+
+@dataclass(frozen=True, slots=True)
+class PriceEntry:
+    """Immutable price facts of one product"""
+    product_id: int
+    unit_cents: int
+    stock: int
+    active: bool
+
+
+@dataclass(frozen=True, slots=True)
+class CouponTerms:
+    """A usable coupon's terms in basis points and cents"""
+    code: str
+    percent_bp: int = 0
+    amount_cents: int = 0
+    min_purchase_cents: int = 0
+
+
+@dataclass
+class Quote:
+    """A priced cart; per-line lists are aligned with product_ids"""
+    product_ids: list[int]
+    quantities: list[int]
+    unit_cents: list[int]
+    line_subtotal_cents: list[int]
+    line_discount_cents: list[int]
+    line_tax_cents: list[int]
+    line_total_cents: list[int]
+    subtotal_cents: int
+    discount_cents: int
+    tax_cents: int
+    total_cents: int
+    coupon_code: Optional[str] = None
+
+
+def _round_half_up(numerator, denominator: int):
+    """Half-up integer division of non-negative values (scalars or arrays)"""
+    return (numerator * 2 + denominator) // (denominator * 2)
+
+
+def coupon_discount(subtotal_cents: int, coupon: CouponTerms) -> int:
+    """Discount of a coupon on a subtotal: percentage first, then the fixed amount"""
+    discount = _round_half_up(subtotal_cents * coupon.percent_bp, BASIS_POINTS)
+    return min(subtotal_cents, discount + coupon.amount_cents)
+
+
+def _spread(line_cents: np.ndarray, subtotal_cents: int, discount_cents: int) -> np.ndarray:
+    """Split a discount over lines in proportion to their subtotals (largest remainder)"""
+    if subtotal_cents > _INT64_SAFE_SUBTOTAL:
+        line_cents = line_cents.astype(object)
+    weighted = line_cents * discount_cents
+    shares = weighted // subtotal_cents
+    leftover = discount_cents - int(shares.sum())
+    if leftover:
+        # The cents lost to flooring go to the lines that lost the most
+        remainders = weighted % subtotal_cents
+        shares[np.argsort(-remainders, kind="stable")[:leftover]] += 1
+    return shares.astype(np.int64)
+
+
+def price_cart(
+    product_ids: Sequence[int],
+    quantities: Sequence[int],
+    unit_cents: Sequence[int],
+    coupon: Optional[CouponTerms] = None,
+    tax_bp: int = 0,
+) -> Quote:
+    """Price a cart whose lines are given as aligned columns"""
+    quantity = np.asarray(quantities, dtype=np.int64)
+    unit = np.asarray(unit_cents, dtype=np.int64)
+    line = unit * quantity
+    subtotal = int(line.sum())
+    
+    discount = 0
+    if coupon is not None:
+        if subtotal < coupon.min_purchase_cents:
+            raise InvalidCouponError(
+                f"Coupon {coupon.code} needs a purchase of at least "
+                f"{from_cents(coupon.min_purchase_cents)}"
+            )
+        discount = coupon_discount(subtotal, coupon)
+    if discount:
+        line_discount = _spread(line, subtotal, discount)
+    else:
+        line_discount = np.zeros_like(line)
+    net = line - line_discount
+    line_tax = _round_half_up(net * tax_bp, BASIS_POINTS)
+    line_total = net + line_tax
+    
+    tax = int(line_tax.sum())
+    return Quote(
+        product_ids=list(product_ids),
+        quantities=quantity.tolist(),
+        unit_cents=unit.tolist(),
+        line_subtotal_cents=line.tolist(),
+        line_discount_cents=line_discount.tolist(),
+        line_tax_cents=line_tax.tolist(),
+        line_total_cents=line_total.tolist(),
+        subtotal_cents=subtotal,
+        discount_cents=discount,
+        tax_cents=tax,
+        total_cents=subtotal - discount + tax,
+        coupon_code=coupon.code if coupon is not None else None,
+    )
@@ -0,0 +1,302 @@
+"""Shared, memory-mapped snapshot of the active product catalog
+
+Rather than every worker loading its own copy of the product listing, one
+builder serializes the active products into a columnar binary file and all
+workers memory-map it read-only. The operating system keeps a single copy of
+its pages for every process on the host, and no worker queries the table to
+fill it.
+
+File layout (little-endian, every section 8-byte aligned):
+
+    header      magic, product cache version, row count, string table size,
+                build time
+    ids         int64[n], ascending (lookups are a binary search)
+    price       int64[n], integer cents
+    stock       int32[n]
+    category    int32[n]
+    created_at  int64[n], microseconds since the epoch
+    updated_at  int64[n]
+    offsets     uint64[3n + 1], start of each row's name, sku and description
+                in the string table, plus its end
+    flags       uint8[n], bit 0 set when the description is not NULL
+    strings     UTF-8 string table
+
+A new version is written next to the file and renamed over it, so readers
+see the old file or the new one, never a partial write. Workers remap when
+the file changes; requests still using the previous mapping keep it until
+they drop their reference. The header records the product version (its
+newest row in cache_writes) when the snapshot was built, so a worker can
+tell when a product write made it stale and fall back to the database. A
+write committing just after a newer one it raced with, while the snapshot
+is being built, goes unnoticed this way; its invalidation message still
+reaches the other caches.
+"""
+
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Iterable, Optional, Sequence
+
+import numpy as np
+
+from app.utils.helpers import from_cents, to_cents
+
+MAGIC = b"SGPRODS1"
+HEADER = struct.Struct("<8sQQQd")
+HEADER_SIZE = 64
+EPOCH = datetime(1970, 1, 1)
+DESCRIPTION_PRESENT = 1
+
+# (id, name, sku, description, price, stock, category_id, created_at, updated_at)
+SnapshotRow = tuple[int, str, str, Optional[str], Decimal, int, int, datetime, datetime]
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _microseconds(moment: datetime) -> int:
+    if moment.tzinfo is not None:
+        # Aware timestamps are stored as the naive UTC the columns hold
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return (moment - EPOCH) // timedelta(microseconds=1)
+
+
+@dataclass(frozen=True, slots=True)
+class ProductRecord:
+    """Product as read from the snapshot (attribute-compatible with the ORM model)"""
+    id: int
+    name: str
+    description: Optional[str]
+    price: Decimal
+    stock: int
+    sku: str
+    category_id: int
+    status: str
+    created_at: datetime
+    updated_at: datetime
+
+
+def write_product_snapshot(
+    path: str, batches: Iterable[Sequence[SnapshotRow]], product_version: int
+) -> dict:
+    """Serialize rows ordered by id to path, replacing the file atomically"""
+    ids, prices, stocks, categories, created, updated, flags = [], [], [], [], [], [], []
+    strings = []
+    for rows in batches:
+        for row in rows:
+            row_id, name, sku, description, price, stock, category_id, created_at, updated_at = row
+            ids.append(row_id)
+            prices.append(to_cents(price))
+            stocks.append(stock)
+            categories.append(category_id)
+            created.append(_microseconds(created_at))
+            updated.append(_microseconds(updated_at))
+            flags.append(DESCRIPTION_PRESENT if description is not None else 0)
+            strings.extend((name.encode(), sku.encode(), (description or "").encode()))
+    count = len(ids)
+    lengths = np.fromiter(map(len, strings), dtype=np.uint64, count=len(strings))
+    offsets = np.zeros(len(strings) + 1, dtype=np.uint64)
+    np.cumsum(lengths, out=offsets[1:])
+    table = b"".join(strings)
+    sections = [
+        np.asarray(ids, dtype="<i8"),
+        np.asarray(prices, dtype="<i8"),
+        np.asarray(stocks, dtype="<i4"),
+        np.asarray(categories, dtype="<i4"),
+        np.asarray(created, dtype="<i8"),
+        np.asarray(updated, dtype="<i8"),
+        offsets.astype("<u8"),
+        np.asarray(flags, dtype=np.uint8),
+    ]
+    
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, product_version, count, len(table), time.time()))
+        handle.write(b"\0" * (HEADER_SIZE - HEADER.size))
+        position = HEADER_SIZE
+        for section in [*sections, table]:
+            data = section if isinstance(section, bytes) else section.tobytes()
+            handle.write(data)
+            position += len(data)
+            handle.write(b"\0" * (_align(position) - position))
+            position = _align(position)
+        # On disk before the rename, so a crash cannot publish a truncated file
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+    return {"product_version": product_version, "products": count, "bytes": position}
+
+
+class ProductSnapshot:
+    """Read-only view of one snapshot file (the arrays point into the mapping)"""
+    
+    def __init__(self, path: str):
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.product_version, count, _, self.built_at = HEADER.unpack_from(
+            self._map
+        )
+        if magic != MAGIC:
+            raise ValueError(f"Not a product snapshot: {path}")
+        self._position = HEADER_SIZE
+        self.ids = self._section("<i8", count)
+        self.price_cents = self._section("<i8", count)
+        self.stock = self._section("<i4", count)
+        self.category_ids = self._section("<i4", count)
+        self.created_at = self._section("<i8", count)
+        self.updated_at = self._section("<i8", count)
+        self.offsets = self._section("<u8", 3 * count + 1)
+        self.flags = self._section(np.uint8, count)
+        self._strings = self._position
+    
+    def _section(self, dtype, count: int) -> np.ndarray:
+        array = np.frombuffer(self._map, dtype=dtype, count=count, offset=self._position)
+        self._position = _align(self._position + array.nbytes)
+        return array
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def _string(self, index: int) -> str:
+        start = self._strings + int(self.offsets[index])
+        return self._map[start:self._strings + int(self.offsets[index + 1])].decode()
+    
+    def record(self, row: int) -> ProductRecord:
+        """Product at a row position"""
+        return ProductRecord(
+            id=int(self.ids[row]),
+            name=self._string(3 * row),
+            description=(
+                self._string(3 * row + 2) if self.flags[row] & DESCRIPTION_PRESENT else None
+            ),
+            price=from_cents(int(self.price_cents[row])),
+            stock=int(self.stock[row]),
+            sku=self._string(3 * row + 1),
+            category_id=int(self.category_ids[row]),
+            status="active",
+            created_at=EPOCH + timedelta(microseconds=int(self.created_at[row])),
+            updated_at=EPOCH + timedelta(microseconds=int(self.updated_at[row])),
+        )
+    
+    def get(self, product_id: int) -> Optional[ProductRecord]:
+        """Active product by id, None when not in the snapshot"""
+        row = int(np.searchsorted(self.ids, product_id))
+        if row < len(self.ids) and self.ids[row] == product_id:
+            return self.record(row)
+        return None
+    
+    def page(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        category_ids: Optional[list[int]] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        in_stock: Optional[bool] = None,
+    ) -> list[ProductRecord]:
+        """Active products matching the filters, ordered by id"""
+        if not category_ids and min_price is None and max_price is None and in_stock is None:
+            rows = range(min(skip, len(self)), min(skip + limit, len(self)))
+        else:
+            mask = np.ones(len(self), dtype=bool)
+            if category_ids:
+                mask &= np.isin(self.category_ids, category_ids)
+            if min_price is not None:
+                mask &= self.price_cents >= math.ceil(Decimal(min_price) * 100)
+            if max_price is not None:
+                mask &= self.price_cents <= math.floor(Decimal(max_price) * 100)
+            if in_stock is not None:
+                mask &= self.stock > 0 if in_stock else self.stock == 0
+            rows = np.flatnonzero(mask)[skip:skip + limit]
+        return [self.record(int(row)) for row in rows]
+
+
+class ProductSnapshotReader:
+    """Serves the current snapshot, remapping when a new one is published"""
+    
+    def __init__(
+        self,
+        path: str,
+        check_interval: float = 1.0,
+        latest_version: Optional[Callable[[], int]] = None,
+    ):
+        self.path = path
+        self.check_interval = check_interval
+        # Newest committed product version known to this worker
+        self.latest_version = latest_version
+        self._snapshot: Optional[ProductSnapshot] = None
+        self._file_key = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"served": 0, "stale": 0, "missing": 0, "remaps": 0}
+    
+    def _refresh(self) -> None:
+        """Map a newly published file (checked at most once per interval)"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return
+            file_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if file_key != self._file_key:
+                # Readers of the previous mapping keep it alive until they are done
+                self._snapshot = ProductSnapshot(self.path)
+                self._file_key = file_key
+                self.stats["remaps"] += 1
+    
+    def current(self) -> Optional[ProductSnapshot]:
+        """The snapshot if it reflects every product write known here, else None"""
+        self._refresh()
+        snapshot = self._snapshot
+        stats = self.stats
+        if snapshot is None:
+            stats["missing"] += 1
+            return None
+        if self.latest_version is not None and snapshot.product_version < self.latest_version():
+            stats["stale"] += 1
+            return None
+        stats["served"] += 1
+        return snapshot
+    
+    def info(self) -> dict:
+        """Mapped snapshot and counters"""
+        snapshot = self._snapshot
+        return {
+            **self.stats,
+            "products": len(snapshot) if snapshot is not None else 0,
+            "product_version": snapshot.product_version if snapshot is not None else None,
+        }
+
+
+_product_snapshot_reader: Optional[ProductSnapshotReader] = None
+
+
+def get_product_snapshot_reader() -> ProductSnapshotReader:
+    """Get the process-wide snapshot reader (fresh against the invalidation bus)"""
+    global _product_snapshot_reader
+    if _product_snapshot_reader is None:
+        from app.core.config import settings
+        from app.infrastructure.services.cache_invalidation import get_invalidation_bus
+        bus = get_invalidation_bus()
+        _product_snapshot_reader = ProductSnapshotReader(
+            settings.CATALOG_SNAPSHOT_PATH,
+            check_interval=settings.CATALOG_SNAPSHOT_CHECK_SECONDS,
+            latest_version=lambda: bus.latest_version("product"),
+        )
+    return _product_snapshot_reader
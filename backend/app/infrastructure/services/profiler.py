@@ -0,0 +1,336 @@
+"""Opt-in statistical profiler for individual requests
+
+While at least one profiled request is in flight, a background thread
+samples the Python stacks of the threads running profiled requests every
+few milliseconds (the sampled code is never instrumented, so profiled
+requests run at full speed). A request runs on the event loop thread from
+start to finish, and on a threadpool thread while its endpoint runs there
+(profiled_endpoint binds that thread). Stacks without any application
+frame are skipped. Each sample is attributed to a layer (endpoint, use
+case, repository, ORM, SQL) by its innermost recognised frame. Every
+profiled request is written as a collapsed-stack file that flamegraph.pl
+or speedscope read directly, and kept in memory for aggregated hot-stack
+reports.
+
+The event loop thread is shared: when several profiled requests overlap,
+each of them gets the event loop samples of all of them. Threadpool
+samples go only to the request whose endpoint runs on the thread.
+"""
+
+import asyncio
+import functools
+import hashlib
+import hmac
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+import app as app_package
+
+APP_ROOT = str(Path(app_package.__file__).parent)
+
+# (module prefix, layer), matched from the innermost frame outwards
+LAYERS = (
+    ("sqlalchemy.engine", "sql"),
+    ("psycopg2", "sql"),
+    ("sqlalchemy", "orm"),
+    ("app.infrastructure.repositories", "repository"),
+    ("app.application", "use_case"),
+    ("app.api", "endpoint"),
+)
+
+MAX_STACK_DEPTH = 64
+
+
+def classify(modules: list[str]) -> str:
+    """Layer of a stack given its module names, innermost first"""
+    for module in modules:
+        for prefix, layer in LAYERS:
+            if module.startswith(prefix):
+                return layer
+    return "other"
+
+
+def sign_profile_request(expires_at: int, secret: str) -> str:
+    """Value for the X-Profile header, valid until the given unix time"""
+    signature = hmac.new(secret.encode(), f"profile:{expires_at}".encode(), hashlib.sha256)
+    return f"{expires_at}.{signature.hexdigest()}"
+
+
+def verify_profile_request(value: str, secret: str, now: Optional[float] = None) -> bool:
+    """Check an X-Profile header value"""
+    expires_at, _, _ = value.partition(".")
+    if not expires_at.isdigit() or int(expires_at) < (now or time.time()):
+        return False
+    return hmac.compare_digest(sign_profile_request(int(expires_at), secret), value)
+
+
+@dataclass
+class RequestProfile:
+    """Samples collected while one request was in flight"""
+    id: str
+    route: str
+    started_at: float
+    samples: Counter = field(default_factory=Counter)
+    layers: Counter = field(default_factory=Counter)
+    duration: float = 0.0
+    sampler: Optional["StackSampler"] = field(default=None, repr=False)
+
+
+# Profile of the request being handled, copied into threadpool calls with the context
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "current_profile", default=None
+)
+
+
+class StackSampler:
+    """Background thread sampling the stacks of threads running profiled requests"""
+    
+    def __init__(self, interval: float = 0.005, root: str = APP_ROOT):
+        self.interval = interval
+        self.root = root
+        # Thread id -> profiles of the requests running on it
+        self._threads: dict[int, list[RequestProfile]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def attach(self, profile: RequestProfile) -> None:
+        """Start sampling the calling thread for a request"""
+        profile.sampler = self
+        self.bind(profile)
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="stack-sampler", daemon=True
+                )
+                self._thread.start()
+        self._wakeup.set()
+    
+    def bind(self, profile: RequestProfile, thread_id: Optional[int] = None) -> None:
+        """Attribute the samples of a thread (the calling one by default) to a request"""
+        thread_id = thread_id or threading.get_ident()
+        with self._lock:
+            self._threads.setdefault(thread_id, []).append(profile)
+    
+    def unbind(self, profile: RequestProfile, thread_id: Optional[int] = None) -> None:
+        """Stop attributing the samples of a thread to a request"""
+        thread_id = thread_id or threading.get_ident()
+        with self._lock:
+            profiles = self._threads.get(thread_id, [])
+            if profile in profiles:
+                profiles.remove(profile)
+            if not profiles:
+                self._threads.pop(thread_id, None)
+    
+    def detach(self, profile: RequestProfile) -> None:
+        """Stop sampling for a request, on every thread
+        
+        Samples are counted under the lock, so once this returns the
+        profile's counters no longer change and can be read freely.
+        """
+        with self._lock:
+            for thread_id in list(self._threads):
+                profiles = self._threads[thread_id]
+                if profile in profiles:
+                    profiles.remove(profile)
+                if not profiles:
+                    del self._threads[thread_id]
+    
+    def _stack(self, frame) -> Optional[tuple[str, str]]:
+        """(collapsed stack, layer) of a frame, None without application frames"""
+        frames, modules = [], []
+        in_app = False
+        while frame is not None and len(frames) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            module = frame.f_globals.get("__name__", "?")
+            in_app = in_app or code.co_filename.startswith(self.root)
+            frames.append(f"{module}:{code.co_name}")
+            modules.append(module)
+            frame = frame.f_back
+        if not in_app:
+            return None
+        return ";".join(reversed(frames)), classify(modules)
+    
+    def sample(self) -> int:
+        """Take one sample of every thread running a profiled request, return the stacks recorded"""
+        with self._lock:
+            thread_ids = list(self._threads)
+        frames = sys._current_frames()
+        stacks = {}
+        for thread_id in thread_ids:
+            frame = frames.get(thread_id)
+            stack = self._stack(frame) if frame is not None else None
+            if stack is not None:
+                stacks[thread_id] = stack
+        with self._lock:
+            for thread_id, (stack, layer) in stacks.items():
+                # Requests that left the thread since the frames were taken are not bound anymore
+                for profile in self._threads.get(thread_id, ()):
+                    profile.samples[stack] += 1
+                    profile.layers[layer] += 1
+        return len(stacks)
+    
+    def _run(self) -> None:
+        """Sample while profiles are active, sleep otherwise"""
+        while True:
+            if not self._threads:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            self.sample()
+            time.sleep(self.interval)
+
+
+@contextmanager
+def profiled_thread() -> Iterator[None]:
+    """Attribute the calling thread's samples to the request being handled, if profiled"""
+    profile = _current_profile.get()
+    if profile is None or profile.sampler is None or profile.duration:
+        yield
+        return
+    profile.sampler.bind(profile)
+    try:
+        yield
+    finally:
+        profile.sampler.unbind(profile)
+
+
+def profiled_endpoint(endpoint: Callable) -> Callable:
+    """Endpoint whose threadpool thread is sampled for the profiled request calling it"""
+    if asyncio.iscoroutinefunction(endpoint):
+        # Runs on the event loop thread, which the request is bound to already
+        return endpoint
+    
+    @functools.wraps(endpoint)
+    def call(*args, **kwargs):
+        with profiled_thread():
+            return endpoint(*args, **kwargs)
+    
+    return call
+
+
+class Profiler:
+    """Decides which requests to profile, stores their results and aggregates them"""
+    
+    def __init__(
+        self,
+        directory: str,
+        secret: str,
+        interval: float = 0.005,
+        retention_minutes: int = 60,
+        sample_rate: float = 0.0,
+        path_prefix: Optional[str] = None,
+        root: str = APP_ROOT,
+    ):
+        self.directory = Path(directory)
+        self.secret = secret
+        self.retention_minutes = retention_minutes
+        # Admin toggle: profile this fraction of requests under path_prefix
+        self.sample_rate = sample_rate
+        self.path_prefix = path_prefix
+        self.sampler = StackSampler(interval, root)
+        self._history: deque[RequestProfile] = deque()
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+    
+    def configure(self, sample_rate: float, path_prefix: Optional[str] = None) -> None:
+        """Change the admin toggle"""
+        self.sample_rate = sample_rate
+        self.path_prefix = path_prefix
+    
+    def should_profile(self, path: str, header: Optional[str]) -> bool:
+        """Whether to profile a request (signed header, or sampled by the toggle)"""
+        if header is not None:
+            return verify_profile_request(header, self.secret)
+        if self.path_prefix and not path.startswith(self.path_prefix):
+            return False
+        return random.random() < self.sample_rate
+    
+    def start(self, route: str) -> RequestProfile:
+        """Begin profiling a request handled by the calling thread and context"""
+        profile = RequestProfile(id=uuid.uuid4().hex[:12], route=route, started_at=time.time())
+        self.sampler.attach(profile)
+        _current_profile.set(profile)
+        return profile
+    
+    def stop(self, profile: RequestProfile) -> None:
+        """Stop sampling for a request"""
+        if not profile.duration:
+            self.sampler.detach(profile)
+            profile.duration = time.time() - profile.started_at
+    
+    def finish(self, profile: RequestProfile, route: Optional[str] = None) -> Path:
+        """Stop profiling a request, write its collapsed stacks and keep it for reports"""
+        self.stop(profile)
+        if route:
+            profile.route = route
+        with self._lock:
+            self._history.append(profile)
+            cutoff = time.time() - self.retention_minutes * 60
+            while self._history and self._history[0].started_at < cutoff:
+                self._history.popleft()
+        return self._write(profile)
+    
+    def _write(self, profile: RequestProfile) -> Path:
+        """Write a collapsed-stack file (one "frame;frame;frame count" line per stack)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slug = "".join(char if char.isalnum() else "_" for char in profile.route).strip("_")
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(profile.started_at))
+        path = self.directory / f"{stamp}-{slug or 'root'}-{profile.id}.collapsed"
+        lines = [f"{stack} {count}" for stack, count in profile.samples.most_common()]
+        path.write_text("\n".join(lines) + "\n" if lines else "")
+        return path
+    
+    def hot_stacks(self, minutes: int = 10, limit: int = 20, route: Optional[str] = None) -> dict:
+        """Most sampled stacks and time per layer over the last minutes"""
+        cutoff = time.time() - minutes * 60
+        with self._lock:
+            profiles = [
+                profile for profile in self._history
+                if profile.started_at >= cutoff and (route is None or profile.route == route)
+            ]
+        samples, layers = Counter(), Counter()
+        for profile in profiles:
+            samples.update(profile.samples)
+            layers.update(profile.layers)
+        interval = self.sampler.interval
+        return {
+            "minutes": minutes,
+            "requests": len(profiles),
+            "samples": sum(samples.values()),
+            "layers": {layer: round(count * interval, 4) for layer, count in layers.items()},
+            "stacks": [
+                {"stack": stack, "samples": count, "seconds": round(count * interval, 4)}
+                for stack, count in samples.most_common(limit)
+            ],
+        }
+
+
+_profiler: Optional[Profiler] = None
+
+
+def get_profiler() -> Profiler:
+    """Get the process-wide profiler"""
+    global _profiler
+    if _profiler is None:
+        from app.core.config import settings
+        _profiler = Profiler(
+            settings.PROFILING_DIR,
+            settings.SECRET_KEY,
+            interval=settings.PROFILING_INTERVAL_SECONDS,
+            retention_minutes=settings.PROFILING_RETENTION_MINUTES,
+            sample_rate=settings.PROFILING_SAMPLE_RATE,
+        )
+    return _profiler
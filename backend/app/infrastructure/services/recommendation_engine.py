@@ -0,0 +1,232 @@
+"""Frequently-bought-together engine based on a sparse co-occurrence matrix
+
+The co-occurrence matrix C (products x products, C[i, j] = number of orders
+containing both i and j) is built from (order_id, product_id) pairs in
+vectorized batches. Only the top-K neighbours per product are published for
+serving, as fixed-width arrays that workers memory-map read-only, so a lookup
+is a single row slice.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+from scipy import sparse
+
+# File names inside the recommendations directory
+MATRIX_FILE = "cooccurrence.npz"
+NEIGHBORS_FILE = "neighbors.npy"
+SCORES_FILE = "scores.npy"
+META_FILE = "meta.json"
+
+PairBatch = tuple[np.ndarray, np.ndarray]
+
+
+def _incidence_delta(order_ids: np.ndarray, product_ids: np.ndarray, n_products: int):
+    """Co-occurrence counts contributed by a batch of complete orders"""
+    order_index = np.unique(order_ids, return_inverse=True)[1]
+    incidence = sparse.csr_matrix(
+        (np.ones(len(product_ids), dtype=np.int32), (order_index, product_ids)),
+        shape=(int(order_index.max()) + 1, n_products),
+    )
+    # Quantity-independent: the same product twice in one order counts once
+    incidence.data[:] = 1
+    return (incidence.T @ incidence).tocsr()
+
+
+def _complete_orders(batches: Iterable[PairBatch]) -> Iterable[PairBatch]:
+    """Re-chunk batches so no order is split across two chunks (input sorted by order)"""
+    carry_orders = np.empty(0, dtype=np.int64)
+    carry_products = np.empty(0, dtype=np.int64)
+    for order_ids, product_ids in batches:
+        order_ids = np.concatenate([carry_orders, np.asarray(order_ids, dtype=np.int64)])
+        product_ids = np.concatenate([carry_products, np.asarray(product_ids, dtype=np.int64)])
+        if not len(order_ids):
+            continue
+        cut = np.searchsorted(order_ids, order_ids[-1], side="left")
+        carry_orders, carry_products = order_ids[cut:], product_ids[cut:]
+        if cut:
+            yield order_ids[:cut], product_ids[:cut]
+    if len(carry_orders):
+        yield carry_orders, carry_products
+
+
+class CooccurrenceModel:
+    """Sparse co-occurrence counts plus the last order included"""
+    
+    def __init__(self, matrix: Optional[sparse.csr_matrix] = None, last_order_id: int = 0):
+        self.matrix = matrix if matrix is not None else sparse.csr_matrix((1, 1), dtype=np.int32)
+        self.last_order_id = last_order_id
+    
+    @property
+    def n_products(self) -> int:
+        return self.matrix.shape[0]
+    
+    def _grow(self, n_products: int) -> None:
+        """Resize the matrix when new product ids appear"""
+        if n_products > self.n_products:
+            self.matrix.resize((n_products, n_products))
+    
+    def add(self, batches: Iterable[PairBatch]) -> np.ndarray:
+        """
+        Add (order_ids, product_ids) batches sorted by order id, return the ids
+        of the products whose counts changed
+        """
+        touched = []
+        for order_ids, product_ids in _complete_orders(batches):
+            self._grow(int(product_ids.max()) + 1)
+            delta = _incidence_delta(order_ids, product_ids, self.n_products)
+            delta.setdiag(0)
+            delta.eliminate_zeros()
+            self.matrix = (self.matrix + delta).tocsr()
+            touched.append(np.unique(product_ids))
+            self.last_order_id = max(self.last_order_id, int(order_ids[-1]))
+        return np.unique(np.concatenate(touched)) if touched else np.empty(0, dtype=np.int64)
+    
+    def top_k(
+        self, k: int, rows: Optional[np.ndarray] = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Top-K neighbour ids and scores for the given rows (all rows by default)"""
+        rows = np.arange(self.n_products) if rows is None else np.asarray(rows)
+        neighbors = np.full((len(rows), k), -1, dtype=np.int32)
+        scores = np.zeros((len(rows), k), dtype=np.int32)
+        subset = self.matrix[rows]
+        if not subset.nnz:
+            return rows, neighbors, scores
+        
+        # Sort all entries at once by (row, score desc, product id), then keep
+        # the first k of each row
+        row_of_entry = np.repeat(np.arange(len(rows)), np.diff(subset.indptr))
+        order = np.lexsort((subset.indices, -subset.data, row_of_entry))
+        sorted_rows = row_of_entry[order]
+        rank = np.arange(len(order)) - subset.indptr[sorted_rows]
+        keep = rank < k
+        neighbors[sorted_rows[keep], rank[keep]] = subset.indices[order][keep]
+        scores[sorted_rows[keep], rank[keep]] = subset.data[order][keep]
+        return rows, neighbors, scores
+
+
+class RecommendationStore:
+    """Persists the model and the published top-K arrays in a directory"""
+    
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+    
+    def load_model(self) -> CooccurrenceModel:
+        """Load the co-occurrence model (empty if not built yet)"""
+        meta = self.read_meta()
+        matrix_path = self.directory / MATRIX_FILE
+        if not matrix_path.exists():
+            return CooccurrenceModel()
+        matrix = sparse.load_npz(matrix_path).tocsr()
+        return CooccurrenceModel(matrix, meta.get("last_order_id", 0))
+    
+    def read_meta(self) -> dict:
+        """Read publication metadata"""
+        meta_path = self.directory / META_FILE
+        if not meta_path.exists():
+            return {}
+        return json.loads(meta_path.read_text())
+    
+    def _write_atomic(self, name: str, write) -> None:
+        """Write a file next to its target and rename it into place"""
+        target = self.directory / name
+        temporary = self.directory / f".{name}.tmp"
+        with open(temporary, "wb") as handle:
+            write(handle)
+        os.replace(temporary, target)
+    
+    def publish(
+        self, model: CooccurrenceModel, k: int, changed_rows: Optional[np.ndarray] = None
+    ) -> dict:
+        """Save the model and publish top-K arrays (recomputing only changed rows if given)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        previous = self.read_meta()
+        n_products = model.n_products
+        
+        if changed_rows is not None and previous.get("k") == k:
+            neighbors = np.full((n_products, k), -1, dtype=np.int32)
+            scores = np.zeros((n_products, k), dtype=np.int32)
+            old_neighbors = np.load(self.directory / NEIGHBORS_FILE)
+            old_scores = np.load(self.directory / SCORES_FILE)
+            neighbors[:len(old_neighbors)] = old_neighbors
+            scores[:len(old_scores)] = old_scores
+            rows, row_neighbors, row_scores = model.top_k(k, changed_rows)
+            neighbors[rows] = row_neighbors
+            scores[rows] = row_scores
+        else:
+            _, neighbors, scores = model.top_k(k)
+        
+        self._write_atomic(
+            MATRIX_FILE, lambda handle: sparse.save_npz(handle, model.matrix, compressed=False)
+        )
+        self._write_atomic(NEIGHBORS_FILE, lambda handle: np.save(handle, neighbors))
+        self._write_atomic(SCORES_FILE, lambda handle: np.save(handle, scores))
+        # meta.json goes last: readers use its version to decide when to remap
+        meta = {
+            "version": previous.get("version", 0) + 1,
+            "k": k,
+            "n_products": n_products,
+            "last_order_id": model.last_order_id,
+            "published_at": time.time(),
+        }
+        self._write_atomic(META_FILE, lambda handle: handle.write(json.dumps(meta).encode()))
+        return meta
+
+
+class RecommendationIndex:
+    """Read-only, memory-mapped view of the published top-K neighbours"""
+    
+    def __init__(self, directory: str, check_interval: float = 5.0):
+        self.store = RecommendationStore(directory)
+        self.check_interval = check_interval
+        self._version = None
+        self._neighbors: Optional[np.ndarray] = None
+        self._scores: Optional[np.ndarray] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+    
+    def _refresh(self) -> None:
+        """Remap the arrays when a newer version was published"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval and self._neighbors is not None:
+            return
+        with self._lock:
+            self._checked_at = now
+            meta = self.store.read_meta()
+            if not meta or meta["version"] == self._version:
+                return
+            directory = self.store.directory
+            self._neighbors = np.load(directory / NEIGHBORS_FILE, mmap_mode="r")
+            self._scores = np.load(directory / SCORES_FILE, mmap_mode="r")
+            self._version = meta["version"]
+    
+    def related(self, product_id: int, limit: int = 10) -> list[tuple[int, int]]:
+        """(product_id, times bought together) pairs, best first, O(K)"""
+        self._refresh()
+        neighbors = self._neighbors
+        if neighbors is None or product_id < 0 or product_id >= len(neighbors):
+            return []
+        row_neighbors = neighbors[product_id, :limit]
+        row_scores = self._scores[product_id, :limit]
+        return [
+            (int(neighbor), int(score))
+            for neighbor, score in zip(row_neighbors, row_scores)
+            if neighbor >= 0
+        ]
+
+
+_recommendation_index: Optional[RecommendationIndex] = None
+
+
+def get_recommendation_index() -> RecommendationIndex:
+    """Get the process-wide recommendation index"""
+    global _recommendation_index
+    if _recommendation_index is None:
+        from app.core.config import settings
+        _recommendation_index = RecommendationIndex(settings.RECOMMENDATIONS_DIR)
+    return _recommendation_index
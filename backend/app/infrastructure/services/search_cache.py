@@ -0,0 +1,141 @@
+"""Result cache for product searches
+
+Results are cached per normalized query and page for a short TTL, in an
+LRU-bounded map. Concurrent identical searches are coalesced: the first one
+runs the query while the others wait for its result (single flight), so a
+burst of the same search costs one database query. Every product write
+bumps a catalog version; entries cached under an older version are treated
+as misses, and a result computed while a write happened is returned but
+not cached.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable, Optional
+
+
+def normalize_query(query: str) -> str:
+    """Case-folded query with runs of whitespace collapsed"""
+    return " ".join(query.lower().split())
+
+
+@dataclass(slots=True)
+class _Entry:
+    """Cached result"""
+    value: Any
+    version: int
+    expires_at: float
+
+
+@dataclass
+class _Flight:
+    """Search being computed, awaited by coalesced callers"""
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+class SearchCache:
+    """LRU + TTL result cache with single-flight loading and version invalidation"""
+    
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = 0
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._flights: dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+    
+    def bump_version(self) -> int:
+        """Invalidate every cached result (called on catalog writes)"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            return self.version
+    
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Cached value for key, or the result of one shared loader call"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.version == self.version and entry.expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                del self._entries[key]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                self.misses += 1
+                flight = self._flights[key] = _Flight()
+                version = self.version
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        
+        try:
+            flight.value = loader()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                # A write during the load may have made the result stale
+                if flight.error is None and version == self.version:
+                    self._store(key, flight.value, version)
+            flight.done.set()
+        return flight.value
+    
+    def _store(self, key: Hashable, value: Any, version: int) -> None:
+        """Insert a fresh entry, evicting the least recently used beyond the limit"""
+        self._entries[key] = _Entry(value, version, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def stats(self) -> dict:
+        """Entry count, catalog version and hit/coalescing counters"""
+        # One consistent snapshot: lookups update these under the same lock
+        with self._lock:
+            entries = len(self._entries)
+            version = self.version
+            hits, misses, coalesced = self.hits, self.misses, self.coalesced
+            evictions = self.evictions
+        lookups = hits + misses + coalesced
+        return {
+            "entries": entries,
+            "version": version,
+            "hits": hits,
+            "misses": misses,
+            "coalesced": coalesced,
+            "evictions": evictions,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> SearchCache:
+    """Get the process-wide search result cache"""
+    global _search_cache
+    if _search_cache is None:
+        from app.core.config import settings
+        _search_cache = SearchCache(
+            ttl=settings.SEARCH_CACHE_TTL_SECONDS,
+            max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+        )
+    return _search_cache
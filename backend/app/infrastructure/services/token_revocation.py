@@ -0,0 +1,223 @@
+"""In-memory revocation checks for JWT token ids
+
+Revoked token ids (used refresh token jtis and whole token families) live in
+the revoked_tokens table. Every worker keeps a Bloom filter over them, so the
+common case, a token that was never revoked, is answered without touching the
+database; only filter hits (real revocations plus a small false-positive
+rate) are confirmed with a query. Workers pick up each other's revocations by
+polling the table for ids past the last one seen, and periodically rebuild the
+filter from unexpired rows so it never fills up with dead entries.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.infrastructure.repositories.token_repository import (
+    RevokedTokenRepository, TokenFamilyRepository
+)
+
+# Ids re-read behind the sync cursor, covering inserts that commit out of id order
+SYNC_OVERLAP = 100
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on one blake2b digest)"""
+    
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, item: str) -> list[int]:
+        """Bit positions of an item"""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(first + i * second) % size for i in range(self.hashes)]
+    
+    def add(self, item: str) -> None:
+        """Add an item"""
+        bits = self._bits
+        for position in self._positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        for position in self._positions(item):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class TokenRevocationStore:
+    """Answers "is this token id revoked?" from memory, confirming hits in the database"""
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        capacity: int = 1_000_000,
+        error_rate: float = 0.001,
+        sync_interval: float = 2.0,
+        rebuild_interval: float = 3600.0,
+    ):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self._filter = BloomFilter(capacity, error_rate)
+        self._confirmed: set[str] = set()
+        # Ids revoked by this worker since the last rebuild started
+        self._recent: list[str] = []
+        self._last_id = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"checks": 0, "filter_hits": 0, "db_lookups": 0, "false_positives": 0}
+    
+    def revoke(self, token_id: str, kind: str, expires_at: datetime, reason: str = None) -> bool:
+        """Revoke a token id, return False if it was already revoked"""
+        db = self.session_factory()
+        try:
+            created = RevokedTokenRepository(db).insert_if_absent({
+                "token_id": token_id, "kind": kind, "reason": reason, "expires_at": expires_at,
+            })
+        finally:
+            db.close()
+        with self._lock:
+            self._filter.add(token_id)
+            self._confirmed.add(token_id)
+            self._recent.append(token_id)
+        return created
+    
+    def is_revoked(self, token_id: str) -> bool:
+        """Check a token id; queries the database only when the filter matches"""
+        stats = self.stats
+        stats["checks"] += 1
+        if token_id not in self._filter:
+            return False
+        stats["filter_hits"] += 1
+        if token_id in self._confirmed:
+            return True
+        
+        stats["db_lookups"] += 1
+        db = self.session_factory()
+        try:
+            revoked = RevokedTokenRepository(db).is_revoked(token_id)
+        finally:
+            db.close()
+        if revoked:
+            with self._lock:
+                self._confirmed.add(token_id)
+        else:
+            stats["false_positives"] += 1
+        return revoked
+    
+    def is_payload_revoked(self, payload: dict) -> bool:
+        """Check the jti and token family of a decoded token"""
+        return any(
+            self.is_revoked(token_id)
+            for token_id in (payload.get("jti"), payload.get("fam"))
+            if token_id
+        )
+    
+    def sync(self) -> int:
+        """Add revocations made by other workers since the last sync, return rows read"""
+        db = self.session_factory()
+        try:
+            rows = RevokedTokenRepository(db).get_since(max(self._last_id - SYNC_OVERLAP, 0))
+        finally:
+            db.close()
+        with self._lock:
+            for row_id, token_id in rows:
+                self._filter.add(token_id)
+                self._last_id = max(self._last_id, row_id)
+        return len(rows)
+    
+    def rebuild(self) -> int:
+        """Drop expired revocations and families and rebuild the filter, return its size"""
+        now = datetime.utcnow()
+        with self._lock:
+            self._recent = []
+        db = self.session_factory()
+        try:
+            TokenFamilyRepository(db).delete_expired(now)
+            repository = RevokedTokenRepository(db)
+            repository.delete_expired(now)
+            rows = list(repository.get_active(now))
+        finally:
+            db.close()
+        # Grow rather than let the false-positive rate climb past the target
+        bloom = BloomFilter(max(self.capacity, 2 * len(rows)), self.error_rate)
+        last_id = 0
+        for row_id, token_id in rows:
+            bloom.add(token_id)
+            last_id = max(last_id, row_id)
+        with self._lock:
+            # Keep ids revoked locally while the rows were being read
+            for token_id in self._recent:
+                bloom.add(token_id)
+            self._filter = bloom
+            self._confirmed = set()
+            self._last_id = max(self._last_id, last_id)
+        return bloom.count
+    
+    def start(self) -> None:
+        """Load the filter and start the sync thread"""
+        if self._thread is None:
+            self.rebuild()
+            self._thread = threading.Thread(
+                target=self._run, name="token-revocation", daemon=True
+            )
+            self._thread.start()
+    
+    def _run(self) -> None:
+        """Sync loop"""
+        rebuilt_at = time.monotonic()
+        while not self._stop.wait(self.sync_interval):
+            try:
+                if time.monotonic() - rebuilt_at >= self.rebuild_interval:
+                    self.rebuild()
+                    rebuilt_at = time.monotonic()
+                else:
+                    self.sync()
+            except Exception:
+                # Revocations stay in the table and are picked up on the next round
+                continue
+    
+    def stop(self) -> None:
+        """Stop the sync thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_token_revocation_store: Optional[TokenRevocationStore] = None
+
+
+def get_token_revocation_store() -> TokenRevocationStore:
+    """Get the process-wide token revocation store"""
+    global _token_revocation_store
+    if _token_revocation_store is None:
+        from app.infrastructure.database.database import SessionLocal
+        _token_revocation_store = TokenRevocationStore(
+            SessionLocal,
+            capacity=settings.TOKEN_REVOCATION_CAPACITY,
+            error_rate=settings.TOKEN_REVOCATION_ERROR_RATE,
+            sync_interval=settings.TOKEN_REVOCATION_SYNC_SECONDS,
+            rebuild_interval=settings.TOKEN_REVOCATION_REBUILD_SECONDS,
+        )
+    return _token_revocation_store
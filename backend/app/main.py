@@ -5,13 +5,41 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
 from app.core.config import settings
-from app.api.v1.endpoints import auth, users, products
-from app.infrastructure.database.database import init_db
+from app.core.logging import configure_logging, get_statement_cache_stats, shutdown_logging
+from app.api.v1.endpoints import (
+    auth, users, products, categories, reviews, images, cart, orders, payments, exports,
+    profiling
+)
+from app.application.categories.catalog import warm_category_catalog
+from app.application.payments.process_webhook import get_payment_event_worker
+from app.application.reviews.reconcile_ratings import get_rating_reconciler
+from app.application.products.autocomplete import (
+    warm_autocomplete_index, get_autocomplete_popularity_refresher
+)
+from app.application.products.facets import warm_facet_index
+from app.application.products.invalidation import start_cache_invalidation
+from app.api.v1.middleware.access_log import AccessLogMiddleware
+from app.api.v1.middleware.idempotency import IdempotencyMiddleware
+from app.api.v1.middleware.profiling import ProfilingMiddleware
+from app.infrastructure.database.database import engine, init_db
+from app.infrastructure.services.idempotency_store import create_idempotency_store
+from app.infrastructure.services.email_service import shutdown_email_batcher
+from app.infrastructure.services.token_revocation import get_token_revocation_store
+from app.infrastructure.services.profiler import get_profiler
+from app.infrastructure.services.search_cache import get_search_cache
+from app.infrastructure.services.category_catalog import get_category_catalog
+from app.infrastructure.services.image_processing import get_image_processor
+from app.infrastructure.services.cart_store import get_cart_store
+from app.infrastructure.services.cache_invalidation import get_invalidation_bus
+from app.infrastructure.services.product_snapshot import get_product_snapshot_reader
 
 
 def create_app() -> FastAPI:
     """Create and configure FastAPI application"""
     
+    # Route all logging through the background log writer
+    log_pipeline = configure_logging()
+    
     # Initialize database
     init_db()
     
@@ -25,7 +53,16 @@ def create_app() -> FastAPI:
         redoc_url=f"{settings.API_V1_STR}/redoc",
     )
     
-    # Add middleware
+    # Add middleware (each one added wraps those added before it)
+    # Innermost, so its 409/422 responses pass through CORS like any other
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=create_idempotency_store(),
+        ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+        lease=settings.IDEMPOTENCY_LEASE_SECONDS,
+        wait_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT_SECONDS,
+    )
+    
     app.add_middleware(
         TrustedHostMiddleware,
         allowed_hosts=["localhost", "127.0.0.1", "*.example.com"]
@@ -39,10 +76,53 @@ def create_app() -> FastAPI:
         allow_headers=settings.CORS_ALLOW_HEADERS,
     )
     
+    # Profiles cover the middleware added before this one
+    app.add_middleware(ProfilingMiddleware, profiler=get_profiler())
+    
+    # Outermost, so access latency covers every other middleware
+    app.add_middleware(AccessLogMiddleware, pipeline=log_pipeline)
+    
     # Include routers
     app.include_router(auth.router, prefix=settings.API_V1_STR)
     app.include_router(users.router, prefix=settings.API_V1_STR)
     app.include_router(products.router, prefix=settings.API_V1_STR)
+    app.include_router(categories.router, prefix=settings.API_V1_STR)
+    app.include_router(reviews.router, prefix=settings.API_V1_STR)
+    app.include_router(images.router, prefix=settings.API_V1_STR)
+    app.include_router(cart.router, prefix=settings.API_V1_STR)
+    app.include_router(orders.router, prefix=settings.API_V1_STR)
+    app.include_router(payments.router, prefix=settings.API_V1_STR)
+    app.include_router(exports.router, prefix=settings.API_V1_STR)
+    app.include_router(profiling.router, prefix=settings.API_V1_STR)
+    
+    # Listen for other workers' writes before loading what they would invalidate
+    app.add_event_handler("startup", start_cache_invalidation)
+    app.add_event_handler("shutdown", get_invalidation_bus().stop)
+    
+    # In-memory indexes
+    app.add_event_handler("startup", warm_autocomplete_index)
+    app.add_event_handler("startup", warm_facet_index)
+    app.add_event_handler("startup", warm_category_catalog)
+    
+    # Background workers
+    app.add_event_handler("startup", get_payment_event_worker().start)
+    app.add_event_handler("shutdown", get_payment_event_worker().stop)
+    app.add_event_handler("startup", get_token_revocation_store().start)
+    app.add_event_handler("shutdown", get_token_revocation_store().stop)
+    app.add_event_handler("startup", get_rating_reconciler().start)
+    app.add_event_handler("shutdown", get_rating_reconciler().stop)
+    app.add_event_handler("startup", get_autocomplete_popularity_refresher().start)
+    app.add_event_handler("shutdown", get_autocomplete_popularity_refresher().stop)
+    app.add_event_handler("startup", get_image_processor().start)
+    app.add_event_handler("shutdown", get_image_processor().stop)
+    app.add_event_handler("startup", get_cart_store().start)
+    app.add_event_handler("shutdown", get_cart_store().stop)
+    
+    # Flush pending emails on shutdown
+    app.add_event_handler("shutdown", shutdown_email_batcher)
+    
+    # Write out queued log records last
+    app.add_event_handler("shutdown", shutdown_logging)
     
     # Health check endpoint
     @app.get("/health", tags=["Health"])
@@ -51,7 +131,16 @@ def create_app() -> FastAPI:
         return {
             "status": "ok",
             "application": settings.APP_NAME,
-            "version": settings.APP_VERSION
+            "version": settings.APP_VERSION,
+            "logging": log_pipeline.stats(),
+            "search_cache": get_search_cache().stats(),
+            "category_catalog": get_category_catalog().stats(),
+            "image_processor": get_image_processor().stats(),
+            "carts": get_cart_store().info(),
+            "cache_invalidation": get_invalidation_bus().info(),
+            "product_snapshot": get_product_snapshot_reader().info(),
+            "statement_cache": get_statement_cache_stats().info(engine),
+            "database_pool": engine.pool.metrics.info(engine.pool),
         }
     
     @app.get("/", tags=["Root"])
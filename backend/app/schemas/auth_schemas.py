@@ -1,12 +1,19 @@
 """Authentication schemas/DTOs"""
 
-from pydantic import BaseModel, EmailStr
+from typing import Optional
+
+from pydantic import BaseModel, EmailStr, Field
+
+# Guest cart tokens (uuid4 hex)
+CART_TOKEN_PATTERN = "^[0-9a-f]{32}$"
 
 
 class TokenRequest(BaseModel):
     """Token request schema for login"""
     email: EmailStr
     password: str
+    # Guest cart to merge into the user's cart
+    cart_token: Optional[str] = Field(None, pattern=CART_TOKEN_PATTERN)
 
 
 class TokenResponse(BaseModel):
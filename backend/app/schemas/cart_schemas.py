@@ -0,0 +1,60 @@
+"""Cart schemas"""
+
+from decimal import Decimal
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+# Most lines a cart (and a quote request) may have, and most units per line
+MAX_CART_LINES = 500
+MAX_LINE_QUANTITY = 1000
+
+
+class CartItem(BaseModel):
+    """A product and quantity in a cart"""
+    product_id: int = Field(..., ge=1)
+    quantity: int = Field(..., ge=1, le=MAX_LINE_QUANTITY)
+
+
+class CartItemUpdate(BaseModel):
+    """New quantity of a cart line (0 removes it)"""
+    quantity: int = Field(..., ge=0, le=MAX_LINE_QUANTITY)
+
+
+class CartResponse(BaseModel):
+    """A stored cart's lines; version changes on every change to the cart"""
+    items: list[CartItem]
+    version: int
+
+
+class CartQuoteRequest(BaseModel):
+    """Cart lines to price, with an optional coupon"""
+    items: list[CartItem] = Field(..., min_length=1, max_length=MAX_CART_LINES)
+    coupon_code: Optional[str] = Field(None, max_length=50)
+
+
+class CartQuoteLine(BaseModel):
+    """One priced cart line"""
+    product_id: int
+    quantity: int
+    unit_price: Decimal
+    subtotal: Decimal
+    discount: Decimal
+    tax: Decimal
+    total: Decimal
+
+
+class CartQuoteResponse(BaseModel):
+    """A priced cart (amounts exact to the cent; lines add up to the totals)"""
+    items: list[CartQuoteLine]
+    subtotal: Decimal
+    discount: Decimal
+    tax: Decimal
+    total: Decimal
+    coupon_code: Optional[str] = None
+
+
+class CartCheckoutResponse(BaseModel):
+    """A stored cart validated and priced for checkout, at a given cart version"""
+    version: int
+    quote: CartQuoteResponse
@@ -0,0 +1,44 @@
+"""Category schemas/DTOs"""
+
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class CategoryBase(BaseModel):
+    """Base category schema"""
+    name: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = None
+    icon: Optional[str] = Field(None, max_length=255)
+    parent_id: Optional[int] = None
+
+
+class CategoryCreate(CategoryBase):
+    """Category creation schema"""
+    pass
+
+
+class CategoryResponse(CategoryBase):
+    """Category response schema"""
+    id: int
+    product_count: int = 0
+    
+    class Config:
+        from_attributes = True
+
+
+class CategoryTreeNode(CategoryResponse):
+    """Category with its subcategories"""
+    total_product_count: int = 0
+    children: list["CategoryTreeNode"] = []
+
+
+class CategoryListResponse(BaseModel):
+    """Categories from one catalog version"""
+    version: int
+    items: list[CategoryResponse]
+
+
+class CategoryTreeResponse(BaseModel):
+    """Category tree from one catalog version"""
+    version: int
+    roots: list[CategoryTreeNode]
@@ -0,0 +1,15 @@
+"""Image schemas/DTOs"""
+
+from pydantic import BaseModel
+
+
+class ProductImageResponse(BaseModel):
+    """Product image with the URL of each stored variant"""
+    id: int
+    product_id: int
+    content_hash: str
+    position: int
+    width: int
+    height: int
+    # Variant name ("original.jpg", "w480.webp", ...) -> URL
+    urls: dict[str, str]
@@ -0,0 +1,31 @@
+"""Order schemas"""
+
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.infrastructure.database.models_order import OrderStatusEnum
+
+# Most orders one bulk status transition may change
+MAX_TRANSITION_ORDERS = 10000
+
+
+class OrderStatusTransitionRequest(BaseModel):
+    """Orders to move to a new status (from_status restricts which ones may move)"""
+    order_ids: list[int] = Field(..., min_length=1, max_length=MAX_TRANSITION_ORDERS)
+    to_status: OrderStatusEnum
+    from_status: Optional[OrderStatusEnum] = None
+
+
+class OrderTransitionFailure(BaseModel):
+    """An order that was not moved, with its current status (None if it does not exist)"""
+    order_id: int
+    status: Optional[OrderStatusEnum] = None
+    error: str
+
+
+class OrderStatusTransitionResponse(BaseModel):
+    """Outcome of a bulk status transition"""
+    to_status: OrderStatusEnum
+    transitioned: list[int]
+    failed: list[OrderTransitionFailure]
@@ -56,3 +56,77 @@ class ProductDetailedResponse(ProductResponse):
     images: list = []
     ratings_average: Optional[float] = None
     ratings_count: int = 0
+
+
+class RelatedProductResponse(ProductResponse):
+    """Product frequently bought together with another one"""
+    times_bought_together: int = 0
+
+
+class ProductBatchRequest(BaseModel):
+    """Ids of the products to fetch at once"""
+    ids: list[int] = Field(..., min_length=1, max_length=100)
+
+
+class ProductBatchResponse(BaseModel):
+    """Products fetched at once, in request order"""
+    items: list[ProductResponse]
+    missing: list[int] = []
+
+
+class ProductFilters(BaseModel):
+    """Faceted browsing filters"""
+    category_ids: Optional[list[int]] = None
+    min_price: Optional[Decimal] = Field(None, ge=0)
+    max_price: Optional[Decimal] = Field(None, ge=0)
+    in_stock: Optional[bool] = None
+    status: ProductStatus = ProductStatus.ACTIVE
+
+
+class FacetValueCount(BaseModel):
+    """Number of matching products for one facet value"""
+    value: int | str | bool
+    count: int
+
+
+class PriceRangeCount(BaseModel):
+    """Number of matching products in a price range (max exclusive, None = open)"""
+    min: Decimal
+    max: Optional[Decimal] = None
+    count: int
+
+
+class ProductFacets(BaseModel):
+    """Facet counts; each facet applies every filter except its own"""
+    categories: list[FacetValueCount] = []
+    price_ranges: list[PriceRangeCount] = []
+    in_stock: list[FacetValueCount] = []
+    status: list[FacetValueCount] = []
+
+
+class FacetedProductsResponse(BaseModel):
+    """Page of filtered products with facet counts"""
+    items: list[ProductResponse]
+    total: int
+    facets: ProductFacets
+
+
+class AutocompleteProduct(BaseModel):
+    """Product suggestion"""
+    id: int
+    name: str
+    sku: str
+    category_id: int
+
+
+class AutocompleteCategory(BaseModel):
+    """Category suggestion"""
+    id: int
+    name: str
+
+
+class AutocompleteResponse(BaseModel):
+    """Autocomplete suggestions for a partial query"""
+    query: str
+    products: list[AutocompleteProduct] = []
+    categories: list[AutocompleteCategory] = []
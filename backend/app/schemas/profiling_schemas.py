@@ -0,0 +1,34 @@
+"""Profiling schemas/DTOs"""
+
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class ProfilingSettings(BaseModel):
+    """Admin toggle for request sampling"""
+    sample_rate: float = Field(..., ge=0, le=1)
+    path_prefix: Optional[str] = None
+
+
+class ProfilingStatus(ProfilingSettings):
+    """Current profiler state"""
+    enabled: bool
+    directory: str
+    interval_seconds: float
+
+
+class HotStack(BaseModel):
+    """Aggregated collapsed stack"""
+    stack: str
+    samples: int
+    seconds: float
+
+
+class HotStacksResponse(BaseModel):
+    """Hottest stacks and time per layer over a time window"""
+    minutes: int
+    requests: int
+    samples: int
+    layers: dict[str, float]
+    stacks: list[HotStack]
@@ -0,0 +1,30 @@
+"""Review schemas/DTOs"""
+
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+
+
+class ReviewCreate(BaseModel):
+    """Review creation schema"""
+    rating: int = Field(..., ge=1, le=5)
+    title: Optional[str] = Field(None, max_length=150)
+    comment: Optional[str] = Field(None, max_length=5000)
+
+
+class ReviewResponse(ReviewCreate):
+    """Review response schema"""
+    id: int
+    product_id: int
+    user_id: int
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class ReviewPage(BaseModel):
+    """One page of a product's reviews, newest first"""
+    items: list[ReviewResponse]
+    # Pass as ?cursor= for the next page; None on the last page
+    next_cursor: Optional[int] = None
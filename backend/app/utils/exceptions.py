@@ -1,5 +1,7 @@
 """Custom exceptions"""
 
+from typing import Optional
+
 
 class SupleGearException(Exception):
     """Base exception for SupleGear"""
@@ -8,12 +10,20 @@ class SupleGearException(Exception):
 
 class ResourceNotFoundError(SupleGearException):
     """Raised when a resource is not found"""
-    pass
+    
+    def __init__(self, message: str, field: Optional[str] = None):
+        super().__init__(message)
+        # Field holding the missing reference, when known
+        self.field = field
 
 
 class DuplicateResourceError(SupleGearException):
     """Raised when trying to create a duplicate resource"""
-    pass
+    
+    def __init__(self, message: str, field: Optional[str] = None):
+        super().__init__(message)
+        # Field whose value is already taken, when known
+        self.field = field
 
 
 class InvalidCredentialsError(SupleGearException):
@@ -34,3 +44,18 @@ class InvalidCouponError(SupleGearException):
 class PaymentFailedError(SupleGearException):
     """Raised when payment processing fails"""
     pass
+
+
+class InvalidWebhookSignatureError(SupleGearException):
+    """Raised when a webhook signature cannot be verified"""
+    pass
+
+
+class InvalidImageError(SupleGearException):
+    """Raised when an upload is not a supported, decodable image"""
+    pass
+
+
+class InvalidOrderTransitionError(SupleGearException):
+    """Raised when an order cannot move to the requested status"""
+    pass
@@ -1,6 +1,9 @@
 """Utility functions"""
 
 from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+CENT = Decimal("0.01")
 
 
 def generate_order_number() -> str:
@@ -9,9 +12,20 @@ def generate_order_number() -> str:
     return f"ORD-{int(time())}"
 
 
-def calculate_discount(original_price: float, discount_percentage: float) -> float:
-    """Calculate discount amount"""
-    return original_price * (discount_percentage / 100)
+def to_cents(amount) -> int:
+    """Exact integer cents of an amount, rounding half up"""
+    return int(Decimal(str(amount)).quantize(CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def from_cents(cents: int) -> Decimal:
+    """Decimal amount of integer cents"""
+    return Decimal(cents).scaleb(-2)
+
+
+def calculate_discount(original_price, discount_percentage) -> Decimal:
+    """Calculate discount amount, exact to the cent (rounding half up)"""
+    discount = Decimal(str(original_price)) * Decimal(str(discount_percentage)) / 100
+    return discount.quantize(CENT, rounding=ROUND_HALF_UP)
 
 
 def format_currency(amount: float, currency: str = "USD") -> str:
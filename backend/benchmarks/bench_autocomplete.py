@@ -0,0 +1,118 @@
+"""Benchmark the in-memory autocomplete index
+
+Builds the index over a synthetic catalog and reports build time, memory and
+lookup latency for realistic partial queries, plus the cost of an incremental
+update and of re-ranking after a day of sales.
+
+Usage: python -m benchmarks.bench_autocomplete [--products 500000] [--queries 20000]
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from app.infrastructure.services.autocomplete_index import AutocompleteIndex
+from benchmarks.datagen import CATEGORY_NAMES, PRODUCT_WORDS
+from benchmarks.load_test import percentile
+
+
+def synthetic_catalog(products: int, seed: int):
+    """(id, name, sku, category_id) rows and Zipf-like popularity"""
+    rng = random.Random(seed)
+    rows = [
+        (
+            i, f"{' '.join(rng.sample(PRODUCT_WORDS, 3))} {i}", f"BENCH-{i:08d}",
+            rng.randint(1, len(CATEGORY_NAMES)),
+        )
+        for i in range(1, products + 1)
+    ]
+    popularity = {i: int(10_000 / i ** 0.8) for i in range(1, products + 1)}
+    return rows, popularity
+
+
+def synthetic_queries(queries: int, products: int, seed: int) -> list[str]:
+    """Partial queries as typed into a search box"""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(queries):
+        kind = rng.random()
+        if kind < 0.6:
+            word = rng.choice(PRODUCT_WORDS)
+            result.append(word[:rng.randint(1, len(word))])
+        elif kind < 0.9:
+            first, second = rng.sample(PRODUCT_WORDS, 2)
+            result.append(f"{first} {second[:rng.randint(1, len(second))]}")
+        else:
+            result.append(f"bench-{rng.randint(1, products):08d}"[:rng.randint(8, 14)])
+    return result
+
+
+def run(products: int, queries: int, limit: int) -> dict:
+    rows, popularity = synthetic_catalog(products, seed=7)
+    categories = list(enumerate(CATEGORY_NAMES, start=1))
+    probe = synthetic_queries(queries, products, seed=1)
+    
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    index = AutocompleteIndex()
+    index.build(rows, categories, popularity=popularity)
+    build_seconds = time.perf_counter() - start
+    del rows
+    retained, build_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    def measure(query_list) -> list[float]:
+        latencies = []
+        for query in query_list:
+            started = time.perf_counter()
+            index.search(query, limit)
+            index.search_categories(query)
+            latencies.append(time.perf_counter() - started)
+        return sorted(latencies)
+    
+    cold = measure(probe)
+    warm = measure(probe)
+    
+    start = time.perf_counter()
+    for i in range(1000):
+        index.upsert_product(products + i + 1, f"Whey Limited {i}", f"LTD-{i:05d}", 1)
+    upsert_seconds = time.perf_counter() - start
+    
+    # A day of sales: 1% of the catalog sold a few more units
+    rng = random.Random(3)
+    sold = dict(popularity)
+    for product_id in rng.sample(range(1, products + 1), products // 100):
+        sold[product_id] += rng.randint(1, 20)
+    start = time.perf_counter()
+    reranked = index.refresh_popularity(sold)
+    refresh_seconds = time.perf_counter() - start
+    
+    return {
+        "products": products,
+        "terms": len(index._terms),
+        "build_seconds": round(build_seconds, 3),
+        "index_mb": round((retained - baseline) / 2**20, 1),
+        "build_peak_traced_mb": round(build_peak / 2**20, 1),
+        "queries": queries,
+        **{f"cold_p{pct}_us": round(percentile(cold, pct) * 1e6, 1) for pct in (50, 99)},
+        **{f"warm_p{pct}_us": round(percentile(warm, pct) * 1e6, 1) for pct in (50, 99)},
+        "upsert_us": round(upsert_seconds / 1000 * 1e6, 1),
+        "popularity_refresh": {"reranked": reranked, "seconds": round(refresh_seconds, 3)},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    result = run(args.products, args.queries, args.limit)
+    print(json.dumps({"benchmark": "autocomplete", "results": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Benchmark loading the products of a 50-item cart
+
+Compares, per cart, three ways a client can fetch the details of its items
+against a file-backed SQLite catalog behind the default 20+40 connection
+pool, with a simulated 0.5 ms network round trip per statement:
+
+- `per_item`: 50 concurrent GET /products/{id}, each request checking out
+  its own session and running get_by_id (the previous endpoint)
+- `loader`: the same 50 concurrent requests resolved through the shared
+  BatchLoader, which coalesces them into `get_by_ids` batches
+- `batch_endpoint`: one POST /products/batch with the 50 ids
+
+Reports cart latency, pool checkouts and statements per cart.
+
+Usage: python -m benchmarks.bench_batch_loader [--carts 50] [--items 50]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from decimal import Decimal
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.repositories.base_repository import BaseRepository
+from app.infrastructure.services.batch_loader import BatchLoader, RequestLoader
+from benchmarks.load_test import percentile
+
+CATALOG = 5000
+ROUND_TRIP = 0.0005
+
+
+def _serialize(product: Product) -> dict:
+    return {"id": product.id, "name": product.name, "price": str(product.price)}
+
+
+class Counters:
+    """Pool checkouts and statements"""
+    
+    def __init__(self, engine):
+        self.checkouts = 0
+        self.statements = 0
+        event.listen(engine, "checkout", self._checkout)
+        event.listen(engine, "before_cursor_execute", self._statement)
+    
+    def _checkout(self, *args) -> None:
+        self.checkouts += 1
+    
+    def _statement(self, *args) -> None:
+        self.statements += 1
+        time.sleep(ROUND_TRIP)
+
+
+def _engine(path: str):
+    engine = create_engine(
+        f"sqlite:///{path}", pool_size=20, max_overflow=40,
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(engine, tables=[Category.__table__, Product.__table__])
+    rng = random.Random(3)
+    with engine.begin() as connection:
+        connection.execute(insert(Category.__table__), [{"id": 1, "name": "Protein"}])
+        connection.execute(insert(Product.__table__), [
+            {
+                "id": i, "sku": f"SKU-{i:06d}", "name": f"Product {i}",
+                "price": Decimal(rng.randint(499, 9999)) / 100, "stock": 10,
+                "category_id": 1, "status": "ACTIVE",
+            }
+            for i in range(1, CATALOG + 1)
+        ])
+    return engine
+
+
+def _app(session_factory) -> FastAPI:
+    app = FastAPI()
+    
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+    
+    def load_products(product_ids: list[int]) -> dict[int, dict]:
+        db = session_factory()
+        try:
+            products = BaseRepository(db, Product).get_by_ids(product_ids)
+            return {product.id: _serialize(product) for product in products}
+        finally:
+            db.close()
+    
+    loader = BatchLoader(load_products)
+    
+    def request_loader() -> RequestLoader:
+        return RequestLoader(loader)
+    
+    @app.get("/per-item/{product_id}")
+    async def per_item(product_id: int, db: Session = Depends(get_db)):
+        product = BaseRepository(db, Product).get_by_id(product_id)
+        if product is None:
+            raise HTTPException(status_code=404)
+        return _serialize(product)
+    
+    @app.get("/loader/{product_id}")
+    async def loaded(product_id: int, products: RequestLoader = Depends(request_loader)):
+        product = await products.load(product_id)
+        if product is None:
+            raise HTTPException(status_code=404)
+        return product
+    
+    @app.post("/batch")
+    async def batch(ids: list[int], products: RequestLoader = Depends(request_loader)):
+        return {"items": [item for item in await products.load_many(ids) if item]}
+    
+    return app
+
+
+def run(carts: int, items: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = _engine(os.path.join(directory, "catalog.db"))
+        counters = Counters(engine)
+        app = _app(sessionmaker(bind=engine, expire_on_commit=False))
+        rng = random.Random(11)
+        cart_ids = [rng.sample(range(1, CATALOG + 1), items) for _ in range(carts)]
+        
+        async def fetch(client: httpx.AsyncClient, mode: str, ids: list[int]) -> None:
+            if mode == "batch_endpoint":
+                response = await client.post("/batch", json=ids)
+                assert len(response.json()["items"]) == len(ids)
+                return
+            prefix = "per-item" if mode == "per_item" else "loader"
+            responses = await asyncio.gather(*(client.get(f"/{prefix}/{i}") for i in ids))
+            assert all(response.status_code == 200 for response in responses)
+        
+        async def scenario(mode: str) -> dict:
+            transport = httpx.ASGITransport(app=app)
+            latencies = []
+            counters.checkouts = counters.statements = 0
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await fetch(client, mode, cart_ids[0])  # warm up
+                counters.checkouts = counters.statements = 0
+                for ids in cart_ids:
+                    start = time.perf_counter()
+                    await fetch(client, mode, ids)
+                    latencies.append(time.perf_counter() - start)
+            latencies.sort()
+            return {
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                "checkouts_per_cart": round(counters.checkouts / carts, 2),
+                "statements_per_cart": round(counters.statements / carts, 2),
+            }
+        
+        results = {
+            mode: asyncio.run(scenario(mode))
+            for mode in ("per_item", "loader", "batch_endpoint")
+        }
+        engine.dispose()
+    return {"carts": carts, "items_per_cart": items, "round_trip_ms": ROUND_TRIP * 1000,
+            **results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--carts", type=int, default=50)
+    parser.add_argument("--items", type=int, default=50)
+    args = parser.parse_args()
+    result = run(args.carts, args.items)
+    print(json.dumps({"benchmark": "batch_loader", "results": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
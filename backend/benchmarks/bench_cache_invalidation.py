@@ -0,0 +1,165 @@
+"""Benchmark cross-worker cache invalidation: write overhead and staleness
+
+Two simulated workers share a file-backed SQLite catalog and a local
+invalidation hub, or with --url a PostgreSQL database and pg_notify. The
+writer updates product prices one transaction at a time. The reader runs
+the listener thread and records when each write reaches its subscriber.
+The benchmark reports:
+- write throughput with and without the bus, and the cost it adds per write
+  (the cache_writes INSERT and the message, both in the write's
+  transaction);
+- how stale the reader stays when messages arrive (time from the writer's
+  commit to the reader's refresh, commit included);
+- how stale it stays when messages are lost and only the version check
+  catches the write.
+
+The PostgreSQL database is emptied first.
+
+Usage: python -m benchmarks.bench_cache_invalidation [--writes 2000] [--check-interval 0.2]
+       [--url postgresql://...]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_cache import CacheWrite
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.services.cache_invalidation import (
+    CacheInvalidationBus, LocalInvalidationHub, LocalInvalidationTransport,
+    PostgresNotifyTransport
+)
+from benchmarks.load_test import percentile
+
+PRODUCTS = 1000
+
+
+def _seed(engine) -> None:
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as connection:
+            connection.execute(text("DROP SCHEMA public CASCADE"))
+            connection.execute(text("CREATE SCHEMA public"))
+    Base.metadata.create_all(
+        engine, tables=[Category.__table__, Product.__table__, CacheWrite.__table__]
+    )
+    with engine.begin() as connection:
+        connection.execute(insert(Category), [{"id": 1, "name": "Protein"}])
+        connection.execute(insert(Product), [
+            {"id": i, "name": f"Product {i}", "sku": f"SKU-{i}", "price": Decimal("10.00"),
+             "stock": 10, "category_id": 1}
+            for i in range(1, PRODUCTS + 1)
+        ])
+
+
+def _update(sessions, product_id: int, cents: int) -> None:
+    db = sessions()
+    product = db.get(Product, product_id)
+    product.price = Decimal(cents) / 100
+    db.commit()
+    db.close()
+
+
+def _writes_per_second(sessions, writes: int) -> float:
+    start = time.perf_counter()
+    for i in range(writes):
+        _update(sessions, i % PRODUCTS + 1, 1000 + i)
+    return writes / (time.perf_counter() - start)
+
+
+def _bus(engine, hub, check_interval: float, channel: str = "cache_invalidation"):
+    sessions = sessionmaker(bind=engine, expire_on_commit=False)
+    if engine.dialect.name == "postgresql":
+        transport = PostgresNotifyTransport(engine, channel)
+    else:
+        transport = LocalInvalidationTransport(hub)
+    bus = CacheInvalidationBus(transport, sessions, check_interval)
+    bus.install(sessions)
+    return sessions, bus
+
+
+def _staleness(writer_sessions, reader: CacheInvalidationBus, writes: int) -> list[float]:
+    """Milliseconds from each write's commit to the reader's refresh"""
+    arrived = threading.Event()
+    received = []
+    reader.subscribe("product", lambda ids: (received.append(time.perf_counter()), arrived.set()))
+    reader.start()
+    lags = []
+    for i in range(writes):
+        arrived.clear()
+        start = time.perf_counter()
+        _update(writer_sessions, i % PRODUCTS + 1, 5000 + i)
+        if not arrived.wait(30):
+            raise RuntimeError("invalidation never arrived")
+        lags.append((received[-1] - start) * 1000)
+    reader.stop()
+    return sorted(lags)
+
+
+def run(writes: int, check_interval: float, url: str = None) -> dict:
+    results = {"writes": writes, "check_interval_seconds": check_interval}
+    with tempfile.TemporaryDirectory() as directory:
+        if url:
+            engine = create_engine(url)
+        else:
+            engine = create_engine(
+                f"sqlite:///{os.path.join(directory, 'catalog.db')}",
+                connect_args={"check_same_thread": False},
+            )
+        results["database"] = engine.dialect.name
+        _seed(engine)
+        hub = LocalInvalidationHub()
+        
+        plain_sessions = sessionmaker(bind=engine, expire_on_commit=False)
+        writer_sessions, writer = _bus(engine, hub, check_interval)
+        writer.subscribe("product", lambda ids: None)
+        # Alternating rounds, best of each, so disk noise hits both alike
+        plain = tracked = 0.0
+        for _ in range(3):
+            plain = max(plain, _writes_per_second(plain_sessions, writes))
+            tracked = max(tracked, _writes_per_second(writer_sessions, writes))
+        results["write_overhead"] = {
+            "writes_per_second_without_bus": round(plain),
+            "writes_per_second_with_bus": round(tracked),
+            "added_ms_per_write": round((1 / tracked - 1 / plain) * 1000, 3),
+        }
+        
+        _, reader = _bus(engine, hub, check_interval)
+        lags = _staleness(writer_sessions, reader, min(writes, 500))
+        results["staleness_with_messages_ms"] = {
+            "p50": round(percentile(lags, 50), 3),
+            "p99": round(percentile(lags, 99), 3),
+            "max": round(lags[-1], 3),
+        }
+        
+        # Messages lost: the reader listens where nobody publishes
+        _, lossy = _bus(engine, LocalInvalidationHub(), check_interval, "cache_invalidation_lost")
+        lags = _staleness(writer_sessions, lossy, 20)
+        results["staleness_messages_lost_ms"] = {
+            "p50": round(percentile(lags, 50), 1),
+            "max": round(lags[-1], 1),
+            "two_check_intervals": round(2 * check_interval * 1000, 1),
+        }
+        engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--check-interval", type=float, default=0.2)
+    parser.add_argument("--url", help="PostgreSQL database to run against (emptied first)")
+    args = parser.parse_args()
+    print(json.dumps({"benchmark": "cache_invalidation",
+                      "results": run(args.writes, args.check_interval, args.url)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
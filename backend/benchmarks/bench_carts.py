@@ -0,0 +1,131 @@
+"""Benchmark cart operations and memory per active cart
+
+Runs a random mix of cart operations over many active carts against the
+in-memory cart store (local backend, write-behind to a file-backed SQLite
+carts table), and the same mix written through to the table on every
+operation. It reports operations per second and the time to flush what
+the mix left dirty. It also measures the memory the store holds per
+active cart with tracemalloc.
+
+Usage: python -m benchmarks.bench_carts [--carts 20000] [--lines 5] [--operations 200000]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_cart import Cart
+from app.infrastructure.repositories.cart_repository import CartRepository
+from app.infrastructure.services.cart_store import CartStore, LocalCartBackend, user_cart_key
+
+PRODUCTS = 5000
+
+
+def _operations(carts: int, operations: int) -> list[tuple[str, str, int, int]]:
+    rng = random.Random(4)
+    mix = []
+    for _ in range(operations):
+        key = user_cart_key(rng.randrange(carts))
+        roll = rng.random()
+        kind = "get" if roll < 0.5 else "add" if roll < 0.8 else "set" if roll < 0.95 else "remove"
+        mix.append((kind, key, rng.randrange(1, PRODUCTS), rng.randint(1, 3)))
+    return mix
+
+
+def _apply(carts: CartStore, mix) -> None:
+    for kind, key, product_id, quantity in mix:
+        if kind == "get":
+            carts.get(key)
+        elif kind == "add":
+            carts.add(key, product_id, quantity)
+        elif kind == "set":
+            carts.set(key, product_id, quantity)
+        else:
+            carts.remove(key, product_id)
+
+
+def _fill(carts: CartStore, count: int, lines: int) -> None:
+    rng = random.Random(2)
+    for cart in range(count):
+        for _ in range(lines):
+            carts.add(user_cart_key(cart), rng.randrange(1, PRODUCTS), rng.randint(1, 3))
+
+
+def run(carts: int, lines: int, operations: int) -> dict:
+    results = {"carts": carts, "lines_per_cart": lines, "operations": operations}
+    mix = _operations(carts, operations)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'carts.db')}")
+        Base.metadata.create_all(engine, tables=[Cart.__table__])
+        session_factory = sessionmaker(bind=engine)
+        
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        store = CartStore(LocalCartBackend(), session_factory)
+        _fill(store, carts, lines)
+        held = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        results["bytes_per_active_cart"] = round(held / carts)
+        
+        start = time.perf_counter()
+        store.flush()
+        results["initial_flush_seconds"] = round(time.perf_counter() - start, 3)
+        
+        start = time.perf_counter()
+        _apply(store, mix)
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        flushed = store.flush()
+        results["write_behind"] = {
+            "operations_per_second": round(operations / elapsed),
+            "flushed_carts": flushed,
+            "flush_seconds": round(time.perf_counter() - start, 3),
+        }
+        
+        # Write-through: every change upserts its cart before returning
+        through = CartStore(LocalCartBackend(), session_factory)
+        db = session_factory()
+        repository = CartRepository(db)
+        sample = mix[:max(operations // 20, 1)]
+        
+        start = time.perf_counter()
+        for operation in sample:
+            _apply(through, [operation])
+            if operation[0] != "get":
+                state = through.backend.get(operation[1])
+                repository.upsert_many([{
+                    "key": operation[1], "items": json.dumps(state.items),
+                    "version": state.version,
+                    "updated_at": datetime.fromtimestamp(state.updated_at),
+                }])
+        elapsed = time.perf_counter() - start
+        results["write_through"] = {
+            "operations_per_second": round(len(sample) / elapsed),
+            "operations_timed": len(sample),
+        }
+        db.close()
+        engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--carts", type=int, default=20000)
+    parser.add_argument("--lines", type=int, default=5)
+    parser.add_argument("--operations", type=int, default=200000)
+    args = parser.parse_args()
+    print(json.dumps({"benchmark": "carts",
+                      "results": run(args.carts, args.lines, args.operations)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Benchmark request concurrency at a fixed pool size: session-long vs short connection holds
+
+Simulates requests against a pool of --pool-size connections with no
+overflow. Each request:
+- validates its input (--pre-ms, no database);
+- reads a coupon through CouponRepository, on a connection whose statements
+  take --db-ms (a SQLite function that sleeps stands in for the round trip);
+- serializes and sends the response (--post-ms).
+Clients run in closed loops, --concurrency of them at a time.
+
+"session_long" is the previous behaviour: a plain Session whose connection
+stays checked out from the first statement until get_db closes it after
+the response is sent. "released_after_endpoint" is PooledSession released
+as SessionReleasingRoute does it: once the endpoint has returned, before
+the response is serialized. For each it reports throughput, request
+latency, and the pool's checkout waits and hold times (MeteredQueuePool).
+
+Usage: python -m benchmarks.bench_connection_hold [--pool-size 10] [--seconds 3]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_coupon import Coupon
+from app.infrastructure.database.pool import MeteredQueuePool, PooledSession, PoolMetrics
+from app.infrastructure.repositories.coupon_repository import CouponRepository
+from benchmarks.load_test import percentile
+
+COUPONS = 100
+
+
+def _engine(path: str, pool_size: int, db_ms: float):
+    engine = create_engine(
+        f"sqlite:///{path}", poolclass=MeteredQueuePool, pool_size=pool_size, max_overflow=0,
+        pool_timeout=30, connect_args={"check_same_thread": False},
+    )
+    
+    @event.listens_for(engine, "connect")
+    def add_latency(dbapi_connection, connection_record):
+        dbapi_connection.create_function(
+            "db_latency", 0, lambda: time.sleep(db_ms / 1000) or 1
+        )
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def delay_statement(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            cursor.connection.execute("SELECT db_latency()")
+    
+    return engine
+
+
+def _seed(engine) -> None:
+    Base.metadata.create_all(engine, tables=[Coupon.__table__])
+    db = Session(bind=engine)
+    db.add_all([
+        Coupon(code=f"SAVE{i}", discount_percentage=10,
+               valid_from=datetime(2020, 1, 1), valid_until=datetime(2099, 1, 1))
+        for i in range(COUPONS)
+    ])
+    db.commit()
+    db.close()
+
+
+def _run(
+    engine, session_class, concurrency: int, seconds: float, pre_ms: float, post_ms: float
+) -> dict:
+    sessions = sessionmaker(
+        bind=engine, class_=session_class, autoflush=False, expire_on_commit=False
+    )
+    engine.pool.metrics = PoolMetrics()
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    
+    def client(number: int) -> None:
+        done = []
+        request = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            time.sleep(pre_ms / 1000)
+            db = sessions()
+            coupon = CouponRepository(db).get_by_code(f"SAVE{(number + request) % COUPONS}")
+            if isinstance(db, PooledSession):
+                # SessionReleasingRoute, once the endpoint has returned
+                db.release()
+            json.dumps({"code": coupon.code, "discount": str(coupon.discount_percentage)})
+            time.sleep(post_ms / 1000)
+            # get_db closes the session after the response has been sent
+            db.close()
+            done.append((time.perf_counter() - start) * 1000)
+            request += 1
+        latencies.extend(done)
+    
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    pool = engine.pool.metrics.info()
+    return {
+        "requests_per_second": round(len(latencies) / elapsed),
+        "latency_p50_ms": round(percentile(latencies, 50), 1),
+        "latency_p99_ms": round(percentile(latencies, 99), 1),
+        "pool_wait_p50_ms": pool["wait_p50_ms"],
+        "pool_wait_p99_ms": pool["wait_p99_ms"],
+        "hold_p50_ms": pool["hold_p50_ms"],
+    }
+
+
+def run(
+    pool_size: int, seconds: float, pre_ms: float, db_ms: float, post_ms: float,
+    concurrency: list[int],
+) -> dict:
+    results = {"pool_size": pool_size, "pre_ms": pre_ms, "db_ms": db_ms, "post_ms": post_ms}
+    with tempfile.TemporaryDirectory() as directory:
+        engine = _engine(os.path.join(directory, "pool.db"), pool_size, db_ms)
+        _seed(engine)
+        for mode, session_class in (
+            ("session_long", Session), ("released_after_endpoint", PooledSession)
+        ):
+            results[mode] = {
+                str(clients): _run(engine, session_class, clients, seconds, pre_ms, post_ms)
+                for clients in concurrency
+            }
+        engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--pre-ms", type=float, default=1.0)
+    parser.add_argument("--db-ms", type=float, default=2.0)
+    parser.add_argument("--post-ms", type=float, default=8.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 20, 40, 80])
+    args = parser.parse_args()
+    results = run(args.pool_size, args.seconds, args.pre_ms, args.db_ms, args.post_ms,
+                  args.concurrency)
+    print(json.dumps({"benchmark": "connection_hold", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
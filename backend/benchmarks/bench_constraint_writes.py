@@ -0,0 +1,197 @@
+"""Benchmark statements per write with pre-check queries and with constraints
+
+Replays user creation, product creation and product updates against a
+file-backed SQLite database (foreign keys enforced) two ways: the former
+write paths, which queried for duplicates and the referenced category
+before writing, and the constraint-driven paths, which write directly and
+translate IntegrityError. Counts the statements each write executes and
+times it; a share of the writes collide with existing rows so the
+violation path is measured too.
+
+Usage: python -m benchmarks.bench_constraint_writes [--writes 2000]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from decimal import Decimal
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.database.models_user import User
+from app.infrastructure.repositories.base_repository import BaseRepository
+from app.infrastructure.repositories.user_repository import UserRepository
+from app.utils.exceptions import SupleGearException
+from benchmarks.load_test import percentile
+
+COLLISION_EVERY = 10
+
+
+class _ProductUpdate(BaseModel):
+    sku: Optional[str] = None
+    category_id: Optional[int] = None
+    price: Optional[Decimal] = None
+
+
+def _engine(path: str):
+    engine = create_engine(f"sqlite:///{path}")
+    
+    @event.listens_for(engine, "connect")
+    def enable_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+    
+    Base.metadata.create_all(
+        engine, tables=[User.__table__, Category.__table__, Product.__table__]
+    )
+    with engine.begin() as connection:
+        connection.execute(Category.__table__.insert(), [{"id": 1, "name": "Protein"}])
+    return engine
+
+
+# Former write paths: look up duplicates and the category first
+def precheck_create_user(db, values: dict) -> None:
+    repository = UserRepository(db)
+    if repository.get_by_email_or_username(values["email"], values["username"]):
+        raise ValueError("User with this email or username already exists")
+    repository.create(values)
+
+
+def precheck_create_product(db, values: dict) -> None:
+    repository = BaseRepository(db, Product)
+    if not BaseRepository(db, Category).get_by_id(values["category_id"]):
+        raise ValueError(f"Category with ID {values['category_id']} not found")
+    if db.query(Product).filter(Product.sku == values["sku"]).first():
+        raise ValueError(f"Product with SKU {values['sku']} already exists")
+    repository.create(values)
+
+
+def precheck_update_product(db, product_id: int, update: _ProductUpdate) -> None:
+    repository = BaseRepository(db, Product)
+    product = repository.get_by_id(product_id)
+    if not product:
+        raise ValueError(f"Product with ID {product_id} not found")
+    if update.category_id and not BaseRepository(db, Category).get_by_id(update.category_id):
+        raise ValueError(f"Category with ID {update.category_id} not found")
+    if update.sku and update.sku != product.sku:
+        if db.query(Product).filter(Product.sku == update.sku).first():
+            raise ValueError(f"Product with SKU {update.sku} already exists")
+    repository.update(product_id, update)
+
+
+# Constraint-driven write paths
+def constrained_create_user(db, values: dict) -> None:
+    UserRepository(db).create(values)
+
+
+def constrained_create_product(db, values: dict) -> None:
+    BaseRepository(db, Product).create(values)
+
+
+def constrained_update_product(db, product_id: int, update: _ProductUpdate) -> None:
+    if BaseRepository(db, Product).update(product_id, update) is None:
+        raise ValueError(f"Product with ID {product_id} not found")
+
+
+def _measure(engine, writes: list) -> dict:
+    """Statements per write and latency of (function, args) writes"""
+    statements = 0
+    
+    def count(*args):
+        nonlocal statements
+        statements += 1
+    
+    event.listen(engine, "before_cursor_execute", count)
+    session_factory = sessionmaker(bind=engine)
+    latencies = []
+    rejected = 0
+    try:
+        for write, args in writes:
+            db = session_factory()
+            start = time.perf_counter()
+            try:
+                write(db, *args)
+            except (ValueError, SupleGearException):
+                rejected += 1
+            finally:
+                latencies.append(time.perf_counter() - start)
+                db.close()
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    latencies.sort()
+    return {
+        "writes": len(writes),
+        "rejected": rejected,
+        "statements_per_write": round(statements / len(writes), 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def _workloads(writes: int, paths) -> dict:
+    """Per operation, writes where every COLLISION_EVERY-th one reuses a taken value"""
+    create_user, create_product, update_product = paths
+    
+    def key(i: int) -> int:
+        return i - 1 if i % COLLISION_EVERY == 0 else i
+    
+    return {
+        "create_user": [
+            (create_user, ({
+                "email": f"user{key(i)}@example.com", "username": f"user{key(i)}",
+                "hashed_password": "x",
+            },))
+            for i in range(1, writes + 1)
+        ],
+        "create_product": [
+            (create_product, ({
+                "sku": f"SKU-{key(i)}", "name": f"Product {i}", "price": Decimal("19.90"),
+                "stock": 10, "category_id": 1,
+            },))
+            for i in range(1, writes + 1)
+        ],
+        "update_product": [
+            (update_product, (i, _ProductUpdate(
+                sku=f"SKU-{i + 1}" if i % COLLISION_EVERY == 0 else f"NEW-{i}",
+                category_id=1, price=Decimal("21.90"),
+            )))
+            for i in range(1, writes + 1)
+        ],
+    }
+
+
+def run(writes: int) -> dict:
+    paths = {
+        "precheck": (precheck_create_user, precheck_create_product, precheck_update_product),
+        "constraints": (
+            constrained_create_user, constrained_create_product, constrained_update_product
+        ),
+    }
+    results = {}
+    for name, functions in paths.items():
+        with tempfile.TemporaryDirectory() as directory:
+            engine = _engine(os.path.join(directory, "writes.db"))
+            # Operations run in order: the updates target the products just created
+            results[name] = {
+                operation: _measure(engine, workload)
+                for operation, workload in _workloads(writes, functions).items()
+            }
+            engine.dispose()
+    return {"writes_per_operation": writes, "collision_every": COLLISION_EVERY, **results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writes", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps({"benchmark": "constraint_writes", "results": run(args.writes)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
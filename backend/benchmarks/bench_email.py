@@ -0,0 +1,79 @@
+"""Benchmark email throughput (messages/sec) at different SMTP pool sizes
+
+Usage: python -m benchmarks.bench_email [--messages 2000] [--pool-sizes 1,2,4,8]
+"""
+
+import argparse
+import json
+import socket
+import time
+
+from aiosmtpd.controller import Controller
+
+from app.infrastructure.services.email_service import (
+    SMTPConnectionPool, EmailService, render_template,
+)
+
+
+class CountingHandler:
+    """aiosmtpd handler that only counts messages"""
+    
+    def __init__(self):
+        self.count = 0
+    
+    async def handle_DATA(self, server, session, envelope):
+        self.count += 1
+        return "250 OK"
+
+
+def _free_port() -> int:
+    """Find a free local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run(messages: int, pool_sizes: list[int]) -> list[dict]:
+    """Send `messages` emails per pool size and measure throughput"""
+    handler = CountingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    results = []
+    try:
+        emails = [
+            render_template("welcome", f"user{i}@example.com", {
+                "username": f"user{i}", "first_name": f"User {i}",
+                "email": f"user{i}@example.com",
+            })
+            for i in range(messages)
+        ]
+        for pool_size in pool_sizes:
+            pool = SMTPConnectionPool("127.0.0.1", controller.port, use_tls=False,
+                                      pool_size=pool_size)
+            service = EmailService(pool, "noreply@suplegear.com")
+            start = time.perf_counter()
+            sent = service.send_batch(emails).sent
+            elapsed = time.perf_counter() - start
+            service.close()
+            results.append({
+                "pool_size": pool_size,
+                "messages": sent,
+                "seconds": round(elapsed, 4),
+                "messages_per_sec": round(sent / elapsed, 1),
+            })
+    finally:
+        controller.stop()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--pool-sizes", default="1,2,4,8")
+    args = parser.parse_args()
+    pool_sizes = [int(size) for size in args.pool_sizes.split(",")]
+    print(json.dumps({"benchmark": "email", "results": run(args.messages, pool_sizes)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Benchmark streaming exports: peak memory and throughput
+
+Loads N orders into a database (a temporary SQLite file unless
+--database-url is given), then runs each export mode in a fresh child
+process and reports rows/sec, output size and the child's peak RSS. For
+comparison, the old access pattern (materializing ORM objects with a
+query().all()) is run on a smaller row count.
+
+Usage: python -m benchmarks.bench_exports [--rows 5000000] [--materialized-rows 500000]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.application.exports.stream_export import StreamExportUseCase
+from app.infrastructure.database import models_user, models_product  # noqa: F401 (FK targets)
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_order import Order, OrderStatusEnum
+
+CHUNK_SIZE = 50_000
+
+MODES = {
+    "csv": ("csv", False),
+    "csv_gzip": ("csv", True),
+    "ndjson": ("ndjson", False),
+    "ndjson_gzip": ("ndjson", True),
+}
+
+
+def _fill(engine, rows: int, seed: int) -> None:
+    """Insert synthetic orders"""
+    rng = random.Random(seed)
+    statuses = list(OrderStatusEnum)
+    start = datetime(2022, 1, 1)
+    for offset in range(0, rows, CHUNK_SIZE):
+        with engine.begin() as connection:
+            connection.execute(insert(Order), [
+                {
+                    "id": i, "user_id": rng.randint(1, 100_000),
+                    "order_number": f"BENCH-{i:010d}", "status": rng.choice(statuses),
+                    "total_amount": Decimal(rng.randint(499, 99999)) / 100,
+                    "shipping_address": "Bench St. 1",
+                    "created_at": start + timedelta(seconds=i * 17),
+                    "updated_at": start + timedelta(seconds=i * 17),
+                }
+                for i in range(offset + 1, min(offset + CHUNK_SIZE, rows) + 1)
+            ])
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux)"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _run_export(database_url: str, mode: str, batch_size: int, queue) -> None:
+    """Child process: stream one export to /dev/null"""
+    engine = create_engine(database_url)
+    db = sessionmaker(bind=engine)()
+    baseline = _peak_rss_mb()
+    export_format, compress = MODES[mode]
+    size = 0
+    start = time.perf_counter()
+    with open(os.devnull, "wb") as sink:
+        for chunk in StreamExportUseCase(db, batch_size).execute("orders", export_format, compress):
+            size += len(chunk)
+            sink.write(chunk)
+    elapsed = time.perf_counter() - start
+    db.close()
+    queue.put({"seconds": elapsed, "bytes": size, "baseline_rss_mb": baseline,
+               "peak_rss_mb": _peak_rss_mb()})
+
+
+def _run_materialized(database_url: str, rows: int, queue) -> None:
+    """Child process: load ORM objects the way get_all does, without a limit"""
+    engine = create_engine(database_url)
+    db = sessionmaker(bind=engine)()
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    orders = db.query(Order).order_by(Order.id).limit(rows).all()
+    elapsed = time.perf_counter() - start
+    count = len(orders)
+    db.close()
+    queue.put({"rows": count, "seconds": elapsed, "baseline_rss_mb": baseline,
+               "peak_rss_mb": _peak_rss_mb()})
+
+
+def _in_child(target, *args) -> dict:
+    """Run a function in a fresh process and return what it reports"""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=target, args=(*args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def run(database_url: str, rows: int, materialized_rows: int, batch_size: int) -> dict:
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(bind=engine, tables=[Order.__table__])
+    Base.metadata.create_all(bind=engine, tables=[Order.__table__])
+    start = time.perf_counter()
+    _fill(engine, rows, seed=42)
+    load_seconds = time.perf_counter() - start
+    
+    report = {"rows": rows, "batch_size": batch_size, "load_seconds": round(load_seconds, 1)}
+    for mode in MODES:
+        result = _in_child(_run_export, database_url, mode, batch_size)
+        report[mode] = {
+            "rows_per_second": round(rows / result["seconds"]),
+            "seconds": round(result["seconds"], 1),
+            "output_mb": round(result["bytes"] / 1e6, 1),
+            "baseline_rss_mb": result["baseline_rss_mb"],
+            "peak_rss_mb": result["peak_rss_mb"],
+        }
+    if materialized_rows:
+        result = _in_child(_run_materialized, database_url, materialized_rows)
+        report["materialized_orm"] = {
+            "rows": result["rows"],
+            "rows_per_second": round(result["rows"] / result["seconds"]),
+            "baseline_rss_mb": result["baseline_rss_mb"],
+            "peak_rss_mb": result["peak_rss_mb"],
+        }
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--materialized-rows", type=int, default=500_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        result = run(database_url, args.rows, args.materialized_rows, args.batch_size)
+    print(json.dumps({"benchmark": "exports", "results": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
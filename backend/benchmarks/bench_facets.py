@@ -0,0 +1,150 @@
+"""Benchmark facet counts from the in-memory facet index
+
+Builds the index over a synthetic catalog and reports latency of facet counts
+for combined filters, next to the equivalent COUNT/GROUP BY queries (one per
+facet) against an indexed in-memory SQLite copy of the same rows.
+
+Usage: python -m benchmarks.bench_facets [--products 1000000] [--repeat 200]
+"""
+
+import argparse
+import json
+import random
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert, text
+
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_product import Product, Category
+from app.infrastructure.services.facet_index import FacetIndex, STATUSES
+from benchmarks.load_test import percentile
+
+CATEGORIES = 40
+
+FILTER_SETS = {
+    "status_only": {},
+    "category": {"category_ids": [3]},
+    "category_price": {"category_ids": [3, 7], "min_price": Decimal("20"),
+                       "max_price": Decimal("80")},
+    "category_price_stock": {"category_ids": [3, 7, 11], "min_price": Decimal("20"),
+                             "max_price": Decimal("80"), "in_stock": True},
+}
+
+
+def synthetic_rows(products: int, seed: int):
+    """(id, category_id, price, stock, status) rows"""
+    rng = random.Random(seed)
+    return [
+        (
+            i, rng.randint(1, CATEGORIES), Decimal(rng.randint(499, 29999)) / 100,
+            rng.choice((0, rng.randint(1, 500))),
+            "active" if rng.random() < 0.9 else rng.choice(STATUSES[1:]),
+        )
+        for i in range(1, products + 1)
+    ]
+
+
+def sql_counts(connection, filters: dict) -> None:
+    """Facet counts the way a per-request SQL implementation would get them"""
+    clauses = {"status": "status = :status"}
+    params = {"status": "ACTIVE"}
+    if filters.get("category_ids"):
+        ids = ", ".join(str(category_id) for category_id in filters["category_ids"])
+        clauses["category"] = f"category_id IN ({ids})"
+    if "min_price" in filters:
+        clauses["price"] = "price BETWEEN :min_price AND :max_price"
+        params.update(min_price=float(filters["min_price"]), max_price=float(filters["max_price"]))
+    if "in_stock" in filters:
+        clauses["in_stock"] = "stock > 0"
+    
+    def where(excluded=None) -> str:
+        return " AND ".join(clause for name, clause in clauses.items() if name != excluded)
+    
+    connection.execute(text(f"SELECT COUNT(*) FROM products WHERE {where()}"), params).all()
+    connection.execute(text(
+        f"SELECT category_id, COUNT(*) FROM products WHERE {where('category')} "
+        "GROUP BY category_id"
+    ), params).all()
+    connection.execute(text(
+        "SELECT CASE WHEN price < 25 THEN 0 WHEN price < 50 THEN 1 WHEN price < 100 THEN 2 "
+        f"WHEN price < 200 THEN 3 ELSE 4 END AS bucket, COUNT(*) FROM products "
+        f"WHERE {where('price')} GROUP BY bucket"
+    ), params).all()
+    connection.execute(text(
+        f"SELECT stock > 0, COUNT(*) FROM products WHERE {where('in_stock')} GROUP BY stock > 0"
+    ), params).all()
+    connection.execute(text(
+        f"SELECT status, COUNT(*) FROM products WHERE {where('status') or '1 = 1'} "
+        "GROUP BY status"
+    ), {key: value for key, value in params.items() if key != "status"}).all()
+
+
+def _timed(function, repeat: int) -> dict:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {f"p{pct}_ms": round(percentile(latencies, pct) * 1000, 3) for pct in (50, 99)}
+
+
+def run(products: int, repeat: int, sql_products: int) -> dict:
+    rows = synthetic_rows(products, seed=7)
+    index = FacetIndex()
+    start = time.perf_counter()
+    index.build(rows)
+    build_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for product_id in range(1, 1001):
+        index.upsert_product(product_id, 1, Decimal("9.99"), 5, "active")
+    upsert_us = (time.perf_counter() - start) / 1000 * 1e6
+    
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Category.__table__, Product.__table__])
+    with engine.begin() as connection:
+        connection.execute(insert(Category.__table__), [
+            {"id": i, "name": f"Category {i}"} for i in range(1, CATEGORIES + 1)
+        ])
+        connection.execute(insert(Product.__table__), [
+            {"id": product_id, "name": f"Product {product_id}", "price": price,
+             "stock": stock, "sku": f"SKU-{product_id}", "category_id": category_id,
+             "status": status.upper()}
+            for product_id, category_id, price, stock, status in rows[:sql_products]
+        ])
+    
+    results = {}
+    with engine.connect() as connection:
+        for name, filters in FILTER_SETS.items():
+            results[name] = {
+                "facet_index": _timed(lambda: index.counts(**filters), repeat),
+                "sql_count_queries": _timed(
+                    lambda: sql_counts(connection, filters), max(repeat // 20, 5)
+                ),
+            }
+    return {
+        "products": products,
+        "sql_products": sql_products,
+        "build_seconds": round(build_seconds, 3),
+        "columns_mb": round(len(index._category) * (4 + 8 + 1 + 1 + 1) / 2**20, 1),
+        "cube_cells": int(index._cube.size),
+        "upsert_us": round(upsert_us, 1),
+        "filters": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--sql-products", type=int, default=200_000,
+                        help="rows loaded into SQLite for the comparison")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    result = run(args.products, args.repeat, args.sql_products)
+    print(json.dumps({"benchmark": "facets", "results": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
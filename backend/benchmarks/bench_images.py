@@ -0,0 +1,105 @@
+"""Benchmark image uploads processed inline vs in the process pool
+
+Generates noisy high-resolution photos and pushes them through the upload
+processing step concurrently, once decoding and resizing on the event loop
+(what a naive handler does) and once through ImageProcessor. A ticker
+coroutine wakes every millisecond meanwhile and records how late it runs,
+which is the lag every other request on the worker would see.
+
+Needs Pillow. Usage: python -m benchmarks.bench_images [--images 24] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import time
+
+from app.infrastructure.services.image_processing import ImageProcessor, process_image
+from benchmarks.load_test import percentile
+
+SIZES = (160, 480, 1024)
+WEBP_QUALITY = 80
+MAX_PIXELS = 40_000_000
+
+
+def _photos(count: int, width: int, height: int) -> list[bytes]:
+    from PIL import Image
+    
+    photos = []
+    for seed in range(count):
+        image = Image.effect_noise((width, height), 40 + seed).convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=90)
+        photos.append(buffer.getvalue())
+    return photos
+
+
+async def _ticker(lags: list, stop: asyncio.Event) -> None:
+    """Record how late a 1 ms sleep wakes up"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def _run(photos: list[bytes], process) -> dict:
+    lags: list = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(process(data) for data in photos))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    lags.sort()
+    return {
+        "images_per_second": round(len(photos) / elapsed, 2),
+        "loop_lag_p50_ms": round(percentile(lags, 50) * 1000, 2),
+        "loop_lag_p99_ms": round(percentile(lags, 99) * 1000, 2),
+        "loop_lag_max_ms": round(lags[-1] * 1000, 2),
+    }
+
+
+async def _benchmark(photos: list[bytes], workers: int) -> dict:
+    async def inline(data: bytes):
+        await asyncio.sleep(0)
+        return process_image(data, SIZES, WEBP_QUALITY, MAX_PIXELS)
+    
+    processor = ImageProcessor(workers, SIZES, WEBP_QUALITY, MAX_PIXELS)
+    processor.start()
+    # Warm the workers so process start-up is not timed
+    await processor.process("warmup", photos[0])
+    
+    async def pooled(data: bytes):
+        return await processor.process(hashlib.sha256(data).hexdigest(), data)
+    
+    try:
+        return {
+            "inline": await _run(photos, inline),
+            "process_pool": await _run(photos, pooled),
+        }
+    finally:
+        processor.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=24)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    photos = _photos(args.images, args.width, args.height)
+    results = {
+        "images": args.images,
+        "resolution": f"{args.width}x{args.height}",
+        "workers": args.workers,
+        **asyncio.run(_benchmark(photos, args.workers)),
+    }
+    print(json.dumps({"benchmark": "images", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Benchmark the cost of logging on the request path
+
+Measures (1) the time a logging call blocks its caller with a synchronous
+JSON StreamHandler versus the bounded queue handler, from several threads
+at once, against a fast sink (/dev/null) and a slow one (a stream stalling
+for a millisecond every 50 writes, like a congested pipe or log shipper),
+and (2) end-to-end request latency through FastAPI with no access logging,
+with every request logged, and with 10% of successes sampled.
+The request variants run in interleaved rounds and the best round is kept.
+
+Usage: python -m benchmarks.bench_logging [--records 20000] [--threads 8]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.api.v1.middleware.access_log import AccessLogMiddleware
+from app.core.logging import JsonFormatter, LogPipeline, RequestContext, bind_request_context
+from benchmarks.load_test import percentile
+
+
+class SlowStream:
+    """Text stream that stalls every `every` writes"""
+    
+    def __init__(self, stall: float = 0.001, every: int = 50):
+        self.stall = stall
+        self.every = every
+        self.writes = 0
+        self._lock = threading.Lock()
+    
+    def write(self, text: str) -> int:
+        with self._lock:
+            self.writes += 1
+            if self.writes % self.every == 0:
+                time.sleep(self.stall)
+        return len(text)
+    
+    def flush(self) -> None:
+        pass
+
+
+def _emit_latencies(logger: logging.Logger, records: int, threads: int) -> list[float]:
+    """Time every logging call made by several threads at once"""
+    latencies: list[list[float]] = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads)
+    
+    def worker(index: int) -> None:
+        timings = latencies[index]
+        context = RequestContext(request_id=f"req-{index}", route="/api/v1/products/{id}")
+        bind_request_context(context)
+        barrier.wait()
+        for number in range(records // threads):
+            start = time.perf_counter()
+            logger.info(
+                "GET /api/v1/products/{id} 200",
+                extra={"status": 200, "latency_ms": 1.25, "db_ms": 0.8, "number": number},
+            )
+            timings.append(time.perf_counter() - start)
+    
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sorted(latency for timings in latencies for latency in timings)
+
+
+def _summary(latencies: list[float]) -> dict:
+    return {
+        "mean_us": round(sum(latencies) / len(latencies) * 1e6, 2),
+        "p50_us": round(percentile(latencies, 50) * 1e6, 2),
+        "p99_us": round(percentile(latencies, 99) * 1e6, 2),
+        "max_us": round(latencies[-1] * 1e6, 1),
+    }
+
+
+def _handler_overhead(stream, records: int, threads: int) -> dict:
+    """Synchronous handler versus queue handler writing to the same stream"""
+    logger = logging.getLogger("bench.sync")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    sync = _emit_latencies(logger, records, threads)
+    logger.removeHandler(handler)
+    
+    pipeline = LogPipeline(queue_size=records, stream=stream)
+    pipeline.start()
+    queued = _emit_latencies(logging.getLogger("bench.queued"), records, threads)
+    start = time.perf_counter()
+    pipeline.stop()
+    drain = time.perf_counter() - start
+    
+    small = LogPipeline(queue_size=1000, stream=stream)
+    small.start()
+    _emit_latencies(logging.getLogger("bench.small"), records, threads)
+    dropped = small.stats()["dropped"]
+    small.stop()
+    return {
+        "sync_stream_handler": _summary(sync),
+        "queue_handler": _summary(queued),
+        "drain_after_burst_ms": round(drain * 1000, 1),
+        "dropped_with_1000_slot_queue": dropped,
+    }
+
+
+def _request_latencies(pipeline, requests: int, concurrency: int) -> dict:
+    """End-to-end latency through FastAPI, `concurrency` requests in flight"""
+    app = FastAPI()
+    if pipeline is not None:
+        app.add_middleware(AccessLogMiddleware, pipeline=pipeline)
+    
+    @app.get("/products/{product_id}")
+    async def get_product(product_id: int):
+        return {"id": product_id, "name": "Whey", "price": "29.90"}
+    
+    async def scenario() -> tuple[list[float], float]:
+        transport = httpx.ASGITransport(app=app)
+        latencies = []
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def one(number: int) -> None:
+                start = time.perf_counter()
+                await client.get(f"/products/{number}")
+                latencies.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            for offset in range(0, requests, concurrency):
+                await asyncio.gather(*(one(offset + i) for i in range(concurrency)))
+            elapsed = time.perf_counter() - start
+        return sorted(latencies), elapsed
+    
+    if pipeline is not None:
+        pipeline.start()
+    try:
+        latencies, elapsed = asyncio.run(scenario())
+        return {**_summary(latencies), "requests_per_second": round(requests / elapsed)}
+    finally:
+        if pipeline is not None:
+            pipeline.stop()
+
+
+def run(records: int, threads: int, requests: int, concurrency: int, rounds: int) -> dict:
+    with open(os.devnull, "w") as devnull:
+        fast = _handler_overhead(devnull, records, threads)
+        slow = _handler_overhead(SlowStream(), records, threads)
+        pipelines = {
+            "no_access_log": lambda: None,
+            "every_request_logged": lambda: LogPipeline(stream=devnull),
+            "successes_sampled_10pct": lambda: LogPipeline(
+                success_sample_rate=0.1, stream=devnull
+            ),
+        }
+        # Interleaved rounds, best round per variant (the host is noisy)
+        requests_result = {}
+        for _ in range(rounds):
+            for name, pipeline in pipelines.items():
+                result = _request_latencies(pipeline(), requests, concurrency)
+                best = requests_result.get(name)
+                if best is None or result["requests_per_second"] > best["requests_per_second"]:
+                    requests_result[name] = result
+    return {
+        "threads": threads,
+        "records": records,
+        "devnull_sink": fast,
+        "slow_sink": slow,
+        "concurrency": concurrency,
+        "requests": requests_result,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    result = run(args.records, args.threads, args.requests, args.concurrency, args.rounds)
+    print(json.dumps({"benchmark": "logging", "results": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
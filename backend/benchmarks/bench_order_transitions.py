@@ -0,0 +1,133 @@
+"""Benchmark moving 10k orders to a new status: per-order updates vs bulk transitions
+
+Seeds a file SQLite database with --orders orders, most of them processing
+and the rest spread over the other statuses, then ships all of them twice
+from the same starting data:
+- "per_order" is the previous way of changing statuses: load each order,
+  check the transition, set its status, add its history row and commit;
+- "bulk" is TransitionOrdersUseCase: per batch of --batch-size ids, one
+  UPDATE ... WHERE id IN (...) AND status = :from RETURNING id, one
+  executemany of history rows, one lookup of the orders that did not move
+  and one commit.
+For each it reports the time, orders per second, statements executed and
+commits. PostgreSQL renders the id filter as id = ANY(:ids).
+
+Usage: python -m benchmarks.bench_order_transitions [--orders 10000] [--batch-size 1000]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.application.orders.order_status import TransitionOrdersUseCase
+from app.domain.orders.state_machine import can_transition
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_order import Order, OrderStatusEnum, OrderStatusHistory
+from app.infrastructure.database.models_user import User
+from app.infrastructure.repositories.order_repository import (
+    OrderRepository, OrderStatusHistoryRepository
+)
+
+# One order in ten is not processing, so some of every batch fail to ship
+OTHER_STATUSES = [OrderStatusEnum.PENDING, OrderStatusEnum.SHIPPED, OrderStatusEnum.CANCELLED]
+
+
+def _seed(path: str, orders: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(
+        engine, tables=[User.__table__, Order.__table__, OrderStatusHistory.__table__]
+    )
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{"id": 1, "email": "admin@example.com",
+                                           "username": "admin", "hashed_password": "x"}])
+        connection.execute(insert(Order), [
+            {"id": i, "user_id": 1, "order_number": f"ORD-{i}", "total_amount": 10,
+             "shipping_address": "Calle 1",
+             "status": OTHER_STATUSES[i % 3] if i % 10 == 0 else OrderStatusEnum.PROCESSING}
+            for i in range(1, orders + 1)
+        ])
+    engine.dispose()
+
+
+def _per_order(db, order_ids: list[int]) -> int:
+    repository, history = OrderRepository(db), OrderStatusHistoryRepository(db)
+    moved = 0
+    for order_id in order_ids:
+        order = repository.get_by_id(order_id)
+        if order is None or not can_transition(order.status, OrderStatusEnum.SHIPPED):
+            continue
+        history.add_many([{"order_id": order.id, "from_status": order.status,
+                           "to_status": OrderStatusEnum.SHIPPED, "changed_by": 1}])
+        order.status = OrderStatusEnum.SHIPPED
+        db.commit()
+        moved += 1
+    return moved
+
+
+def _bulk(db, order_ids: list[int], batch_size: int) -> int:
+    use_case = TransitionOrdersUseCase(db, batch_size=batch_size)
+    return len(use_case.execute(order_ids, OrderStatusEnum.SHIPPED, changed_by=1).transitioned)
+
+
+def _run(path: str, orders: int, transition) -> dict:
+    engine = create_engine(f"sqlite:///{path}")
+    counts = {"statements": 0, "commits": 0}
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        counts["statements"] += 1
+    
+    @event.listens_for(engine, "commit")
+    def count_commit(conn):
+        counts["commits"] += 1
+    
+    db = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)()
+    order_ids = list(range(1, orders + 1))
+    start = time.perf_counter()
+    moved = transition(db, order_ids)
+    elapsed = time.perf_counter() - start
+    db.close()
+    engine.dispose()
+    return {
+        "moved": moved,
+        "seconds": round(elapsed, 3),
+        "orders_per_second": round(orders / elapsed),
+        **counts,
+    }
+
+
+def run(orders: int, batch_size: int) -> dict:
+    results = {"orders": orders, "batch_size": batch_size}
+    with tempfile.TemporaryDirectory() as directory:
+        seeded = os.path.join(directory, "seed.db")
+        _seed(seeded, orders)
+        for mode, transition in (
+            ("per_order", _per_order),
+            ("bulk", lambda db, order_ids: _bulk(db, order_ids, batch_size)),
+        ):
+            path = os.path.join(directory, f"{mode}.db")
+            shutil.copy(seeded, path)
+            results[mode] = _run(path, orders, transition)
+    results["speedup"] = round(
+        results["per_order"]["seconds"] / results["bulk"]["seconds"], 1
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    results = run(args.orders, args.batch_size)
+    print(json.dumps({"benchmark": "order_transitions", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
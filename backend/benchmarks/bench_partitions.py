@@ -0,0 +1,151 @@
+"""Benchmark order history queries before and after monthly partitioning
+
+Generates multi-year synthetic data with benchmarks.datagen, times the
+order repository's history queries on the plain tables, converts them to
+monthly partitions and times the same queries again. Reports how many
+partitions the planner keeps for a date-bounded query and how long archiving
+the oldest year takes. Requires PostgreSQL; the database is reset.
+
+Usage: python -m benchmarks.bench_partitions --database-url postgresql://... \\
+           [--orders 3000000] [--years 3] [--queries 500]
+"""
+
+import argparse
+import json
+import random
+import re
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_order import OrderStatusEnum
+from app.infrastructure.database.partitioning import PartitionManager, add_months, month_start
+from app.infrastructure.repositories.order_repository import OrderRepository, OrderItemRepository
+from benchmarks.datagen import generate
+from benchmarks.load_test import percentile
+
+
+def _scenarios(rng: random.Random, users: int, orders: int) -> dict:
+    """name -> callable(repository, item_repository) issuing one history query"""
+    now = datetime.utcnow()
+    statuses = list(OrderStatusEnum)
+    return {
+        "user_history": lambda repo, items: repo.get_by_user(rng.randint(1, users), limit=20),
+        "user_last_90_days": lambda repo, items: repo.get_by_user(
+            rng.randint(1, users), limit=20, since=now - timedelta(days=90)
+        ),
+        "status_page": lambda repo, items: repo.get_by_status(rng.choice(statuses), limit=50),
+        "status_last_30_days": lambda repo, items: repo.get_by_status(
+            rng.choice(statuses), limit=50, since=now - timedelta(days=30)
+        ),
+        "order_items": lambda repo, items: items.get_by_order(
+            repo.get_by_id(rng.randint(1, orders))
+        ),
+    }
+
+
+def _time_queries(session_factory, users: int, orders: int, queries: int, seed: int) -> dict:
+    """Latency percentiles per scenario"""
+    report = {}
+    db = session_factory()
+    try:
+        repository, items = OrderRepository(db), OrderItemRepository(db)
+        for name, scenario in _scenarios(random.Random(seed), users, orders).items():
+            latencies = []
+            for _ in range(queries):
+                start = time.perf_counter()
+                scenario(repository, items)
+                latencies.append(time.perf_counter() - start)
+                db.expunge_all()
+            latencies.sort()
+            report[name] = {
+                f"p{pct}_ms": round(percentile(latencies, pct) * 1000, 3) for pct in (50, 95, 99)
+            }
+    finally:
+        db.close()
+    return report
+
+
+def _partitions_scanned(engine, days: int) -> int:
+    """Partitions left in the plan of a date-bounded status query"""
+    statement = (
+        "EXPLAIN SELECT * FROM orders WHERE status = 'DELIVERED' "
+        "AND created_at >= :since ORDER BY created_at DESC LIMIT 50"
+    )
+    with engine.connect() as connection:
+        plan = "\n".join(row[0] for row in connection.execute(
+            text(statement), {"since": datetime.utcnow() - timedelta(days=days)}
+        ))
+    return len(set(re.findall(r"orders_(?:p\d{4}_\d{2}|default)", plan)))
+
+
+def run(database_url: str, users: int, products: int, orders: int, years: int, queries: int,
+        seed: int) -> dict:
+    engine = create_engine(database_url)
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("bench_partitions requires a PostgreSQL --database-url")
+    session_factory = sessionmaker(bind=engine)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    generated = generate(engine, users, products, orders, years=years, seed=seed)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+    plain = _time_queries(session_factory, users, orders, queries, seed)
+    
+    manager = PartitionManager(engine)
+    start = time.perf_counter()
+    converted = manager.convert()
+    convert_seconds = time.perf_counter() - start
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+    partitioned = _time_queries(session_factory, users, orders, queries, seed)
+    scanned = _partitions_scanned(engine, days=30)
+    
+    cutoff = add_months(month_start(datetime.utcnow()), -12 * (years - 1))
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        archived = manager.archive(cutoff, directory)
+        archive_seconds = time.perf_counter() - start
+    
+    return {
+        "rows": generated["rows"],
+        "partitions_per_table": converted[0]["partitions"] + 1 if converted else None,
+        "convert_seconds": round(convert_seconds, 2),
+        "partitions_scanned_last_30_days": scanned,
+        "plain_tables": plain,
+        "partitioned_tables": partitioned,
+        "archive": {
+            "partitions": len(archived),
+            "rows": sum(item["rows"] for item in archived),
+            "compressed_mb": round(sum(item["bytes"] for item in archived) / 1e6, 2),
+            "seconds": round(archive_seconds, 2),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--orders", type=int, default=3_000_000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    result = run(
+        args.database_url, args.users, args.products, args.orders, args.years, args.queries,
+        args.seed,
+    )
+    print(json.dumps({"benchmark": "partitions", "results": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
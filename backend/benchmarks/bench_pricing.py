@@ -0,0 +1,143 @@
+"""Benchmark pricing 100-line carts
+
+Loads a catalog into a file-backed SQLite database and prices random carts
+two ways. The per-line variant loads each product by id and does Decimal
+arithmetic line by line (a quantize per discount and tax amount). The
+batched variant loads every price with one narrow IN query, the
+projection ProductRepository.get_price_rows selects, and prices the cart
+with the integer-cent engine. The arithmetic alone is timed too, which is
+what a re-quote served from a warm per-request price cache costs.
+
+Usage: python -m benchmarks.bench_pricing [--products 5000] [--lines 100] [--quotes 500]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.services.pricing_engine import CouponTerms, price_cart
+from app.utils.helpers import to_cents
+from benchmarks.load_test import percentile
+
+CENT = Decimal("0.01")
+TAX_BP = 2100
+COUPON = CouponTerms("SAVE10", percent_bp=1000)
+
+
+def _engine(path: str, products: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[Category.__table__, Product.__table__])
+    rng = random.Random(5)
+    with engine.begin() as connection:
+        connection.execute(insert(Category.__table__), [{"id": 1, "name": "Protein"}])
+        connection.execute(insert(Product.__table__), [{
+            "id": product_id, "sku": f"SKU-{product_id}", "name": f"Product {product_id}",
+            "price": Decimal(rng.randint(199, 19999)).scaleb(-2), "stock": 1000,
+            "category_id": 1, "status": "ACTIVE",
+        } for product_id in range(1, products + 1)])
+    return engine
+
+
+def _decimal_quote(lines: list[tuple[int, int]], prices: dict[int, Decimal]) -> Decimal:
+    """Line-by-line Decimal pricing with the same rules as the engine (no spread)"""
+    subtotal = sum(prices[product_id] * quantity for product_id, quantity in lines)
+    discount = (subtotal * Decimal(COUPON.percent_bp) / 10000).quantize(CENT, ROUND_HALF_UP)
+    total = Decimal(0)
+    for product_id, quantity in lines:
+        line = prices[product_id] * quantity
+        line_discount = (line * discount / subtotal).quantize(CENT, ROUND_HALF_UP)
+        net = line - line_discount
+        total += net + (net * Decimal(TAX_BP) / 10000).quantize(CENT, ROUND_HALF_UP)
+    return total
+
+
+def _cents_quote(lines: list[tuple[int, int]], prices: dict[int, int]):
+    return price_cart(
+        [product_id for product_id, _ in lines],
+        [quantity for _, quantity in lines],
+        [prices[product_id] for product_id, _ in lines],
+        COUPON, TAX_BP,
+    )
+
+
+def _timed(function, carts: list) -> dict:
+    latencies = []
+    start = time.perf_counter()
+    for cart in carts:
+        began = time.perf_counter()
+        function(cart)
+        latencies.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "quotes_per_second": round(len(carts) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def run(products: int, lines: int, quotes: int) -> dict:
+    rng = random.Random(9)
+    carts = [
+        [(product_id, rng.randint(1, 5))
+         for product_id in rng.sample(range(1, products + 1), lines)]
+        for _ in range(quotes)
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        engine = _engine(os.path.join(directory, "pricing.db"), products)
+        db = sessionmaker(bind=engine)()
+        
+        def per_line(cart):
+            prices = {
+                product_id: db.get(Product, product_id, populate_existing=True).price
+                for product_id, _ in cart
+            }
+            _decimal_quote(cart, prices)
+            db.rollback()
+        
+        def batched(cart):
+            rows = db.execute(
+                select(Product.id, Product.price, Product.stock, Product.status)
+                .where(Product.id.in_([product_id for product_id, _ in cart]))
+            ).all()
+            _cents_quote(cart, {row[0]: to_cents(row[1]) for row in rows})
+            db.rollback()
+        
+        results = {
+            "per_line_queries_decimal": _timed(per_line, carts),
+            "batched_query_integer_cents": _timed(batched, carts),
+        }
+        
+        # Arithmetic only, prices already loaded (a warm per-request price cache)
+        decimal_prices = dict(db.execute(select(Product.id, Product.price)).all())
+        cent_prices = {product_id: to_cents(price) for product_id, price in decimal_prices.items()}
+        results["arithmetic_only"] = {
+            "decimal_per_line": _timed(lambda cart: _decimal_quote(cart, decimal_prices), carts),
+            "integer_cents_engine": _timed(lambda cart: _cents_quote(cart, cent_prices), carts),
+        }
+        db.close()
+        engine.dispose()
+    return {"products": products, "lines_per_cart": lines, "quotes": quotes, **results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=100)
+    parser.add_argument("--quotes", type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps({"benchmark": "pricing",
+                      "results": run(args.products, args.lines, args.quotes)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Benchmark the shared product snapshot against per-worker copies and the ORM
+
+Seeds a file-backed SQLite catalog, publishes the product snapshot, then
+starts several worker processes two ways:
+- per-worker copy: each worker loads every active product from the database
+  into its own in-memory records;
+- shared snapshot: each worker maps the snapshot file and touches all of
+  its pages, so all of them are resident.
+For each, it reports per-worker memory from /proc/self/smaps_rollup. RSS
+counts shared pages in full; PSS splits them between the processes mapping
+them; private is memory no other process shares. It also reports the time
+each worker takes to get its data.
+
+Read latency compares the ORM path (a session per request, as in
+ProductRepository.get_by_id and filter_products) with the snapshot, for a
+lookup by id and for a filtered page of 20.
+
+Usage: python -m benchmarks.bench_product_snapshot [--products 100000] [--workers 4]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from decimal import Decimal
+
+import numpy as np
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.services.product_snapshot import (
+    ProductRecord, ProductSnapshotReader, write_product_snapshot
+)
+from benchmarks.load_test import percentile
+
+CATEGORIES = 40
+# Same projection as ProductRepository.iter_snapshot_rows
+SNAPSHOT_COLUMNS = (
+    Product.id, Product.name, Product.sku, Product.description, Product.price, Product.stock,
+    Product.category_id, Product.created_at, Product.updated_at,
+)
+
+
+def _seed(engine, products: int) -> None:
+    rng = random.Random(7)
+    Base.metadata.create_all(engine, tables=[Category.__table__, Product.__table__])
+    with engine.begin() as connection:
+        connection.execute(insert(Category), [
+            {"id": i, "name": f"Category {i}"} for i in range(1, CATEGORIES + 1)
+        ])
+        connection.execute(insert(Product), [
+            {"id": i, "name": f"Whey protein isolate {i} chocolate 2 kg", "sku": f"SKU-{i:08d}",
+             "description": "Fast-absorbing whey protein isolate, 25 g protein per serving. " * 2,
+             "price": Decimal(rng.randint(500, 20000)) / 100, "stock": rng.randint(0, 50),
+             "category_id": rng.randint(1, CATEGORIES),
+             "status": "active" if rng.random() < 0.9 else "inactive"}
+            for i in range(1, products + 1)
+        ])
+
+
+def _snapshot_rows(session):
+    statement = (
+        select(*SNAPSHOT_COLUMNS).where(Product.status == "active").order_by(Product.id)
+        .execution_options(yield_per=10000)
+    )
+    for partition in session.connection().execute(statement).partitions():
+        yield partition
+
+
+def _memory() -> dict:
+    """Rss, Pss and private memory of this process in kB"""
+    values = {}
+    with open("/proc/self/smaps_rollup") as handle:
+        for line in handle:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                values[key] = int(rest.split()[0])
+    return {
+        "rss": values["Rss"], "pss": values["Pss"],
+        "private": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+
+def _worker(mode: str, database_url: str, path: str, ready, release, results) -> None:
+    before = _memory()
+    start = time.perf_counter()
+    if mode == "copy":
+        engine = create_engine(database_url)
+        session = sessionmaker(bind=engine)()
+        held = {
+            row[0]: ProductRecord(row[0], row[1], row[3], row[4], row[5], row[2], row[6],
+                                  "active", row[7], row[8])
+            for rows in _snapshot_rows(session) for row in rows
+        }
+        session.close()
+        engine.dispose()
+    else:
+        held = ProductSnapshotReader(path).current()
+        # Touch every page of the file, as a worker serving the whole catalog would
+        np.frombuffer(held._map, dtype=np.uint8).sum()
+    seconds = time.perf_counter() - start
+    ready.release()
+    # Measure once every worker holds its data, so shared pages are split between all
+    release.wait()
+    after = _memory()
+    results.put({
+        "load_seconds": seconds,
+        **{key: (after[key] - before[key]) / 1024 for key in after},
+        "held": len(held),
+    })
+
+
+def _per_worker(mode: str, database_url: str, path: str, workers: int) -> dict:
+    # Fresh interpreters, so nothing is shared through fork
+    context = multiprocessing.get_context("spawn")
+    ready, release, results = context.Semaphore(0), context.Event(), context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(mode, database_url, path, ready, release, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.acquire()
+    release.set()
+    measured = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return {
+        "rss_mb": round(sum(m["rss"] for m in measured) / workers, 1),
+        "pss_mb": round(sum(m["pss"] for m in measured) / workers, 1),
+        "private_mb": round(sum(m["private"] for m in measured) / workers, 1),
+        "load_seconds": round(max(m["load_seconds"] for m in measured), 3),
+    }
+
+
+def _latency(timed, arguments: list) -> dict:
+    samples = []
+    for argument in arguments:
+        start = time.perf_counter()
+        timed(argument)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(percentile(samples, 50), 4),
+        "p99_ms": round(percentile(samples, 99), 4),
+    }
+
+
+def run(products: int, workers: int) -> dict:
+    results = {"products": products, "workers": workers}
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{os.path.join(directory, 'catalog.db')}"
+        path = os.path.join(directory, "products.snapshot")
+        engine = create_engine(database_url)
+        _seed(engine, products)
+        sessions = sessionmaker(bind=engine)
+        
+        session = sessions()
+        start = time.perf_counter()
+        built = write_product_snapshot(path, _snapshot_rows(session), product_version=1)
+        session.close()
+        results["build"] = {
+            "seconds": round(time.perf_counter() - start, 3),
+            "active_products": built["products"],
+            "file_mb": round(built["bytes"] / 2**20, 1),
+        }
+        
+        results["per_worker_copy"] = _per_worker("copy", database_url, path, workers)
+        results["shared_snapshot"] = _per_worker("snapshot", database_url, path, workers)
+        
+        rng = random.Random(3)
+        ids = [rng.randint(1, products) for _ in range(5000)]
+        pages = [
+            (rng.randrange(0, 2000), rng.sample(range(1, CATEGORIES + 1), 3)) for _ in range(2000)
+        ]
+        reader = ProductSnapshotReader(path)
+        
+        def orm_get(product_id):
+            db = sessions()
+            db.query(Product).filter(Product.id == product_id).first()
+            db.close()
+        
+        def orm_page(page):
+            db = sessions()
+            db.query(Product).filter(
+                Product.status == "active", Product.category_id.in_(page[1]),
+                Product.price >= Decimal("20"), Product.stock > 0,
+            ).order_by(Product.id).offset(page[0] % 200).limit(20).all()
+            db.close()
+        
+        def snapshot_page(page):
+            reader.current().page(
+                page[0] % 200, 20, category_ids=page[1], min_price=Decimal("20"), in_stock=True
+            )
+        
+        results["get_by_id"] = {
+            "orm": _latency(orm_get, ids),
+            "snapshot": _latency(lambda product_id: reader.current().get(product_id), ids),
+        }
+        results["filtered_page_of_20"] = {
+            "orm": _latency(orm_page, pages),
+            "snapshot": _latency(snapshot_page, pages),
+        }
+        engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    print(json.dumps({"benchmark": "product_snapshot",
+                      "results": run(args.products, args.workers)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark building and serving frequently-bought-together recommendations
+
+Generates synthetic order items with Zipf-like product popularity and reports
+build time, memory, published index size and O(K) lookup latency.
+
+Usage: python -m benchmarks.bench_recommendations [--order-items 1000000]
+                                                  [--products 50000] [--k 20]
+"""
+
+import argparse
+import json
+import resource
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.infrastructure.services.recommendation_engine import (
+    CooccurrenceModel, RecommendationStore, RecommendationIndex
+)
+
+
+def synthetic_pairs(order_items: int, products: int, max_items: int, seed: int):
+    """(order_ids, product_ids) sorted by order, popular products bought more often"""
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(1, max_items + 1, size=order_items // ((max_items + 1) // 2) + 1)
+    sizes = sizes[:np.searchsorted(np.cumsum(sizes), order_items) + 1]
+    order_ids = np.repeat(np.arange(1, len(sizes) + 1), sizes)[:order_items]
+    popularity = 1.0 / np.arange(1, products + 1) ** 0.8
+    product_ids = rng.choice(
+        np.arange(1, products + 1), size=len(order_ids), p=popularity / popularity.sum()
+    )
+    return order_ids, product_ids
+
+
+def batches(order_ids, product_ids, batch_size):
+    """Split arrays into batches, as the repository would stream them"""
+    for start in range(0, len(order_ids), batch_size):
+        yield order_ids[start:start + batch_size], product_ids[start:start + batch_size]
+
+
+def run(order_items: int, products: int, k: int, batch_size: int, lookups: int) -> dict:
+    order_ids, product_ids = synthetic_pairs(order_items, products, max_items=6, seed=7)
+    split = int(len(order_ids) * 0.99)
+    split = int(np.searchsorted(order_ids, order_ids[split]))
+    directory = tempfile.mkdtemp()
+    store = RecommendationStore(directory)
+    
+    tracemalloc.start()
+    start = time.perf_counter()
+    model = CooccurrenceModel()
+    model.add(batches(order_ids[:split], product_ids[:split], batch_size))
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    store.publish(model, k)
+    publish_seconds = time.perf_counter() - start
+    _, build_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    start = time.perf_counter()
+    model = store.load_model()
+    changed = model.add(batches(order_ids[split:], product_ids[split:], batch_size))
+    store.publish(model, k, changed_rows=changed)
+    incremental_seconds = time.perf_counter() - start
+    
+    index = RecommendationIndex(directory, check_interval=60)
+    index.related(1, k)
+    probe = np.random.default_rng(1).integers(1, products + 1, size=lookups)
+    start = time.perf_counter()
+    for product_id in probe:
+        index.related(int(product_id), 10)
+    lookup_seconds = time.perf_counter() - start
+    
+    matrix = model.matrix
+    return {
+        "order_items": int(len(order_ids)),
+        "orders": int(order_ids[-1]),
+        "products": products,
+        "k": k,
+        "build_seconds": round(build_seconds, 3),
+        "publish_seconds": round(publish_seconds, 3),
+        "build_peak_traced_mb": round(build_peak / 2**20, 1),
+        "process_max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "matrix_nnz": int(matrix.nnz),
+        "matrix_mb": round(
+            (matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes) / 2**20, 1
+        ),
+        "topk_index_mb": round(2 * (products + 1) * k * 4 / 2**20, 1),
+        "incremental_order_items": int(len(order_ids) - split),
+        "incremental_update_seconds": round(incremental_seconds, 3),
+        "lookup_us": round(lookup_seconds / lookups * 1e6, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--order-items", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+    result = run(args.order_items, args.products, args.k, args.batch_size, args.lookups)
+    print(json.dumps({"benchmark": "recommendations", "results": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
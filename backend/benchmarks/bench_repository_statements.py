@@ -0,0 +1,281 @@
+"""Benchmark per-call overhead of repository queries: legacy Query vs cached statements
+
+Seeds a small in-memory SQLite database, so executing a statement costs
+little and the time per call is mostly Python: building the query, looking
+up (or compiling) the statement, and loading the rows. For every repository
+method it times the legacy form, a db.query(...).filter(...) object built
+and compiled on each call, against the ported repository method, which
+reuses a statement built once (or a lambda statement) and finds its
+compiled form in the engine's cache.
+
+The compiled cache counters of app.core.logging show how many of the timed
+calls compiled their statement. ProductRepository cannot be imported while
+its schemas fail to load, so its methods are timed through the same
+statements, built here.
+
+Usage: python -m benchmarks.bench_repository_statements [--calls 3000]
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import bindparam, create_engine, func, insert, lambda_stmt, or_, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.logging import StatementCacheStats, instrument_engine
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_coupon import Coupon
+from app.infrastructure.database.models_idempotency import IdempotencyKey
+from app.infrastructure.database.models_order import (
+    Order, OrderItem, Payment, PaymentWebhookEvent, WebhookEventStatusEnum
+)
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.database.models_user import User
+from app.infrastructure.repositories.coupon_repository import CouponRepository
+from app.infrastructure.repositories.idempotency_repository import IdempotencyKeyRepository
+from app.infrastructure.repositories.order_repository import (
+    OrderItemRepository, OrderRepository, PaymentRepository, PaymentWebhookEventRepository
+)
+from app.infrastructure.repositories.user_repository import UserRepository
+from benchmarks.load_test import percentile
+
+ROWS = 200
+ROUNDS = 3
+CREATED = datetime(2024, 6, 1)
+
+# ProductRepository's statements (see product_repository.py)
+_BY_SKU = select(Product).where(Product.sku == bindparam("sku")).limit(1)
+_PRICE_ROWS = select(Product.id, Product.price, Product.stock, Product.status).where(
+    Product.id.in_(bindparam("ids", expanding=True))
+)
+
+
+def _seed(engine) -> None:
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Category), [{"id": 1, "name": "Protein"}])
+        connection.execute(insert(Product), [
+            {"id": i, "name": f"Whey {i}", "sku": f"SKU-{i}", "price": Decimal(i) + 1,
+             "stock": i % 7, "category_id": 1}
+            for i in range(1, ROWS + 1)
+        ])
+        connection.execute(insert(User), [
+            {"id": i, "email": f"user{i}@example.com", "username": f"user{i}",
+             "hashed_password": "x", "first_name": "Ana", "last_name": f"Diaz {i}"}
+            for i in range(1, ROWS + 1)
+        ])
+        connection.execute(insert(Coupon), [
+            {"id": i, "code": f"SAVE{i}", "discount_percentage": 10,
+             "valid_from": datetime(2020, 1, 1), "valid_until": datetime(2099, 1, 1)}
+            for i in range(1, ROWS + 1)
+        ])
+        connection.execute(insert(IdempotencyKey), [
+            {"key": f"key-{i}", "fingerprint": "f", "status": "completed",
+             "expires_at": datetime(2099, 1, 1)}
+            for i in range(1, ROWS + 1)
+        ])
+        connection.execute(insert(Order), [
+            {"id": i, "user_id": i % 20 + 1, "order_number": f"ORD-{i}",
+             "total_amount": Decimal("10"), "shipping_address": "Calle 1",
+             "created_at": CREATED + timedelta(hours=i)}
+            for i in range(1, ROWS + 1)
+        ])
+        connection.execute(insert(OrderItem), [
+            {"order_id": i, "product_id": i, "quantity": 1, "unit_price": Decimal("10"),
+             "subtotal": Decimal("10"), "created_at": CREATED + timedelta(hours=i)}
+            for i in range(1, ROWS + 1)
+        ])
+        connection.execute(insert(Payment), [
+            {"order_id": i, "amount": Decimal("10"), "payment_method": "card",
+             "transaction_id": f"tx-{i}", "created_at": CREATED + timedelta(hours=i)}
+            for i in range(1, ROWS + 1)
+        ])
+        connection.execute(insert(PaymentWebhookEvent), [
+            {"event_id": f"evt-{i}", "event_type": "payment.succeeded", "payload": "{}"}
+            for i in range(1, 21)
+        ])
+
+
+def _product_filter(db, category_ids, min_price, in_stock, skip, limit):
+    """ProductRepository.filter_products as a lambda statement"""
+    statement = lambda_stmt(lambda: select(Product).where(Product.status == "active"))
+    if category_ids:
+        statement += lambda s: s.where(Product.category_id.in_(category_ids))
+    if min_price is not None:
+        statement += lambda s: s.where(Product.price >= min_price)
+    if in_stock:
+        statement += lambda s: s.where(Product.stock > 0)
+    statement += lambda s: s.order_by(Product.id).offset(skip).limit(limit)
+    return list(db.scalars(statement))
+
+
+def _cases(db) -> dict:
+    """method -> (legacy call, ported call), each taking a random row number"""
+    coupons, keys = CouponRepository(db), IdempotencyKeyRepository(db)
+    users, orders = UserRepository(db), OrderRepository(db)
+    items, payments = OrderItemRepository(db), PaymentRepository(db)
+    events = PaymentWebhookEventRepository(db)
+    query = db.query
+    order = orders.get_by_id(1)
+    db.expunge(order)
+    return {
+        "BaseRepository.get_by_id": (
+            lambda i: query(Coupon).filter(Coupon.id == i).first(),
+            lambda i: coupons.get_by_id(i),
+        ),
+        "BaseRepository.get_by_ids": (
+            lambda i: query(Coupon).filter(Coupon.id.in_([i, i + 1, i + 2])).all(),
+            lambda i: coupons.get_by_ids([i, i + 1, i + 2]),
+        ),
+        "BaseRepository.exists": (
+            lambda i: query(Coupon).filter(Coupon.id == i).first() is not None,
+            lambda i: coupons.exists(i),
+        ),
+        "BaseRepository.get_all": (
+            lambda i: query(Coupon).offset(i % 50).limit(10).all(),
+            lambda i: coupons.get_all(i % 50, 10),
+        ),
+        "ProductRepository.get_by_sku": (
+            lambda i: query(Product).filter(Product.sku == f"SKU-{i}").first(),
+            lambda i: db.scalars(_BY_SKU, {"sku": f"SKU-{i}"}).first(),
+        ),
+        "ProductRepository.filter_products": (
+            lambda i: query(Product).filter(
+                Product.status == "active", Product.category_id.in_([1, i]),
+                Product.price >= Decimal(i % 50), Product.stock > 0,
+            ).order_by(Product.id).offset(i % 10).limit(20).all(),
+            lambda i: _product_filter(db, [1, i], Decimal(i % 50), True, i % 10, 20),
+        ),
+        "ProductRepository.get_price_rows": (
+            lambda i: query(Product.id, Product.price, Product.stock, Product.status).filter(
+                Product.id.in_([i, i + 1, i + 2])
+            ).all(),
+            lambda i: list(db.execute(_PRICE_ROWS, {"ids": [i, i + 1, i + 2]})),
+        ),
+        "UserRepository.get_by_email": (
+            lambda i: query(User).filter(User.email == f"user{i}@example.com").first(),
+            lambda i: users.get_by_email(f"user{i}@example.com"),
+        ),
+        "UserRepository.get_by_email_or_username": (
+            lambda i: query(User).filter(
+                or_(User.email == f"user{i}@example.com", User.username == f"user{i}")
+            ).first(),
+            lambda i: users.get_by_email_or_username(f"user{i}@example.com", f"user{i}"),
+        ),
+        "UserRepository.search": (
+            lambda i: query(User).filter(or_(
+                User.email.ilike(f"%{i}%"), User.username.ilike(f"%{i}%"),
+                User.first_name.ilike(f"%{i}%"), User.last_name.ilike(f"%{i}%"),
+            )).offset(0).limit(10).all(),
+            lambda i: users.search(str(i), 0, 10),
+        ),
+        "CouponRepository.get_by_code": (
+            lambda i: query(Coupon).filter(Coupon.code == f"SAVE{i}").first(),
+            lambda i: coupons.get_by_code(f"SAVE{i}"),
+        ),
+        "IdempotencyKeyRepository.get_by_key": (
+            lambda i: query(IdempotencyKey).filter(IdempotencyKey.key == f"key-{i}").first(),
+            lambda i: keys.get_by_key(f"key-{i}"),
+        ),
+        "OrderRepository.get_by_order_number": (
+            lambda i: query(Order).filter(Order.order_number == f"ORD-{i}").first(),
+            lambda i: orders.get_by_order_number(f"ORD-{i}"),
+        ),
+        "OrderRepository.get_by_user": (
+            lambda i: query(Order).filter(
+                Order.user_id == i % 20 + 1, Order.created_at >= CREATED
+            ).order_by(Order.created_at.desc()).offset(0).limit(10).all(),
+            lambda i: orders.get_by_user(i % 20 + 1, 0, 10, since=CREATED),
+        ),
+        "OrderItemRepository.get_by_order": (
+            lambda i: query(OrderItem).filter(
+                OrderItem.order_id == order.id, OrderItem.created_at == order.created_at
+            ).all(),
+            lambda i: items.get_by_order(order),
+        ),
+        "OrderItemRepository.get_units_sold": (
+            lambda i: query(OrderItem.product_id, func.sum(OrderItem.quantity)).group_by(
+                OrderItem.product_id
+            ).all(),
+            lambda i: items.get_units_sold(),
+        ),
+        "PaymentRepository.get_by_transaction_id": (
+            lambda i: query(Payment).filter(Payment.transaction_id == f"tx-{i}").first(),
+            lambda i: payments.get_by_transaction_id(f"tx-{i}"),
+        ),
+        "PaymentRepository.get_by_order": (
+            lambda i: query(Payment).filter(
+                Payment.order_id == i, Payment.created_at >= CREATED
+            ).first(),
+            lambda i: payments.get_by_order(i, since=CREATED),
+        ),
+        "PaymentWebhookEventRepository.get_pending": (
+            lambda i: query(PaymentWebhookEvent).filter(
+                PaymentWebhookEvent.status == WebhookEventStatusEnum.RECEIVED
+            ).order_by(PaymentWebhookEvent.id).limit(20).all(),
+            lambda i: events.get_pending(20),
+        ),
+    }
+
+
+def _time(call, rows: list[int], stats: StatementCacheStats) -> dict:
+    for row in rows[:200]:
+        call(row)
+    compiled = stats.counts["misses"] + stats.counts["uncached"]
+    samples = []
+    for row in rows:
+        start = time.perf_counter()
+        call(row)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "p50_us": round(percentile(samples, 50), 1),
+        "p99_us": round(percentile(samples, 99), 1),
+        "compiled": stats.counts["misses"] + stats.counts["uncached"] - compiled,
+    }
+
+
+def run(calls: int) -> dict:
+    engine = create_engine("sqlite://")
+    stats = StatementCacheStats()
+    instrument_engine(engine, cache_stats=stats)
+    _seed(engine)
+    db = sessionmaker(bind=engine)()
+    rng = random.Random(5)
+    rows = [rng.randint(1, ROWS - 3) for _ in range(calls)]
+    results = {}
+    for method, (legacy, ported) in _cases(db).items():
+        runs = {"legacy_query": [], "cached_statement": []}
+        # Alternating rounds, best of each, so a noisy round does not favour either form
+        for _ in range(ROUNDS):
+            for form, call in (("legacy_query", legacy), ("cached_statement", ported)):
+                # Both forms start with an empty identity map
+                db.expunge_all()
+                runs[form].append(_time(call, rows, stats))
+        best = {form: min(timed, key=lambda timing: timing["p50_us"])
+                for form, timed in runs.items()}
+        results[method] = {
+            **best,
+            "saved_us_per_call": round(
+                best["legacy_query"]["p50_us"] - best["cached_statement"]["p50_us"], 1
+            ),
+        }
+    db.close()
+    results["statement_cache"] = stats.info(engine)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=3000)
+    args = parser.parse_args()
+    print(json.dumps({"benchmark": "repository_statements", "results": run(args.calls)},
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
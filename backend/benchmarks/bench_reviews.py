@@ -0,0 +1,146 @@
+"""Benchmark the product detail page for a product with 100k reviews
+
+Loads one product with many reviews into a file-backed SQLite database and
+times what the detail page reads. Two variants are compared. The aggregate
+variant reads the product row with its stored rating sum and count, plus
+the first page of reviews. The computed variant adds an AVG/COUNT over the
+product's reviews. It also compares a deep page of reviews reached with
+OFFSET and with the keyset cursor, and the cost of a review insert with
+and without the aggregate update.
+
+Usage: python -m benchmarks.bench_reviews [--reviews 100000] [--requests 300]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.database.models_review import Review
+from app.infrastructure.repositories.review_repository import ReviewRepository
+from benchmarks.load_test import percentile
+
+PAGE_SIZE = 20
+PRODUCT_ID = 1
+
+
+def _engine(path: str, reviews: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(
+        engine, tables=[Category.__table__, Product.__table__, Review.__table__]
+    )
+    rng = random.Random(11)
+    ratings = [rng.choice((1, 2, 3, 4, 4, 5, 5, 5)) for _ in range(reviews)]
+    with engine.begin() as connection:
+        connection.execute(insert(Category.__table__), [{"id": 1, "name": "Protein"}])
+        connection.execute(insert(Product.__table__), [{
+            "id": PRODUCT_ID, "sku": "WHEY-1", "name": "Whey", "price": 39.9, "stock": 10,
+            "category_id": 1, "status": "ACTIVE",
+            "rating_sum": sum(ratings), "rating_count": reviews,
+        }])
+        connection.execute(insert(Review.__table__), [
+            {"product_id": PRODUCT_ID, "user_id": user_id, "rating": rating,
+             "comment": "Mixes well, tastes fine."}
+            for user_id, rating in enumerate(ratings, start=1)
+        ])
+    return engine
+
+
+def _timed(function, requests: int) -> dict:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def run(reviews: int, requests: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = _engine(os.path.join(directory, "reviews.db"), reviews)
+        session_factory = sessionmaker(bind=engine)
+        db = session_factory()
+        repository = ReviewRepository(db)
+        
+        def detail_from_aggregate():
+            product = db.get(Product, PRODUCT_ID, populate_existing=True)
+            product.rating_sum / product.rating_count
+            repository.get_page(PRODUCT_ID, PAGE_SIZE)
+            db.rollback()
+        
+        def detail_computed():
+            db.get(Product, PRODUCT_ID, populate_existing=True)
+            db.execute(
+                select(func.avg(Review.rating), func.count(Review.id))
+                .where(Review.product_id == PRODUCT_ID)
+            ).one()
+            repository.get_page(PRODUCT_ID, PAGE_SIZE)
+            db.rollback()
+        
+        deep_page = reviews // PAGE_SIZE // 2
+        cursor = repository.get_page(PRODUCT_ID, deep_page * PAGE_SIZE)[-1].id
+        
+        def offset_page():
+            db.scalars(
+                select(Review).where(Review.product_id == PRODUCT_ID)
+                .order_by(Review.id.desc()).offset(deep_page * PAGE_SIZE).limit(PAGE_SIZE)
+            ).all()
+            db.rollback()
+        
+        def keyset_page():
+            repository.get_page(PRODUCT_ID, PAGE_SIZE, before_id=cursor)
+            db.rollback()
+        
+        results = {
+            "detail_page": {
+                "stored_aggregate": _timed(detail_from_aggregate, requests),
+                "avg_count_query": _timed(detail_computed, requests),
+            },
+            f"reviews_page_{deep_page}": {
+                "offset": _timed(offset_page, requests),
+                "keyset": _timed(keyset_page, requests),
+            },
+        }
+        
+        # Write cost: plain insert vs insert plus the aggregate update
+        next_user = iter(range(reviews + 1, reviews + 2 * requests + 1))
+        
+        def insert_only():
+            db.add(Review(product_id=PRODUCT_ID, user_id=next(next_user), rating=4))
+            db.commit()
+        
+        def insert_with_aggregate():
+            repository.add_review({"product_id": PRODUCT_ID, "user_id": next(next_user),
+                                   "rating": 4})
+        
+        results["review_insert"] = {
+            "insert_only": _timed(insert_only, requests),
+            "insert_with_aggregate": _timed(insert_with_aggregate, requests),
+        }
+        db.close()
+        engine.dispose()
+    return {"reviews": reviews, "requests": requests, "page_size": PAGE_SIZE, **results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reviews", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+    print(json.dumps({"benchmark": "reviews", "results": run(args.reviews, args.requests)},
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Benchmark the search result cache under a Zipf-distributed query workload
+
+Threads issue searches whose terms follow a Zipf distribution over a
+vocabulary of product words (a few terms are searched constantly, most
+rarely), against a file-backed SQLite catalog running the same ILIKE query
+as ProductRepository.search, while a writer bumps the catalog version a
+few times per second. Reports throughput, latency, database queries and
+the cache's hit ratio and coalesced-request count, with and without the
+cache.
+
+Usage: python -m benchmarks.bench_search_cache [--searches 20000] [--threads 16]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.services.search_cache import SearchCache, normalize_query
+from benchmarks.load_test import percentile
+
+WORDS = [
+    "whey", "creatine", "protein", "isolate", "casein", "vegan", "bcaa", "glutamine",
+    "preworkout", "omega", "vitamin", "zinc", "magnesium", "collagen", "gainer", "bar",
+    "shaker", "electrolyte", "caffeine", "beta", "alanine", "citrulline", "carnitine",
+    "ashwagandha", "melatonin", "multivitamin", "chocolate", "vanilla", "strawberry",
+    "cookies", "banana", "unflavored", "monohydrate", "hydrolyzed", "micellar", "plant",
+]
+
+
+def _engine(path: str, products: int):
+    engine = create_engine(
+        f"sqlite:///{path}", pool_size=20, max_overflow=40,
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(engine, tables=[Category.__table__, Product.__table__])
+    rng = random.Random(5)
+    with engine.begin() as connection:
+        connection.execute(insert(Category.__table__), [{"id": 1, "name": "Supplements"}])
+        connection.execute(insert(Product.__table__), [
+            {
+                "id": i, "sku": f"SKU-{i:06d}",
+                "name": " ".join(rng.sample(WORDS, 3)).title() + f" {i}",
+                "description": " ".join(rng.sample(WORDS, 8)),
+                "price": Decimal(rng.randint(499, 9999)) / 100, "stock": 10,
+                "category_id": 1, "status": "ACTIVE",
+            }
+            for i in range(1, products + 1)
+        ])
+    return engine
+
+
+def _queries(searches: int, exponent: float, seed: int) -> list[tuple[str, int]]:
+    """(query, skip) pairs with Zipf-distributed terms over one- and two-word queries"""
+    rng = np.random.default_rng(seed)
+    vocabulary = WORDS + [f"{a} {b}" for a in WORDS[:12] for b in WORDS[26:32]]
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1) ** exponent
+    picks = rng.choice(len(vocabulary), size=searches, p=weights / weights.sum())
+    pages = rng.choice([0, 0, 0, 20], size=searches)
+    # Users type with varying case and spacing
+    styles = (str.lower, str.title, str.upper, lambda text: f" {text}  ")
+    return [
+        (styles[index % len(styles)](vocabulary[pick]), int(page))
+        for index, (pick, page) in enumerate(zip(picks, pages))
+    ]
+
+
+def run_workload(session_factory, queries, threads: int, cache, write_interval: float) -> dict:
+    """Run the searches from several threads, optionally through the cache"""
+    database_queries = 0
+    counter_lock = threading.Lock()
+    latencies: list[list[float]] = [[] for _ in range(threads)]
+    stop_writer = threading.Event()
+    
+    def search(query: str, skip: int):
+        nonlocal database_queries
+        db = session_factory()
+        try:
+            with counter_lock:
+                database_queries += 1
+            return db.query(Product).filter(
+                Product.name.ilike(f"%{query}%") | Product.description.ilike(f"%{query}%")
+            ).offset(skip).limit(20).all()
+        finally:
+            db.close()
+    
+    def worker(index: int) -> None:
+        timings = latencies[index]
+        for query, skip in queries[index::threads]:
+            start = time.perf_counter()
+            if cache is None:
+                search(query, skip)
+            else:
+                query = normalize_query(query)
+                cache.get_or_load((query, skip, 20), lambda: tuple(search(query, skip)))
+            timings.append(time.perf_counter() - start)
+    
+    def writer() -> None:
+        while not stop_writer.wait(write_interval):
+            if cache is not None:
+                cache.bump_version()
+    
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    writer_thread.start()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop_writer.set()
+    writer_thread.join()
+    
+    merged = sorted(latency for timings in latencies for latency in timings)
+    result = {
+        "searches_per_second": round(len(queries) / elapsed),
+        "p50_ms": round(percentile(merged, 50) * 1000, 3),
+        "p99_ms": round(percentile(merged, 99) * 1000, 3),
+        "database_queries": database_queries,
+    }
+    if cache is not None:
+        result["cache"] = cache.stats()
+    return result
+
+
+def run(searches: int, threads: int, products: int, exponent: float, write_interval: float):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = _engine(os.path.join(directory, "catalog.db"), products)
+        session_factory = sessionmaker(bind=engine)
+        queries = _queries(searches, exponent, seed=3)
+        uncached = run_workload(session_factory, queries, threads, None, write_interval)
+        cached = run_workload(session_factory, queries, threads, SearchCache(), write_interval)
+        engine.dispose()
+    return {
+        "searches": searches,
+        "threads": threads,
+        "products": products,
+        "zipf_exponent": exponent,
+        "catalog_writes_per_second": round(1 / write_interval, 1),
+        "uncached": uncached,
+        "cached": cached,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--searches", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--write-interval", type=float, default=0.25)
+    args = parser.parse_args()
+    result = run(args.searches, args.threads, args.products, args.zipf, args.write_interval)
+    print(json.dumps({"benchmark": "search_cache", "results": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
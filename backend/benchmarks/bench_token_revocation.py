@@ -0,0 +1,120 @@
+"""Benchmark the per-request token revocation check
+
+Fills a revoked_tokens table (file-backed SQLite, or --database-url) with N
+revocations, loads them into a TokenRevocationStore and reports the cost of
+checking a token: a never-revoked id (the common case, answered by the Bloom
+filter alone), a revoked id, and the naive alternative of one indexed
+database lookup per request. Also reports the observed false-positive rate
+and the filter's memory footprint.
+
+Usage: python -m benchmarks.bench_token_revocation [--revoked 1000000] [--checks 200000]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_token import RevokedToken
+from app.infrastructure.repositories.token_repository import RevokedTokenRepository
+from app.infrastructure.services.token_revocation import TokenRevocationStore
+from benchmarks.load_test import percentile
+
+CHUNK_SIZE = 50_000
+
+
+def _fill(engine, revoked: int) -> list[str]:
+    """Insert revoked token ids, return them"""
+    expires_at = datetime.utcnow() + timedelta(days=7)
+    token_ids = [uuid.uuid4().hex for _ in range(revoked)]
+    for start in range(0, revoked, CHUNK_SIZE):
+        with engine.begin() as connection:
+            connection.execute(insert(RevokedToken), [
+                {"token_id": token_id, "kind": "jti", "expires_at": expires_at}
+                for token_id in token_ids[start:start + CHUNK_SIZE]
+            ])
+    return token_ids
+
+
+def _timed(check, token_ids: list[str]) -> dict:
+    """Per-check latency stats"""
+    latencies = []
+    started = time.perf_counter()
+    for token_id in token_ids:
+        start = time.perf_counter()
+        check(token_id)
+        latencies.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "checks": len(token_ids),
+        "mean_us": round(elapsed / len(token_ids) * 1e6, 2),
+        "p50_us": round(percentile(latencies, 50) * 1e6, 2),
+        "p99_us": round(percentile(latencies, 99) * 1e6, 2),
+    }
+
+
+def run(database_url: str, revoked: int, checks: int, capacity: int, error_rate: float) -> dict:
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(bind=engine, tables=[RevokedToken.__table__])
+    Base.metadata.create_all(bind=engine, tables=[RevokedToken.__table__])
+    session_factory = sessionmaker(bind=engine)
+    token_ids = _fill(engine, revoked)
+    
+    store = TokenRevocationStore(session_factory, capacity=capacity, error_rate=error_rate)
+    start = time.perf_counter()
+    store.rebuild()
+    rebuild_seconds = time.perf_counter() - start
+    
+    valid_ids = [uuid.uuid4().hex for _ in range(checks)]
+    never_revoked = _timed(store.is_revoked, valid_ids)
+    false_positives = store.stats["false_positives"]
+    revoked_sample = token_ids[:min(checks, revoked) // 10]
+    revoked_check = _timed(store.is_revoked, revoked_sample)
+    
+    db = session_factory()
+    try:
+        repository = RevokedTokenRepository(db)
+        database_check = _timed(repository.is_revoked, valid_ids[:max(checks // 10, 1)])
+    finally:
+        db.close()
+    
+    bloom = store._filter
+    return {
+        "revoked_tokens": revoked,
+        "filter": {
+            "bits": bloom.size, "hashes": bloom.hashes,
+            "memory_mb": round(bloom.size / 8 / 1e6, 2),
+            "rebuild_seconds": round(rebuild_seconds, 2),
+        },
+        "false_positive_rate": round(false_positives / checks, 5),
+        "check_never_revoked": never_revoked,
+        "check_revoked": revoked_check,
+        "database_lookup_per_check": database_check,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--revoked", type=int, default=1_000_000)
+    parser.add_argument("--checks", type=int, default=200_000)
+    parser.add_argument("--capacity", type=int, default=1_000_000)
+    parser.add_argument("--error-rate", type=float, default=0.001)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        result = run(database_url, args.revoked, args.checks, args.capacity, args.error_rate)
+    print(json.dumps({"benchmark": "token_revocation", "results": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
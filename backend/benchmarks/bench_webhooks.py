@@ -0,0 +1,91 @@
+"""Benchmark webhook ingestion and processing under a replayed event storm
+
+Usage: python -m benchmarks.bench_webhooks [--orders 2000] [--retries 3]
+                                            [--database-url sqlite:///bench.db]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.infrastructure.database.database import Base
+from app.infrastructure.database import models_user, models_product  # noqa: F401
+from app.infrastructure.database.models_order import Order, Payment
+from app.infrastructure.external.fake_payment_provider import FakePaymentProvider
+from app.application.payments.process_webhook import (
+    ReceivePaymentWebhookUseCase, ProcessPaymentEventsUseCase
+)
+
+
+def run(database_url: str, orders: int, retries: int, batch_size: int) -> dict:
+    """Replay a storm and measure ingest and processing throughput"""
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    
+    settings.STRIPE_WEBHOOK_SECRET = "whsec_bench"
+    provider = FakePaymentProvider(settings.STRIPE_WEBHOOK_SECRET, seed=42)
+    
+    db = Session()
+    transactions = {}
+    for i in range(orders):
+        order = Order(user_id=1, order_number=f"BENCH-{i}", total_amount=10,
+                      shipping_address="bench")
+        db.add(order)
+        db.flush()
+        db.add(Payment(order_id=order.id, amount=10, payment_method="stripe",
+                       transaction_id=f"pi_bench_{i}"))
+        transactions[order.id] = f"pi_bench_{i}"
+    db.commit()
+    
+    deliveries = provider.storm(
+        transactions, lifecycle=("payment_intent.succeeded", "charge.refunded"), retries=retries
+    )
+    
+    receive = ReceivePaymentWebhookUseCase(db)
+    start = time.perf_counter()
+    stored = sum(receive.execute(payload, header) for payload, header in deliveries)
+    ingest_seconds = time.perf_counter() - start
+    
+    process = ProcessPaymentEventsUseCase(db)
+    start = time.perf_counter()
+    processed = 0
+    while True:
+        handled = process.execute(batch_size)
+        processed += handled
+        if handled < batch_size:
+            break
+    process_seconds = time.perf_counter() - start
+    db.close()
+    
+    return {
+        "deliveries": len(deliveries),
+        "unique_events": stored,
+        "ingest_seconds": round(ingest_seconds, 4),
+        "ingest_deliveries_per_sec": round(len(deliveries) / ingest_seconds, 1),
+        "processed_events": processed,
+        "process_seconds": round(process_seconds, 4),
+        "process_events_per_sec": round(processed / process_seconds, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=settings.PAYMENT_EVENTS_BATCH_SIZE)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_webhooks.db"
+    result = run(database_url, args.orders, args.retries, args.batch_size)
+    print(json.dumps({"benchmark": "webhooks", "results": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
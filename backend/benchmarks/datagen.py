@@ -0,0 +1,227 @@
+"""Fast synthetic data generator for benchmarks
+
+Creates N users, categories, products and orders (with items and payments)
+using PostgreSQL COPY when available and bulk executemany INSERTs otherwise.
+
+Usage: python -m benchmarks.datagen --users 10000 --products 50000 --orders 100000
+                                    [--database-url postgresql://...] [--reset]
+"""
+
+import argparse
+import csv
+import enum
+import io
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.security import hash_password
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_user import User, UserRoleEnum
+from app.infrastructure.database.models_product import Product, Category, ProductStatusEnum
+from app.infrastructure.database.models_order import (
+    Order, OrderItem, Payment, OrderStatusEnum, PaymentStatusEnum
+)
+
+BENCH_PASSWORD = "benchmark-password"
+CHUNK_SIZE = 10_000
+
+CATEGORY_NAMES = [
+    "Proteins", "Creatine", "Pre-Workout", "Vitamins", "Amino Acids", "Fat Burners",
+    "Mass Gainers", "Recovery", "Energy Bars", "Accessories",
+]
+PRODUCT_WORDS = [
+    "Whey", "Isolate", "Casein", "Creatine", "Monohydrate", "BCAA", "Glutamine",
+    "Omega", "Multivitamin", "Caffeine", "Beta-Alanine", "Collagen", "Vegan", "Gold",
+    "Chocolate", "Vanilla", "Strawberry", "Unflavored", "Pro", "Max", "Ultra", "Lean",
+]
+
+
+def bench_email(index: int) -> str:
+    """Email of the n-th generated user"""
+    return f"user{index}@bench.suplegear.com"
+
+
+def _copy_value(value):
+    """Format a value for COPY csv (enum columns store member names)"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, enum.Enum):
+        return value.name
+    return value
+
+
+def _copy_rows(engine: Engine, table, columns: list[str], rows) -> None:
+    """Load rows with COPY FROM STDIN (PostgreSQL only)"""
+    connection = engine.raw_connection()
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([_copy_value(row[column]) for column in columns])
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) "
+                "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def bulk_load(engine: Engine, model, rows: list[dict]) -> None:
+    """Insert rows in chunks, using COPY on PostgreSQL"""
+    if not rows:
+        return
+    table = model.__table__
+    for start in range(0, len(rows), CHUNK_SIZE):
+        chunk = rows[start:start + CHUNK_SIZE]
+        if engine.dialect.name == "postgresql":
+            _copy_rows(engine, table, list(chunk[0].keys()), chunk)
+        else:
+            with engine.begin() as connection:
+                connection.execute(insert(table), chunk)
+
+
+def _reset_sequences(engine: Engine) -> None:
+    """Move id sequences past explicitly inserted ids (PostgreSQL only)"""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as connection:
+        for table in ("users", "categories", "products", "orders", "order_items", "payments"):
+            connection.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+            )
+
+
+def generate(
+    engine: Engine,
+    users: int,
+    products: int,
+    orders: int,
+    max_items: int = 5,
+    years: int = 1,
+    seed: int = 42,
+) -> dict:
+    """Generate the dataset, return row counts and timings"""
+    rng = random.Random(seed)
+    timings = {}
+    now = datetime.utcnow()
+    oldest = now - timedelta(days=365 * years)
+    span_seconds = int((now - oldest).total_seconds())
+    
+    start = time.perf_counter()
+    hashed_password = hash_password(BENCH_PASSWORD)
+    bulk_load(engine, User, [
+        {
+            "id": i, "email": bench_email(i), "username": f"user{i}",
+            "hashed_password": hashed_password, "first_name": f"User{i}", "last_name": "Bench",
+            "role": UserRoleEnum.CUSTOMER, "is_active": True, "email_verified": True,
+            "created_at": now, "updated_at": now,
+        }
+        for i in range(1, users + 1)
+    ])
+    timings["users"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    bulk_load(engine, Category, [
+        {"id": i, "name": name, "description": f"{name} supplements",
+         "created_at": now, "updated_at": now}
+        for i, name in enumerate(CATEGORY_NAMES, start=1)
+    ])
+    prices = {}
+    product_rows = []
+    for i in range(1, products + 1):
+        prices[i] = Decimal(rng.randint(499, 14999)) / 100
+        name = " ".join(rng.sample(PRODUCT_WORDS, 3))
+        product_rows.append({
+            "id": i, "name": f"{name} {i}", "description": f"{name} benchmark product",
+            "price": prices[i], "stock": rng.randint(0, 500), "sku": f"BENCH-{i:08d}",
+            "category_id": rng.randint(1, len(CATEGORY_NAMES)),
+            "status": ProductStatusEnum.ACTIVE if rng.random() < 0.9 else rng.choice(
+                [ProductStatusEnum.INACTIVE, ProductStatusEnum.DISCONTINUED]
+            ),
+            "created_at": now, "updated_at": now,
+        })
+    bulk_load(engine, Product, product_rows)
+    timings["products"] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    order_rows, item_rows, payment_rows = [], [], []
+    item_id = 0
+    statuses = list(OrderStatusEnum)
+    for order_id in range(1, orders + 1):
+        created_at = oldest + timedelta(seconds=rng.randint(0, span_seconds))
+        total = Decimal("0")
+        item_count = rng.randint(1, min(max_items, products))
+        for product_id in rng.sample(range(1, products + 1), item_count):
+            item_id += 1
+            quantity = rng.randint(1, 3)
+            subtotal = prices[product_id] * quantity
+            total += subtotal
+            item_rows.append({
+                "id": item_id, "order_id": order_id, "product_id": product_id,
+                "quantity": quantity, "unit_price": prices[product_id], "subtotal": subtotal,
+                "created_at": created_at,
+            })
+        order_rows.append({
+            "id": order_id, "user_id": rng.randint(1, users),
+            "order_number": f"BENCH-{order_id:010d}", "status": rng.choice(statuses),
+            "total_amount": total, "shipping_address": "Bench St. 1", "notes": None,
+            "created_at": created_at, "updated_at": created_at,
+        })
+        payment_rows.append({
+            "id": order_id, "order_id": order_id, "amount": total,
+            "status": PaymentStatusEnum.COMPLETED, "payment_method": "stripe",
+            "transaction_id": f"pi_bench_{order_id}",
+            "created_at": created_at, "updated_at": created_at,
+        })
+    bulk_load(engine, Order, order_rows)
+    bulk_load(engine, OrderItem, item_rows)
+    bulk_load(engine, Payment, payment_rows)
+    timings["orders"] = time.perf_counter() - start
+    
+    _reset_sequences(engine)
+    return {
+        "rows": {
+            "users": users, "categories": len(CATEGORY_NAMES), "products": products,
+            "orders": orders, "order_items": item_id, "payments": orders,
+        },
+        "seconds": {name: round(value, 3) for name, value in timings.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--max-items", type=int, default=5)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables")
+    args = parser.parse_args()
+    
+    engine = create_engine(args.database_url)
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    result = generate(
+        engine, args.users, args.products, args.orders,
+        max_items=args.max_items, years=args.years, seed=args.seed,
+    )
+    print(json.dumps({"benchmark": "datagen", "results": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
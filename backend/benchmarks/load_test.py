@@ -0,0 +1,273 @@
+"""Scripted load test for the whole API
+
+Runs a weighted mix of realistic scenarios (browse, search, view product,
+login and checkout when the route exists) either in-process through the ASGI
+app or against a running server, and reports throughput, latency percentiles
+and DB statements per request as JSON. With --thresholds it works as a perf
+gate: any violated threshold makes the process exit with status 1.
+
+Usage:
+  DATABASE_URL=postgresql://... python -m benchmarks.datagen --reset
+  DATABASE_URL=postgresql://... python -m benchmarks.load_test --duration 30 --concurrency 32
+  python -m benchmarks.load_test --base-url http://127.0.0.1:8000 \
+      --thresholds benchmarks/thresholds.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from app.core.config import settings
+from benchmarks.datagen import BENCH_PASSWORD, PRODUCT_WORDS, bench_email
+
+API = settings.API_V1_STR
+
+# Per-request DB statement counter, set by the load loop and bumped by an engine hook
+_statement_counter: ContextVar[Optional[list]] = ContextVar("statement_counter", default=None)
+
+
+@dataclass
+class LoadContext:
+    """Shared state for scenarios"""
+    rng: random.Random
+    users: int
+    products: int
+    tokens: dict = field(default_factory=dict)
+
+
+Scenario = Callable[[httpx.AsyncClient, LoadContext], Awaitable[httpx.Response]]
+
+
+async def browse(client: httpx.AsyncClient, ctx: LoadContext) -> httpx.Response:
+    """List a random page of products"""
+    skip = ctx.rng.randint(0, max(ctx.products // 20 - 1, 0)) * 20
+    return await client.get(f"{API}/products/", params={"skip": skip, "limit": 20})
+
+
+async def search(client: httpx.AsyncClient, ctx: LoadContext) -> httpx.Response:
+    """Search for a common product word"""
+    return await client.get(
+        f"{API}/products/search/results", params={"q": ctx.rng.choice(PRODUCT_WORDS)}
+    )
+
+
+async def view_product(client: httpx.AsyncClient, ctx: LoadContext) -> httpx.Response:
+    """Open a product page"""
+    return await client.get(f"{API}/products/{ctx.rng.randint(1, ctx.products)}")
+
+
+async def login(client: httpx.AsyncClient, ctx: LoadContext) -> httpx.Response:
+    """Log in as a random generated user"""
+    user = ctx.rng.randint(1, ctx.users)
+    response = await client.post(
+        f"{API}/auth/login", json={"email": bench_email(user), "password": BENCH_PASSWORD}
+    )
+    if response.status_code == 200:
+        ctx.tokens[user] = response.json()["access_token"]
+    return response
+
+
+async def checkout(client: httpx.AsyncClient, ctx: LoadContext) -> httpx.Response:
+    """Place an order as an already logged-in user"""
+    if not ctx.tokens:
+        return await login(client, ctx)
+    user = ctx.rng.choice(list(ctx.tokens))
+    items = [
+        {"product_id": ctx.rng.randint(1, ctx.products), "quantity": ctx.rng.randint(1, 3)}
+        for _ in range(ctx.rng.randint(1, 5))
+    ]
+    return await client.post(
+        f"{API}/orders/",
+        json={"items": items, "shipping_address": "Bench St. 1"},
+        headers={"Authorization": f"Bearer {ctx.tokens[user]}"},
+    )
+
+
+# name -> (scenario, weight, route that must exist for the scenario to run)
+SCENARIOS: dict[str, tuple[Scenario, int, tuple[str, str]]] = {
+    "browse": (browse, 40, ("get", f"{API}/products/")),
+    "search": (search, 20, ("get", f"{API}/products/search/results")),
+    "view_product": (view_product, 30, ("get", f"{API}/products/{{product_id}}")),
+    "login": (login, 5, ("post", f"{API}/auth/login")),
+    "checkout": (checkout, 5, ("post", f"{API}/orders/")),
+}
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def _available_scenarios(client: httpx.AsyncClient) -> dict:
+    """Keep only scenarios whose route exists in the OpenAPI schema"""
+    response = await client.get(f"{API}/openapi.json")
+    paths = response.json().get("paths", {}) if response.status_code == 200 else {}
+    return {
+        name: (scenario, weight)
+        for name, (scenario, weight, (method, path)) in SCENARIOS.items()
+        if method in paths.get(path, {})
+    }
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    ctx: LoadContext,
+    duration: float,
+    concurrency: int,
+    only: Optional[list[str]] = None,
+    count_statements: bool = False,
+) -> dict:
+    """Run the weighted scenario mix and collect per-scenario stats"""
+    scenarios = await _available_scenarios(client)
+    if only:
+        scenarios = {name: value for name, value in scenarios.items() if name in only}
+    names = list(scenarios)
+    weights = [scenarios[name][1] for name in names]
+    stats = {name: {"latencies": [], "errors": 0, "statements": 0} for name in names}
+    deadline = time.perf_counter() + duration
+    
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            name = ctx.rng.choices(names, weights)[0]
+            counter = [0]
+            token = _statement_counter.set(counter)
+            start = time.perf_counter()
+            try:
+                response = await scenarios[name][0](client, ctx)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            finally:
+                _statement_counter.reset(token)
+            stats[name]["latencies"].append(time.perf_counter() - start)
+            stats[name]["statements"] += counter[0]
+            stats[name]["errors"] += failed
+    
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    
+    report = {}
+    for name, data in stats.items():
+        latencies = sorted(data["latencies"])
+        requests = len(latencies)
+        report[name] = {
+            "requests": requests,
+            "errors": data["errors"],
+            "error_rate": round(data["errors"] / requests, 4) if requests else 0.0,
+            "rps": round(requests / elapsed, 1),
+            **{
+                f"p{pct}_ms": round(percentile(latencies, pct) * 1000, 2)
+                for pct in (50, 90, 95, 99)
+            },
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            "db_statements_per_request": (
+                round(data["statements"] / requests, 2)
+                if count_statements and requests else None
+            ),
+        }
+    total = sum(item["requests"] for item in report.values())
+    return {
+        "duration_seconds": round(elapsed, 2),
+        "concurrency": concurrency,
+        "total_requests": total,
+        "total_rps": round(total / elapsed, 1),
+        "scenarios": report,
+    }
+
+
+def check_thresholds(report: dict, thresholds: dict) -> list[str]:
+    """Return human-readable threshold violations"""
+    violations = []
+    limits = {
+        "max_p50_ms": ("p50_ms", max), "max_p95_ms": ("p95_ms", max),
+        "max_p99_ms": ("p99_ms", max), "max_error_rate": ("error_rate", max),
+        "max_db_statements": ("db_statements_per_request", max), "min_rps": ("rps", min),
+    }
+    defaults = thresholds.get("default", {})
+    for name, result in report["scenarios"].items():
+        scenario_limits = {**defaults, **thresholds.get("scenarios", {}).get(name, {})}
+        for limit_name, limit in scenario_limits.items():
+            metric, kind = limits[limit_name]
+            value = result.get(metric)
+            if value is None:
+                continue
+            if (kind is max and value > limit) or (kind is min and value < limit):
+                violations.append(f"{name}: {metric}={value} violates {limit_name}={limit}")
+    return violations
+
+
+def _install_statement_counter() -> None:
+    """Count statements executed by the app's engine per request"""
+    from sqlalchemy import event
+    from app.infrastructure.database.database import engine
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        counter = _statement_counter.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+async def main_async(args: argparse.Namespace) -> dict:
+    ctx = LoadContext(rng=random.Random(args.seed), users=args.users, products=args.products)
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=30)
+        count_statements = False
+    else:
+        from app.main import app
+        _install_statement_counter()
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://localhost", timeout=30
+        )
+        count_statements = True
+    async with client:
+        return await run_load(
+            client, ctx, args.duration, args.concurrency,
+            only=args.scenarios.split(",") if args.scenarios else None,
+            count_statements=count_statements,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--base-url", help="run against a live server instead of in-process")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=1000, help="users created by datagen")
+    parser.add_argument("--products", type=int, default=5000, help="products created by datagen")
+    parser.add_argument("--scenarios", help="comma-separated subset of scenarios")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--thresholds", help="JSON file with regression thresholds")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+    
+    report = asyncio.run(main_async(args))
+    if args.thresholds:
+        with open(args.thresholds) as thresholds_file:
+            report["violations"] = check_thresholds(report, json.load(thresholds_file))
+    
+    output = json.dumps({"benchmark": "load_test", "results": report}, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output)
+    print(output)
+    if report.get("violations"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 """pytest configuration"""
+import os
 import sys
 from pathlib import Path
 
@@ -25,3 +26,19 @@ def db_session():
     yield session
     
     session.close()
+
+
+@pytest.fixture
+def postgres_engine():
+    """Engine on an emptied PostgreSQL database named by TEST_POSTGRES_URL (skipped without it)"""
+    from sqlalchemy import create_engine
+    
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP SCHEMA public CASCADE")
+        connection.exec_driver_sql("CREATE SCHEMA public")
+    yield engine
+    engine.dispose()
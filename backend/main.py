@@ -11,5 +11,9 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.RELOAD,
-        log_level="info",
+        log_level=settings.LOG_LEVEL.lower(),
+        # Keep the application's queue-based JSON logging, access logs
+        # come from AccessLogMiddleware
+        log_config=None,
+        access_log=False,
     )
@@ -0,0 +1,141 @@
+"""Maintenance commands
+
+Usage: python manage.py <command> [options]
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+
+from app.core.config import settings
+from app.infrastructure.database.database import SessionLocal, engine
+
+
+def build_recommendations(args: argparse.Namespace) -> dict:
+    """Rebuild frequently-bought-together recommendations from all orders"""
+    from app.application.products.recommendations import BuildRecommendationsUseCase
+    db = SessionLocal()
+    try:
+        return BuildRecommendationsUseCase(db).execute()
+    finally:
+        db.close()
+
+
+def update_recommendations(args: argparse.Namespace) -> dict:
+    """Fold orders placed since the last build into the recommendations"""
+    from app.application.products.recommendations import UpdateRecommendationsUseCase
+    db = SessionLocal()
+    try:
+        return UpdateRecommendationsUseCase(db).execute()
+    finally:
+        db.close()
+
+
+def build_catalog_snapshot(args: argparse.Namespace) -> dict:
+    """Publish the shared product snapshot (with --watch, republish whenever products change)"""
+    from app.application.products.snapshot import BuildProductSnapshotUseCase
+    result = None
+    while True:
+        db = SessionLocal()
+        try:
+            use_case = BuildProductSnapshotUseCase(db)
+            if result is None or use_case.source_version() != result["product_version"]:
+                result = use_case.execute()
+                if args.watch:
+                    print(json.dumps(result), flush=True)
+        finally:
+            db.close()
+        if not args.watch:
+            return result
+        time.sleep(args.watch)
+
+
+def _partition_manager(args: argparse.Namespace):
+    from app.infrastructure.database.partitioning import PartitionManager
+    return PartitionManager(engine, dry_run=args.dry_run)
+
+
+def _partition_result(manager, result) -> dict:
+    """Command result plus the DDL it ran"""
+    return {"result": result, "dry_run": manager.dry_run, "statements": manager.statements}
+
+
+def partition_tables(args: argparse.Namespace) -> dict:
+    """Convert orders, order_items and payments to monthly partitions (one-time)"""
+    manager = _partition_manager(args)
+    return _partition_result(manager, manager.convert(args.months_ahead))
+
+
+def create_partitions(args: argparse.Namespace) -> dict:
+    """Pre-create monthly partitions for the coming months"""
+    manager = _partition_manager(args)
+    return _partition_result(manager, manager.ensure_partitions(args.months_ahead))
+
+
+def archive_partitions(args: argparse.Namespace) -> dict:
+    """Detach old monthly partitions and export them to gzip-compressed CSV files"""
+    from app.infrastructure.database.partitioning import add_months, month_start
+    manager = _partition_manager(args)
+    cutoff = add_months(month_start(datetime.utcnow()), -args.older_than_months)
+    return _partition_result(manager, manager.archive(cutoff, args.directory))
+
+
+def upgrade_schema(args: argparse.Namespace) -> dict:
+    """Add columns and indexes the models gained to existing tables"""
+    from app.infrastructure.database.schema import upgrade_schema as upgrade
+    return {"dry_run": args.dry_run, "statements": upgrade(engine, dry_run=args.dry_run)}
+
+
+def profile_header(args: argparse.Namespace) -> dict:
+    """Print a signed X-Profile header value that profiles requests for a few minutes"""
+    from app.infrastructure.services.profiler import sign_profile_request
+    expires_at = int(time.time()) + args.minutes * 60
+    return {"header": "X-Profile", "value": sign_profile_request(expires_at, settings.SECRET_KEY)}
+
+
+COMMANDS = {
+    "build-recommendations": build_recommendations,
+    "update-recommendations": update_recommendations,
+    "build-catalog-snapshot": build_catalog_snapshot,
+    "partition-tables": partition_tables,
+    "create-partitions": create_partitions,
+    "archive-partitions": archive_partitions,
+    "upgrade-schema": upgrade_schema,
+    "profile-header": profile_header,
+}
+
+DRY_RUN_COMMANDS = (
+    "partition-tables", "create-partitions", "archive-partitions", "upgrade-schema"
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, command in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=command.__doc__)
+        if name in DRY_RUN_COMMANDS:
+            subparser.add_argument("--dry-run", action="store_true", help="print the DDL only")
+        if name in ("partition-tables", "create-partitions"):
+            subparser.add_argument(
+                "--months-ahead", type=int, default=settings.PARTITION_MONTHS_AHEAD
+            )
+        if name == "archive-partitions":
+            subparser.add_argument(
+                "--older-than-months", type=int, default=settings.ARCHIVE_AFTER_MONTHS
+            )
+            subparser.add_argument("--directory", default=settings.ARCHIVE_DIR)
+        if name == "build-catalog-snapshot":
+            subparser.add_argument(
+                "--watch", type=float, default=0,
+                help="check for product writes every this many seconds and rebuild",
+            )
+        if name == "profile-header":
+            subparser.add_argument("--minutes", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(COMMANDS[args.command](args), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
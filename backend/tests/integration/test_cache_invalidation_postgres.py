@@ -0,0 +1,129 @@
+"""Integration tests for cache invalidation over pg_notify (TEST_POSTGRES_URL)"""
+
+import threading
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_cache import CacheWrite
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.services import cache_invalidation
+from app.infrastructure.services.cache_invalidation import (
+    CacheInvalidationBus, PostgresNotifyTransport
+)
+
+
+class Worker:
+    """One simulated worker listening on its own connection"""
+    
+    def __init__(self, engine):
+        self.sessions = sessionmaker(bind=engine, expire_on_commit=False)
+        self.bus = CacheInvalidationBus(
+            PostgresNotifyTransport(engine), self.sessions, check_interval=0.2
+        )
+        self.invalidated = []
+        self.bus.subscribe("product", self.invalidated.append)
+        self.bus.install(self.sessions)
+
+
+@pytest.fixture
+def workers(postgres_engine):
+    Base.metadata.create_all(
+        postgres_engine, tables=[Category.__table__, Product.__table__, CacheWrite.__table__]
+    )
+    with sessionmaker(bind=postgres_engine)() as db:
+        db.add(Category(id=1, name="Protein"))
+        db.commit()
+    writer, reader = Worker(postgres_engine), Worker(postgres_engine)
+    yield writer, reader
+    writer.bus.stop()
+    reader.bus.stop()
+
+
+def _write_products(worker: Worker, count: int) -> list[int]:
+    with worker.sessions() as db:
+        products = [
+            Product(name=f"P-{i}", sku=f"P-{i}", price=Decimal("9.99"), stock=1, category_id=1)
+            for i in range(count)
+        ]
+        db.add_all(products)
+        db.commit()
+        return [product.id for product in products]
+
+
+def test_notification_reaches_the_listener_thread(workers):
+    """Test that a committed write is delivered by pg_notify to another worker's subscriber"""
+    writer, reader = workers
+    arrived = threading.Event()
+    reader.bus.subscribe("product", lambda ids: arrived.set())
+    reader.bus.start()
+    
+    product_ids = _write_products(writer, 2)
+    
+    assert arrived.wait(5)
+    assert reader.invalidated == [frozenset(product_ids)]
+    assert reader.bus.stats["applied"] == 1 and reader.bus.stats["fallback_refreshes"] == 0
+    with writer.sessions() as db:
+        version = db.scalar(select(func.max(CacheWrite.version)))
+    assert reader.bus.latest_version("product") == writer.bus.latest_version("product") == version
+
+
+def test_rolled_back_write_sends_nothing(workers):
+    """Test that neither the notification nor the version row outlive a rollback"""
+    writer, reader = workers
+    reader.bus.transport.listen()
+    with writer.sessions() as db:
+        db.add(Product(name="P", sku="P", price=Decimal("1.00"), stock=1, category_id=1))
+        db.flush()
+        db.rollback()
+    
+    assert reader.bus.receive(0.5) == 0
+    assert reader.bus.check_versions(grace=False) == []
+
+
+def test_failed_notify_rolls_back_the_write(workers, monkeypatch):
+    """Test that a notification PostgreSQL refuses makes the write fail with it"""
+    writer, reader = workers
+    reader.bus.transport.listen()
+    # One message for 2000 ids: over pg_notify's 8000 byte payload limit
+    monkeypatch.setattr(cache_invalidation, "MAX_MESSAGE_IDS", 5000)
+    
+    with pytest.raises(Exception, match="payload string too long"):
+        _write_products(writer, 2000)
+    
+    with writer.sessions() as db:
+        assert db.scalar(select(func.count()).select_from(Product)) == 0
+        assert db.scalar(select(func.count()).select_from(CacheWrite)) == 0
+    assert reader.bus.receive(0.5) == 0
+
+
+def test_concurrent_writes_take_versions_without_waiting(workers):
+    """Test that a write commits while another holds an uncommitted, older version"""
+    writer, reader = workers
+    reader.bus.transport.listen()
+    first, second = writer.sessions(), writer.sessions()
+    try:
+        first.add(Product(name="A", sku="A", price=Decimal("1.00"), stock=1, category_id=1))
+        first.flush()
+        # What the first commit does before COMMIT: its version row is held uncommitted
+        older = writer.bus.publish(first, {"product": {1}})["product"]
+        # A shared version row would make this wait for the first transaction
+        second.execute(text("SET LOCAL lock_timeout = '1s'"))
+        second.add(Product(name="B", sku="B", price=Decimal("1.00"), stock=1, category_id=1))
+        second.commit()
+        first.commit()
+    finally:
+        first.close()
+        second.close()
+    
+    with writer.sessions() as db:
+        versions = db.scalars(select(CacheWrite.version).order_by(CacheWrite.version)).all()
+    assert versions[0] == older and len(versions) == 3
+    # Delivered in commit order, newest version first; nothing is left for the check
+    reader.bus.receive(2)
+    reader.bus.receive(0.5)
+    assert reader.bus.stats["applied"] == 3
+    assert reader.bus.check_versions(grace=False) == []
@@ -0,0 +1,139 @@
+"""Integration tests for the pooled email service against a local SMTP server"""
+
+import socket
+import time
+
+import pytest
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+from app.infrastructure.services.email_service import (
+    SMTPConnectionPool, EmailService, EmailBatcher, OutgoingEmail, render_template,
+    get_compiled_template,
+)
+
+
+class RecordingHandler:
+    """aiosmtpd handler that keeps received messages in memory"""
+    
+    def __init__(self):
+        self.messages = []
+    
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("bounce"):
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+    
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+def _free_port() -> int:
+    """Find a free local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    """Run a local SMTP stand-in"""
+    handler = RecordingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+@pytest.fixture
+def email_service(smtp_server):
+    """Email service pointed at the local SMTP server"""
+    controller, _ = smtp_server
+    pool = SMTPConnectionPool("127.0.0.1", controller.port, use_tls=False, pool_size=2)
+    service = EmailService(pool, "noreply@suplegear.com")
+    yield service
+    service.close()
+
+
+def test_template_is_compiled_once():
+    """Test that compiled templates are cached"""
+    assert get_compiled_template("welcome") is get_compiled_template("welcome")
+    
+    email = render_template("welcome", "ana@example.com", {
+        "username": "ana", "first_name": "Ana", "email": "ana@example.com"
+    })
+    assert email.subject == "Welcome to SupleGear, ana!"
+    assert "ana@example.com" in email.body
+
+
+def test_send_batch_reuses_pooled_connections(smtp_server, email_service, monkeypatch):
+    """Test that a batch is delivered over the pooled connections without opening new ones"""
+    _, handler = smtp_server
+    pool = email_service.pool
+    opened = []
+    connect = pool._connect
+    monkeypatch.setattr(pool, "_connect", lambda: opened.append(1) or connect())
+    with pool.connection(), pool.connection():
+        pass
+    emails = [
+        OutgoingEmail(to=f"user{i}@example.com", subject="Hi", body="Hello")
+        for i in range(10)
+    ]
+    
+    result = email_service.send_batch(emails)
+    
+    assert result.sent == 10 and result.retry == [] and result.rejected == []
+    assert len(handler.messages) == 10
+    assert len(opened) == 2
+    assert pool._idle.qsize() == 2
+
+
+def test_send_batch_reports_rejected_and_unsent_emails(smtp_server, email_service):
+    """Test that a refused recipient is rejected once and the rest of its chunk still goes out"""
+    _, handler = smtp_server
+    emails = [
+        OutgoingEmail(to=f"{'bounce' if i == 3 else 'user'}{i}@example.com", subject="Hi",
+                      body="Hello")
+        for i in range(6)
+    ]
+    
+    result = email_service.send_batch(emails)
+    
+    assert result.sent == 5 and result.retry == []
+    assert [email.to for email in result.rejected] == ["bounce3@example.com"]
+    assert len(handler.messages) == 5
+    
+    down = EmailService(SMTPConnectionPool("127.0.0.1", _free_port(), use_tls=False), "x@y.z")
+    result = down.send_batch(emails[:2])
+    down.close()
+    assert result.sent == 0 and result.retry == emails[:2]
+
+
+def test_batcher_flushes_on_close(smtp_server, email_service):
+    """Test that queued emails are flushed when the batcher stops"""
+    _, handler = smtp_server
+    batcher = EmailBatcher(email_service, batch_size=5, interval=0.05)
+    for i in range(7):
+        batcher.enqueue(OutgoingEmail(to=f"user{i}@example.com", subject="Hi", body="Hello"))
+    
+    batcher.close(timeout=5)
+    
+    assert len(handler.messages) == 7
+
+
+def test_batcher_stops_retrying_when_closed():
+    """Test that close() returns while the server is down, dropping what cannot be sent"""
+    pool = SMTPConnectionPool("127.0.0.1", _free_port(), use_tls=False, pool_size=1)
+    service = EmailService(pool, "noreply@suplegear.com")
+    batcher = EmailBatcher(service, batch_size=5, interval=0.05, max_attempts=100)
+    for i in range(3):
+        batcher.enqueue(OutgoingEmail(to=f"user{i}@example.com", subject="Hi", body="Hello"))
+    time.sleep(0.2)
+    
+    batcher.close(timeout=5)
+    
+    assert not batcher._thread.is_alive()
+    assert batcher._queue.empty()
+    service.close()
@@ -0,0 +1,92 @@
+"""Integration tests for monthly partitioning against a PostgreSQL server (TEST_POSTGRES_URL)"""
+
+import gzip
+from datetime import date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.infrastructure.database import (  # noqa: F401 (every table of the models)
+    models_cache, models_cart, models_coupon, models_idempotency, models_image, models_product,
+    models_review, models_token, models_user
+)
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_order import Order, OrderStatusEnum
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.database.models_user import User
+from app.infrastructure.database.partitioning import PartitionManager
+from app.infrastructure.repositories.order_repository import (
+    OrderItemRepository, OrderRepository
+)
+
+
+def _place_orders(session_factory) -> list[int]:
+    """One order with two items in each of January, February and March 2024"""
+    with session_factory() as db:
+        db.add(User(id=1, email="u1@example.com", username="u1", hashed_password="x"))
+        db.add(Category(id=1, name="Protein"))
+        db.add_all([
+            Product(id=product_id, sku=f"SKU-{product_id}", name="Whey", price=5, category_id=1)
+            for product_id in (1, 2)
+        ])
+        db.commit()
+        order_ids = []
+        for month in (1, 2, 3):
+            order = Order(
+                user_id=1, order_number=f"ORD-{month}", total_amount=10, shipping_address="x",
+                status=OrderStatusEnum.DELIVERED, created_at=datetime(2024, month, 10),
+            )
+            db.add(order)
+            db.flush()
+            OrderItemRepository(db).add_to_order(order, [
+                {"product_id": product_id, "quantity": 1, "unit_price": 5, "subtotal": 5}
+                for product_id in (1, 2)
+            ])
+            order_ids.append(order.id)
+        db.commit()
+    return order_ids
+
+
+def test_conversion_keeps_rows_and_prunes_partitions(postgres_engine, tmp_path):
+    """Test converting, querying, pre-creating and archiving monthly partitions"""
+    Base.metadata.create_all(postgres_engine)
+    session_factory = sessionmaker(bind=postgres_engine, expire_on_commit=False)
+    order_ids = _place_orders(session_factory)
+    manager = PartitionManager(postgres_engine)
+    
+    converted = manager.convert(months_ahead=0)
+    
+    assert [table["table"] for table in converted] == ["orders", "order_items", "payments"]
+    with postgres_engine.connect() as connection:
+        assert manager.is_partitioned(connection, "order_items")
+        partitions = manager.list_partitions(connection, "order_items")
+        assert {"order_items_p2024_01", "order_items_p2024_03", "order_items_default"} <= set(
+            partitions
+        )
+        plan = "\n".join(row[0] for row in connection.execute(text(
+            "EXPLAIN SELECT * FROM order_items WHERE order_id = :id AND created_at = :created"
+        ), {"id": order_ids[1], "created": datetime(2024, 2, 10)}))
+    assert "order_items_p2024_02" in plan and "order_items_p2024_01" not in plan
+    
+    with session_factory() as db:
+        orders = OrderRepository(db).get_by_user(1, since=datetime(2024, 2, 1))
+        assert [order.id for order in orders] == order_ids[:0:-1]
+        items = OrderItemRepository(db).get_by_order(orders[-1])
+        assert [item.product_id for item in items] == [1, 2]
+        # The id sequence survived the conversion
+        order = Order(user_id=1, order_number="ORD-NEW", total_amount=1, shipping_address="x")
+        db.add(order)
+        db.commit()
+        assert order.id == order_ids[-1] + 1
+    
+    assert manager.ensure_partitions(months_ahead=0, today=date(2024, 3, 1)) == []
+    archived = manager.archive(date(2024, 2, 1), str(tmp_path))
+    
+    assert {item["name"]: item["rows"] for item in archived} == {
+        "orders_p2024_01": 1, "order_items_p2024_01": 2, "payments_p2024_01": 0,
+    }
+    with gzip.open(tmp_path / "order_items_p2024_01.csv.gz", "rt") as handle:
+        assert len(handle.read().splitlines()) == 3
+    with postgres_engine.connect() as connection:
+        assert "orders_p2024_01" not in manager.list_partitions(connection, "orders")
+        assert connection.execute(text("SELECT count(*) FROM orders")).scalar() == 3
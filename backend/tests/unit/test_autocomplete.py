@@ -0,0 +1,119 @@
+"""Tests for the autocomplete prefix index"""
+
+from app.infrastructure.services.autocomplete_index import (
+    AutocompleteIndex, normalize, tokenize
+)
+
+CATEGORIES = [(1, "Proteins"), (2, "Pre-Workout")]
+PRODUCTS = [
+    (1, "Whey Protein Isolate", "WP-ISO-001", 1),
+    (2, "Whey Protein Concentrate", "WP-CON-002", 1),
+    (3, "Pre-Workout Explosión", "PW-EXP-003", 2),
+    (4, "Casein Night Protein", "CN-004", 1),
+]
+
+
+def _index(popularity=None):
+    index = AutocompleteIndex()
+    index.build(PRODUCTS, CATEGORIES, popularity=popularity)
+    return index
+
+
+def test_normalize_strips_accents_and_case():
+    """Test that queries match regardless of accents and case"""
+    assert normalize("Explosión") == "explosion"
+    assert [entry.id for entry in _index().search("EXPLO")] == [3]
+
+
+def test_prefix_search_ranks_by_popularity():
+    """Test that matches are ordered by popularity, then id"""
+    index = _index(popularity={2: 50, 4: 10})
+    
+    assert [entry.id for entry in index.search("prot")] == [2, 4, 1]
+    assert [entry.id for entry in index.search("prot", limit=2)] == [2, 4]
+
+
+def test_multi_word_query_requires_every_word():
+    """Test that earlier words must also prefix-match a term"""
+    index = _index()
+    
+    assert [entry.id for entry in index.search("whey iso")] == [1]
+    assert [entry.id for entry in index.search("casein whey")] == []
+
+
+def test_sku_and_category_terms():
+    """Test lookups by SKU (with or without separators) and category name"""
+    index = _index()
+    
+    assert [entry.id for entry in index.search("wpiso")] == [1]
+    assert [entry.id for entry in index.search("CN-00")] == [4]
+    assert {entry.id for entry in index.search("proteins")} == {1, 2, 4}
+    assert index.search_categories("work") == [(2, "Pre-Workout")]
+
+
+def test_incremental_upsert_and_deactivate():
+    """Test that product writes are reflected without a rebuild"""
+    index = _index(popularity={1: 5})
+    
+    index.upsert_product(5, "Whey Gold Standard", "WG-005", 1)
+    assert 5 in [entry.id for entry in index.search("whey")]
+    
+    index.upsert_product(1, "Isolate Zero", "WP-ISO-001", 1)
+    assert 1 not in [entry.id for entry in index.search("whey")]
+    assert index.search("zero")[0].popularity == 5
+    
+    index.upsert_product(1, "Isolate Zero", "WP-ISO-001", 1, is_active=False)
+    assert index.search("zero") == []
+    assert "zero" not in index._terms
+    assert len(index) == 4
+
+
+def _brute_force(rows, popularity, query, limit=10):
+    """Expected results of a query, by scanning every product"""
+    words = tokenize(query)
+    matches = [
+        (-popularity.get(product_id, 0), product_id)
+        for product_id, name, sku, _ in rows
+        if all(
+            any(term.startswith(word) for term in tokenize(name) + tokenize(sku)
+                + ["".join(tokenize(sku))])
+            for word in words
+        )
+    ]
+    return [product_id for _, product_id in sorted(matches)[:limit]]
+
+
+def test_broad_prefixes_match_full_scan():
+    """Test that broad-prefix key arrays stay exact across writes"""
+    index = AutocompleteIndex()
+    rows = [(i, f"Item {i}", f"SKU-{i:05d}", 3) for i in range(1, 501)]
+    popularity = {i: i % 37 for i in range(1, 501)}
+    index.build(rows, CATEGORIES, popularity=popularity)
+    queries = ("s", "sku", "sku0", "1", "i", "item 1", "sku 00", "3 item", "sku00 4")
+    
+    for query in queries:
+        assert [entry.id for entry in index.search(query)] == \
+            _brute_force(rows, popularity, query), query
+    assert "sku0" in index._prefix_keys
+    
+    index.upsert_product(501, "Item Bestseller", "SKU-00501", 3)
+    index.upsert_product(7, "Renamed", "OTHER-7", 3, is_active=False)
+    rows = [row for row in rows if row[0] != 7] + [(501, "Item Bestseller", "SKU-00501", 3)]
+    for query in queries:
+        assert [entry.id for entry in index.search(query)] == \
+            _brute_force(rows, popularity, query), query
+
+
+def test_refresh_popularity_reranks_products():
+    """Test that changed units sold re-rank products, including in broad prefixes"""
+    index = AutocompleteIndex()
+    rows = [(i, f"Item {i}", f"SKU-{i:05d}", 3) for i in range(1, 301)]
+    index.build(rows, CATEGORIES, popularity={i: i % 11 for i in range(1, 301)})
+    
+    popularity = {250: 1000, 3: 500}
+    # Every product but those that sold nothing before (multiples of 11) changed
+    assert index.refresh_popularity(popularity) == 300 - 300 // 11
+    assert [entry.id for entry in index.search("item", limit=3)] == [250, 3, 1]
+    assert [entry.id for entry in index.search("sku0")] == _brute_force(rows, popularity, "sku0")
+    assert index.search("item 250")[0].popularity == 1000
+    assert index.refresh_popularity(popularity) == 0
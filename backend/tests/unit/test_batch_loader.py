@@ -0,0 +1,101 @@
+"""Tests for DataLoader-style batching"""
+
+import asyncio
+
+from app.infrastructure.services.batch_loader import BatchLoader, RequestLoader
+
+
+class RecordingBatchFn:
+    """Batch function returning key * 10 for keys below 100, recording its calls"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def __call__(self, keys):
+        self.calls.append(sorted(keys))
+        return {key: key * 10 for key in keys if key < 100}
+
+
+def test_loads_in_one_tick_are_one_batch():
+    """Test that concurrent loads are coalesced and deduplicated into one call"""
+    batch_fn = RecordingBatchFn()
+    loader = BatchLoader(batch_fn)
+    
+    async def scenario():
+        return await asyncio.gather(*(loader.load(key) for key in [3, 1, 2, 3]))
+    
+    assert asyncio.run(scenario()) == [30, 10, 20, 30]
+    assert batch_fn.calls == [[1, 2, 3]]
+    assert loader.stats() == {"loads": 4, "batches": 1}
+
+
+def test_missing_keys_load_as_none():
+    """Test that keys the batch function has no value for resolve to None"""
+    loader = BatchLoader(RecordingBatchFn())
+    assert asyncio.run(loader.load_many([1, 500])) == [10, None]
+
+
+def test_batches_respect_max_size():
+    """Test that a large tick is split into several batch calls"""
+    batch_fn = RecordingBatchFn()
+    loader = BatchLoader(batch_fn, max_batch_size=2)
+    assert asyncio.run(loader.load_many([1, 2, 3, 4, 5])) == [10, 20, 30, 40, 50]
+    # Batches run concurrently in the threadpool
+    assert sorted(batch_fn.calls) == [[1, 2], [3, 4], [5]]
+
+
+def test_later_ticks_are_separate_batches():
+    """Test that loads after a batch resolved start a new batch"""
+    batch_fn = RecordingBatchFn()
+    loader = BatchLoader(batch_fn)
+    
+    async def scenario():
+        first = await loader.load(1)
+        second = await loader.load(2)
+        return first, second
+    
+    assert asyncio.run(scenario()) == (10, 20)
+    assert batch_fn.calls == [[1], [2]]
+
+
+def test_request_loader_memoizes():
+    """Test that a request loads each key once while separate requests do not share values"""
+    batch_fn = RecordingBatchFn()
+    loader = BatchLoader(batch_fn)
+    
+    async def scenario():
+        request = RequestLoader(loader)
+        await request.load_many([1, 2])
+        await request.load(1)
+        await request.load_many([2, 3])
+        await RequestLoader(loader).load(1)
+    
+    asyncio.run(scenario())
+    assert batch_fn.calls == [[1, 2], [3], [1]]
+
+
+def test_batch_errors_reach_every_caller():
+    """Test that a failing batch call fails each waiting load"""
+    def failing(keys):
+        raise RuntimeError("database unavailable")
+    
+    loader = BatchLoader(failing)
+    
+    async def scenario():
+        return await asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True)
+    
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_get_by_ids_fetches_in_one_query(db_session):
+    """Test that the repository multi-get returns only existing rows"""
+    from app.infrastructure.database.models_product import Category
+    from app.infrastructure.repositories.base_repository import BaseRepository
+    
+    db_session.add_all([Category(name=f"Category {number}") for number in range(3)])
+    db_session.commit()
+    repository = BaseRepository(db_session, Category)
+    ids = [category.id for category in repository.get_all()]
+    assert {category.id for category in repository.get_by_ids(ids[:2] + [999])} == set(ids[:2])
+    assert repository.get_by_ids([]) == []
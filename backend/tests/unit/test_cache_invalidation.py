@@ -0,0 +1,173 @@
+"""Tests for cross-worker cache invalidation"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_cache import CacheWrite
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.repositories.cache_version_repository import CacheVersionRepository
+from app.infrastructure.services.cache_invalidation import (
+    CacheInvalidationBus, Invalidation, LocalInvalidationHub, LocalInvalidationTransport,
+    MAX_WRITE_IDS, split_message
+)
+
+
+class Worker:
+    """One simulated worker: its own sessions, bus and record of invalidations"""
+    
+    def __init__(self, engine, hub):
+        self.sessions = sessionmaker(bind=engine, expire_on_commit=False)
+        self.bus = CacheInvalidationBus(LocalInvalidationTransport(hub), self.sessions)
+        self.invalidated = []
+        self.bus.subscribe("product", self.invalidated.append)
+        self.bus.install(self.sessions)
+        self.bus.transport.listen()
+
+
+@pytest.fixture
+def workers():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(
+        engine, tables=[Category.__table__, Product.__table__, CacheWrite.__table__]
+    )
+    db = sessionmaker(bind=engine)()
+    db.add(Category(id=1, name="Protein"))
+    db.commit()
+    db.close()
+    hub = LocalInvalidationHub()
+    return Worker(engine, hub), Worker(engine, hub)
+
+
+def _write_product(worker: Worker, sku: str, rollback: bool = False) -> Product:
+    db = worker.sessions()
+    product = Product(name=sku, sku=sku, price=Decimal("9.99"), stock=1, category_id=1)
+    try:
+        db.add(product)
+        if rollback:
+            db.flush()
+            db.rollback()
+        else:
+            db.commit()
+    finally:
+        db.close()
+    return product
+
+
+def test_commit_notifies_other_workers_only(workers):
+    """Test that a committed write reaches the other worker's subscribers, not the writer's"""
+    writer, reader = workers
+    product = _write_product(writer, "A-1")
+    # The writer knows its own version before the message comes back
+    assert writer.bus.latest_version("product") == 1
+    assert reader.bus.latest_version("product") == 0
+    assert reader.bus.receive() == 1
+    assert reader.invalidated == [frozenset({product.id})]
+    assert writer.bus.receive() == 1
+    assert writer.invalidated == []
+    assert writer.bus.stats["own"] == 1
+    assert reader.bus.info()["versions"] == {"product": 1}
+
+
+def test_rollback_publishes_nothing(workers):
+    """Test that a rolled back write sends no message and leaves the version alone"""
+    writer, reader = workers
+    _write_product(writer, "A-1", rollback=True)
+    assert reader.bus.receive() == 0
+    assert reader.bus.check_versions(grace=False) == []
+
+
+def test_missed_messages_are_applied_from_the_version_table(workers):
+    """Test that the version check applies writes whose messages were lost, by their ids"""
+    writer, reader = workers
+    reader.bus.transport.close()
+    first = _write_product(writer, "A-1")
+    reader.bus.transport.listen()
+    second = _write_product(writer, "A-2")
+    reader.bus.receive()
+    assert reader.invalidated == [frozenset({second.id})]
+    
+    # The first check allows for a message still in flight, the next one applies it
+    assert reader.bus.check_versions() == []
+    assert reader.bus.check_versions() == ["product"]
+    assert reader.invalidated[1] == frozenset({first.id})
+    assert reader.bus.check_versions(grace=False) == []
+    
+    reader.bus.transport.close()
+    third = _write_product(writer, "A-3")
+    fourth = _write_product(writer, "A-4")
+    assert reader.bus.check_versions(grace=False) == ["product"]
+    assert reader.invalidated[2] == frozenset({third.id, fourth.id})
+    assert reader.bus.info()["versions"] == {"product": 4}
+
+
+def test_invalidation_commits_with_the_write(workers):
+    """Test that the version row is appended in the write's transaction, never updated"""
+    writer, reader = workers
+    engine = writer.sessions.kw["bind"]
+    steps = []
+    
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        steps.append(" ".join(statement.split()[:3]))
+    
+    event.listen(engine, "before_cursor_execute", record_statement)
+    event.listen(engine, "commit", lambda conn: steps.append("COMMIT"))
+    try:
+        _write_product(writer, "A-1")
+        _write_product(writer, "A-2")
+    finally:
+        event.remove(engine, "before_cursor_execute", record_statement)
+    
+    assert steps == ["INSERT INTO products", "INSERT INTO cache_writes", "COMMIT"] * 2
+    assert writer.bus.latest_version("product") == 2
+    assert reader.bus.receive() == 2
+
+
+def test_failed_publish_rolls_back_the_write(workers, monkeypatch):
+    """Test that a write whose invalidation cannot be sent does not commit either"""
+    writer, reader = workers
+    
+    def fail(session, payloads):
+        raise RuntimeError("transport down")
+    
+    monkeypatch.setattr(writer.bus.transport, "publish", fail)
+    with pytest.raises(RuntimeError):
+        _write_product(writer, "A-1")
+    db = writer.sessions()
+    assert db.query(Product).count() == 0
+    assert db.query(CacheWrite).count() == 0
+    db.close()
+    assert reader.bus.receive() == 0
+    assert reader.bus.check_versions(grace=False) == []
+
+
+def test_pruning_keeps_each_entity_newest_write(workers):
+    """Test that old version rows are deleted but the one holding the current version"""
+    writer, reader = workers
+    for sku in ("A-1", "A-2", "A-3"):
+        _write_product(writer, sku)
+    db = writer.sessions()
+    repository = CacheVersionRepository(db)
+    assert repository.delete_before(datetime.utcnow() + timedelta(days=1)) == 2
+    assert repository.get_versions() == {"product": 3}
+    assert [version for version, _, _ in repository.get_since(0)] == [3]
+    db.close()
+
+
+def test_message_encoding_and_splitting():
+    """Test payload round trips, id chunking and whole-entity messages for huge writes"""
+    messages = split_message("w1", "product", 7, range(2500), 1700000000.5)
+    assert [len(message.ids) for message in messages] == [1000, 1000, 500]
+    assert Invalidation.decode(messages[2].encode()) == messages[2]
+    assert len(messages[0].encode()) < 8000
+    
+    whole = split_message("w1", "product", 8, range(MAX_WRITE_IDS + 1), 1700000000.0)
+    assert len(whole) == 1 and whole[0].ids is None
+    assert Invalidation.decode(whole[0].encode()).ids is None
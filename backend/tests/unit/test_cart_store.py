@@ -0,0 +1,155 @@
+"""Tests for the in-memory cart store and its write-behind persistence"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.application.orders.manage_cart import MergeGuestCartUseCase
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_cart import Cart
+from app.infrastructure.services.cart_store import (
+    CartLimitError, CartState, CartStore, LocalCartBackend, guest_cart_key, user_cart_key
+)
+
+USER = user_cart_key(1)
+
+
+@pytest.fixture
+def session_factory():
+    # One connection, so the write-behind thread sees the same in-memory database
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine, tables=[Cart.__table__])
+    return sessionmaker(bind=engine)
+
+
+def _store(session_factory, **options) -> CartStore:
+    return CartStore(LocalCartBackend(max_lines=3, max_quantity=10), session_factory, **options)
+
+
+def test_line_operations_and_limits(session_factory):
+    """Test add/set/remove, quantity capping and the line limit"""
+    carts = _store(session_factory)
+    assert carts.add(USER, 7, 2) == 2
+    assert carts.add(USER, 7, 20) == 10
+    carts.set(USER, 8, 1)
+    carts.add(USER, 9, 1)
+    with pytest.raises(CartLimitError):
+        carts.add(USER, 10, 1)
+    carts.remove(USER, 8)
+    state = carts.get(USER)
+    assert state.items == {7: 10, 9: 1}
+    assert state.version == 5
+
+
+def test_write_behind_and_read_through(session_factory):
+    """Test that nothing is written until a flush and a new process reads carts back"""
+    carts = _store(session_factory)
+    carts.add(USER, 7, 2)
+    carts.add(USER, 8, 1)
+    db = session_factory()
+    assert db.query(Cart).count() == 0
+    assert carts.flush() == 1
+    assert carts.flush() == 0
+    db.close()
+    
+    restarted = _store(session_factory)
+    state = restarted.get(USER)
+    assert state.items == {7: 2, 8: 1}
+    assert state.version == 2
+    restarted.clear(USER)
+    restarted.flush()
+    # Emptied carts keep their version across reloads
+    assert _store(session_factory).get(USER).version == 3
+
+
+def test_merge_guest_cart_on_login(session_factory):
+    """Test that guest lines are added to the user's cart and the guest cart emptied"""
+    carts = _store(session_factory)
+    token = "ab" * 16
+    carts.add(USER, 7, 2)
+    carts.add(guest_cart_key(token), 7, 3)
+    carts.add(guest_cart_key(token), 8, 1)
+    merged = MergeGuestCartUseCase(carts).execute(token, 1)
+    assert [(item.product_id, item.quantity) for item in merged.items] == [(7, 5), (8, 1)]
+    assert carts.get(guest_cart_key(token)).items == {}
+
+
+def test_merge_is_atomic_with_concurrent_adds(session_factory):
+    """Test that lines added to the user's cart during merges are never lost"""
+    carts = CartStore(LocalCartBackend(max_lines=500, max_quantity=10**6), session_factory)
+    token = "cd" * 16
+    
+    def add_to_user():
+        for _ in range(2000):
+            carts.add(USER, 7, 1)
+    
+    adder = threading.Thread(target=add_to_user)
+    adder.start()
+    for _ in range(200):
+        carts.add(guest_cart_key(token), 7, 1)
+        carts.merge(guest_cart_key(token), USER)
+    adder.join()
+    
+    assert carts.get(USER).items == {7: 2200}
+
+
+def test_reads_block_until_the_cart_is_held(session_factory):
+    """Test that only the first access to a cart needs the threadpool"""
+    carts = _store(session_factory)
+    assert carts.would_block(USER)
+    carts.get(USER)
+    assert not carts.would_block(USER)
+
+
+def test_failed_flushes_are_logged_and_retried(session_factory, caplog):
+    """Test that the write-behind thread logs a failing flush and writes the carts later"""
+    failing = threading.Event()
+    failing.set()
+    
+    def flaky_session():
+        if failing.is_set():
+            raise RuntimeError("database unavailable")
+        return session_factory()
+    
+    carts = _store(flaky_session, flush_interval=0.01)
+    carts.backend.insert_if_absent(USER, CartState(), time.time())
+    carts.add(USER, 7, 1)
+    with caplog.at_level(logging.ERROR, logger="app.carts"):
+        carts.start()
+        deadline = time.monotonic() + 5
+        while not caplog.records and time.monotonic() < deadline:
+            time.sleep(0.01)
+        failing.clear()
+        carts.stop()
+    
+    assert "Writing carts to the table failed" in caplog.text
+    assert _store(session_factory).get(USER).items == {7: 1}
+
+
+def test_sweep_evicts_idle_carts_and_expires_rows(session_factory):
+    """Test that sweeps keep recent carts, evict idle ones and delete expired rows"""
+    carts = _store(session_factory, idle_seconds=60, expiry_days=30)
+    carts.add(user_cart_key(1), 7, 1)
+    carts.add(user_cart_key(2), 7, 1)
+    # Cart 1 went idle an hour ago
+    carts.backend._carts[user_cart_key(1)].touched_at = time.time() - 3600
+    db = session_factory()
+    db.add(Cart(key=user_cart_key(3), items="{}", version=1,
+                updated_at=datetime.now() - timedelta(days=31)))
+    db.commit()
+    
+    assert carts.sweep() == 1
+    assert user_cart_key(1) not in carts.backend
+    assert user_cart_key(2) in carts.backend
+    assert {key for key, in db.query(Cart.key)} == {user_cart_key(1), user_cart_key(2)}
+    db.close()
+    # The evicted cart is read back on next use
+    assert carts.get(user_cart_key(1)).items == {7: 1}
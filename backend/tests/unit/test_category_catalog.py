@@ -0,0 +1,83 @@
+"""Tests for the in-memory category catalog"""
+
+from app.infrastructure.services.category_catalog import CategoryCatalog
+
+# (id, name, description, icon, parent_id)
+CATEGORIES = [
+    (1, "Protein", None, None, None),
+    (2, "Whey", None, None, 1),
+    (3, "Casein", None, None, 1),
+    (4, "Vitamins", None, None, None),
+    (5, "Isolate", None, None, 2),
+]
+# (id, category_id, status)
+PRODUCTS = [
+    (10, 2, "active"),
+    (11, 2, "active"),
+    (12, 5, "active"),
+    (13, 3, "inactive"),
+    (14, 4, "active"),
+]
+
+
+def _catalog() -> CategoryCatalog:
+    catalog = CategoryCatalog()
+    catalog.build(CATEGORIES, PRODUCTS)
+    return catalog
+
+
+def test_build_counts_active_products():
+    """Test that only active products are counted, per category"""
+    snapshot = _catalog().snapshot
+    assert snapshot.version == 1
+    assert 5 in snapshot and 99 not in snapshot
+    assert [snapshot.product_count(i) for i in range(1, 6)] == [0, 2, 0, 1, 1]
+
+
+def test_tree_structure_and_subtree_counts():
+    """Test that children are ordered by name and subtree counts include descendants"""
+    snapshot = _catalog().snapshot
+    assert snapshot.children[None] == (1, 4)
+    assert snapshot.children[1] == (3, 2)
+    assert snapshot.subtree_product_counts[1] == 3
+    assert snapshot.subtree_product_counts[2] == 3
+    assert snapshot.subtree_product_counts[5] == 1
+    assert snapshot.subtree_product_counts[4] == 1
+
+
+def test_product_writes_adjust_counts_incrementally():
+    """Test that product creates, moves, deactivations and deletes update the counts"""
+    catalog = _catalog()
+    catalog.upsert_product(20, 4, "active")
+    catalog.upsert_product(10, 3, "active")
+    catalog.upsert_product(11, 2, "discontinued")
+    catalog.upsert_product(13, 3, "active")
+    catalog.remove_product(14)
+    snapshot = catalog.snapshot
+    assert [snapshot.product_count(i) for i in range(1, 6)] == [0, 0, 2, 1, 1]
+    assert catalog.stats()["active_products"] == 4
+
+
+def test_writes_swap_versions_without_touching_old_snapshots():
+    """Test that each change publishes a new version and earlier snapshots stay consistent"""
+    catalog = _catalog()
+    before = catalog.snapshot
+    catalog.upsert_product(20, 4, "active")
+    counted = catalog.snapshot
+    catalog.upsert_category(6, "Creatine")
+    after = catalog.snapshot
+    assert after.version == before.version + 2
+    assert before.product_count(4) == 1 and 6 not in before
+    assert after.product_count(4) == 2 and after.children[None] == (6, 1, 4)
+    # Product writes share the category maps; category writes share the counts
+    assert counted.categories is before.categories
+    assert after.product_counts is counted.product_counts
+
+
+def test_unchanged_product_does_not_bump_version():
+    """Test that rewriting a product without moving it keeps the snapshot"""
+    catalog = _catalog()
+    snapshot = catalog.snapshot
+    catalog.upsert_product(10, 2, "active")
+    catalog.upsert_product(13, 3, "inactive")
+    assert catalog.snapshot is snapshot
@@ -0,0 +1,191 @@
+"""Tests for connection hold times of pooled sessions and the pool metrics"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api.v1.routing import SessionReleasingRoute
+from app.application.auth import login as login_module
+from app.application.auth.login import LoginUseCase
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_coupon import Coupon
+from app.infrastructure.database.models_token import TokenFamily
+from app.infrastructure.database.models_user import User
+from app.infrastructure.database.pool import (
+    MeteredQueuePool, PooledSession, add_request_session
+)
+from app.infrastructure.repositories.coupon_repository import CouponRepository
+from app.schemas.auth_schemas import TokenRequest
+
+
+@pytest.fixture
+def pool_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=MeteredQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.2,
+    )
+    Base.metadata.create_all(engine, tables=[Coupon.__table__])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def sessions(pool_engine):
+    return sessionmaker(
+        bind=pool_engine, class_=PooledSession, autoflush=False, expire_on_commit=False
+    )
+
+
+def _coupon(code: str) -> Coupon:
+    return Coupon(code=code, discount_percentage=10,
+                  valid_from=datetime(2020, 1, 1), valid_until=datetime(2099, 1, 1))
+
+
+def test_reads_share_one_transaction_until_released(pool_engine, sessions):
+    """Test that reads keep their transaction, and release() returns the connection once"""
+    db = sessions()
+    repository = CouponRepository(db)
+    repository.create({"code": "SAVE10", "discount_percentage": 10,
+                       "valid_from": datetime(2020, 1, 1), "valid_until": datetime(2099, 1, 1)})
+    coupon = repository.get_by_code("SAVE10")
+    assert [found.code for found in repository.get_active_coupons()] == ["SAVE10"]
+    assert pool_engine.pool.checkedout() == 1
+    
+    assert db.release() is True
+    assert pool_engine.pool.checkedout() == 0
+    assert coupon.code == "SAVE10" and coupon.current_uses == 0
+    assert db.release() is False
+    db.close()
+
+
+def test_writes_and_held_connections_are_not_released(pool_engine, sessions):
+    """Test that pending changes, writes, direct connection use and streams are not released"""
+    db = sessions()
+    db.add(_coupon("NEW"))
+    db.scalars(select(Coupon)).all()
+    assert db.release() is False
+    # The added coupon is neither committed nor lost
+    assert pool_engine.pool.checkedout() == 1 and db.new
+    db.commit()
+    assert pool_engine.pool.checkedout() == 0
+    
+    coupon = db.scalars(select(Coupon)).first()
+    coupon.current_uses = 1
+    db.flush()
+    assert db.release() is False
+    db.commit()
+    
+    db.connection()
+    assert db.release() is False
+    db.rollback()
+    for _ in db.scalars(select(Coupon).execution_options(yield_per=10)):
+        assert db.release() is False
+    db.rollback()
+    assert pool_engine.pool.checkedout() == 0
+    assert db.scalars(select(Coupon.current_uses)).one() == 1
+    db.close()
+
+
+def test_route_releases_reads_before_serializing(pool_engine, sessions):
+    """Test that a route's sessions return their connection before the response is rendered"""
+    rendered_with = []
+    
+    class RecordingResponse(JSONResponse):
+        def render(self, content) -> bytes:
+            rendered_with.append(pool_engine.pool.checkedout())
+            return super().render(content)
+    
+    def get_session():
+        db = sessions()
+        add_request_session(db)
+        try:
+            yield db
+        finally:
+            db.close()
+    
+    router = APIRouter(route_class=SessionReleasingRoute)
+    
+    @router.get("/coupons", response_class=RecordingResponse)
+    def list_coupons(db: Session = Depends(get_session)):
+        first = [coupon.code for coupon in db.scalars(select(Coupon))]
+        second = [coupon.code for coupon in db.scalars(select(Coupon))]
+        return {"codes": first + second}
+    
+    @router.post("/coupons", response_class=RecordingResponse)
+    async def add_coupon(db: Session = Depends(get_session)):
+        db.add(_coupon("ROUTE"))
+        db.flush()
+        return {"added": True}
+    
+    app = FastAPI()
+    app.include_router(router)
+    
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.get("/coupons")).json() == {"codes": []}
+            # Left uncommitted by the endpoint: still held, then rolled back by the teardown
+            assert (await client.post("/coupons")).json() == {"added": True}
+    
+    asyncio.run(scenario())
+    assert rendered_with == [0, 1]
+    assert pool_engine.pool.checkedout() == 0
+
+
+def test_login_holds_no_connection_while_checking_the_password(
+    pool_engine, sessions, monkeypatch
+):
+    """Test that the user lookup's transaction ends before the password hash is checked"""
+    Base.metadata.create_all(pool_engine, tables=[User.__table__, TokenFamily.__table__])
+    with sessions() as db:
+        db.add(User(id=7, email="seven@example.com", username="seven", hashed_password="x"))
+        db.commit()
+    checked_out = []
+    
+    def verify_password(password, hashed_password):
+        checked_out.append(pool_engine.pool.checkedout())
+        return True
+    
+    monkeypatch.setattr(login_module, "verify_password", verify_password)
+    db = sessions()
+    LoginUseCase(db).execute(TokenRequest(email="seven@example.com", password="secret"))
+    
+    assert checked_out == [0]
+    assert pool_engine.pool.checkedout() == 0
+    assert db.scalars(select(TokenFamily.user_id)).all() == [7]
+    db.close()
+
+
+def test_metrics_record_waits_holds_and_timeouts(pool_engine, sessions):
+    """Test that a checkout blocked by a held connection is timed, and a timeout counted"""
+    metrics = pool_engine.pool.metrics
+    checkouts = metrics.stats["checkouts"]
+    holder = pool_engine.connect()
+    
+    def release_later():
+        time.sleep(0.05)
+        holder.close()
+    
+    threading.Thread(target=release_later).start()
+    with pool_engine.connect():
+        pass
+    info = metrics.info(pool_engine.pool)
+    assert info["checkouts"] == checkouts + 2 and info["waited"] == 1
+    assert info["wait_p99_ms"] >= 40
+    assert info["hold_p99_ms"] >= 40
+    
+    holder = pool_engine.connect()
+    with pytest.raises(PoolTimeoutError):
+        sessions().scalars(select(Coupon)).all()
+    holder.close()
+    assert metrics.info(pool_engine.pool)["timeouts"] == 1
+    assert metrics.info(pool_engine.pool)["checked_out"] == 0
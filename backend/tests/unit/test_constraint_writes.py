@@ -0,0 +1,146 @@
+"""Tests for constraint-driven writes"""
+
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.application.users.create_user import CreateUserUseCase
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.database.models_user import User
+from app.infrastructure.repositories.base_repository import BaseRepository
+from app.infrastructure.repositories.integrity import (
+    FOREIGN_KEY, UNIQUE, constraint_columns, translate_integrity_error
+)
+from app.schemas.user_schemas import UserCreate
+from app.utils.exceptions import DuplicateResourceError, ResourceNotFoundError
+
+
+class SkuUpdate(BaseModel):
+    sku: Optional[str] = None
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite:///:memory:")
+    
+    @event.listens_for(engine, "connect")
+    def enable_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+    
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def statements(engine):
+    """SELECT/INSERT/UPDATE statements executed"""
+    executed = []
+    event.listen(
+        engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: executed.append(statement.split()[0]),
+    )
+    return executed
+
+
+def _product(**overrides) -> dict:
+    values = {
+        "sku": "WHEY-1", "name": "Whey", "price": 29.9, "stock": 5, "category_id": 1,
+    }
+    values.update(overrides)
+    return values
+
+
+def _user(**overrides) -> UserCreate:
+    values = {"email": "ana@example.com", "username": "ana", "password": "secret-password"}
+    values.update(overrides)
+    return UserCreate(**values)
+
+
+def test_create_user_is_one_insert(db, statements):
+    """Test that creating a user runs no pre-check query"""
+    CreateUserUseCase(db).execute(_user())
+    assert statements == ["INSERT", "SELECT"]  # insert, then refresh
+    assert db.query(User).count() == 1
+
+
+@pytest.mark.parametrize("field, overrides", [
+    ("email", {"username": "other"}),
+    ("username", {"email": "other@example.com"}),
+])
+def test_duplicate_user_names_the_field(db, field, overrides):
+    """Test that a taken email or username raises DuplicateResourceError for that field"""
+    CreateUserUseCase(db).execute(_user())
+    with pytest.raises(DuplicateResourceError) as error:
+        CreateUserUseCase(db).execute(_user(**overrides))
+    assert error.value.field == field
+    assert db.query(User).count() == 1
+
+
+def test_unknown_category_raises_not_found(db):
+    """Test that the category foreign key rejects unknown categories"""
+    with pytest.raises(ResourceNotFoundError) as error:
+        BaseRepository(db, Product).create(_product(category_id=999))
+    assert error.value.field == "category_id"
+    assert str(error.value) == "Category with ID 999 not found"
+
+
+def test_duplicate_sku_on_create_and_update(db, statements):
+    """Test that the SKU unique constraint rejects duplicates on insert and update"""
+    db.add(Category(id=1, name="Protein"))
+    db.commit()
+    repository = BaseRepository(db, Product)
+    repository.create(_product())
+    other = repository.create(_product(sku="WHEY-2"))
+    
+    with pytest.raises(DuplicateResourceError) as error:
+        repository.create(_product())
+    assert error.value.field == "sku"
+    assert "'WHEY-1'" in str(error.value)
+    
+    with pytest.raises(DuplicateResourceError) as error:
+        repository.update(other.id, SkuUpdate(sku="WHEY-1"))
+    assert error.value.field == "sku"
+    
+    # The session is usable after the rollback
+    assert repository.update(other.id, SkuUpdate(sku="WHEY-3")).sku == "WHEY-3"
+
+
+def test_postgresql_constraint_names_map_to_fields():
+    """Test that PostgreSQL constraint names identify the column"""
+    assert constraint_columns(User.__table__)["ix_users_email"] == (UNIQUE, "email")
+    assert constraint_columns(Product.__table__)["products_category_id_fkey"] == (
+        FOREIGN_KEY, "category_id"
+    )
+    
+    original = SimpleNamespace(
+        pgcode="23505", diag=SimpleNamespace(constraint_name="ix_users_username")
+    )
+    error = translate_integrity_error(
+        IntegrityError("INSERT", {}, original), User, {"username": "ana"}
+    )
+    assert isinstance(error, DuplicateResourceError)
+    assert error.field == "username"
+
+
+def test_other_violations_are_raised_untranslated(db):
+    """Test that a violation without a domain error reaches the caller as it was raised"""
+    original = SimpleNamespace(pgcode="23502", diag=SimpleNamespace(constraint_name=None))
+    error = IntegrityError("INSERT", {}, original)
+    assert translate_integrity_error(error, User, {}) is error
+    
+    with pytest.raises(IntegrityError, match="NOT NULL") as raised:
+        BaseRepository(db, Category).create({"name": None})
+    assert raised.value.__cause__ is not raised.value
@@ -0,0 +1,74 @@
+"""Tests for streaming admin exports"""
+
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.application.exports.stream_export import StreamExportUseCase, open_export
+from app.infrastructure.database.models_product import Product, Category, ProductStatusEnum
+from app.infrastructure.database.models_user import User, UserRoleEnum
+
+
+def _create_products(db_session: Session, count: int) -> None:
+    db_session.add(Category(id=1, name="Proteins"))
+    for i in range(1, count + 1):
+        db_session.add(Product(
+            id=i, name=f"Whey {i}", price=Decimal("19.99"), stock=i, sku=f"SKU-{i}",
+            category_id=1, status=ProductStatusEnum.ACTIVE,
+            created_at=datetime(2024, 1, 2, 3, 4, 5),
+        ))
+    db_session.commit()
+
+
+def test_csv_export_streams_one_chunk_per_batch(db_session: Session):
+    """Test that rows are written batch by batch with converted values"""
+    _create_products(db_session, 25)
+    
+    chunks = list(StreamExportUseCase(db_session, batch_size=10).execute("products", "csv"))
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    
+    assert len(chunks) == 3
+    assert rows[0][:4] == ["id", "sku", "name", "price"]
+    assert len(rows) == 26
+    assert rows[1][:4] == ["1", "SKU-1", "Whey 1", "19.99"]
+    assert rows[1][6:8] == ["active", "2024-01-02T03:04:05"]
+
+
+def test_ndjson_export_is_gzip_compressible(db_session: Session):
+    """Test NDJSON output through the gzip stream"""
+    _create_products(db_session, 5)
+    
+    chunks = StreamExportUseCase(db_session, batch_size=2).execute(
+        "products", "ndjson", compress=True
+    )
+    lines = gzip.decompress(b"".join(chunks)).decode().splitlines()
+    
+    assert [json.loads(line)["id"] for line in lines] == [1, 2, 3, 4, 5]
+    assert json.loads(lines[0])["price"] == "19.99"
+
+
+def test_user_export_leaves_out_password_hashes(db_session: Session):
+    """Test that user exports only contain the projected columns"""
+    db_session.add(User(
+        email="a@b.com", username="a", hashed_password="secret-hash", role=UserRoleEnum.ADMIN
+    ))
+    db_session.commit()
+    
+    output = b"".join(StreamExportUseCase(db_session).execute("users", "ndjson"))
+    
+    assert b"secret-hash" not in output
+    assert json.loads(output)["role"] == "admin"
+
+
+def test_unknown_export_is_rejected_before_streaming():
+    """Test that invalid requests fail before a session is opened"""
+    with pytest.raises(ValueError):
+        open_export("payments", "csv", session_factory=lambda: pytest.fail("session opened"))
+    with pytest.raises(ValueError):
+        open_export("orders", "xml", session_factory=lambda: pytest.fail("session opened"))
@@ -0,0 +1,77 @@
+"""Tests for the in-memory facet index"""
+
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.infrastructure.services.facet_index import FacetIndex
+
+# (id, category_id, price, stock, status)
+ROWS = [
+    (1, 1, Decimal("19.99"), 10, "active"),
+    (2, 1, Decimal("49.99"), 0, "active"),
+    (3, 2, Decimal("75.00"), 5, "active"),
+    (4, 2, Decimal("250.00"), 3, "inactive"),
+    (5, 3, Decimal("24.99"), 0, "discontinued"),
+]
+
+
+def _index():
+    index = FacetIndex()
+    index.build(ROWS)
+    return index
+
+
+def test_counts_without_filters_cover_active_products():
+    """Test default counts (active products only)"""
+    counts = _index().counts()
+    
+    assert counts["total"] == 3
+    assert counts["categories"] == {1: 2, 2: 1}
+    assert [count for _, _, count in counts["price_ranges"]] == [1, 1, 1, 0, 0]
+    assert counts["in_stock"] == {True: 2, False: 1}
+    assert counts["status"] == {"active": 3, "inactive": 1, "discontinued": 1}
+
+
+def test_each_facet_ignores_its_own_filter():
+    """Test that facet counts apply every filter except their own"""
+    counts = _index().counts(category_ids=[1], in_stock=True)
+    
+    assert counts["total"] == 1
+    # Other categories still show what choosing them would give
+    assert counts["categories"] == {1: 1, 2: 1}
+    assert counts["in_stock"] == {True: 1, False: 1}
+
+
+def test_unknown_and_negative_categories_match_nothing():
+    """Test that category ids outside the index select no products"""
+    index = _index()
+    
+    assert index.counts(category_ids=[-1])["total"] == 0
+    assert index.counts(category_ids=[-3, 99, 2])["total"] == 1
+
+
+def test_price_range_filter_is_inclusive():
+    """Test min/max price bounds"""
+    index = _index()
+    
+    assert index.counts(min_price=Decimal("19.99"), max_price=Decimal("49.99"))["total"] == 2
+    assert index.counts(min_price=Decimal("50"), status=None)["total"] == 2
+
+
+def test_incremental_updates():
+    """Test upserts, growth past capacity and removals"""
+    index = _index()
+    index.upsert_product(2, 1, Decimal("49.99"), 7, "active")
+    index.upsert_product(4, 2, Decimal("250.00"), 3, "active")
+    index.remove_product(1)
+    for product_id in range(100, 2100):
+        index.upsert_product(product_id, 9, Decimal("5.00"), 1, "active")
+    
+    counts = index.counts(category_ids=[1, 2])
+    assert counts["total"] == 3
+    assert counts["in_stock"] == {True: 3, False: 0}
+    assert counts["categories"] == {1: 1, 2: 2, 9: 2000}
+    assert len(index) == 2004
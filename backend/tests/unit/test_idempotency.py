@@ -0,0 +1,185 @@
+"""Tests for Idempotency-Key support"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.middleware.idempotency import IdempotencyMiddleware
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_idempotency import IdempotencyKey
+from app.infrastructure.services.idempotency_store import (
+    InMemoryIdempotencyStore, DatabaseIdempotencyStore, IdempotencyRecord
+)
+
+
+def _build_app(store) -> tuple[FastAPI, dict]:
+    """App with a slow endpoint that counts executions"""
+    calls = {"count": 0}
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, store=store, wait_timeout=5)
+    
+    @app.post("/items")
+    async def create_item(item: dict):
+        calls["count"] += 1
+        await asyncio.sleep(0.05)
+        return {"id": calls["count"], **item}
+    
+    return app, calls
+
+
+@pytest.fixture
+def database_store():
+    """Database-backed store on an in-memory database shared across threads"""
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return DatabaseIdempotencyStore(sessionmaker(bind=engine))
+
+
+@pytest.mark.parametrize("store_name", ["memory", "database"])
+def test_retry_replays_stored_response(store_name, request):
+    """Test that a retried request skips the endpoint and replays the response"""
+    store = InMemoryIdempotencyStore() if store_name == "memory" else request.getfixturevalue(
+        "database_store"
+    )
+    app, calls = _build_app(store)
+    
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"Idempotency-Key": "abc"}
+            first = await client.post("/items", json={"name": "whey"}, headers=headers)
+            second = await client.post("/items", json={"name": "whey"}, headers=headers)
+            return first, second
+    
+    first, second = asyncio.run(scenario())
+    
+    assert calls["count"] == 1
+    assert second.status_code == first.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+
+
+def test_concurrent_duplicates_wait_for_first_execution():
+    """Test that concurrent duplicates run the endpoint only once"""
+    app, calls = _build_app(InMemoryIdempotencyStore())
+    
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[
+                client.post("/items", json={"name": "whey"}, headers={"Idempotency-Key": "k"})
+                for _ in range(10)
+            ])
+    
+    responses = asyncio.run(scenario())
+    
+    assert calls["count"] == 1
+    assert {response.json()["id"] for response in responses} == {1}
+
+
+def test_streaming_response_is_delivered_and_stored_whole():
+    """Test that a streamed response is not cut off as if the client had disconnected"""
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, store=InMemoryIdempotencyStore(), wait_timeout=5)
+    
+    @app.post("/export")
+    async def export():
+        async def rows():
+            for index in range(5):
+                await asyncio.sleep(0.01)
+                yield f"row {index}\n"
+        
+        return StreamingResponse(rows(), media_type="text/plain")
+    
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"Idempotency-Key": "export"}
+            first = await client.post("/export", headers=headers)
+            second = await client.post("/export", headers=headers)
+            return first, second
+    
+    first, second = asyncio.run(scenario())
+    
+    expected = "".join(f"row {index}\n" for index in range(5))
+    assert first.text == second.text == expected
+    assert second.headers["idempotent-replayed"] == "true"
+
+
+def test_key_reuse_with_different_body_is_rejected():
+    """Test that reusing a key for a different request returns 422"""
+    app, calls = _build_app(InMemoryIdempotencyStore())
+    
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"Idempotency-Key": "abc"}
+            await client.post("/items", json={"name": "whey"}, headers=headers)
+            return await client.post("/items", json={"name": "creatine"}, headers=headers)
+    
+    response = asyncio.run(scenario())
+    
+    assert response.status_code == 422
+    assert calls["count"] == 1
+
+
+@pytest.mark.parametrize("store_name", ["memory", "database"])
+def test_abandoned_claim_expires_after_its_lease(store_name, request):
+    """Test that a key claimed by a request that never finished is free after the lease"""
+    store = InMemoryIdempotencyStore() if store_name == "memory" else request.getfixturevalue(
+        "database_store"
+    )
+    assert store.claim("k", "fingerprint", 1) is None
+    assert store.claim("k", "fingerprint", 1).status == "in_progress"
+    
+    time.sleep(1.1)
+    
+    assert store.claim("k", "fingerprint", 1) is None
+    store.complete("k", IdempotencyRecord(fingerprint="fingerprint", status_code=201), 3600)
+    time.sleep(1.1)
+    assert store.claim("k", "fingerprint", 1).status_code == 201
+
+
+def test_racing_takeovers_of_an_expired_claim_let_one_worker_in(tmp_path):
+    """Test that of two workers taking over the same expired key only one gets the claim"""
+    # A file database, so each thread has its own connection as each worker would
+    engine = create_engine(f"sqlite:///{tmp_path / 'keys.db'}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    stores = [DatabaseIdempotencyStore(session_factory) for _ in range(2)]
+    
+    for attempt in range(20):
+        key = f"expired-{attempt}"
+        with session_factory() as db:
+            db.add(IdempotencyKey(
+                key=key, fingerprint="old", status="in_progress",
+                expires_at=datetime.utcnow() - timedelta(seconds=1),
+            ))
+            db.commit()
+        start = threading.Barrier(2)
+        results = []
+        
+        def claim(store):
+            start.wait()
+            results.append(store.claim(key, "fingerprint", 60))
+        
+        threads = [threading.Thread(target=claim, args=(store,)) for store in stores]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert sum(result is None for result in results) == 1
+        [other] = [result for result in results if result is not None]
+        assert other.fingerprint == "fingerprint" and other.status == "in_progress"
@@ -0,0 +1,125 @@
+"""Tests for product image storage, processing and uploads"""
+
+import asyncio
+import hashlib
+import io
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.application.images.upload_image import (
+    ListProductImagesUseCase, UploadProductImageUseCase
+)
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_image import ImageAsset
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.services.image_processing import (
+    ImageProcessor, ProcessedImage, process_image
+)
+from app.infrastructure.services.image_storage import (
+    InMemoryImageStorage, LocalImageStorage, image_key, is_valid_key
+)
+from app.utils.exceptions import InvalidImageError, ResourceNotFoundError
+
+HASH = "ab" * 32
+
+
+class CountingProcessor(ImageProcessor):
+    """Processor that records its jobs instead of decoding images"""
+    
+    def __init__(self):
+        super().__init__()
+        self.jobs = 0
+    
+    async def _run(self, loop, data: bytes) -> ProcessedImage:
+        self.jobs += 1
+        await asyncio.sleep(0.01)
+        return ProcessedImage(format="PNG", width=4, height=3,
+                              variants={"w160.png": b"small", "w160.webp": b"small"})
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Category(id=1, name="Protein"))
+    session.add_all([
+        Product(id=product_id, sku=f"SKU-{product_id}", name="Whey", price=30, category_id=1)
+        for product_id in (1, 2)
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_keys_reject_path_tricks():
+    """Test that only <sha256>/<variant>.<ext> keys are accepted"""
+    assert is_valid_key(image_key(HASH, "w480.webp"))
+    assert not is_valid_key(image_key(HASH, "../../etc/passwd"))
+    assert not is_valid_key(image_key("ab", "w480.webp"))
+    assert not is_valid_key(image_key(HASH, "w480.gif"))
+
+
+def test_local_storage_writes_each_key_once(tmp_path):
+    """Test that the local store is content addressed and skips stored keys"""
+    storage = LocalImageStorage(str(tmp_path))
+    key = image_key(HASH, "w160.jpg")
+    assert storage.put(key, b"first")
+    assert not storage.put(key, b"second")
+    assert storage.get(key) == b"first"
+    assert storage.local_path(key) == str(tmp_path / "ab" / HASH / "w160.jpg")
+    assert storage.get(image_key(HASH, "w480.jpg")) is None
+    with pytest.raises(ValueError):
+        storage.put("../escape.jpg", b"x")
+
+
+def test_upload_dedupes_by_content_hash(db):
+    """Test that one image uploaded concurrently and to two products is processed once"""
+    storage = InMemoryImageStorage()
+    processor = CountingProcessor()
+    data = b"not really a png"
+    
+    async def upload(product_id: int):
+        return await UploadProductImageUseCase(db, storage, processor).execute(product_id, data)
+    
+    async def scenario():
+        return await asyncio.gather(upload(1), upload(1), upload(2))
+    
+    first, again, other = asyncio.run(scenario())
+    content_hash = hashlib.sha256(data).hexdigest()
+    assert processor.jobs == 1
+    assert processor.stats()["coalesced"] == 2
+    assert first.id == again.id and other.product_id == 2
+    assert db.query(ImageAsset).count() == 1
+    assert storage.get(image_key(content_hash, "original.png")) == data
+    assert first.urls["w160.webp"].endswith(f"/images/{content_hash}/w160.webp")
+    assert [image.id for image in ListProductImagesUseCase(db).execute(1)] == [first.id]
+
+
+def test_upload_rejections(db):
+    """Test that empty uploads and unknown products are refused before processing"""
+    processor = CountingProcessor()
+    use_case = UploadProductImageUseCase(db, InMemoryImageStorage(), processor)
+    with pytest.raises(InvalidImageError):
+        asyncio.run(use_case.execute(1, b""))
+    with pytest.raises(ResourceNotFoundError):
+        asyncio.run(use_case.execute(99, b"data"))
+    assert processor.jobs == 0
+
+
+def test_process_image_variants():
+    """Test that a decoded photo yields thumbnails no larger than each size"""
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.new("RGB", (1200, 800), "orange").save(buffer, "JPEG")
+    processed = process_image(buffer.getvalue(), (160, 480), 80, 40_000_000)
+    assert (processed.format, processed.width, processed.height) == ("JPEG", 1200, 800)
+    assert set(processed.variants) == {
+        "full.webp", "w480.jpg", "w480.webp", "w160.jpg", "w160.webp"
+    }
+    with Image.open(io.BytesIO(processed.variants["w160.jpg"])) as thumbnail:
+        assert max(thumbnail.size) == 160
+    with pytest.raises(InvalidImageError):
+        process_image(b"not an image", (160,), 80, 40_000_000)
@@ -0,0 +1,166 @@
+"""Tests for queue-based structured logging"""
+
+import asyncio
+import io
+import json
+import logging
+import queue
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import create_engine, text
+
+from app.api.v1.middleware.access_log import AccessLogMiddleware
+from app.core.logging import (
+    BoundedQueueHandler, JsonFormatter, LogPipeline, RequestContext, bind_request_context,
+    instrument_engine, reset_request_context,
+)
+
+
+@pytest.fixture
+def output():
+    return io.StringIO()
+
+
+@pytest.fixture
+def pipeline(output):
+    pipeline = LogPipeline(stream=output)
+    pipeline.start()
+    yield pipeline
+    pipeline.stop()
+
+
+def _records(pipeline: LogPipeline, output: io.StringIO) -> list[dict]:
+    pipeline.stop()
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def _get(pipeline: LogPipeline, path: str, headers: dict = None) -> httpx.Response:
+    app = FastAPI()
+    app.add_middleware(AccessLogMiddleware, pipeline=pipeline)
+    
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        logging.getLogger("app.test").info("loading item", extra={"item_id": item_id})
+        return {"id": item_id}
+    
+    @app.get("/missing")
+    async def missing():
+        raise HTTPException(status_code=404, detail="Not found")
+    
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers=headers or {})
+    
+    return asyncio.run(scenario())
+
+
+def test_access_record_has_request_context(pipeline, output):
+    """Test that access and application records carry request id and route"""
+    response = _get(pipeline, "/items/7", {"X-Request-ID": "abc-123"})
+    assert response.headers["x-request-id"] == "abc-123"
+    
+    records = _records(pipeline, output)
+    app_record = next(record for record in records if record["logger"] == "app.test")
+    assert app_record["request_id"] == "abc-123"
+    assert app_record["item_id"] == 7
+    
+    access = next(record for record in records if record["logger"] == "app.access")
+    assert access["request_id"] == "abc-123"
+    assert access["route"] == "/items/{item_id}"
+    assert access["status"] == 200
+    assert access["level"] == "INFO"
+    assert access["latency_ms"] >= 0
+    assert access["db_statements"] == 0
+
+
+def test_success_sampling_keeps_errors(output):
+    """Test that sampled-out success logs are counted while errors are always logged"""
+    pipeline = LogPipeline(success_sample_rate=0.0, stream=output)
+    pipeline.start()
+    _get(pipeline, "/items/1")
+    _get(pipeline, "/missing")
+    
+    access = [record for record in _records(pipeline, output) if record["logger"] == "app.access"]
+    assert [record["status"] for record in access] == [404]
+    assert access[0]["level"] == "WARNING"
+    assert pipeline.stats()["sampled_out"] == 1
+
+
+def test_full_queue_drops_and_counts():
+    """Test that a full queue drops records instead of blocking"""
+    handler = BoundedQueueHandler(queue.Queue(maxsize=2))
+    logger = logging.Logger("bounded")
+    logger.addHandler(handler)
+    for number in range(5):
+        logger.warning("record %d", number)
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_queued_records_hold_text_not_objects():
+    """Test that args and tracebacks are rendered when logged, not when written out"""
+    handler = BoundedQueueHandler(queue.Queue())
+    logger = logging.Logger("prepared")
+    logger.addHandler(handler)
+    cart = {"items": 1}
+    logger.warning("cart %s", cart)
+    cart["items"] = 2
+    try:
+        raise ValueError("bad cart")
+    except ValueError:
+        logger.exception("checkout failed")
+    
+    first, second = handler.queue.get_nowait(), handler.queue.get_nowait()
+    assert (first.msg, first.args) == ("cart {'items': 1}", None)
+    assert second.exc_info is None
+    assert second.exc_text.startswith("Traceback") and "ValueError: bad cart" in second.exc_text
+    entry = json.loads(JsonFormatter().format(second))
+    assert entry["message"] == "checkout failed"
+    assert entry["exception"] == second.exc_text
+
+
+def test_stop_with_full_queue_writes_everything_queued(output):
+    """Test that stopping the listener while the queue is full still drains it"""
+    pipeline = LogPipeline(queue_size=3, stream=output)
+    logger = logging.Logger("full")
+    logger.addHandler(pipeline.handler)
+    for number in range(5):
+        logger.warning("record %d", number)
+    assert pipeline.stats()["dropped"] == 2
+    
+    pipeline.listener.start()
+    pipeline.listener.stop()
+    assert [json.loads(line)["message"] for line in output.getvalue().splitlines()] == [
+        "record 0", "record 1", "record 2",
+    ]
+
+
+def test_database_time_accumulates_in_request_context(pipeline):
+    """Test that statements executed during a request add to its database time"""
+    engine = create_engine("sqlite:///:memory:")
+    instrument_engine(engine)
+    context = RequestContext(request_id="r1", route="/test")
+    token = bind_request_context(context)
+    try:
+        with engine.connect() as connection:
+            for _ in range(3):
+                connection.execute(text("SELECT 1"))
+    finally:
+        reset_request_context(token)
+    assert context.db_statements == 3
+    assert context.db_seconds > 0
+
+
+def test_slow_queries_are_logged(pipeline, output):
+    """Test that statements over the threshold produce a slow query record"""
+    pipeline.slow_query_ms = 0.0
+    engine = create_engine("sqlite:///:memory:")
+    instrument_engine(engine, pipeline)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 42"))
+    
+    slow = [record for record in _records(pipeline, output) if record["logger"] == "app.db"]
+    assert slow and "SELECT 42" in slow[0]["statement"]
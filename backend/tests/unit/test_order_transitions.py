@@ -0,0 +1,107 @@
+"""Tests for the order state machine and bulk status transitions"""
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.application.orders.order_status import TransitionOrdersUseCase
+from app.domain.orders.state_machine import can_transition, check_transition, source_statuses
+from app.infrastructure.database import models_user, models_product  # noqa: F401 (FK targets)
+from app.infrastructure.database.models_order import Order, OrderStatusEnum
+from app.infrastructure.repositories.order_repository import OrderStatusHistoryRepository
+from app.utils.exceptions import InvalidOrderTransitionError
+
+
+def _create_orders(db_session: Session, statuses: list[OrderStatusEnum]) -> list[int]:
+    """Create one order per status, return their ids"""
+    orders = [
+        Order(user_id=1, order_number=f"ORD-{i}", total_amount=10, shipping_address="x",
+              status=order_status)
+        for i, order_status in enumerate(statuses)
+    ]
+    db_session.add_all(orders)
+    db_session.commit()
+    return [order.id for order in orders]
+
+
+def _statuses(db_session: Session) -> dict[int, OrderStatusEnum]:
+    db_session.expire_all()
+    return {order.id: order.status for order in db_session.query(Order)}
+
+
+def test_state_machine_rules():
+    """Test allowed moves, final statuses and the sources of each target"""
+    assert can_transition("pending", "confirmed")
+    assert can_transition(OrderStatusEnum.SHIPPED, OrderStatusEnum.DELIVERED)
+    assert not can_transition("shipped", "cancelled")
+    assert not can_transition("delivered", "pending")
+    assert source_statuses("cancelled") == ["pending", "confirmed", "processing"]
+    assert source_statuses("pending") == []
+    with pytest.raises(InvalidOrderTransitionError, match="already shipped"):
+        check_transition("shipped", "shipped")
+
+
+def test_bulk_transition_reports_each_order_not_moved(db_session: Session):
+    """Test that a bulk ship moves processing orders and explains the rest"""
+    processing, pending, shipped = _create_orders(db_session, [
+        OrderStatusEnum.PROCESSING, OrderStatusEnum.PENDING, OrderStatusEnum.SHIPPED
+    ])
+    
+    result = TransitionOrdersUseCase(db_session).execute(
+        [processing, pending, processing, shipped, 999], OrderStatusEnum.SHIPPED, changed_by=7
+    )
+    
+    assert result.transitioned == [processing]
+    assert [(failure.order_id, failure.status, failure.error) for failure in result.failed] == [
+        (pending, OrderStatusEnum.PENDING, "Cannot change an order from pending to shipped"),
+        (shipped, OrderStatusEnum.SHIPPED, "Order is already shipped"),
+        (999, None, "Order not found"),
+    ]
+    assert _statuses(db_session)[processing] == OrderStatusEnum.SHIPPED
+    history = OrderStatusHistoryRepository(db_session).get_by_order(processing)
+    assert [(row.from_status, row.to_status, row.changed_by) for row in history] == [
+        (OrderStatusEnum.PROCESSING, OrderStatusEnum.SHIPPED, 7)
+    ]
+    assert OrderStatusHistoryRepository(db_session).get_by_order(pending) == []
+
+
+def test_cancel_moves_every_source_in_batches(db_session: Session):
+    """Test that batches cover all orders and history keeps each order's own source"""
+    order_ids = _create_orders(db_session, [
+        OrderStatusEnum.PENDING, OrderStatusEnum.CONFIRMED, OrderStatusEnum.PROCESSING,
+        OrderStatusEnum.DELIVERED, OrderStatusEnum.PENDING,
+    ])
+    
+    result = TransitionOrdersUseCase(db_session, batch_size=2).execute(
+        order_ids, OrderStatusEnum.CANCELLED
+    )
+    
+    assert sorted(result.transitioned) == sorted(order_ids[:3] + order_ids[4:])
+    assert [failure.order_id for failure in result.failed] == [order_ids[3]]
+    sources = {
+        order_id: [row.from_status for row in
+                   OrderStatusHistoryRepository(db_session).get_by_order(order_id)]
+        for order_id in order_ids
+    }
+    assert sources == {
+        order_ids[0]: [OrderStatusEnum.PENDING], order_ids[1]: [OrderStatusEnum.CONFIRMED],
+        order_ids[2]: [OrderStatusEnum.PROCESSING], order_ids[3]: [],
+        order_ids[4]: [OrderStatusEnum.PENDING],
+    }
+
+
+def test_transitions_never_allowed_are_rejected(db_session: Session):
+    """Test that an impossible request fails before touching any order"""
+    order_ids = _create_orders(db_session, [OrderStatusEnum.CONFIRMED])
+    use_case = TransitionOrdersUseCase(db_session)
+    with pytest.raises(InvalidOrderTransitionError):
+        use_case.execute(order_ids, OrderStatusEnum.PENDING)
+    with pytest.raises(InvalidOrderTransitionError):
+        use_case.execute(
+            order_ids, OrderStatusEnum.DELIVERED, from_status=OrderStatusEnum.CONFIRMED
+        )
+    assert _statuses(db_session) == {order_ids[0]: OrderStatusEnum.CONFIRMED}
+    
+    result = use_case.execute(
+        order_ids, OrderStatusEnum.PROCESSING, from_status=OrderStatusEnum.CONFIRMED
+    )
+    assert result.transitioned == order_ids and result.failed == []
@@ -0,0 +1,109 @@
+"""Tests for monthly partition planning and partition-pruning queries"""
+
+from datetime import date, datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.infrastructure.database import models_user, models_product  # noqa: F401 (FK targets)
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_order import Order, OrderItem, OrderStatusEnum
+from app.infrastructure.database.partitioning import (
+    add_months, archivable, foreign_key_ddl, index_ddl, months_between, parse_partition_name,
+    partition_ddl, partition_name
+)
+from app.infrastructure.repositories.order_repository import (
+    OrderRepository, OrderItemRepository
+)
+
+
+def test_month_arithmetic_crosses_years():
+    """Test month helpers across year boundaries"""
+    assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+    assert months_between(datetime(2024, 11, 17), date(2025, 1, 1)) == [
+        date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1)
+    ]
+
+
+def test_partition_ddl_covers_one_month():
+    """Test that a partition spans exactly one calendar month"""
+    assert partition_name("order_items", date(2024, 12, 1)) == "order_items_p2024_12"
+    assert partition_ddl("orders", date(2024, 12, 1)) == (
+        "CREATE TABLE IF NOT EXISTS orders_p2024_12 PARTITION OF orders "
+        "FOR VALUES FROM ('2024-12-01') TO ('2025-01-01')"
+    )
+    assert parse_partition_name("order_items_p2024_12") == ("order_items", date(2024, 12, 1))
+    assert parse_partition_name("orders_default") is None
+
+
+def test_archivable_keeps_cutoff_month_and_default_partition():
+    """Test that only whole months before the cutoff are archived"""
+    partitions = ["orders_p2023_02", "orders_default", "orders_p2023_01", "orders_p2023_03"]
+    
+    assert archivable(partitions, date(2023, 3, 15)) == ["orders_p2023_01", "orders_p2023_02"]
+
+
+def test_partitioned_tables_drop_global_uniqueness_and_foreign_keys_to_orders():
+    """Test the index and foreign key DDL of partitioned tables"""
+    orders = Base.metadata.tables["orders"]
+    payments = Base.metadata.tables["payments"]
+    items = Base.metadata.tables["order_items"]
+    
+    assert "CREATE INDEX ix_orders_order_number ON orders (order_number)" in index_ddl(orders)
+    assert "CREATE INDEX ix_payments_order_id ON payments (order_id)" in index_ddl(payments)
+    assert foreign_key_ddl(items) == [
+        "ALTER TABLE order_items ADD FOREIGN KEY (product_id) REFERENCES products (id)"
+    ]
+    assert foreign_key_ddl(payments) == []
+
+
+def test_order_queries_filter_on_partition_key(db_session: Session):
+    """Test that history queries honour created_at bounds and return newest first"""
+    for i, month in enumerate([1, 2, 3, 4], start=1):
+        created_at = datetime(2024, month, 10)
+        db_session.add(Order(
+            id=i, user_id=1, order_number=f"ORD-{i}", total_amount=10, shipping_address="x",
+            status=OrderStatusEnum.DELIVERED, created_at=created_at,
+        ))
+        db_session.add(OrderItem(
+            order_id=i, product_id=1, quantity=1, unit_price=10, subtotal=10,
+            created_at=created_at,
+        ))
+    db_session.commit()
+    repository = OrderRepository(db_session)
+    
+    orders = repository.get_by_user(1, since=datetime(2024, 2, 1), until=datetime(2024, 4, 1))
+    assert [order.id for order in orders] == [3, 2]
+    delivered = repository.get_by_status(OrderStatusEnum.DELIVERED, limit=2)
+    assert [order.id for order in delivered] == [4, 3]
+    items = OrderItemRepository(db_session).get_by_order(orders[0])
+    assert [item.order_id for item in items] == [3]
+
+
+def test_items_copy_the_created_at_of_their_order(db_session: Session):
+    """Test that items added to an order land in its partition, in one INSERT"""
+    order = Order(
+        user_id=1, order_number="ORD-1", total_amount=10, shipping_address="x",
+        created_at=datetime(2024, 3, 10, 12, 30),
+    )
+    db_session.add(order)
+    db_session.commit()
+    db_session.refresh(order)
+    repository = OrderItemRepository(db_session)
+    statements = []
+    event.listen(
+        db_session.get_bind(), "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement.split()[0]),
+    )
+    
+    repository.add_to_order(order, [
+        {"product_id": product_id, "quantity": 1, "unit_price": 5, "subtotal": 5}
+        for product_id in (1, 2)
+    ])
+    db_session.commit()
+    
+    assert statements == ["INSERT"]
+    items = repository.get_by_order(order)
+    assert [item.product_id for item in items] == [1, 2]
+    assert {item.created_at for item in items} == {datetime(2024, 3, 10, 12, 30)}
@@ -0,0 +1,155 @@
+"""Tests for payment webhook ingestion and processing"""
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.application.payments.process_webhook import (
+    ReceivePaymentWebhookUseCase, ProcessPaymentEventsUseCase
+)
+from app.infrastructure.database import models_user, models_product  # noqa: F401 (FK targets)
+from app.infrastructure.database.models_order import (
+    Order, OrderStatusHistory, Payment, PaymentWebhookEvent, OrderStatusEnum, PaymentStatusEnum,
+    WebhookEventStatusEnum
+)
+from app.infrastructure.external.fake_payment_provider import FakePaymentProvider
+from app.infrastructure.database.models_user import User
+from app.infrastructure.external.stripe_webhooks import parse_event
+from app.infrastructure.services.email_service import EmailBatcher
+from app.utils.exceptions import InvalidWebhookSignatureError
+
+SECRET = "whsec_test"
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """Fake provider sharing the configured webhook secret"""
+    monkeypatch.setattr(settings, "STRIPE_WEBHOOK_SECRET", SECRET)
+    return FakePaymentProvider(SECRET, seed=1)
+
+
+class RecordingBatcher(EmailBatcher):
+    """Email batcher that keeps queued emails instead of sending them"""
+    
+    def __init__(self):
+        super().__init__(service=None, interval=0.01)
+        self.queued = []
+    
+    def enqueue(self, email) -> None:
+        self.queued.append(email)
+
+
+def _create_orders(db_session: Session, count: int) -> dict[int, str]:
+    """Create pending orders with pending payments, return order_id -> transaction_id"""
+    transactions = {}
+    for i in range(count):
+        order = Order(user_id=1, order_number=f"ORD-{i}", total_amount=10, shipping_address="x")
+        db_session.add(order)
+        db_session.flush()
+        transactions[order.id] = f"pi_{i}"
+        db_session.add(Payment(
+            order_id=order.id, amount=10, payment_method="stripe", transaction_id=f"pi_{i}"
+        ))
+    db_session.commit()
+    return transactions
+
+
+def test_duplicate_deliveries_are_stored_once(db_session: Session, provider):
+    """Test that retried events are deduplicated on insert"""
+    transactions = _create_orders(db_session, 5)
+    deliveries = provider.storm(transactions, retries=3)
+    
+    use_case = ReceivePaymentWebhookUseCase(db_session)
+    new_events = sum(use_case.execute(payload, header) for payload, header in deliveries)
+    
+    assert new_events == 5
+    assert db_session.query(PaymentWebhookEvent).count() == 5
+
+
+def test_invalid_signature_is_rejected(db_session: Session, provider):
+    """Test that a tampered payload is rejected"""
+    payload = provider.make_event("payment_intent.succeeded", 1, "pi_1")
+    header = provider.sign(payload)
+    
+    with pytest.raises(InvalidWebhookSignatureError):
+        ReceivePaymentWebhookUseCase(db_session).execute(payload + b" ", header)
+
+
+def test_events_are_applied_in_order_per_order(db_session: Session, provider):
+    """Test that a storm of succeeded-then-refunded events ends refunded"""
+    transactions = _create_orders(db_session, 20)
+    deliveries = provider.storm(
+        transactions, lifecycle=("payment_intent.succeeded", "charge.refunded")
+    )
+    receive = ReceivePaymentWebhookUseCase(db_session)
+    for payload, header in deliveries:
+        receive.execute(payload, header)
+    
+    handled = ProcessPaymentEventsUseCase(db_session).execute(batch_size=1000)
+    
+    assert handled == 40
+    assert {p.status for p in db_session.query(Payment)} == {PaymentStatusEnum.REFUNDED}
+    assert {o.status for o in db_session.query(Order)} == {OrderStatusEnum.CANCELLED}
+    # pending -> confirmed -> cancelled for each order
+    assert db_session.query(OrderStatusHistory).count() == 40
+
+
+def test_malformed_order_metadata_is_rejected():
+    """Test that a non-numeric order id is a malformed payload, not a server error"""
+    with pytest.raises(InvalidWebhookSignatureError):
+        parse_event(
+            b'{"id": "evt_1", "type": "payment_intent.succeeded", '
+            b'"data": {"object": {"id": "pi_1", "metadata": {"order_id": "abc"}}}}'
+        )
+
+
+def test_events_before_their_payment_are_retried(db_session: Session, provider):
+    """Test that an event arriving before its payment row waits for it, up to max_attempts"""
+    payload = provider.make_event("payment_intent.succeeded", 1, "pi_0")
+    ReceivePaymentWebhookUseCase(db_session).execute(payload, provider.sign(payload))
+    use_case = ProcessPaymentEventsUseCase(db_session, max_attempts=3, retry_backoff=0)
+    
+    assert use_case.execute() == 1
+    event = db_session.query(PaymentWebhookEvent).one()
+    assert event.status == WebhookEventStatusEnum.RECEIVED and event.attempts == 1
+    
+    _create_orders(db_session, 1)
+    assert use_case.execute() == 1
+    assert event.status == WebhookEventStatusEnum.PROCESSED
+    assert db_session.query(Order).one().status == OrderStatusEnum.CONFIRMED
+    
+    orphan = provider.make_event("payment_intent.succeeded", 2, "pi_missing")
+    ReceivePaymentWebhookUseCase(db_session).execute(orphan, provider.sign(orphan))
+    for _ in range(3):
+        use_case.execute()
+    db_session.expire_all()
+    orphan_event = db_session.query(PaymentWebhookEvent).filter_by(transaction_id="pi_missing")
+    assert orphan_event.one().status == WebhookEventStatusEnum.IGNORED
+    assert use_case.execute() == 0
+
+
+def test_confirmed_orders_get_a_confirmation_email(db_session: Session, provider):
+    """Test that orders still confirmed at the end of a batch are emailed once"""
+    db_session.add(User(
+        id=1, email="buyer@example.com", username="buyer", hashed_password="x", first_name="Ana"
+    ))
+    transactions = _create_orders(db_session, 2)
+    (first, first_tx), (second, second_tx) = transactions.items()
+    receive = ReceivePaymentWebhookUseCase(db_session)
+    for event_type, order_id, transaction_id in (
+        ("payment_intent.succeeded", first, first_tx),
+        ("payment_intent.succeeded", second, second_tx),
+        ("charge.refunded", second, second_tx),
+    ):
+        payload = provider.make_event(event_type, order_id, transaction_id)
+        receive.execute(payload, provider.sign(payload))
+    batcher = RecordingBatcher()
+    try:
+        ProcessPaymentEventsUseCase(db_session, email_batcher=batcher).execute()
+    finally:
+        batcher.close()
+    
+    assert [(email.to, email.subject) for email in batcher.queued] == [
+        ("buyer@example.com", "Order ORD-0 confirmed")
+    ]
+    assert "Hi Ana" in batcher.queued[0].body
@@ -0,0 +1,80 @@
+"""Tests for exact cart pricing"""
+
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.infrastructure.database.models_coupon import Coupon
+from app.infrastructure.repositories.coupon_repository import is_usable
+from app.infrastructure.services.pricing_engine import (
+    CouponTerms, coupon_discount, price_cart
+)
+from app.utils.exceptions import InvalidCouponError
+from app.utils.helpers import calculate_discount, from_cents, to_cents
+
+
+def test_cent_conversions_are_exact():
+    """Test conversions that float arithmetic gets wrong"""
+    assert to_cents(Decimal("0.1")) + to_cents(Decimal("0.2")) == to_cents(Decimal("0.3"))
+    assert to_cents("19.995") == 2000
+    assert to_cents(Decimal("89.99")) == 8999
+    assert from_cents(8999) == Decimal("89.99")
+    assert calculate_discount(Decimal("19.99"), 15) == Decimal("3.00")
+    assert calculate_discount(Decimal("0.10"), Decimal("50")) == Decimal("0.05")
+
+
+def test_quote_lines_add_up_to_totals():
+    """Test that spread discounts and per-line tax always sum to the quote totals"""
+    rng = random.Random(3)
+    for _ in range(200):
+        lines = rng.randint(1, 100)
+        quote = price_cart(
+            list(range(lines)),
+            [rng.randint(1, 9) for _ in range(lines)],
+            [rng.randint(1, 20000) for _ in range(lines)],
+            CouponTerms("SAVE", percent_bp=rng.choice((0, 1000, 1250, 3333)),
+                        amount_cents=rng.choice((0, 1, 499))),
+            tax_bp=rng.choice((0, 1000, 2100)),
+        )
+        assert sum(quote.line_subtotal_cents) == quote.subtotal_cents
+        assert sum(quote.line_discount_cents) == quote.discount_cents
+        assert sum(quote.line_tax_cents) == quote.tax_cents
+        assert sum(quote.line_total_cents) == quote.total_cents
+        assert all(0 <= discount <= subtotal for discount, subtotal in zip(
+            quote.line_discount_cents, quote.line_subtotal_cents
+        ))
+
+
+def test_discount_and_tax_rounding():
+    """Test half-up rounding of the coupon discount, its spread and the tax"""
+    quote = price_cart([1, 2, 3], [3, 1, 2], [333, 1000, 1],
+                       CouponTerms("X", percent_bp=1000, amount_cents=7), tax_bp=2100)
+    assert quote.subtotal_cents == 2001
+    # 10% of 20.01 is 2.001 -> 2.00, plus 0.07 fixed
+    assert quote.discount_cents == 207
+    assert quote.line_discount_cents == [103, 104, 0]
+    assert quote.line_tax_cents == [188, 188, 0]
+    assert quote.total_cents == 2001 - 207 + 376
+    assert coupon_discount(1000, CouponTerms("Y", amount_cents=5000)) == 1000
+
+
+def test_large_amounts_stay_exact():
+    """Test that subtotals too large for the int64 spread fall back to exact integers"""
+    quote = price_cart([1, 2], [1000, 1000], [9_999_999_999, 5], CouponTerms("X", 3333))
+    assert quote.discount_cents == sum(quote.line_discount_cents) == 3_333_000_001_333
+
+
+def test_coupon_minimum_and_usability():
+    """Test the minimum purchase check and coupon validity window"""
+    with pytest.raises(InvalidCouponError):
+        price_cart([1], [1], [999], CouponTerms("MIN", amount_cents=100, min_purchase_cents=1000))
+    now = datetime(2024, 6, 1)
+    coupon = Coupon(code="C", is_active=True, valid_from=now - timedelta(days=1),
+                    valid_until=now + timedelta(days=1), max_uses=2, current_uses=1)
+    assert is_usable(coupon, now)
+    coupon.current_uses = 2
+    assert not is_usable(coupon, now)
+    coupon.current_uses = 0
+    assert not is_usable(coupon, now + timedelta(days=2))
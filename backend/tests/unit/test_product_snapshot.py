@@ -0,0 +1,79 @@
+"""Tests for the shared, memory-mapped product snapshot"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from app.infrastructure.services.product_snapshot import (
+    ProductSnapshot, ProductSnapshotReader, write_product_snapshot
+)
+
+CREATED = datetime(2024, 5, 1, 12, 30, 15, 250)
+
+
+def _rows(count: int, start: int = 1) -> list[tuple]:
+    return [
+        (i, f"Whey {i}", f"SKU-{i}", None if i % 3 else f"Descripción {i}",
+         Decimal("19.99") + i, i % 4, 1 + i % 2, CREATED, CREATED)
+        for i in range(start, start + count)
+    ]
+
+
+def test_round_trip_and_lookups(tmp_path):
+    """Test that rows read back exactly and ids are found by binary search"""
+    path = str(tmp_path / "products.snapshot")
+    result = write_product_snapshot(path, [_rows(5), _rows(5, start=10)], product_version=7)
+    assert result["products"] == 10
+    snapshot = ProductSnapshot(path)
+    assert snapshot.product_version == 7
+    
+    product = snapshot.get(12)
+    assert (product.name, product.sku) == ("Whey 12", "SKU-12")
+    assert product.description == "Descripción 12"
+    assert product.price == Decimal("31.99") and product.stock == 0 and product.category_id == 1
+    assert product.created_at == CREATED and product.status == "active"
+    assert snapshot.get(11).description is None
+    assert snapshot.get(7) is None and snapshot.get(99) is None
+
+
+def test_aware_timestamps_are_stored_as_utc(tmp_path):
+    """Test that timezone-aware timestamps are converted to UTC, not stripped"""
+    path = str(tmp_path / "products.snapshot")
+    local = datetime(2024, 5, 1, 14, 30, 15, 250, tzinfo=timezone(timedelta(hours=2)))
+    row = (1, "Whey 1", "SKU-1", None, Decimal("19.99"), 1, 1, local, CREATED)
+    write_product_snapshot(path, [[row]], product_version=1)
+    
+    assert ProductSnapshot(path).get(1).created_at == CREATED
+
+
+def test_page_filters_match_the_repository(tmp_path):
+    """Test pagination and the category, price and stock filters, ordered by id"""
+    path = str(tmp_path / "products.snapshot")
+    write_product_snapshot(path, [_rows(20)], product_version=1)
+    snapshot = ProductSnapshot(path)
+    assert [p.id for p in snapshot.page(5, 3)] == [6, 7, 8]
+    assert [p.id for p in snapshot.page(category_ids=[1], in_stock=False)] == [4, 8, 12, 16, 20]
+    prices = snapshot.page(min_price=Decimal("25.99"), max_price=Decimal("27.985"))
+    assert [p.id for p in prices] == [6, 7]
+    assert snapshot.page(30, 10) == []
+
+
+def test_reader_swaps_versions_and_detects_staleness(tmp_path):
+    """Test that a republished file is remapped while old readers keep theirs"""
+    path = str(tmp_path / "products.snapshot")
+    latest = {"product": 1}
+    reader = ProductSnapshotReader(path, check_interval=0, latest_version=lambda: latest["product"])
+    assert reader.current() is None
+    
+    write_product_snapshot(path, [_rows(3)], product_version=1)
+    old = reader.current()
+    assert len(old) == 3
+    latest["product"] = 2
+    assert reader.current() is None
+    
+    write_product_snapshot(path, [_rows(4)], product_version=2)
+    assert len(reader.current()) == 4
+    assert reader.info()["remaps"] == 2
+    # The replaced mapping still reads, even with its file gone
+    assert old.get(3).name == "Whey 3"
+    assert not os.path.exists(f"{path}.tmp")
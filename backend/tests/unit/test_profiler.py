@@ -0,0 +1,131 @@
+"""Tests for the per-request sampling profiler"""
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+
+from app.api.v1.middleware.profiling import ProfilingMiddleware
+from app.api.v1.routing import SessionReleasingRoute
+from app.infrastructure.services.profiler import (
+    Profiler, RequestProfile, StackSampler, classify, sign_profile_request,
+    verify_profile_request
+)
+
+SECRET = "test-secret"
+
+
+def busy_handler(duration: float) -> int:
+    """Burn CPU so the sampler catches this frame"""
+    deadline = time.perf_counter() + duration
+    total = 0
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    """Profiler treating the test modules as application code"""
+    return Profiler(str(tmp_path), SECRET, interval=0.001, root=str(Path(__file__).parent))
+
+
+def _request(profiler: Profiler, headers: dict) -> httpx.Response:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+    router = APIRouter(route_class=SessionReleasingRoute)
+    
+    @router.get("/slow")
+    def slow():
+        return {"loops": busy_handler(0.1)}
+    
+    app.include_router(router)
+    
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/slow", headers=headers)
+    
+    return asyncio.run(scenario())
+
+
+def test_signed_header_profiles_request(profiler, tmp_path):
+    """Test that a signed header writes a collapsed-stack file with the hot frame"""
+    header = sign_profile_request(int(time.time()) + 60, SECRET)
+    
+    response = _request(profiler, {"X-Profile": header})
+    
+    profile_id = response.headers["x-profile-id"]
+    [path] = tmp_path.glob(f"*-slow-{profile_id}.collapsed")
+    assert "busy_handler" in path.read_text()
+    report = profiler.hot_stacks(minutes=1, limit=5)
+    assert report["requests"] == 1
+    assert any("busy_handler" in item["stack"] for item in report["stacks"])
+
+
+def test_unprofiled_requests_are_untouched(profiler, tmp_path):
+    """Test that bad signatures and a disabled toggle skip profiling"""
+    expired = sign_profile_request(int(time.time()) - 1, SECRET)
+    forged = sign_profile_request(int(time.time()) + 60, "other-secret")
+    
+    for headers in ({}, {"X-Profile": expired}, {"X-Profile": forged}):
+        assert "x-profile-id" not in _request(profiler, headers).headers
+    assert not list(tmp_path.iterdir())
+
+
+def test_admin_toggle_samples_requests_under_prefix(profiler):
+    """Test that the toggle profiles requests matching the path prefix"""
+    profiler.configure(1.0, path_prefix="/other")
+    assert "x-profile-id" not in _request(profiler, {}).headers
+    
+    profiler.configure(1.0, path_prefix="/slow")
+    assert "x-profile-id" in _request(profiler, {}).headers
+
+
+def test_only_threads_bound_to_a_request_are_sampled():
+    """Test that a busy thread outside the request is not attributed to it"""
+    sampler = StackSampler(root=str(Path(__file__).parent))
+    profile = RequestProfile(id="p", route="/slow", started_at=time.time())
+    ready, done = threading.Event(), threading.Event()
+    
+    def unrelated_work():
+        ready.set()
+        while not done.is_set():
+            busy_handler(0.001)
+    
+    other = threading.Thread(target=unrelated_work)
+    other.start()
+    ready.wait()
+    try:
+        sampler.bind(profile, other.ident)
+        assert sampler.sample() == 1
+        sampler.unbind(profile, other.ident)
+        assert sampler.sample() == 0
+    finally:
+        done.set()
+        other.join()
+    
+    assert sum(profile.samples.values()) == 1
+    assert all("unrelated_work" in stack for stack in profile.samples)
+
+
+def test_signature_checks():
+    """Test header signature validation"""
+    now = time.time()
+    value = sign_profile_request(int(now) + 10, SECRET)
+    
+    assert verify_profile_request(value, SECRET, now)
+    assert not verify_profile_request(value, SECRET, now + 20)
+    assert not verify_profile_request("garbage", SECRET, now)
+
+
+def test_samples_are_attributed_to_innermost_layer():
+    """Test layer classification from the innermost frame outwards"""
+    assert classify(["sqlalchemy.engine.default", "app.infrastructure.repositories.x"]) == "sql"
+    assert classify(["app.infrastructure.repositories.x", "app.application.y"]) == "repository"
+    assert classify(["json.encoder", "app.application.products.create_product"]) == "use_case"
+    assert classify(["asyncio.events"]) == "other"
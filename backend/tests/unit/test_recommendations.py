@@ -0,0 +1,56 @@
+"""Tests for the frequently-bought-together engine"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from app.infrastructure.services.recommendation_engine import (
+    CooccurrenceModel, RecommendationStore, RecommendationIndex
+)
+
+# (order_id, product_id) pairs sorted by order
+ORDERS = [(1, 1), (1, 2), (1, 3), (2, 1), (2, 2), (3, 1), (3, 4), (4, 2), (4, 3)]
+
+
+def _batches(pairs, size):
+    """Split pairs into arrays of at most `size` rows"""
+    for start in range(0, len(pairs), size):
+        chunk = np.asarray(pairs[start:start + size])
+        yield chunk[:, 0], chunk[:, 1]
+
+
+def test_cooccurrence_counts_ignore_batch_boundaries():
+    """Test that orders split across batches are counted once"""
+    whole = CooccurrenceModel()
+    whole.add(_batches(ORDERS, 100))
+    chunked = CooccurrenceModel()
+    chunked.add(_batches(ORDERS, 2))
+    
+    assert (whole.matrix != chunked.matrix).nnz == 0
+    assert whole.matrix[1, 2] == 2
+    assert whole.matrix[1, 1] == 0
+    assert whole.last_order_id == 4
+
+
+def test_incremental_publish_matches_full_rebuild(tmp_path):
+    """Test that folding new orders in gives the same neighbours as a rebuild"""
+    store = RecommendationStore(str(tmp_path / "incremental"))
+    model = CooccurrenceModel()
+    model.add(_batches(ORDERS[:5], 100))
+    store.publish(model, k=2)
+    
+    model = store.load_model()
+    changed = model.add(_batches(ORDERS[5:], 100))
+    store.publish(model, k=2, changed_rows=changed)
+    
+    full = CooccurrenceModel()
+    full.add(_batches(ORDERS, 100))
+    _, expected_neighbors, _ = full.top_k(2)
+    index = RecommendationIndex(str(tmp_path / "incremental"), check_interval=0)
+    
+    assert index.related(1, 2) == [(2, 2), (3, 1)]
+    for product_id in range(5):
+        assert [n for n, _ in index.related(product_id, 2)] == [
+            n for n in expected_neighbors[product_id] if n >= 0
+        ]
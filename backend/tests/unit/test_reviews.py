@@ -0,0 +1,129 @@
+"""Tests for product reviews and their rating aggregates"""
+
+import logging
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.application.reviews.manage_reviews import (
+    CreateReviewUseCase, DeleteReviewUseCase, ListReviewsUseCase
+)
+from app.application.reviews.reconcile_ratings import RatingReconciler, ReconcileRatingsUseCase
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_product import Category, Product
+from app.infrastructure.database.models_review import Review
+from app.infrastructure.database.models_user import User
+from app.infrastructure.repositories.review_repository import ReviewRepository
+from app.schemas.review_schemas import ReviewCreate
+from app.utils.exceptions import DuplicateResourceError, ResourceNotFoundError
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite:///:memory:")
+    
+    @event.listens_for(engine, "connect")
+    def enable_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+    
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Category(id=1, name="Protein"))
+    session.add_all([
+        Product(id=product_id, sku=f"SKU-{product_id}", name="Whey", price=30, category_id=1)
+        for product_id in (1, 2)
+    ])
+    session.add_all([
+        User(id=user_id, email=f"u{user_id}@example.com", username=f"user{user_id}",
+             hashed_password="x")
+        for user_id in range(1, 8)
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def _review(db, user_id: int, rating: int, product_id: int = 1):
+    return CreateReviewUseCase(db).execute(product_id, user_id, ReviewCreate(rating=rating))
+
+
+def test_aggregate_follows_inserts_and_deletes(db):
+    """Test that the product's rating sum and count change with each review write"""
+    repository = ReviewRepository(db)
+    first = _review(db, 1, 5)
+    _review(db, 2, 3)
+    assert repository.get_rating_aggregate(1) == (8, 2)
+    assert DeleteReviewUseCase(db).execute(first.id) == 1
+    assert repository.get_rating_aggregate(1) == (3, 1)
+    assert repository.get_rating_aggregate(2) == (0, 0)
+
+
+def test_rejected_review_leaves_aggregate_untouched(db):
+    """Test that a duplicate review rolls back the aggregate update with it"""
+    _review(db, 1, 4)
+    with pytest.raises(DuplicateResourceError):
+        _review(db, 1, 2)
+    with pytest.raises(ResourceNotFoundError) as error:
+        _review(db, 1, 2, product_id=99)
+    assert error.value.field == "product_id"
+    assert ReviewRepository(db).get_rating_aggregate(1) == (4, 1)
+    assert db.query(Review).count() == 1
+
+
+def test_only_the_author_deletes_without_admin(db):
+    """Test that deleting someone else's review is treated as not found"""
+    review = _review(db, 1, 4)
+    with pytest.raises(ResourceNotFoundError):
+        DeleteReviewUseCase(db).execute(review.id, user_id=2)
+    DeleteReviewUseCase(db).execute(review.id, user_id=1)
+    assert ReviewRepository(db).get_rating_aggregate(1) == (0, 0)
+
+
+def test_keyset_pagination(db):
+    """Test that pages are newest first, disjoint and end with no cursor"""
+    ids = [_review(db, user_id, 5).id for user_id in range(1, 8)]
+    use_case = ListReviewsUseCase(db)
+    seen = []
+    cursor = None
+    while True:
+        page = use_case.execute(1, limit=3, cursor=cursor)
+        seen.extend(review.id for review in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_reconciliation_fixes_drifted_aggregates(db):
+    """Test that reconciliation recomputes only products whose aggregate drifted"""
+    _review(db, 1, 5)
+    _review(db, 2, 1)
+    # Drift: a review inserted behind the aggregate's back, and a corrupted counter
+    db.add(Review(product_id=2, user_id=3, rating=4))
+    db.query(Product).filter(Product.id == 1).update({"rating_count": 7})
+    db.commit()
+    repository = ReviewRepository(db)
+    assert sorted(repository.find_drifted_products()) == [1, 2]
+    assert ReconcileRatingsUseCase(db).execute(batch_size=1) == 2
+    assert repository.get_rating_aggregate(1) == (6, 2)
+    assert repository.get_rating_aggregate(2) == (4, 1)
+    assert list(repository.find_drifted_products()) == []
+
+
+def test_failed_reconciliation_is_logged(caplog):
+    """Test that the worker logs a failing pass and keeps running"""
+    def broken_session():
+        raise RuntimeError("database unavailable")
+    
+    reconciler = RatingReconciler(broken_session, interval=0.01)
+    with caplog.at_level(logging.ERROR, logger="app.reviews"):
+        reconciler.start()
+        deadline = time.monotonic() + 5
+        while len(caplog.records) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        reconciler.stop()
+    
+    assert len(caplog.records) >= 2
+    assert caplog.records[0].getMessage() == "Rating reconciliation failed"
@@ -0,0 +1,54 @@
+"""Tests for upgrading databases created by older versions of the models"""
+
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import Session
+
+from app.infrastructure.database import models_user, models_order  # noqa: F401 (FK targets)
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_product import Category
+from app.infrastructure.database.schema import upgrade_schema
+
+
+def test_missing_column_and_index_are_added_once():
+    """Test that a categories table without parent_id is upgraded and then left alone"""
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        # categories as created before parent_id was added
+        connection.execute(text(
+            "CREATE TABLE categories (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, "
+            "description TEXT, icon VARCHAR(255), "
+            "created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, "
+            "updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL)"
+        ))
+        connection.execute(text("CREATE INDEX ix_categories_id ON categories (id)"))
+        connection.execute(text("CREATE UNIQUE INDEX ix_categories_name ON categories (name)"))
+        connection.execute(text("INSERT INTO categories (name) VALUES ('Protein')"))
+    Base.metadata.create_all(engine)
+    
+    assert upgrade_schema(engine) == [
+        "ALTER TABLE categories ADD COLUMN parent_id INTEGER REFERENCES categories (id)",
+        "CREATE INDEX ix_categories_parent_id ON categories (parent_id)",
+    ]
+    
+    assert upgrade_schema(engine) == []
+    assert "ix_categories_parent_id" in {
+        index["name"] for index in inspect(engine).get_indexes("categories")
+    }
+    with Session(engine) as db:
+        category = db.scalars(select(Category)).one()
+        assert category.name == "Protein" and category.parent_id is None
+
+
+def test_superseded_index_is_dropped():
+    """Test that the single-column user_id index of orders is dropped once"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE INDEX ix_orders_user_id ON orders (user_id)"))
+    
+    assert upgrade_schema(engine) == ["DROP INDEX ix_orders_user_id"]
+    
+    assert upgrade_schema(engine) == []
+    assert "ix_orders_user_created" in {
+        index["name"] for index in inspect(engine).get_indexes("orders")
+    }
@@ -0,0 +1,151 @@
+"""Tests for the search result cache"""
+
+import threading
+import time
+
+from app.infrastructure.services.search_cache import SearchCache, normalize_query
+
+
+def test_normalize_query():
+    """Test that case and whitespace differences map to one key"""
+    assert normalize_query("  Whey   PROTEIN ") == normalize_query("whey protein")
+
+
+def test_hits_after_first_load():
+    """Test that a cached result is served without calling the loader again"""
+    cache = SearchCache()
+    calls = []
+    loader = lambda: calls.append(1) or ["whey"]
+    assert cache.get_or_load(("whey", 0, 20), loader) == ["whey"]
+    assert cache.get_or_load(("whey", 0, 20), loader) == ["whey"]
+    assert cache.get_or_load(("whey", 20, 20), loader) == ["whey"]
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_entries_expire():
+    """Test that entries older than the TTL are reloaded"""
+    cache = SearchCache(ttl=0.01)
+    calls = []
+    cache.get_or_load("whey", lambda: calls.append(1))
+    time.sleep(0.02)
+    cache.get_or_load("whey", lambda: calls.append(1))
+    assert len(calls) == 2
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted at the size limit"""
+    cache = SearchCache(max_entries=2)
+    cache.get_or_load("a", lambda: "a")
+    cache.get_or_load("b", lambda: "b")
+    cache.get_or_load("a", lambda: "a")
+    cache.get_or_load("c", lambda: "c")
+    assert cache.get_or_load("a", lambda: "reloaded") == "a"
+    assert cache.get_or_load("b", lambda: "reloaded") == "reloaded"
+    assert cache.stats()["evictions"] == 2
+
+
+def test_version_bump_invalidates():
+    """Test that a catalog write invalidates cached results"""
+    cache = SearchCache()
+    cache.get_or_load("whey", lambda: "old")
+    cache.bump_version()
+    assert cache.get_or_load("whey", lambda: "new") == "new"
+
+
+def test_result_loaded_across_a_write_is_not_cached():
+    """Test that a result computed while the catalog changed is returned but not kept"""
+    cache = SearchCache()
+    
+    def loader():
+        cache.bump_version()
+        return "stale"
+    
+    assert cache.get_or_load("whey", loader) == "stale"
+    assert cache.get_or_load("whey", lambda: "fresh") == "fresh"
+
+
+def test_concurrent_identical_searches_are_coalesced():
+    """Test that concurrent identical searches run the loader once"""
+    cache = SearchCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    
+    def slow_loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ["creatine"]
+    
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_load("c", slow_loader)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("c", slow_loader)))
+        for _ in range(5)
+    ]
+    for thread in followers:
+        thread.start()
+    while cache.stats()["coalesced"] < 5:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+    
+    assert results == [["creatine"]] * 6
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 5
+
+
+def test_loader_errors_reach_coalesced_callers():
+    """Test that a failed load fails the waiting callers and is not cached"""
+    cache = SearchCache()
+    started = threading.Event()
+    release = threading.Event()
+    
+    def failing_loader():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("database unavailable")
+    
+    errors = []
+    
+    def search():
+        try:
+            cache.get_or_load("c", failing_loader)
+        except RuntimeError as exc:
+            errors.append(exc)
+    
+    threads = [threading.Thread(target=search)]
+    threads[0].start()
+    started.wait(5)
+    threads.append(threading.Thread(target=search))
+    threads[1].start()
+    while cache.stats()["coalesced"] < 1:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    
+    assert len(errors) == 2
+    assert cache.get_or_load("c", lambda: "ok") == "ok"
+
+
+def test_stats_wait_for_a_lookup_in_progress():
+    """Test that stats are read under the lock lookups update them with"""
+    cache = SearchCache()
+    cache.get_or_load("c", lambda: ["creatine"])
+    snapshots = []
+    with cache._lock:
+        # Mid-update: the lookup has counted a hit but not yet returned
+        cache.hits += 1
+        reader = threading.Thread(target=lambda: snapshots.append(cache.stats()))
+        reader.start()
+        reader.join(0.05)
+        assert snapshots == []
+        cache.misses += 1
+    reader.join(5)
+    assert snapshots[0]["hits"] == 1 and snapshots[0]["misses"] == 2
@@ -0,0 +1,72 @@
+"""Tests for cached repository statements and the statement cache counters"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.logging import StatementCacheStats, instrument_engine
+from app.infrastructure.database.database import Base, driver_connect_args
+from app.infrastructure.database.models_coupon import Coupon
+from app.infrastructure.database.models_order import Order, Payment
+from app.infrastructure.database.models_user import User
+from app.infrastructure.repositories.coupon_repository import CouponRepository
+from app.infrastructure.repositories.order_repository import OrderRepository
+
+
+@pytest.fixture
+def counted():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(
+        engine,
+        tables=[User.__table__, Coupon.__table__, Order.__table__, Payment.__table__],
+    )
+    stats = StatementCacheStats()
+    instrument_engine(engine, cache_stats=stats)
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        Coupon(code=f"SAVE{number}", discount_percentage=10,
+               valid_from=datetime(2020, 1, 1), valid_until=datetime(2099, 1, 1))
+        for number in range(3)
+    ])
+    db.commit()
+    stats.counts.update(hits=0, misses=0, uncached=0)
+    yield db, stats, engine
+    db.close()
+
+
+def test_repeated_lookups_compile_once(counted):
+    """Test that lookups with new values reuse the compiled statement"""
+    db, stats, engine = counted
+    repository = CouponRepository(db)
+    codes = [repository.get_by_code(f"SAVE{number}").code for number in range(3)]
+    assert codes == ["SAVE0", "SAVE1", "SAVE2"]
+    assert repository.get_by_code("MISSING") is None
+    assert [coupon.code for coupon in repository.get_by_ids([1, 3])] == ["SAVE0", "SAVE2"]
+    assert len(repository.get_by_ids([1, 2, 3])) == 3
+    assert repository.exists(2) and not repository.exists(99)
+    assert stats.counts == {"hits": 5, "misses": 3, "uncached": 0}
+    assert stats.info(engine)["entries"] >= 3
+
+
+def test_lambda_statements_cache_each_filter_combination(counted):
+    """Test that optional filters compile once per combination, not once per value"""
+    db, stats, _ = counted
+    repository = OrderRepository(db)
+    for day in (1, 2, 3):
+        assert repository.get_by_status("pending", since=datetime(2024, 1, day)) == []
+    assert repository.get_by_status("paid", limit=5) == []
+    assert stats.counts["misses"] == 2
+    assert stats.counts["hits"] == 2
+    assert stats.info()["hit_ratio"] == 0.5
+
+
+def test_prepared_statements_only_for_psycopg():
+    """Test that only the psycopg driver is configured for server-side prepares"""
+    assert driver_connect_args("postgresql+psycopg://u@db/shop", 5) == {"prepare_threshold": 5}
+    assert driver_connect_args("postgresql+psycopg://u@db/shop", -1) == {
+        "prepare_threshold": None
+    }
+    assert driver_connect_args("postgresql://u@db/shop", 5) == {}
+    assert driver_connect_args("sqlite://", 5) == {}
@@ -0,0 +1,165 @@
+"""Tests for refresh token rotation and the token revocation store"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.application.auth.login import (
+    RefreshTokenUseCase, LogoutUseCase, RevokeUserTokensUseCase, issue_tokens
+)
+from app.application.users.create_user import UpdateUserUseCase
+from app.core.security import decode_token
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models_user import User, UserRoleEnum
+from app.infrastructure.repositories.token_repository import TokenFamilyRepository
+from app.schemas.user_schemas import UserUpdate
+from app.infrastructure.services.token_revocation import BloomFilter, TokenRevocationStore
+
+
+@pytest.fixture
+def session_factory():
+    """Session factory on an in-memory database shared across threads"""
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    """Session holding customer 7"""
+    session = session_factory()
+    session.add(User(id=7, email="seven@example.com", username="seven", hashed_password="x",
+                     role=UserRoleEnum.CUSTOMER))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _expiry() -> datetime:
+    return datetime.utcnow() + timedelta(days=1)
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    """Test that every added item matches and the false-positive rate stays near target"""
+    bloom = BloomFilter(10000, error_rate=0.01)
+    for i in range(10000):
+        bloom.add(f"revoked-{i}")
+    
+    assert all(f"revoked-{i}" in bloom for i in range(10000))
+    false_positives = sum(f"valid-{i}" in bloom for i in range(10000))
+    assert false_positives < 200
+
+
+def test_store_confirms_filter_hits_in_database(session_factory):
+    """Test that only filter hits reach the database"""
+    store = TokenRevocationStore(session_factory, capacity=1000)
+    assert store.revoke("jti-1", "jti", _expiry())
+    assert not store.revoke("jti-1", "jti", _expiry())
+    
+    assert store.is_revoked("jti-1")
+    assert not store.is_revoked("jti-2")
+    assert store.stats["db_lookups"] == store.stats["false_positives"]
+
+
+def test_sync_picks_up_revocations_from_other_workers(session_factory):
+    """Test that a worker learns about revocations made by another worker"""
+    worker_a = TokenRevocationStore(session_factory, capacity=1000)
+    worker_b = TokenRevocationStore(session_factory, capacity=1000)
+    worker_b.rebuild()
+    
+    worker_a.revoke("family-1", "family", _expiry())
+    assert not worker_b.is_revoked("family-1")
+    
+    worker_b.sync()
+    assert worker_b.is_revoked("family-1")
+    assert worker_b.stats["db_lookups"] == 1
+
+
+def test_rebuild_drops_expired_revocations(session_factory):
+    """Test that revocations of expired tokens are purged on rebuild"""
+    store = TokenRevocationStore(session_factory, capacity=1000)
+    store.revoke("old", "jti", datetime.utcnow() - timedelta(seconds=1))
+    store.revoke("current", "jti", _expiry())
+    
+    assert store.rebuild() == 1
+    assert not store.is_revoked("old")
+    assert store.is_revoked("current")
+
+
+def test_refresh_rotates_and_reuse_revokes_family(session_factory, db):
+    """Test that refresh tokens are single-use and replaying one ends the session"""
+    store = TokenRevocationStore(session_factory, capacity=1000)
+    use_case = RefreshTokenUseCase(db, store)
+    login = issue_tokens("7", "customer", "family-7")
+    
+    rotated = use_case.execute(login.refresh_token)
+    payload = decode_token(rotated.refresh_token)
+    assert payload["sub"] == "7" and payload["fam"] == "family-7"
+    assert payload["jti"] != decode_token(login.refresh_token)["jti"]
+    
+    with pytest.raises(ValueError, match="reuse"):
+        use_case.execute(login.refresh_token)
+    # The legitimate holder's newer tokens are revoked too
+    with pytest.raises(ValueError, match="revoked"):
+        use_case.execute(rotated.refresh_token)
+    assert store.is_payload_revoked(decode_token(rotated.access_token))
+
+
+def test_refresh_rejects_access_tokens(session_factory, db):
+    """Test that an access token can't be used as a refresh token"""
+    use_case = RefreshTokenUseCase(db, TokenRevocationStore(session_factory, capacity=1000))
+    tokens = issue_tokens("7", "customer", "family-7")
+    
+    with pytest.raises(ValueError, match="Invalid"):
+        use_case.execute(tokens.access_token)
+
+
+def test_logout_revokes_access_tokens(session_factory):
+    """Test that logging out revokes the session's access tokens"""
+    store = TokenRevocationStore(session_factory, capacity=1000)
+    tokens = issue_tokens("7", "customer", "family-7")
+    
+    assert not store.is_payload_revoked(decode_token(tokens.access_token))
+    LogoutUseCase(store).execute(tokens.refresh_token)
+    assert store.is_payload_revoked(decode_token(tokens.access_token))
+
+
+def test_refresh_reloads_the_user(session_factory, db):
+    """Test that refreshed tokens carry the current role and inactive users can't refresh"""
+    store = TokenRevocationStore(session_factory, capacity=1000)
+    use_case = RefreshTokenUseCase(db, store)
+    login = issue_tokens("7", "admin", "family-7")
+    
+    rotated = use_case.execute(login.refresh_token)
+    assert decode_token(rotated.access_token)["role"] == "customer"
+    
+    db.get(User, 7).is_active = False
+    db.commit()
+    with pytest.raises(ValueError, match="inactive"):
+        use_case.execute(rotated.refresh_token)
+    assert store.is_payload_revoked(decode_token(rotated.access_token))
+
+
+def test_deactivation_revokes_every_session(session_factory, db, monkeypatch):
+    """Test that deactivating a user revokes all of its live token families"""
+    store = TokenRevocationStore(session_factory, capacity=1000)
+    monkeypatch.setattr(
+        "app.application.auth.login.get_token_revocation_store", lambda: store
+    )
+    families = TokenFamilyRepository(db)
+    families.record("family-a", 7, _expiry())
+    families.record("family-b", 7, _expiry())
+    families.record("family-old", 7, datetime.utcnow() - timedelta(days=1))
+    sessions = [issue_tokens("7", "customer", family) for family in ("family-a", "family-b")]
+    
+    UpdateUserUseCase(db).execute(7, UserUpdate(is_active=False))
+    for tokens in sessions:
+        assert store.is_payload_revoked(decode_token(tokens.access_token))
+    assert not store.is_revoked("family-old")
+    assert families.get_live_family_ids(7, datetime.utcnow()) == []
+    assert RevokeUserTokensUseCase(db, store).execute(7, "deactivated") == 0